@@ -7,7 +7,12 @@ from flask_login import LoginManager
 from dotenv import load_dotenv
 from configuration import load_config
 from utils_upload import UploadSet, IMAGES, VIDEO, configure_uploads
+from sqlalchemy.exc import SQLAlchemyError
 from extensions import db, database
+from utils.catalog_events import install_session_hooks
+from utils.schema_migrations import warn_if_pending
+from utils.query_stats import init_flask as init_flask_query_stats
+from utils.db_engine import engine_options, configure_engine
 from models import (  # Import all models explicitly
     User, ProductCategory, ServiceCategory, EducationalCategory,
     Product, Service, ProductMedia, ServiceMedia, Inquiry,
@@ -28,27 +33,28 @@ app.config['WTF_CSRF_ENABLED'] = False
 # Load configuration
 config = load_config()
 app.config["SQLALCHEMY_DATABASE_URI"] = config.get("DATABASE_URL") or os.environ.get("SQLALCHEMY_DATABASE_URI") or os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-    "connect_args": {
-        "sslmode": "prefer",
-        "application_name": "RFCBot",
-        "connect_timeout": 10
-    }
-}
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"], role='web')
 
 # Initialize SQLAlchemy with the app and bind to Base from models
 db.init_app(app)
 with app.app_context():
     db.Model = Base  # Bind the Base class from models.py to db
-    database.initialize(app.config["SQLALCHEMY_DATABASE_URI"])  # Initialize custom Database
+    # Pool metrics and per-statement timing; the repositories share the same engine
+    configure_engine(db.engine, role='web')
+    # The panel reports database errors directly instead of serving cached catalog data
+    database.initialize(engine=db.engine, degraded=False)
+    # Catalog edits made through the panel's session go to the outbox as well
+    install_session_hooks(db.session)
+init_flask_query_stats(app)
 
 # Configure file uploads
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4'}
 app.config['UPLOADED_MEDIA_DEST'] = 'static/uploads'
 app.config['UPLOADS_DEFAULT_DEST'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload size
+# واگذاری ارسال فایل‌های /media به وب‌سرور: پیشوند location داخلی nginx یا X-Sendfile
+app.config['MEDIA_ACCEL_REDIRECT_PREFIX'] = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX')
+app.config['USE_X_SENDFILE'] = os.environ.get('MEDIA_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
 
 # Create a custom media upload set that includes images and mp4 videos
 media_files = UploadSet('media', IMAGES + VIDEO)
@@ -69,9 +75,8 @@ login_manager.login_view = 'login'
 def load_user(user_id):
     return User.query.get(int(user_id))
 
-# Create database tables and initialize admin user
-with app.app_context():
-    db.create_all()  # Create all tables for models
+def ensure_admin_user():
+    """ساخت کاربر مدیر پیش‌فرض در صورت نبود"""
     admin = User.query.filter_by(username='admin').first()
     if not admin:
         admin = User(username='admin', email='admin@example.com', is_admin=True)
@@ -82,5 +87,14 @@ with app.app_context():
     else:
         logger.info("Admin user already exists")
 
+# Tables are created by versioned migrations (python migrate.py); check version and admin user
+with app.app_context():
+    warn_if_pending(db.engine)
+    try:
+        ensure_admin_user()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.warning(f"Admin user check skipped, database not migrated yet: {e}")
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -416,7 +416,8 @@ from werkzeug.security import generate_password_hash
 
 def init_db():
     with app.app_context():
-        db.create_all()
+        from utils.schema_migrations import upgrade
+        upgrade(db.engine)
         admin_user = os.environ.get('SETUP_ADMIN_USER')
         admin_pass = os.environ.get('SETUP_ADMIN_PASS')
         if admin_user and admin_pass:
@@ -11,8 +11,9 @@ from dotenv import load_dotenv
 from aiohttp import web, ClientSession
 from logging_config import get_logger
 from extensions import database
-from models import Base
-from sqlalchemy import create_engine
+from utils.schema_migrations import warn_if_pending
+from utils.db_engine import database_url
+from utils.catalog_events import CatalogSubscriber
 import traceback
 from handlers import handlers_utils
 
@@ -47,15 +48,16 @@ dp = Dispatcher(storage=storage)
 # Initialize database
 def init_database():
     try:
-        database_url = os.environ.get("DATABASE_URL") or os.environ.get("SQLALCHEMY_DATABASE_URI")
-        if not database_url:
+        url = database_url()
+        if not url:
             logger.error("DATABASE_URL or SQLALCHEMY_DATABASE_URI not set in environment variables")
             raise ValueError("Database URL not provided")
-        database.initialize(database_url)
-        # Create tables if they don't exist
-        engine = create_engine(database_url)
-        Base.metadata.create_all(engine)
-        logger.info("Database tables created successfully")
+        database.initialize(url, role='bot')
+        # Tables are created by versioned migrations (python migrate.py)
+        warn_if_pending(database.engine)
+        if database.cache is not None:
+            # Evict cached catalog entries when the panel or job worker changes them
+            CatalogSubscriber(database.engine).start()
         logger.info("Database initialized successfully for bot")
     except Exception as e:
         logger.critical(f"Failed to initialize database for bot: {str(e)}")
@@ -83,6 +85,16 @@ async def register_handlers():
     # Include only the main router in the dispatcher
     dp.include_router(main_router)
 
+    # Count database queries per handled update
+    from handlers.middlewares import QueryAccountingMiddleware
+    dp.message.middleware(QueryAccountingMiddleware())
+    dp.callback_query.middleware(QueryAccountingMiddleware())
+
+    # Per-user anti-flood limits, applied before filters and handlers
+    from handlers.middlewares import ThrottlingMiddleware
+    dp.message.outer_middleware(ThrottlingMiddleware('message'))
+    dp.callback_query.outer_middleware(ThrottlingMiddleware('callback'))
+
     # Verify handlers are registered
     handlers_count = (
         len(main_router.message.handlers) +
@@ -199,7 +199,8 @@ load_dotenv()
 logger.debug("SQLALCHEMY_DATABASE_URI: %s", os.getenv('SQLALCHEMY_DATABASE_URI'))
 with app.app_context():
     logger.debug("Creating database tables...")
-    db.create_all()
+    from utils.schema_migrations import upgrade
+    upgrade(db.engine)
     logger.debug("Database tables created successfully.")
 EOF
 fi
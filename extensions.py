@@ -1,5 +1,6 @@
+import json
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker, DeclarativeBase
 from logging_config import get_logger
 from repositories.product_repository import ProductRepository
@@ -8,6 +9,14 @@ from repositories.tutorial_repository import TutorialRepository
 from repositories.user_repository import UserRepository
 from repositories.inquiry_repository import InquiryRepository
 from repositories.static_content_repository import StaticContentRepository
+from utils.inquiry_partitions import INQUIRY_HOT_DAYS
+from utils.db_engine import create_db_engine
+from utils.read_replica import REPLICA_URL, ReplicaRouter, RoutingSession
+from utils.degraded_mode import DegradedMode, served_stale
+from utils.read_cache import READ_CACHE_BACKEND, STATIC_TTL, ReadCache, cached, make_backend
+from utils.catalog_changes import on_catalog_change
+from utils.catalog_events import install_session_hooks
+from utils.single_flight import SingleFlight, coalesced
 
 logger = get_logger('app')
 
@@ -19,104 +28,169 @@ db = SQLAlchemy(model_class=Base)  # Flask-SQLAlchemy instance
 class Database:
     def __init__(self):
         self.engine = None
+        self.replica_engine = None
+        self.router = None
         self.Session = None
+        self.ReadSession = None
         self.product_repo = None
         self.service_repo = None
         self.tutorial_repo = None
         self.user_repo = None
         self.inquiry_repo = None
         self.static_content_repo = None
-
-    def initialize(self, database_url):
+        self.degraded = None
+        self.cache = None
+        self.flight = None
+
+    def initialize(self, database_url=None, engine=None, role='bot', replica_url=REPLICA_URL, degraded=True,
+                   cache_backend=READ_CACHE_BACKEND):
+        """
+        راه‌اندازی session و مخزن‌ها
+
+        Args:
+            database_url: آدرس دیتابیس برای ساخت engine (در پردازه ربات)
+            engine: engine موجود (در پنل وب همان engine فلسک) تا هر پردازه یک pool داشته باشد
+            role: نام engine ساخته شده در آمار pool
+            replica_url: آدرس replica فقط‌خواندنی برای خواندن‌های کاتالوگ (اختیاری)
+            degraded: هنگام قطع دیتابیس کاتالوگ از آخرین نسخه سالم خوانده و درخواست‌ها صف شوند
+            cache_backend: backend کش خواندن کاتالوگ (memory، shared یا off)
+        """
         try:
-            if not database_url:
-                logger.error("Database URL not provided")
-                raise ValueError("Database URL not provided")
-            self.engine = create_engine(database_url, echo=False)
+            if engine is None:
+                if not database_url:
+                    logger.error("Database URL not provided")
+                    raise ValueError("Database URL not provided")
+                engine = create_db_engine(database_url, role=role)
+            self.engine = engine
             self.Session = scoped_session(sessionmaker(bind=self.engine))
-            self.product_repo = ProductRepository(self.Session)
-            self.service_repo = ServiceRepository(self.Session)
-            self.tutorial_repo = TutorialRepository(self.Session)
+            self.router = ReplicaRouter(self.engine)
+            if replica_url:
+                self.replica_engine = create_db_engine(replica_url, role='replica')
+                self.router = ReplicaRouter(self.engine, self.replica_engine)
+                # نوشتن‌های کاتالوگ این پردازه پنجره read-your-writes را برای همه پردازه‌ها باز می‌کنند
+                self.router.track_writes(self.engine)
+                logger.info("Catalog reads are routed to the read replica")
+            self.ReadSession = scoped_session(sessionmaker(bind=self.engine, class_=RoutingSession,
+                                                           router=self.router))
+            self.product_repo = ProductRepository(self.Session, self.ReadSession)
+            self.service_repo = ServiceRepository(self.Session, self.ReadSession)
+            self.tutorial_repo = TutorialRepository(self.Session, self.ReadSession)
             self.user_repo = UserRepository(self.Session)
             self.inquiry_repo = InquiryRepository(self.Session)
-            self.static_content_repo = StaticContentRepository(self.Session)
+            self.static_content_repo = StaticContentRepository(self.Session, self.ReadSession)
+            if degraded:
+                self.degraded = DegradedMode()
+                self.degraded.attach(self.engine)
+                if self.replica_engine is not None:
+                    self.degraded.attach(self.replica_engine)
+                self.degraded.register_writer('inquiry', self._write_inquiry)
+                self.degraded.write_state()
+                # درخواست‌هایی که پیش از راه‌اندازی دوباره در صف مانده‌اند
+                if self.degraded.store.pending_count():
+                    self.degraded.replay_async()
+            backend = make_backend(cache_backend)
+            if backend is not None:
+                # پاسخ‌های نسخه ذخیره شده هنگام قطع دیتابیس در کش نمی‌مانند
+                self.cache = ReadCache(backend, cacheable=lambda: not served_stale())
+                on_catalog_change(self.cache.on_catalog_change)
+            # خواندن‌های هم‌زمان یکسانِ بیرون از کش یک کوئری مشترک دارند
+            self.flight = SingleFlight()
+            # تغییرهای کاتالوگ این پردازه در outbox ثبت و به پردازه‌های دیگر اعلام می‌شوند
+            install_session_hooks(self.Session)
             logger.info("Database and repository Initialized successfully")
         except Exception as e:
             logger.error(f"Error in  initialize Database: {str(e)}", exc_info=True)
             raise
 
     # توابع محصول
+    @cached(tags=lambda product_id: [f'product:{product_id}'])
+    @coalesced
     def get_product(self, product_id: int) -> dict | None:
         """گرفتن محصول با شناسه."""
-        return self.product_repo.get_product(product_id)
+        return self._catalog(self.product_repo.get_product, product_id, default=None)
 
+    @cached(tags=lambda product_id: [f'product:{product_id}', 'product_media:*'])
+    @coalesced
     def get_product_media(self, product_id: int) -> list[dict]:
         """گرفتن رسانه‌های محصول."""
-        return self.product_repo.get_product_media(product_id)
+        return self._catalog(self.product_repo.get_product_media, product_id, default=[])
 
     def update_product_media_file_id(self, media_id: int, new_file_id: str) -> bool:
         """به‌روزرسانی file_id رسانه محصول."""
         return self.product_repo.update_product_media_file_id(media_id, new_file_id)
 
 
+    @cached(tags=lambda parent_id: ['product_category:*', 'product:*'])
     def get_product_categories(self, parent_id: int = None) -> list[dict]:
         """گرفتن دسته‌بندی‌های محصول با تعداد زیرمجموعه‌ها و محصولات."""
-        return self.product_repo.get_product_categories(parent_id)
+        return self._catalog(self.product_repo.get_product_categories, parent_id, default=[])
         
+    @cached(tags=lambda category_id: [f'product_category:{category_id}'])
     def get_product_category(self, category_id: int) -> dict | None:
         """گرفتن دسته‌بندی محصول با شناسه."""
-        return self.product_repo.get_product_category(category_id)
+        return self._catalog(self.product_repo.get_product_category, category_id, default=None)
 
+    @cached(tags=lambda: ['product_category:*'])
     def get_all_product_categories(self) -> list[dict]:
         """گرفتن همه دسته‌بندی‌های محصول."""
-        return self.product_repo.get_all_product_categories()
+        return self._catalog(self.product_repo.get_all_product_categories, default=[])
         
+    @cached(tags=lambda category_id: [f'product_category:{category_id}', 'product:*'])
+    @coalesced
     def get_products(self, category_id: int) -> list[dict]:
         """گرفتن محصولات یعک دسته بندی با شناسه دسته بندی ."""
-        return self.product_repo.get_products(category_id)
+        return self._catalog(self.product_repo.get_products, category_id, default=[])
 
     
     # توابع سرویس
+    @cached(tags=lambda service_id: [f'service:{service_id}'])
     def get_service(self, service_id: int) -> dict | None:
         """گرفتن سرویس با شناسه."""
-        return self.service_repo.get_service(service_id)
+        return self._catalog(self.service_repo.get_service, service_id, default=None)
 
+    @cached(tags=lambda service_id: [f'service:{service_id}', 'service_media:*'])
     def get_service_media(self, service_id: int) -> list[dict]:
         """گرفتن رسانه‌های سرویس."""
-        return self.service_repo.get_service_media(service_id)
+        return self._catalog(self.service_repo.get_service_media, service_id, default=[])
 
     def update_service_media_file_id(self, media_id: int, new_file_id: str) -> bool:
         """به‌روزرسانی file_id رسانه سرویس."""
         return self.service_repo.update_service_media_file_id(media_id, new_file_id)
 
+    @cached(tags=lambda category_id: [f'service_category:{category_id}'])
     def get_service_category(self, category_id: int) -> dict | None:
         """گرفتن دسته‌بندی سرویس با شناسه."""
-        return self.service_repo.get_service_category(category_id)
+        return self._catalog(self.service_repo.get_service_category, category_id, default=None)
 
+    @cached(tags=lambda: ['service_category:*'])
     def get_all_service_categories(self) -> list[dict]:
         """گرفتن همه دسته‌بندی‌های سرویس."""
-        return self.service_repo.get_all_service_categories()
+        return self._catalog(self.service_repo.get_all_service_categories, default=[])
 
     # توابع محتوای آموزشی
+    @cached(tags=lambda content_id: [f'educational_content:{content_id}'])
     def get_educational_content(self, content_id: int) -> dict | None:
         """گرفتن محتوای آموزشی با شناسه."""
-        return self.tutorial_repo.get_educational_content(content_id)
+        return self._catalog(self.tutorial_repo.get_educational_content, content_id, default=None)
 
+    @cached(tags=lambda content_id: [f'educational_content:{content_id}', 'educational_content_media:*'])
     def get_educational_content_media(self, content_id: int) -> list[dict]:
         """گرفتن رسانه‌های محتوای آموزشی."""
-        return self.tutorial_repo.get_educational_content_media(content_id)
+        return self._catalog(self.tutorial_repo.get_educational_content_media, content_id, default=[])
 
     def update_educational_content_media_file_id(self, media_id: int, new_file_id: str) -> bool:
         """به‌روزرسانی file_id رسانه محتوای آموزشی."""
         return self.tutorial_repo.update_educational_content_media_file_id(media_id, new_file_id)
 
+    @cached(tags=lambda category_id: [f'educational_category:{category_id}'])
     def get_educational_category(self, category_id: int) -> dict | None:
         """گرفتن دسته‌بندی محتوای آموزشی با شناسه."""
-        return self.tutorial_repo.get_educational_category(category_id)
+        return self._catalog(self.tutorial_repo.get_educational_category, category_id, default=None)
 
+    @cached(tags=lambda: ['educational_category:*'])
     def get_all_educational_categories(self) -> list[dict]:
         """گرفتن همه دسته‌بندی‌های محتوای آموزشی."""
-        return self.tutorial_repo.get_all_educational_categories()
+        return self._catalog(self.tutorial_repo.get_all_educational_categories, default=[])
 
     # توابع کاربر
     def get_user(self, telegram_id: int) -> dict | None:
@@ -133,19 +207,43 @@ class Database:
 
     # توابع درخواست
     def create_inquiry(self, user_id: int, name: str, phone: str, description: str, product_id: int = None, service_id: int = None) -> bool:
-        """ایجاد درخواست جدید."""
-        return self.inquiry_repo.create_inquiry(user_id, name, phone, description, product_id, service_id)
-
-    def get_inquiries(self, user_id: int = None, status: str = None) -> list[dict]:
-        """گرفتن درخواست‌ها با فیلتر اختیاری."""
-        return self.inquiry_repo.get_inquiries(user_id, status)
+        """ایجاد درخواست جدید (هنگام قطع دیتابیس صف و پس از وصل شدن ثبت می‌شود)."""
+        payload = {'user_id': user_id, 'name': name, 'phone': phone, 'description': description,
+                   'product_id': product_id, 'service_id': service_id}
+        if self.degraded is None:
+            return self._write_inquiry(payload)
+        return self.degraded.write('inquiry', payload)
+
+    def _write_inquiry(self, payload: dict) -> bool:
+        queued_at = payload.get('queued_at')
+        return self.inquiry_repo.create_inquiry(
+            payload['user_id'], payload['name'], payload['phone'], payload['description'],
+            payload['product_id'], payload['service_id'],
+            created_at=datetime.utcfromtimestamp(queued_at) if queued_at else None)
+
+    def get_inquiries(self, user_id: int = None, status: str = None,
+                      days: int | None = INQUIRY_HOT_DAYS) -> list[dict]:
+        """گرفتن درخواست‌ها با فیلتر اختیاری (پیش‌فرض فقط روزهای اخیر؛ days=None برای کل تاریخچه)."""
+        return self.inquiry_repo.get_inquiries(user_id, status, days)
 
     # توابع محتوای ثابت
+    @cached(ttl=STATIC_TTL, tags=lambda content_type: ['static_content:*'])
     def get_static_content(self, content_type: str) -> dict | None:
         """گرفتن محتوای ثابت با نوع."""
-        return self.static_content_repo.get_static_content(content_type)
+        return self._catalog(self.static_content_repo.get_static_content, content_type, default=None)
 
-    
+    # حالت کاهش‌یافته
+    def _catalog(self, method, *args, default=None):
+        """خواندن کاتالوگ با متد مخزن، با برگشت به آخرین پاسخ سالم هنگام قطع دیتابیس"""
+        if self.degraded is None:
+            return method(*args)
+        return self.degraded.read(f'{method.__name__}:{json.dumps(args)}', lambda: method(*args), default)
+
+    def health(self) -> dict:
+        """وضعیت breaker دیتابیس، صف درخواست‌ها و پاسخ‌های ذخیره شده"""
+        if self.degraded is None:
+            return {'state': 'disabled'}
+        return self.degraded.state()
 
 
-database = Database()
\ No newline at end of file
+database = Database()
@@ -9,9 +9,10 @@
 import os
 import shutil
 import logging
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from utils.db_engine import create_db_engine
 
 # تنظیم لاگر
 logging.basicConfig(level=logging.INFO, 
@@ -27,7 +28,7 @@ if not db_url:
     logger.error("DATABASE_URL محیطی تنظیم نشده است")
     exit(1)
 
-engine = create_engine(db_url)
+engine = create_db_engine(db_url, role='script')
 Session = sessionmaker(bind=engine)
 session = Session()
 
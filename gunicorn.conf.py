@@ -1,6 +1,8 @@
 bind = "0.0.0.0:5000"
 workers = 1
-worker_class = "sync"
+# gthread تا اتصال‌های SSE (/admin/inquiries/stream) کل worker را نگه ندارند
+worker_class = "gthread"
+threads = 16
 timeout = 120
 keepalive = 2
 max_requests = 1000
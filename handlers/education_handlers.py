@@ -12,7 +12,6 @@ from aiogram.filters import Command
 from utils.utils import create_telegraph_page
 import os
 import traceback
-from models import EducationalContentMedia
 
 logger = get_logger('bot')
 router = Router(name="educational_router")
@@ -216,23 +215,12 @@ async def process_media_file(media, idx, bot, caption_text):
                 logger.error(f"Invalid file_id returned from upload: {telegram_file_id}")
                 return None
 
-            session = db.Session()
-            try:
-                media_record = session.query(EducationalContentMedia).filter_by(id=media_id).first()
-                if media_record:
-                    media_record.file_id = telegram_file_id
-                    session.commit()
-                    logger.info(f"Updated file_id for media {media_id} to {telegram_file_id}")
-                    file_id = telegram_file_id
-                else:
-                    logger.error(f"Media record {media_id} not found")
-                    return None
-            except Exception as e:
-                logger.error(f"Failed to update database for media {media_id}: {str(e)}")
-                session.rollback()
+            # file_id روی همه رسانه‌هایی که همین فایل را دارند هم ثبت می‌شود
+            if not db.update_educational_content_media_file_id(media_id, telegram_file_id):
+                logger.error(f"Failed to update database for media {media_id}")
                 return None
-            finally:
-                session.close()
+            logger.info(f"Updated file_id for media {media_id} to {telegram_file_id}")
+            file_id = telegram_file_id
         except Exception as e:
             logger.error(f"Error uploading local file {full_path}: {str(e)}")
             return None
@@ -257,23 +245,12 @@ async def process_media_file(media, idx, bot, caption_text):
                     logger.error(f"Invalid file_id from upload: {telegram_file_id}")
                     return None
 
-                session = db.Session()
-                try:
-                    media_record = session.query(EducationalContentMedia).filter_by(id=media_id).first()
-                    if media_record:
-                        media_record.file_id = telegram_file_id
-                        session.commit()
-                        logger.info(f"Updated file_id for media {media_id} to {telegram_file_id}")
-                        file_id = telegram_file_id
-                    else:
-                        logger.error(f"Media record {media_id} not found")
-                        return None
-                except Exception as e:
-                    logger.error(f"Failed to update database for media {media_id}: {str(e)}")
-                    session.rollback()
+                # file_id روی همه رسانه‌هایی که همین فایل را دارند هم ثبت می‌شود
+                if not db.update_educational_content_media_file_id(media_id, telegram_file_id):
+                    logger.error(f"Failed to update database for media {media_id}")
                     return None
-                finally:
-                    session.close()
+                logger.info(f"Updated file_id for media {media_id} to {telegram_file_id}")
+                file_id = telegram_file_id
             except Exception as e:
                 logger.error(f"Error re-uploading file {full_path}: {str(e)}")
                 return None
@@ -123,7 +123,7 @@ async def callback_confirm_inquiry(callback: CallbackQuery, state: FSMContext):
         product_id = inquiry_data.get('product_id')
         service_id = inquiry_data.get('service_id')
 
-        db.add_inquiry(user_id, name, phone, description, product_id, service_id)
+        db.create_inquiry(user_id, name, phone, description, product_id, service_id)
         await callback.message.answer(
             "✅ درخواست شما با موفقیت ثبت شد.\nکارشناسان ما در اسرع وقت با شما تماس خواهند گرفت."
         )
@@ -0,0 +1,71 @@
+"""
+middleware های ربات
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, TelegramObject
+from configuration import ADMIN_ID
+from logging_config import get_logger
+from utils.query_stats import query_unit
+from utils.throttling import (ALLOWED, CALLBACK_BURST, CALLBACK_RATE, DUPLICATE, DUPLICATE_WINDOW, MESSAGE_BURST,
+                              MESSAGE_RATE, Throttle)
+
+logger = get_logger('bot')
+
+THROTTLED_TEXT = "⏳ لطفاً کمی آهسته‌تر."
+
+
+class QueryAccountingMiddleware(BaseMiddleware):
+    """
+    شمارش کوئری‌های دیتابیس هر به‌روزرسانی با نام handler به عنوان مبدأ
+
+    به صورت middleware داخلی (پس از انتخاب handler) ثبت می‌شود تا data['handler'] در دسترس باشد.
+    """
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        handler_object = data.get('handler')
+        callback = getattr(handler_object, 'callback', None)
+        name = getattr(callback, '__name__', type(event).__name__)
+        with query_unit(f'bot:{name}'):
+            return await handler(event, data)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    محدودیت نرخ پیام‌ها یا callback های هر کاربر (utils/throttling.py)
+
+    به صورت middleware بیرونی ثبت می‌شود تا به‌روزرسانی رد شده پیش از فیلترها و handler کنار
+    گذاشته شود. callback رد شده فقط با answer پاسخ می‌گیرد تا دکمه از حالت انتظار خارج شود
+    (ضربه تکراری بی‌صدا، بیش از حد مجاز با یک پیام کوتاه) و پیام رد شده پاسخی نمی‌گیرد.
+    """
+
+    def __init__(self, kind: str):
+        """
+        Args:
+            kind: message یا callback
+        """
+        if kind == 'callback':
+            self.throttle = Throttle(kind, CALLBACK_RATE, CALLBACK_BURST, DUPLICATE_WINDOW)
+        else:
+            self.throttle = Throttle(kind, MESSAGE_RATE, MESSAGE_BURST)
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        user = getattr(event, 'from_user', None)
+        if user is None or str(user.id) == str(ADMIN_ID):
+            return await handler(event, data)
+        fingerprint = None
+        if isinstance(event, CallbackQuery):
+            fingerprint = (event.message.message_id if event.message else event.inline_message_id, event.data)
+        decision = self.throttle.check(user.id, fingerprint)
+        if decision == ALLOWED:
+            return await handler(event, data)
+        logger.debug(f"Dropped {self.throttle.kind} from user {user.id}: {decision}")
+        if isinstance(event, CallbackQuery):
+            try:
+                await event.answer(None if decision == DUPLICATE else THROTTLED_TEXT)
+            except Exception as e:
+                logger.debug(f"Could not answer dropped callback: {e}")
+        return None
@@ -1,3 +1,4 @@
+import asyncio
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -84,7 +85,8 @@ async def callback_product_category(callback: CallbackQuery):
             await callback.message.answer("⚠️ دسته‌بندی مورد نظر یافت نشد.")
             return
 
-        products = db.get_products(category_id=category_id)
+        # در رشته جدا تا ضربه‌های هم‌زمان روی یک دسته در یک کوئری ادغام شوند
+        products = await asyncio.to_thread(db.get_products, category_id)
         if not products:
             logger.warning(f"No products found for category ID: {category_id}")
             await callback.message.answer(f"⚠️ محصولی برای دسته‌بندی '{category_info['name']}' موجود نیست.")
@@ -131,7 +133,7 @@ async def callback_product(callback: CallbackQuery):
         _, params = result
         product_id = params['product_id']
         logger.info(f"Selected product ID: {product_id} by user: {callback.from_user.id}")
-        product = db.get_product(product_id)
+        product = await asyncio.to_thread(db.get_product, product_id)
         if not product:
             logger.error(f"Product not found for ID: {product_id}")
             await callback.message.answer("⚠️ محصول مورد نظر یافت نشد.")
@@ -164,7 +166,7 @@ async def callback_product(callback: CallbackQuery):
         keyboard = product_detail_keyboard(product_id, product.get('category_id'))
         chat_id = callback.message.chat.id
 
-        media = db.get_product_media(product_id)
+        media = await asyncio.to_thread(db.get_product_media, product_id)
         # لاگ خروجی خام
         logger.debug(f"Raw media from db.get_product_media for product {product_id}: {media}")
 
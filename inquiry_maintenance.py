@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+نگهداری دوره‌ای جدول استعلام‌ها
+پارتیشن‌های ماه‌های آینده را می‌سازد، استعلام‌های بسته شده قدیمی‌تر از مدت نگهداری
+را در data/inquiry_archive بایگانی می‌کند و پارتیشن‌های قدیمی خالی را برمی‌دارد.
+روزانه از cron یا systemd timer اجرا شود.
+
+استفاده:
+    python inquiry_maintenance.py --retention-days 365
+"""
+
+import os
+import sys
+import argparse
+
+# اضافه کردن مسیر فعلی به path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from logging_config import get_logger
+from utils.inquiry_partitions import maintain_inquiries, INQUIRY_RETENTION_DAYS
+
+logger = get_logger('app')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inquiry partition maintenance and archival')
+    parser.add_argument('--retention-days', type=int, default=INQUIRY_RETENTION_DAYS,
+                        help='مدت نگهداری استعلام‌های بسته شده (روز)')
+    args = parser.parse_args()
+
+    from app import app
+    from extensions import db
+
+    with app.app_context():
+        result = maintain_inquiries(db.engine, retention_days=args.retention_days)
+    logger.info(f"Inquiry maintenance finished: {result}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+پردازه اجرای کارهای پس‌زمینه پنل مدیریت
+کارهای ثبت شده در جدول jobs (ورود داده، بازیابی، پشتیبان‌گیری، حذف فایل‌ها و ...) را اجرا می‌کند.
+
+استفاده:
+    python job_worker.py --workers 2
+"""
+
+import os
+import sys
+import argparse
+import multiprocessing
+
+# اضافه کردن مسیر فعلی به path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from logging_config import get_logger
+
+logger = get_logger('app')
+
+
+def worker_main(once: bool = False):
+    """اجرای حلقه worker در پردازه فعلی"""
+    from app import app
+    from extensions import db
+    from utils.job_runner import run_worker
+    import utils.admin_jobs  # noqa: F401  ثبت اجراکننده‌ها
+
+    with app.app_context():
+        run_worker(db.engine, once=once)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RFCBot background job worker')
+    parser.add_argument('--workers', type=int, default=1, help='تعداد پردازه‌های موازی')
+    parser.add_argument('--once', action='store_true', help='اجرای کارهای موجود و خروج')
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        worker_main(args.once)
+        return
+
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=worker_main, args=(args.once,), daemon=False)
+                 for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {len(processes)} job worker processes")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == '__main__':
+    main()
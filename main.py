@@ -5,6 +5,7 @@
 
 import os
 import io
+import json
 from logging_config import get_logger
 
 import datetime
@@ -13,19 +14,49 @@ import zipfile
 import tempfile
 from sqlalchemy.orm import joinedload
 from flask import (render_template, request, redirect, url_for, flash, session,
-                   Response, send_file, jsonify, send_from_directory)
+                   Response, send_file, jsonify, send_from_directory, abort, stream_with_context)
 
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import NotFound
 from sqlalchemy import inspect, text
 import shutil
 from app import app
 from extensions import db
-from utils_upload import media_files, handle_media_upload, remove_file, serve_file
+from utils_upload import (media_files, handle_media_upload, remove_file, serve_file,
+                          allowed_media_filename)
+from utils.backup_utils import iter_backup_zip, BACKUP_DIR
+from utils.import_utils import (IMPORT_SPECS, CsvImportError,
+                                 REPORT_DIR as IMPORT_REPORT_DIR)
+from utils.restore_utils import REPORT_DIR as RESTORE_REPORT_DIR
+from utils.media_store import ingest_file, release_blobs
+from utils.media_gc import GC_MODES
+from utils.bulk_edit import bulk_update, parse_ids, BulkEditError
+from utils.inquiry_inbox import (INQUIRY_STATUSES, parse_filters, filter_args, inquiry_page,
+                                 status_counts, related_choices)
+from utils.inquiry_feed import InquiryFeed
+from utils.db_engine import direct_engine
+from utils.sql_console import (SqlConsoleError, check_query, clamp_timeout, run_query, stream_query,
+                                explain_query, record_history, DEFAULT_TIMEOUT_MS, MAX_TIMEOUT_MS,
+                                DISPLAY_ROW_LIMIT, EXPORT_ROW_LIMIT, HISTORY_SIZE as SQL_HISTORY_SIZE)
+from utils.query_stats import (SLOW_QUERY_MS, SORT_KEYS as QUERY_SORT_KEYS, top_queries,
+                               reset_query_stats)
+from utils.inquiry_analytics import (REPORTS, last_refresh, daily_volume, weekly_volume,
+                                     item_volume, category_volume, status_conversion,
+                                     repeat_customers, report_rows)
+from utils.media_serving import media_response
+from utils.chunked_upload import (create_upload, get_upload, write_chunk, finish_upload,
+                                  discard_upload, remove_stale_uploads, UploadError,
+                                  UploadOffsetMismatch, CHUNK_SIZE as UPLOAD_CHUNK_SIZE)
+from utils.job_runner import (enqueue_job, request_cancel, save_job_file,
+                              JOB_STATUSES)
+import utils.admin_jobs  # noqa: F401 ثبت اجراکننده‌های کارهای پس‌زمینه
+from utils.integrity import foreign_key_checks, cycle_checks
+from utils.degraded_mode import load_states as load_breaker_states
 from models import (User, Product, ProductMedia, Service, ServiceMedia,
                     Inquiry, EducationalContent, StaticContent,
                     EducationalCategory, EducationalContentMedia,
-                    ProductCategory, ServiceCategory)
+                    ProductCategory, ServiceCategory, Job, MediaStorageUsage, SqlQueryHistory, Base)
 from flask_wtf.csrf import CSRFProtect
 
 from itertools import islice
@@ -38,32 +69,65 @@ csrf = CSRFProtect(app)
 # ----- Utility Functions for Media Management -----
 
 
-def delete_media_file(file_path):
+def delete_media_rows(model, *criteria):
     """
-    حذف فیزیکی فایل رسانه‌ای از سیستم فایل
+    حذف مجموعه‌ای ردیف‌های رسانه (فقط دیتابیس)
+
+    blobهایی که دیگر ارجاعی ندارند در همان تراکنش حذف می‌شوند؛ فایل‌ها را
+    کار پس‌زمینه پاکسازی رسانه‌ها (media_gc) جمع می‌کند.
 
     Args:
-        file_path: مسیر فایل برای حذف
+        model: ProductMedia، ServiceMedia یا EducationalContentMedia
+        criteria: شرط‌های انتخاب ردیف‌ها
 
     Returns:
-        bool: موفقیت یا عدم موفقیت عملیات
+        int: تعداد ردیف‌های حذف شده
+    """
+    blob_ids = [row[0] for row in db.session.query(model.blob_id).filter(
+        *criteria, model.blob_id.isnot(None)).distinct()]
+    deleted = db.session.query(model).filter(*criteria).delete(synchronize_session=False)
+    release_blobs(db.session, blob_ids)
+    return deleted
+
+
+def media_row_fields(file_path, file_type):
+    """
+    انتقال فایل آپلود شده به مخزن رسانه و مقادیر ستون‌های ردیف رسانه
+
+    Args:
+        file_path: مسیر فایل ذخیره شده توسط handle_media_upload
+        file_type: نوع رسانه
+
+    Returns:
+        dict: blob_id، file_id، file_type و local_path
+    """
+    blob = ingest_file(db.session, file_path, file_type)
+    return {
+        'blob_id': blob.id,
+        'file_id': blob.telegram_file_id or blob.path.replace('static/', '', 1),
+        'file_type': file_type,
+        'local_path': blob.path,
+    }
+
+
+def queue_media_processing(table, media_items):
+    """
+    ثبت کار پس‌زمینه پردازش تصاویر آپلود شده (نسخه‌ها، حذف EXIF، کوچک‌سازی)
+
+    Args:
+        table: نام جدول رسانه
+        media_items: ردیف‌های رسانه ذخیره شده
     """
+    ids = [m.id for m in media_items if m.file_type == 'photo']
+    if not ids:
+        return
     try:
-        # بررسی اینکه آیا فایل وجود دارد
-        if file_path and os.path.exists(file_path):
-            # حذف فایل
-            if os.path.isdir(file_path):
-                shutil.rmtree(file_path)
-            else:
-                os.remove(file_path)
-            logger.info(f"File deleted successfully: {file_path}")
-            return True
-        else:
-            logger.warning(f"File not found for deletion: {file_path}")
-            return False
+        enqueue_job(db.session, 'process_media', {'table': table, 'ids': ids},
+                    created_by=current_user.id)
     except Exception as e:
-        logger.error(f"Error deleting file {file_path}: {str(e)}")
-        return False
+        db.session.rollback()
+        logger.error(f"Error queueing media processing for {table}: {str(e)}")
+
 
 def read_last_lines(file_path, max_lines):
     try:
@@ -73,6 +137,26 @@ def read_last_lines(file_path, max_lines):
         bot_logger.error(f"Error reading log file: {str(e)}", exc_info=True)
         return []
 
+
+def apply_bulk_edit(table):
+    """
+    اجرای عملیات گروهی انتخاب شده در لیست محصولات یا خدمات
+
+    Args:
+        table: products یا services
+    """
+    try:
+        ids = parse_ids(request.form.getlist('ids'))
+        updated = bulk_update(db.session, table, ids, request.form.get('bulk_action'),
+                              request.form)
+        flash(f'{updated} مورد به‌روزرسانی شد.', 'success')
+    except BulkEditError as e:
+        flash(f'ویرایش گروهی انجام نشد: {str(e)}', 'warning')
+    except Exception as e:
+        logger.error(f"خطا در ویرایش گروهی {table}: {str(e)}")
+        flash(f'خطا در ویرایش گروهی: {str(e)}', 'danger')
+
+
 # ----- Main Routes -----
 
 
@@ -340,22 +424,19 @@ def delete_media():
         content_id = int(content_id)
         media_id = int(media_id)
 
-        # تعریف مپینگ برای مدل‌ها و مسیرهای ذخیره‌سازی
+        # تعریف مپینگ برای مدل‌ها
         media_config = {
             'product': {
                 'model': ProductMedia,
-                'id_field': 'product_id',
-                'upload_dir': os.path.join('static', 'uploads', 'products')
+                'id_field': 'product_id'
             },
             'service': {
                 'model': ServiceMedia,
-                'id_field': 'service_id',
-                'upload_dir': os.path.join('static', 'uploads', 'services')
+                'id_field': 'service_id'
             },
             'educational': {
                 'model': EducationalContentMedia,
-                'id_field': 'educational_id',
-                'upload_dir': os.path.join('static', 'uploads', 'educationals')
+                'id_field': 'content_id'
             }
         }
 
@@ -373,7 +454,6 @@ def delete_media():
         config = media_config[content_type]
         MediaModel = config['model']
         id_field = config['id_field']
-        upload_dir = config['upload_dir']
 
         # یافتن رسانه
         media = MediaModel.query.get(media_id)
@@ -386,24 +466,12 @@ def delete_media():
                 'error': f'رسانه {content_type} یافت نشد'
             }), 404
 
-        # تعیین مسیر فایل لوکال
-        file_path = media.local_path if hasattr(
-            media, 'local_path') and media.local_path else None
-        if not file_path and media.file_id:
-            # اگر local_path وجود ندارد، مسیر را از file_id بسازیم
-            file_name = media.file_id.split('_')[
-                -1]  # فرض: file_id شامل نام فایل است
-            file_path = os.path.join(upload_dir, file_name)
-
-        # حذف فایل لوکال (در صورت وجود)
-        delete_result = delete_media_file(file_path) if file_path else False
-
-        # حذف رسانه از دیتابیس
-        db.session.delete(media)
+        # فقط ردیف حذف می‌شود؛ فایل‌های بدون ارجاع را media_gc پاک می‌کند
+        delete_media_rows(MediaModel, MediaModel.id == media.id)
         db.session.commit()
 
         logger.info(
-            f"{content_type.capitalize()} media deleted: id={media_id}, {id_field}={content_id}, file_path={file_path}"
+            f"{content_type.capitalize()} media deleted: id={media_id}, {id_field}={content_id}"
         )
         return jsonify({'success': True})
 
@@ -503,19 +571,18 @@ def admin_products():
 
     # Handle POST requests
     if request.method == 'POST':
-        if action == 'delete':
+        if action == 'bulk':
+            apply_bulk_edit('products')
+            return redirect(request.referrer or url_for('admin_products'))
+
+        elif action == 'delete':
             product_id = request.form.get('product_id')
             if not product_id:
                 flash('شناسه محصول الزامی است.', 'danger')
                 return redirect(url_for('admin_products'))
             try:
                 product = Product.query.get_or_404(int(product_id))
-                media_files = ProductMedia.query.filter_by(
-                    product_id=product.id).all()
-                for media in media_files:
-                    if media.local_path:
-                        delete_media_file(media.local_path)
-                    db.session.delete(media)
+                delete_media_rows(ProductMedia, ProductMedia.product_id == product.id)
                 db.session.delete(product)
                 db.session.commit()
                 flash(f'محصول "{product.name}" با موفقیت حذف شد.', 'success')
@@ -541,6 +608,7 @@ def admin_products():
             try:
                 upload_dir = os.path.join('static', 'uploads', 'products',
                                           str(product.id))
+                uploaded = []
                 for file in files:
                     if file.filename:
                         success, file_path = handle_media_upload(
@@ -548,16 +616,16 @@ def admin_products():
                             directory=upload_dir,
                             file_type=file_type)
                         if success and file_path:
-                            relative_path = file_path.replace('static/', '', 1)
-                            media = ProductMedia(product_id=product.id,
-                                                 file_id=relative_path,
-                                                 file_type=file_type,
-                                                 local_path=file_path)
+                            media = ProductMedia(
+                                product_id=product.id,
+                                **media_row_fields(file_path, file_type))
                             db.session.add(media)
+                            uploaded.append(media)
                         else:
                             flash(f'آپلود فایل {file.filename} ناموفق بود.',
                                   'danger')
                 db.session.commit()
+                queue_media_processing('product_media', uploaded)
                 flash('رسانه‌ها با موفقیت آپلود شدند.', 'success')
                 logger.info(f"رسانه‌ها آپلود شدند برای محصول {product_id}")
             except Exception as e:
@@ -663,9 +731,7 @@ def admin_products():
             try:
                 media = ProductMedia.query.get(int(media_id))
                 if media and media.product_id == int(product_id):
-                    if media.local_path:
-                        delete_media_file(media.local_path)
-                    db.session.delete(media)
+                    delete_media_rows(ProductMedia, ProductMedia.id == media.id)
                     db.session.commit()
                     flash('رسانه با موفقیت حذف شد.', 'success')
                 else:
@@ -1177,18 +1243,18 @@ def admin_services():
 
     # Handle POST requests
     if request.method == 'POST':
-        if action == 'delete':
+        if action == 'bulk':
+            apply_bulk_edit('services')
+            return redirect(request.referrer or url_for('admin_services'))
+
+        elif action == 'delete':
             service_id = request.form.get('service_id')
             if not service_id:
                 flash('شناسه خدمت الزامی است.', 'danger')
                 return redirect(url_for('admin_services'))
             try:
                 service = Service.query.get_or_404(int(service_id))
-                media_files = ServiceMedia.query.filter_by(service_id=service.id).all()
-                for media in media_files:
-                    if media.local_path:
-                        delete_media_file(media.local_path)
-                    db.session.delete(media)
+                delete_media_rows(ServiceMedia, ServiceMedia.service_id == service.id)
                 db.session.delete(service)
                 db.session.commit()
                 flash(f'خدمت "{service.name}" با موفقیت حذف شد.', 'success')
@@ -1212,6 +1278,7 @@ def admin_services():
                 return redirect(url_for('admin_services', action='media', id=service_id))
             try:
                 upload_dir = os.path.join('static', 'uploads', 'services', str(service.id))
+                uploaded = []
                 for file in files:
                     if file.filename:
                         success, file_path = handle_media_upload(
@@ -1219,16 +1286,15 @@ def admin_services():
                             directory=upload_dir,
                             file_type=file_type)
                         if success and file_path:
-                            relative_path = file_path.replace('static/', '', 1)
                             media = ServiceMedia(
                                 service_id=service.id,
-                                file_id=relative_path,
-                                file_type=file_type,
-                                local_path=file_path)
+                                **media_row_fields(file_path, file_type))
                             db.session.add(media)
+                            uploaded.append(media)
                         else:
                             flash(f'آپلود فایل {file.filename} ناموفق بود.', 'danger')
                 db.session.commit()
+                queue_media_processing('service_media', uploaded)
                 flash('رسانه‌ها با موفقیت آپلود شدند.', 'success')
                 logger.info(f"رسانه‌ها آپلود شدند برای خدمت {service_id}")
             except Exception as e:
@@ -1313,15 +1379,13 @@ def admin_services():
         elif action == 'delete_media':
             media_id = request.form.get('media_id')
             service_id = request.form.get('service_id')
-            if not mediaote:
+            if not media_id or not service_id:
                 flash('شناسه رسانه و خدمت الزامی است.', 'danger')
                 return redirect(url_for('admin_services'))
             try:
                 media = ServiceMedia.query.get(int(media_id))
                 if media and media.service_id == int(service_id):
-                    if media.local_path:
-                        delete_media_file(media.local_path)
-                    db.session.delete(media)
+                    delete_media_rows(ServiceMedia, ServiceMedia.id == media.id)
                     db.session.commit()
                     flash('رسانه با موفقیت حذف شد.', 'success')
                 else:
@@ -1432,13 +1496,8 @@ def admin_education():
                 return redirect(url_for('admin_education'))
 
             content = EducationalContent.query.get_or_404(int(content_id))
-            media_files = EducationalContentMedia.query.filter_by(
-                content_id=content.id).all()
-            for media in media_files:
-                if media.file_id and not media.file_id.startswith('http'):
-                    file_path = os.path.join('static', media.file_id)
-                    delete_media_file(file_path)
-
+            delete_media_rows(EducationalContentMedia,
+                              EducationalContentMedia.content_id == content.id)
             db.session.delete(content)
             db.session.commit()
             flash(f'محتوای آموزشی "{content.title}" با موفقیت حذف شد.',
@@ -1533,16 +1592,13 @@ def admin_education():
                             file_type=file_type,
                             custom_filename=None)
                         if success:
-                            relative_path = file_path.replace(
-                                'static/', '', 1) if file_path.startswith(
-                                    'static/') else file_path
                             media = EducationalContentMedia(
                                 content_id=content.id,
-                                file_id=relative_path,
-                                file_type=file_type,
-                                local_path=file_path)
+                                **media_row_fields(file_path, file_type))
                             db.session.add(media)
                             db.session.commit()
+                            queue_media_processing('educational_content_media',
+                                                   [media])
                             flash('رسانه با موفقیت آپلود شد.', 'success')
                             logger.info(
                                 f"Media uploaded for content: {file_path}")
@@ -1590,15 +1646,13 @@ def admin_education():
                         file_type=file_type,
                         custom_filename=None)
                     if success:
-                        relative_path = file_path.replace(
-                            'static/', '', 1) if file_path.startswith(
-                                'static/') else file_path
-                        media = EducationalContentMedia(content_id=content.id,
-                                                        file_id=relative_path,
-                                                        file_type=file_type,
-                                                        local_path=file_path)
+                        media = EducationalContentMedia(
+                            content_id=content.id,
+                            **media_row_fields(file_path, file_type))
                         db.session.add(media)
                         db.session.commit()
+                        queue_media_processing('educational_content_media',
+                                               [media])
                         flash('رسانه با موفقیت آپلود شد.', 'success')
                         logger.info(f"Media uploaded for content: {file_path}")
                     else:
@@ -1624,8 +1678,7 @@ def admin_education():
             try:
                 media = EducationalContentMedia.query.get(int(media_id))
                 if media and media.content_id == int(content_id):
-                    delete_media_file(media.local_path)
-                    db.session.delete(media)
+                    delete_media_rows(EducationalContentMedia, EducationalContentMedia.id == media.id)
                     db.session.commit()
                     flash('رسانه با موفقیت حذف شد.', 'success')
                     logger.info(
@@ -1748,7 +1801,7 @@ def admin_inquiries():
 
         if action == 'update_status':
             status = request.form.get('status')
-            if status in ['pending', 'in_progress', 'completed', 'rejected']:
+            if status in INQUIRY_STATUSES:
                 inquiry.status = status
                 db.session.commit()
                 flash(f'وضعیت استعلام به "{status}" تغییر کرد.', 'success')
@@ -1760,14 +1813,133 @@ def admin_inquiries():
             db.session.commit()
             flash('استعلام حذف شد.', 'success')
 
-        return redirect(url_for('admin_inquiries'))
+        return redirect(request.referrer or url_for('admin_inquiries'))
 
-    inquiries = Inquiry.query.order_by(Inquiry.created_at.desc()).all()
+    filters = parse_filters(request.args)
+    page = inquiry_page(Inquiry.query, filters,
+                        after=request.args.get('after'),
+                        before=request.args.get('before'))
+    products, services = related_choices(db.session)
     return render_template('admin/inquiries.html',
-                           inquiries=inquiries,
+                           inquiries=page['items'],
+                           next_cursor=page['next_cursor'],
+                           prev_cursor=page['prev_cursor'],
+                           filters=filters,
+                           filter_args=filter_args(filters),
+                           status_counts=status_counts(db.session, filters),
+                           statuses=INQUIRY_STATUSES,
+                           products=products,
+                           services=services,
                            active_page='inquiries')
 
 
+inquiry_feed = None
+
+
+def get_inquiry_feed():
+    """شنونده تغییرات استعلام‌ها در این پردازه (در اولین درخواست ساخته می‌شود)"""
+    global inquiry_feed
+    if inquiry_feed is None:
+        inquiry_feed = InquiryFeed(direct_engine(db.engine))
+    return inquiry_feed
+
+
+@app.route('/admin/inquiries/stream')
+@login_required
+def admin_inquiries_stream():
+    """Server-Sent Events stream of new and changed inquiries"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'دسترسی مجاز نیست'}), 403
+
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    return Response(get_inquiry_feed().stream(last_event_id),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache',
+                             'X-Accel-Buffering': 'no'})
+
+
+# ----- Inquiry Report Routes -----
+
+
+def report_date_range():
+    """بازه تاریخ گزارش از پارامترهای درخواست (پیش‌فرض ۳۰ روز اخیر)"""
+    today = datetime.datetime.utcnow().date()
+    try:
+        end = datetime.datetime.strptime(request.args.get('end_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        end = today
+    try:
+        start = datetime.datetime.strptime(request.args.get('start_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        start = end - datetime.timedelta(days=29)
+    return min(start, end), end
+
+
+@app.route('/admin/reports')
+@login_required
+def admin_reports():
+    """Admin panel - Precomputed inquiry reports"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
+
+    start, end = report_date_range()
+    daily = daily_volume(db.session, start, end)
+    customer_summary, top_customers = repeat_customers(db.session, limit=20)
+    return render_template('admin/reports.html',
+                           start=start,
+                           end=end,
+                           refresh=last_refresh(db.session),
+                           daily=daily,
+                           weekly=weekly_volume(daily),
+                           items=item_volume(db.session, start, end, limit=20),
+                           categories=category_volume(db.session, start, end),
+                           statuses=status_conversion(db.session, start, end),
+                           customer_summary=customer_summary,
+                           top_customers=top_customers,
+                           reports=REPORTS,
+                           active_page='reports')
+
+
+@app.route('/admin/reports/<report>.csv')
+@login_required
+def admin_report_csv(report):
+    """Download one inquiry report as CSV"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
+    if report not in REPORTS:
+        abort(404)
+
+    start, end = report_date_range()
+    headers, rows = report_rows(db.session, report, start, end)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    return Response(
+        output.getvalue(),
+        mimetype='text/csv',
+        headers={
+            'Content-Disposition':
+            f'attachment; filename=inquiries_{report}_{start:%Y%m%d}_{end:%Y%m%d}.csv'
+        })
+
+
+@app.route('/admin/reports/refresh', methods=['POST'])
+@login_required
+def admin_reports_refresh():
+    """Queue a refresh of the inquiry report rollups"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
+
+    full = request.form.get('full') == '1'
+    job_id = enqueue_job(db.session, 'inquiry_analytics', {'full': full}, created_by=current_user.id)
+    flash('تازه‌سازی گزارش‌ها در پس‌زمینه آغاز شد.', 'info')
+    return redirect(url_for('admin_job_detail', job_id=job_id))
+
+
 # ----- Database Management Routes -----
 
 
@@ -1832,6 +2004,7 @@ def admin_database():
                                pg_host=pg_host,
                                pg_database=pg_database,
                                pg_user=pg_user,
+                               breaker_states=load_breaker_states(),
                                active_page='database')
     except Exception as e:
         logger.error(f"Error loading admin_database: {str(e)}", exc_info=True)
@@ -1839,138 +2012,202 @@ def admin_database():
         return redirect(url_for('admin_index'))
 
 
+SQL_CONSOLE_MODES = ('run', 'explain', 'analyze', 'export')
+
+
+def render_sql_console(sql='', timeout_ms=DEFAULT_TIMEOUT_MS, mode='run', result=None, plan=None,
+                       error=None):
+    """Render the SQL console with the admin's recent query history."""
+    history = SqlQueryHistory.query.filter_by(user_id=current_user.id) \
+        .order_by(SqlQueryHistory.id.desc()).limit(SQL_HISTORY_SIZE).all()
+    return render_template('admin/sql_console.html',
+                           title='کنسول SQL',
+                           sql=sql,
+                           timeout_ms=timeout_ms,
+                           mode=mode,
+                           result=result,
+                           plan=plan,
+                           error=error,
+                           history=history,
+                           display_limit=DISPLAY_ROW_LIMIT,
+                           export_limit=EXPORT_ROW_LIMIT,
+                           max_timeout_ms=MAX_TIMEOUT_MS,
+                           active_page='database')
+
+
+@app.route('/admin/database/console', methods=['GET'])
+@login_required
+def admin_sql_console():
+    """Read-only SQL console; ?history=<id> loads a previous query into the editor."""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز است.', 'danger')
+        return redirect(url_for('index'))
+
+    sql, mode = '', 'run'
+    history_id = request.args.get('history', type=int)
+    if history_id:
+        item = SqlQueryHistory.query.filter_by(id=history_id, user_id=current_user.id).first()
+        if item:
+            sql, mode = item.sql, item.mode
+    return render_sql_console(sql=sql, mode=mode)
+
+
 @app.route('/admin/database/execute_sql', methods=['POST'])
 @login_required
 def execute_sql():
-    """Execute a custom SQL query."""
+    """Run, explain or export a read-only SQL query with a statement timeout and row cap."""
     if not current_user.is_admin:
         flash('دسترسی غیرمجاز است.', 'danger')
         return redirect(url_for('index'))
 
+    sql = request.form.get('sql_query', '')
+    mode = request.form.get('mode', 'run')
+    if mode not in SQL_CONSOLE_MODES:
+        mode = 'run'
+    timeout_ms = clamp_timeout(request.form.get('timeout_ms'))
+
     try:
-        sql_query = request.form.get('sql_query')
-        if not sql_query:
-            flash('کوئری SQL خالی است.', 'danger')
-            return redirect(url_for('admin_database'))
+        check_query(sql)
+    except SqlConsoleError as e:
+        return render_sql_console(sql=sql, timeout_ms=timeout_ms, mode=mode, error=str(e))
 
-        sql_query = sql_query.strip().lower()
-        if sql_query.startswith(
-            ('drop ', 'alter ', 'truncate ', 'delete ', 'insert ', 'update ')):
-            flash('کوئری‌های تغییر ساختار یا داده مجاز نیستند.', 'danger')
-            return redirect(url_for('admin_database'))
+    if mode == 'export':
+        record_history(db.session, SqlQueryHistory, current_user.id, sql, mode)
+        rows = stream_query(db.engine, sql, timeout_ms=timeout_ms)
 
-        with db.engine.connect() as connection:
-            result = connection.execute(text(sql_query))
-            rows = result.fetchall()
-            columns = result.keys() if rows else []
+        def generate():
+            output = io.StringIO()
+            writer = csv.writer(output)
+            try:
+                for row in rows:
+                    writer.writerow(row)
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate(0)
+            except Exception as e:
+                # پاسخ شروع شده است؛ خطا در انتهای فایل نوشته می‌شود
+                logger.error(f"Error exporting SQL query: {str(e)}")
+                yield f"# error: {e}\n"
 
-        results = [dict(zip(columns, row)) for row in rows] if rows else []
-        flash(f'کوئری با موفقیت اجرا شد. تعداد ردیف‌ها: {len(results)}',
-              'success')
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        return Response(stream_with_context(generate()),
+                        mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename=query_{timestamp}.csv'})
 
-        table_model_map = {
-            'users': User,
-            'products': Product,
-            'services': Service,
-            'inquiries': Inquiry,
-            'educational_content': EducationalContent,
-            'static_content': StaticContent,
-            'product_categories': ProductCategory,
-            'service_categories': ServiceCategory,
-            'educational_categories': EducationalCategory,
-            'product_media': ProductMedia,
-            'educational_content_media': EducationalContentMedia
-        }
+    result = plan = None
+    try:
+        if mode == 'run':
+            result = run_query(db.engine, sql, timeout_ms=timeout_ms)
+            record_history(db.session, SqlQueryHistory, current_user.id, sql, mode,
+                           duration_ms=result['duration_ms'], rows=result['row_count'],
+                           truncated=result['truncated'])
+        else:
+            plan = explain_query(db.engine, sql, timeout_ms=timeout_ms, analyze=mode == 'analyze')
+            record_history(db.session, SqlQueryHistory, current_user.id, sql, mode,
+                           duration_ms=plan['duration_ms'])
+    except Exception as e:
+        db.session.rollback()
+        error = str(getattr(e, 'orig', None) or e).strip()
+        logger.warning(f"SQL console query failed: {error}")
+        record_history(db.session, SqlQueryHistory, current_user.id, sql, mode, error=error)
+        return render_sql_console(sql=sql, timeout_ms=timeout_ms, mode=mode, error=error)
+    return render_sql_console(sql=sql, timeout_ms=timeout_ms, mode=mode, result=result, plan=plan)
 
-        table_counts = {}
-        for table_name, model in table_model_map.items():
-            try:
-                count = model.query.count()
-                table_counts[table_name] = count
-            except Exception as e:
-                logger.warning(
-                    f"Error counting records for table {table_name}: {str(e)}")
-                table_counts[table_name] = 'Error'
 
-        with db.engine.connect() as connection:
-            pg_version = connection.execute(
-                text("SELECT version();")).fetchone()[0]
+@app.route('/admin/database/queries', methods=['GET'])
+@login_required
+def admin_database_queries():
+    """Top-N statements and per-request query counts of the web, bot and job processes."""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز است.', 'danger')
+        return redirect(url_for('index'))
 
-        pg_host = os.environ.get('DATABASE_HOST', 'localhost')
-        pg_database = os.environ.get('DATABASE_NAME', 'unknown')
-        pg_user = os.environ.get('DATABASE_USER', 'unknown')
+    sort = request.args.get('sort', 'total')
+    if sort not in QUERY_SORT_KEYS:
+        sort = 'total'
+    limit = min(max(request.args.get('limit', 50, type=int) or 50, 10), 500)
+    stats = top_queries(sort=sort, limit=limit)
+    return render_template('admin/query_stats.html',
+                           title='کوئری‌های کند',
+                           stats=stats,
+                           sort=sort,
+                           limit=limit,
+                           slow_query_ms=SLOW_QUERY_MS,
+                           active_page='database')
+
+
+@app.route('/admin/database/queries/reset', methods=['POST'])
+@login_required
+def admin_database_queries_reset():
+    """Clear collected query statistics in all processes."""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز است.', 'danger')
+        return redirect(url_for('index'))
 
-        inspector = inspect(db.engine)
-        table_structures = {}
-        for table_name in table_model_map.keys():
-            try:
-                columns = inspector.get_columns(table_name)
-                table_structures[table_name] = columns
-            except Exception as e:
-                logger.warning(
-                    f"Error fetching structure for table {table_name}: {str(e)}"
-                )
-                table_structures[table_name] = []
+    reset_query_stats()
+    flash('آمار کوئری‌ها پاک شد.', 'success')
+    return redirect(url_for('admin_database_queries'))
 
-        return render_template('admin/database.html',
-                               title='مدیریت دیتابیس',
-                               table_counts=table_counts,
-                               table_structures=table_structures,
-                               pg_version=pg_version,
-                               pg_host=pg_host,
-                               pg_database=pg_database,
-                               pg_user=pg_user,
-                               sql_results=results,
-                               sql_columns=columns,
-                               active_page='database')
-    except Exception as e:
-        logger.error(f"Error executing SQL query: {str(e)}", exc_info=True)
-        flash(f'خطا در اجرای کوئری: {str(e)}', 'danger')
-        return redirect(url_for('admin_database'))
+
+@app.route('/admin/database/integrity', methods=['GET'])
+@login_required
+def admin_database_integrity():
+    """Latest referential integrity scan: orphaned references and category cycles."""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز است.', 'danger')
+        return redirect(url_for('index'))
+
+    last_job = Job.query.filter(Job.kind.in_(['integrity_check', 'integrity_fix']),
+                                Job.status == 'succeeded') \
+        .order_by(Job.finished_at.desc()).first()
+    running = Job.query.filter(Job.kind.in_(['integrity_check', 'integrity_fix']),
+                               Job.status.in_(['queued', 'running'])) \
+        .order_by(Job.created_at.desc()).first()
+    return render_template('admin/integrity.html',
+                           title='یکپارچگی داده‌ها',
+                           last_job=job_to_dict(last_job) if last_job else None,
+                           running=running,
+                           active_page='database')
+
+
+@app.route('/admin/database/integrity/<string:action>', methods=['POST'])
+@login_required
+def admin_database_integrity_run(action):
+    """Queue an integrity scan or a set-based fix of all tables."""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز است.', 'danger')
+        return redirect(url_for('index'))
+
+    if action not in ('check', 'fix'):
+        flash('عملیات نامعتبر است.', 'danger')
+        return redirect(url_for('admin_database_integrity'))
+    job_id = enqueue_job(db.session, f'integrity_{action}', {}, created_by=current_user.id)
+    flash('بررسی یکپارچگی در پس‌زمینه آغاز شد.' if action == 'check'
+          else 'اصلاح یکپارچگی در پس‌زمینه آغاز شد.', 'info')
+    return redirect(url_for('admin_job_detail', job_id=job_id))
 
 
 @app.route('/admin/database/fix/<string:table>', methods=['POST'])
 @login_required
 def admin_database_fix(table):
-    """Fix issues in the specified table."""
+    """Fix orphaned references (and category cycles) of the specified table."""
     if not current_user.is_admin:
         flash('دسترسی غیرمجاز است.', 'danger')
         return redirect(url_for('index'))
 
     try:
-        table_model_map = {
-            'users': User,
-            'products': Product,
-            'services': Service,
-            'inquiries': Inquiry,
-            'educational_content': EducationalContent,
-            'static_content': StaticContent,
-            'product_categories': ProductCategory,
-            'service_categories': ServiceCategory,
-            'educational_categories': EducationalCategory,
-            'product_media': ProductMedia,
-            'educational_content_media': EducationalContentMedia
-        }
-
-        if table not in table_model_map:
+        if table not in Base.metadata.tables:
             flash(f'جدول "{table}" نامعتبر است.', 'danger')
             return redirect(url_for('admin_database'))
 
-        model = table_model_map[table]
-
-        if table == 'inquiries':
-            invalid_inquiries = model.query.filter(
-                (model.product_id != None) &
-                (model.product_id.notin_(db.session.query(Product.id)))).all()
-            for inquiry in invalid_inquiries:
-                inquiry.product_id = None
-            db.session.commit()
-            flash(f'جدول {table} اصلاح شد: ارجاعات نامعتبر اصلاح شدند.',
-                  'success')
-        else:
-            flash(f'اصلاح برای جدول {table} پیاده‌سازی نشده است.', 'warning')
+        if not foreign_key_checks(Base.metadata, [table]) + cycle_checks([table]):
+            flash(f'جدول {table} ارجاعی برای بررسی ندارد.', 'info')
+            return redirect(url_for('admin_database'))
 
-        return redirect(url_for('admin_database'))
+        job_id = enqueue_job(db.session, 'integrity_fix', {'tables': [table]},
+                             created_by=current_user.id)
+        flash(f'اصلاح جدول {table} در پس‌زمینه آغاز شد.', 'info')
+        return redirect(url_for('admin_job_detail', job_id=job_id))
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error fixing table {table}: {str(e)}", exc_info=True)
@@ -2124,14 +2361,167 @@ def admin_static_content():
 
 @app.route('/media/<path:filename>')
 def serve_media(filename):
-    """ارائه فایل‌های رسانه‌ای"""
+    """ارائه فایل‌های رسانه‌ای با ETag، کش immutable مخزن و پشتیبانی Range"""
     try:
-        return send_from_directory('static/uploads', filename)
+        return media_response(filename, accel_prefix=app.config.get('MEDIA_ACCEL_REDIRECT_PREFIX'))
+    except NotFound:
+        return jsonify({'error': 'File not found'}), 404
     except Exception as e:
         logger.error(f"Error serving media file {filename}: {str(e)}")
         return jsonify({'error': 'File not found'}), 404
 
 
+# ----- Resumable Upload Routes -----
+
+# نوع موجودیت -> (مدل والد، مدل رسانه، ستون والد، پوشه آپلود، جدول رسانه)
+UPLOAD_TARGETS = {
+    'product': (Product, ProductMedia, 'product_id', 'products', 'product_media'),
+    'service': (Service, ServiceMedia, 'service_id', 'services', 'service_media'),
+    'educational': (EducationalContent, EducationalContentMedia, 'content_id',
+                    'educational', 'educational_content_media'),
+}
+
+
+def upload_status_response(upload, status=200, **extra):
+    """پاسخ JSON وضعیت آپلود همراه با سرآیندهای Upload-Offset/Upload-Length"""
+    body = {'success': True, 'upload_id': upload['upload_id'],
+            'offset': upload['offset'], 'size': upload['size']}
+    body.update(extra)
+    response = jsonify(body)
+    response.status_code = status
+    response.headers['Upload-Offset'] = str(upload['offset'])
+    response.headers['Upload-Length'] = str(upload['size'])
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def complete_resumable_upload(upload):
+    """
+    انتقال آپلود کامل شده به پوشه موجودیت و ساخت ردیف رسانه
+
+    Args:
+        upload: مشخصات آپلود (خروجی write_chunk)
+
+    Returns:
+        ردیف رسانه ساخته شده
+    """
+    parent_model, media_model, parent_column, folder, table = UPLOAD_TARGETS[upload['entity']]
+    upload_dir = os.path.join('static', 'uploads', folder, str(upload['entity_id']))
+    file_path = finish_upload(upload['upload_id'], upload_dir)
+    try:
+        media = media_model(**{parent_column: upload['entity_id']},
+                            **media_row_fields(file_path, upload['file_type']))
+        db.session.add(media)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        remove_file(file_path)
+        raise
+    queue_media_processing(table, [media])
+    logger.info(f"Resumable upload {upload['upload_id']} stored as {table} {media.id}")
+    return media
+
+
+@app.route('/admin/uploads', methods=['POST'])
+@login_required
+def admin_upload_create():
+    """شروع آپلود تکه‌تکه؛ بدنه JSON شامل entity، entity_id، file_type، filename و size"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'دسترسی مجاز نیست'}), 403
+
+    data = request.get_json(silent=True) or {}
+    entity = data.get('entity')
+    file_type = data.get('file_type', 'photo')
+    filename = data.get('filename', '')
+    try:
+        entity_id = int(data.get('entity_id'))
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'شناسه یا اندازه فایل نامعتبر است'}), 400
+    if entity not in UPLOAD_TARGETS:
+        return jsonify({'success': False, 'error': 'نوع موجودیت نامعتبر است'}), 400
+    if not allowed_media_filename(filename, file_type):
+        return jsonify({'success': False, 'error': 'فرمت فایل مجاز نیست'}), 400
+    if db.session.get(UPLOAD_TARGETS[entity][0], entity_id) is None:
+        return jsonify({'success': False, 'error': 'موجودیت یافت نشد'}), 404
+
+    remove_stale_uploads()
+    try:
+        upload = create_upload(filename, size, {
+            'entity': entity,
+            'entity_id': entity_id,
+            'file_type': file_type,
+            'created_by': current_user.id,
+        })
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status_code
+    response = upload_status_response(upload, 201, chunk_size=UPLOAD_CHUNK_SIZE)
+    response.headers['Location'] = url_for('admin_upload_status', upload_id=upload['upload_id'])
+    return response
+
+
+@app.route('/admin/uploads/<upload_id>', methods=['GET', 'HEAD'])
+@login_required
+def admin_upload_status(upload_id):
+    """offset فعلی آپلود برای ادامه پس از قطع اتصال"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'دسترسی مجاز نیست'}), 403
+    try:
+        return upload_status_response(get_upload(upload_id), chunk_size=UPLOAD_CHUNK_SIZE)
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status_code
+
+
+@app.route('/admin/uploads/<upload_id>', methods=['PATCH'])
+@login_required
+def admin_upload_chunk(upload_id):
+    """
+    دریافت یک تکه با سرآیند Upload-Offset و بدنه application/offset+octet-stream
+
+    بدنه مستقیم از stream درخواست روی دیسک نوشته می‌شود. با رسیدن آخرین بایت،
+    فایل به پوشه موجودیت منتقل و ردیف رسانه ساخته می‌شود.
+    """
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'دسترسی مجاز نیست'}), 403
+    if request.mimetype != 'application/offset+octet-stream':
+        return jsonify({'success': False,
+                        'error': 'Content-Type باید application/offset+octet-stream باشد'}), 415
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'سرآیند Upload-Offset الزامی است'}), 400
+
+    try:
+        upload = write_chunk(upload_id, offset, request.stream, request.content_length)
+        if upload['offset'] < upload['size']:
+            return upload_status_response(upload, complete=False)
+        media = complete_resumable_upload(upload)
+        return upload_status_response(upload, complete=True, media_id=media.id)
+    except UploadOffsetMismatch as e:
+        response = jsonify({'success': False, 'error': str(e), 'offset': e.offset})
+        response.status_code = e.status_code
+        response.headers['Upload-Offset'] = str(e.offset)
+        return response
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status_code
+    except Exception as e:
+        logger.error(f"Error storing resumable upload {upload_id}: {str(e)}")
+        return jsonify({'success': False, 'error': f'خطا در ذخیره فایل: {str(e)}'}), 500
+
+
+@app.route('/admin/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def admin_upload_discard(upload_id):
+    """لغو آپلود و حذف تکه‌های دریافت شده"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'دسترسی مجاز نیست'}), 403
+    try:
+        removed = discard_upload(upload_id)
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status_code
+    return jsonify({'success': removed})
+
+
 # ----- Error Handlers -----
 
 
@@ -2185,6 +2575,167 @@ def control_stop():
     return redirect(url_for('index'))
   
 
+# ----- Background Job Routes -----
+
+
+JOB_KIND_LABELS = {
+    'import_csv': 'ورود داده از CSV',
+    'restore': 'بازیابی پشتیبان',
+    'backup': 'پشتیبان‌گیری',
+    'delete_files': 'حذف فایل‌های رسانه',
+    'integrity_check': 'بررسی یکپارچگی',
+    'integrity_fix': 'اصلاح یکپارچگی',
+    'process_media': 'پردازش تصاویر',
+    'media_gc': 'پاکسازی رسانه‌های یتیم',
+    'inquiry_analytics': 'تازه‌سازی گزارش استعلام‌ها',
+    'inquiry_maintenance': 'پارتیشن‌ها و بایگانی استعلام‌ها',
+}
+
+
+def job_to_dict(job):
+    """تبدیل کار به دیکشنری برای پاسخ JSON و قالب"""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'kind_label': JOB_KIND_LABELS.get(job.kind, job.kind),
+        'status': job.status,
+        'progress': job.progress,
+        'progress_message': job.progress_message,
+        'cancel_requested': job.cancel_requested,
+        'is_finished': job.is_finished,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+    }
+
+
+@app.route('/admin/jobs')
+@login_required
+def admin_jobs():
+    """Admin panel - Background job list"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
+
+    status = request.args.get('status')
+    query = Job.query
+    if status in JOB_STATUSES:
+        query = query.filter(Job.status == status)
+    jobs = query.order_by(Job.created_at.desc(), Job.id.desc()).limit(100).all()
+    return render_template('admin/jobs.html',
+                           jobs=jobs,
+                           status=status,
+                           statuses=JOB_STATUSES,
+                           kind_labels=JOB_KIND_LABELS,
+                           active_page='jobs')
+
+
+@app.route('/admin/jobs/<int:job_id>')
+@login_required
+def admin_job_detail(job_id):
+    """Admin panel - Background job progress and result"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
+
+    job = Job.query.get_or_404(job_id)
+    return render_template('admin/job_detail.html',
+                           job=job_to_dict(job),
+                           active_page='jobs')
+
+
+@app.route('/admin/jobs/<int:job_id>/status')
+@login_required
+def admin_job_status(job_id):
+    """Background job progress as JSON (polled by the job page)"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'دسترسی مجاز نیست'}), 403
+
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'کار یافت نشد'}), 404
+    return jsonify({'success': True, 'job': job_to_dict(job)})
+
+
+@app.route('/admin/jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def admin_job_cancel(job_id):
+    """Request cancellation of a queued or running job"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
+
+    if request_cancel(db.session, job_id):
+        flash('درخواست لغو ثبت شد.', 'success')
+    else:
+        flash('این کار قبلاً به پایان رسیده است.', 'warning')
+    return redirect(url_for('admin_job_detail', job_id=job_id))
+
+
+
+# ----- Media Storage Routes -----
+
+STORAGE_ENTITY_MODELS = {
+    'product': (Product, 'name'),
+    'service': (Service, 'name'),
+    'educational': (EducationalContent, 'title'),
+}
+
+
+@app.route('/admin/storage')
+@login_required
+def admin_storage():
+    """Admin panel - Media disk usage and orphaned file report"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
+
+    last_job = Job.query.filter(Job.kind == 'media_gc', Job.status == 'succeeded') \
+        .order_by(Job.finished_at.desc()).first()
+    usage = MediaStorageUsage.query.order_by(MediaStorageUsage.bytes.desc()).limit(50).all()
+
+    # نام موجودیت‌ها با یک پرس‌وجو برای هر نوع
+    names = {}
+    for entity_type, (model, column) in STORAGE_ENTITY_MODELS.items():
+        ids = [item.entity_id for item in usage if item.entity_type == entity_type]
+        if ids:
+            for entity_id, name in db.session.query(model.id, getattr(model, column)) \
+                    .filter(model.id.in_(ids)):
+                names[(entity_type, entity_id)] = name
+    totals = db.session.query(
+        MediaStorageUsage.entity_type,
+        db.func.sum(MediaStorageUsage.files),
+        db.func.sum(MediaStorageUsage.bytes),
+        db.func.sum(MediaStorageUsage.missing)).group_by(MediaStorageUsage.entity_type).all()
+
+    return render_template('admin/storage.html',
+                           last_job=job_to_dict(last_job) if last_job else None,
+                           usage=usage,
+                           names=names,
+                           totals=totals,
+                           modes=GC_MODES,
+                           active_page='storage')
+
+
+@app.route('/admin/storage/gc', methods=['POST'])
+@login_required
+def admin_storage_gc():
+    """Queue a media garbage collection run"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
+
+    mode = request.form.get('mode', 'report')
+    if mode not in GC_MODES:
+        flash('حالت پاکسازی نامعتبر است.', 'danger')
+        return redirect(url_for('admin_storage'))
+    job_id = enqueue_job(db.session, 'media_gc', {'mode': mode}, created_by=current_user.id)
+    flash('پاکسازی رسانه‌ها در پس‌زمینه آغاز شد.', 'info')
+    return redirect(url_for('admin_job_detail', job_id=job_id))
+
+
 # ----- Import Export Routes -----
 
 
@@ -2197,8 +2748,12 @@ def admin_import_export():
         return redirect(url_for('index'))
 
     message = session.pop('import_export_message', None)
+    recent_jobs = Job.query.filter(
+        Job.kind.in_(['import_csv', 'restore', 'backup'])).order_by(
+            Job.created_at.desc()).limit(5).all()
     return render_template('admin_import_export.html',
                            message=message,
+                           recent_jobs=recent_jobs,
                            active_page='import_export')
 
 
@@ -2303,8 +2858,8 @@ def import_entity():
         flash('دسترسی غیرمجاز.', 'danger')
         return redirect(url_for('index'))
 
+    entity_type = request.form.get('entity_type')
     try:
-        entity_type = request.form.get('entity_type')
         if not entity_type:
             flash('لطفاً نوع داده را انتخاب کنید.', 'danger')
             return redirect(url_for('admin_import_export'))
@@ -2318,164 +2873,67 @@ def import_entity():
             flash('فایل باید فرمت CSV داشته باشد.', 'danger')
             return redirect(url_for('admin_import_export'))
 
-        content = file.read().decode('utf-8')
-        csv_data = io.StringIO(content)
-        reader = csv.DictReader(csv_data)
-        imported_count = 0
-
-        if entity_type == 'products':
-            for row in reader:
-                product = Product(
-                    name=row.get('name', ''),
-                    price=int(row.get('price', 0)) if row.get('price') else 0,
-                    description=row.get('description', ''),
-                    category_id=int(row.get('category_id'))
-                    if row.get('category_id') else None,
-                    brand=row.get('brand', None),
-                    model=row.get('model', None),
-                    in_stock=row.get('in_stock', 'True').lower() == 'true',
-                    tags=row.get('tags', None),
-                    featured=row.get('featured', 'False').lower() == 'true')
-                db.session.add(product)
-                imported_count += 1
-        elif entity_type == 'services':
-            for row in reader:
-                service = Service(
-                    name=row.get('name', ''),
-                    price=int(row.get('price', 0)) if row.get('price') else 0,
-                    description=row.get('description', ''),
-                    category_id=int(row.get('category_id'))
-                    if row.get('category_id') else None,
-                    featured=row.get('featured', 'False').lower() == 'true',
-                    available=row.get('available', 'True').lower() == 'true',
-                    tags=row.get('tags', None))
-                db.session.add(service)
-                imported_count += 1
-
-        elif entity_type == 'categories':
-            for row in reader:
-                category_type = row.get('category_type', 'product')
-                name = row.get('name', '')
-                parent_id = int(
-                    row.get('parent_id')) if row.get('parent_id') else None
-
-                if category_type == 'product':
-                    category = ProductCategory(name=name, parent_id=parent_id)
-                elif category_type == 'service':
-                    category = ServiceCategory(name=name, parent_id=parent_id)
-                elif category_type == 'educational':
-                    category = EducationalCategory(name=name,
-                                                   parent_id=parent_id)
-                else:
-                    continue
-
-                db.session.add(category)
-                imported_count += 1
-
-        elif entity_type == 'inquiries':
-            for row in reader:
-                inquiry = Inquiry(
-                    user_id=int(row.get('user_id', 0)),
-                    product_id=int(row.get('product_id'))
-                    if row.get('product_id') else None,
-                    service_id=int(row.get('service_id'))
-                    if row.get('service_id') else None,
-                    name=row.get('name', ''),
-                    phone=row.get('phone', ''),
-                    description=row.get('description', None),
-                    status=row.get('status', 'new'),
-                    date=datetime.datetime.strptime(row.get('date'),
-                                                    '%Y-%m-%d %H:%M:%S')
-                    if row.get('date') else datetime.datetime.utcnow())
-                db.session.add(inquiry)
-                imported_count += 1
-
-        elif entity_type == 'educational':
-            for row in reader:
-                content = EducationalContent(
-                    title=row.get('title', ''),
-                    content=row.get('content', ''),
-                    category_id=int(row.get('category_id'))
-                    if row.get('category_id') else None,
-                    tags=row.get('tags', None),
-                    featured=row.get('featured', 'False').lower() == 'true')
-                db.session.add(content)
-                imported_count += 1
+        if entity_type != 'categories' and entity_type not in IMPORT_SPECS:
+            raise CsvImportError(f"Unknown entity type: {entity_type}")
 
-        db.session.commit()
-        flash(f'{imported_count} مورد با موفقیت وارد شد.', 'success')
-        return redirect(url_for('admin_import_export'))
+        path = save_job_file(file, 'import')
+        job_id = enqueue_job(db.session, 'import_csv',
+                             {'entity_type': entity_type, 'path': path},
+                             created_by=current_user.id)
+        flash('فایل دریافت شد و ورود داده در پس‌زمینه انجام می‌شود.', 'info')
+        return redirect(url_for('admin_job_detail', job_id=job_id))
 
+    except CsvImportError as e:
+        logger.error(f"Invalid CSV for {entity_type}: {str(e)}")
+        flash(f'فایل CSV نامعتبر است: {str(e)}', 'danger')
+        return redirect(url_for('admin_import_export'))
     except Exception as e:
-        db.session.rollback()
         logger.error(f"Error importing {entity_type}: {str(e)}")
         flash(f'خطا در وارد کردن داده‌ها: {str(e)}', 'danger')
         return redirect(url_for('admin_import_export'))
 
 
-@app.route('/admin/backup')
+@app.route('/admin/import/report/<path:filename>')
 @login_required
-def backup_database():
-    """Create database backup as ZIP file"""
+def download_import_report(filename):
+    """Download the error report of a CSV import"""
     if not current_user.is_admin:
         flash('دسترسی غیرمجاز.', 'danger')
         return redirect(url_for('index'))
 
-    try:
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_filename = f"database_backup_{timestamp}.zip"
+    return send_from_directory(os.path.abspath(IMPORT_REPORT_DIR),
+                               secure_filename(filename),
+                               as_attachment=True)
 
-        models_map = {
-            'users.csv': User,
-            'product_categories.csv': ProductCategory,
-            'service_categories.csv': ServiceCategory,
-            'educational_categories.csv': EducationalCategory,
-            'products.csv': Product,
-            'services.csv': Service,
-            'inquiries.csv': Inquiry,
-            'educational_content.csv': EducationalContent,
-            'product_media.csv': ProductMedia,
-            'service_media.csv': ServiceMedia,
-            'educational_content_media.csv': EducationalContentMedia,
-            'static_content.csv': StaticContent
-        }
 
-        memory_file = io.BytesIO()
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for table_name, model in models_map.items():
-                items = model.query.all()
-                if not items:
-                    continue
-
-                columns = [c.name for c in model.__table__.columns]
-                csv_output = io.StringIO()
-                writer = csv.writer(csv_output)
-                writer.writerow(columns)
-
-                for item in items:
-                    row = [
-                        str(getattr(item, col))
-                        if getattr(item, col) is not None else ''
-                        for col in columns
-                    ]
-                    writer.writerow(row)
-
-                zf.writestr(table_name, csv_output.getvalue().encode('utf-8'))
+@app.route('/admin/backup')
+@login_required
+def backup_database():
+    """Create database backup as a streamed ZIP file (or queue a job that saves it under data/backups)"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
 
-            readme_content = f"""این پشتیبان در تاریخ {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ایجاد شده است.
-هر فایل CSV شامل داده‌های یک جدول است.
-ستون اول در هر فایل CSV نام ستون‌ها را نشان می‌دهد.
+    try:
+        include_media = request.args.get('include_media') == '1'
 
-فایل‌های پشتیبان شامل:
-{', '.join(models_map.keys())}
-"""
-            zf.writestr("README.txt", readme_content.encode('utf-8'))
+        if request.args.get('target') == 'file':
+            job_id = enqueue_job(db.session, 'backup',
+                                 {'include_media': include_media},
+                                 created_by=current_user.id)
+            flash('پشتیبان‌گیری در پس‌زمینه آغاز شد.', 'info')
+            return redirect(url_for('admin_job_detail', job_id=job_id))
 
-        memory_file.seek(0)
-        return send_file(memory_file,
-                         mimetype='application/zip',
-                         as_attachment=True,
-                         download_name=backup_filename)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        backup_filename = f"database_backup_{timestamp}.zip"
+        return Response(iter_backup_zip(db.engine,
+                                        include_media=include_media),
+                        mimetype='application/zip',
+                        headers={
+                            'Content-Disposition':
+                            f'attachment; filename={backup_filename}',
+                            'X-Accel-Buffering': 'no'
+                        })
 
     except Exception as e:
         logger.error(f"Error in backup_database: {str(e)}")
@@ -2483,10 +2941,23 @@ def backup_database():
         return redirect(url_for('admin_import_export'))
 
 
+@app.route('/admin/backup/file/<path:filename>')
+@login_required
+def download_backup_file(filename):
+    """Download a backup file written by a background job"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
+
+    return send_from_directory(os.path.abspath(BACKUP_DIR),
+                               secure_filename(filename),
+                               as_attachment=True)
+
+
 @app.route('/admin/restore', methods=['POST'])
 @login_required
 def restore_database():
-    """Restore database from backup file"""
+    """Queue a database restore from an uploaded backup file"""
     if not current_user.is_admin:
         flash('دسترسی غیرمجاز.', 'danger')
         return redirect(url_for('index'))
@@ -2497,131 +2968,35 @@ def restore_database():
             flash('فایل پشتیبان باید با فرمت ZIP باشد.', 'warning')
             return redirect(url_for('admin_import_export'))
 
-        safe_filename = secure_filename(backup_file.filename)
-        temp_dir = tempfile.mkdtemp()
-        temp_path = os.path.join(temp_dir, safe_filename)
-        backup_file.save(temp_path)
-
-        models_map = {
-            'users.csv': User,
-            'product_categories.csv': ProductCategory,
-            'service_categories.csv': ServiceCategory,
-            'educational_categories.csv': EducationalCategory,
-            'static_content.csv': StaticContent,
-            'products.csv': Product,
-            'services.csv': Service,
-            'educational_content.csv': EducationalContent,
-            'inquiries.csv': Inquiry,
-            'product_media.csv': ProductMedia,
-            'service_media.csv': ServiceMedia,
-            'educational_content_media.csv': EducationalContentMedia
-        }
-
-        restored_tables = []
-        skipped_tables = []
-        error_tables = []
-
-        with zipfile.ZipFile(temp_path, 'r') as zip_ref:
-            file_list = zip_ref.namelist()
-            if 'README.txt' in file_list:
-                file_list.remove('README.txt')
-
-            should_clear_tables = request.form.get('clear_tables') == 'on'
-
-            for csv_filename in models_map.keys():
-                if csv_filename not in file_list:
-                    logger.info(f"File {csv_filename} not in backup")
-                    continue
-
-                model = models_map[csv_filename]
-                csv_content = zip_ref.read(csv_filename).decode('utf-8')
-                csv_file = io.StringIO(csv_content)
-                reader = csv.DictReader(csv_file)
-
-                if should_clear_tables:
-                    try:
-                        db.session.query(model).delete()
-                        db.session.commit()
-                    except Exception as e:
-                        db.session.rollback()
-                        logger.error(
-                            f"Error clearing table {csv_filename}: {str(e)}")
-                        skipped_tables.append(csv_filename)
-                        continue
-
-                restored_rows = 0
-                for row in reader:
-                    try:
-                        data = {}
-                        for field in reader.fieldnames:
-                            value = row[field]
-                            if value == '':
-                                value = None
-                            elif field in [
-                                    'id', 'parent_id', 'category_id',
-                                    'product_id', 'service_id', 'content_id',
-                                    'user_id'
-                            ]:
-                                value = int(value) if value else None
-                            elif field in [
-                                    'is_admin', 'in_stock', 'featured',
-                                    'available'
-                            ]:
-                                value = value.lower() in ('true', '1', 'yes')
-                            elif field in ['created_at', 'updated_at', 'date']:
-                                value = datetime.datetime.strptime(
-                                    value,
-                                    '%Y-%m-%d %H:%M:%S') if value else None
-                            data[field] = value
-
-                        # Validate foreign keys for media tables
-                        if model == ProductMedia and data.get('product_id'):
-                            if not Product.query.get(data['product_id']):
-                                continue
-                        elif model == ServiceMedia and data.get('service_id'):
-                            if not Service.query.get(data['service_id']):
-                                continue
-                        elif model == EducationalContentMedia and data.get(
-                                'content_id'):
-                            if not EducationalContent.query.get(
-                                    data['content_id']):
-                                continue
-
-                        item = model(**data)
-                        db.session.add(item)
-                        restored_rows += 1
-                    except Exception as e:
-                        logger.warning(
-                            f"Error adding row to {csv_filename}: {str(e)}")
-                        continue
-
-                try:
-                    db.session.commit()
-                    restored_tables.append(
-                        f"{csv_filename} ({restored_rows} rows)")
-                except Exception as e:
-                    db.session.rollback()
-                    logger.error(f"Error committing {csv_filename}: {str(e)}")
-                    error_tables.append(csv_filename)
-
-        os.unlink(temp_path)
-        os.rmdir(temp_dir)
-
-        if restored_tables:
-            flash(f'بازیابی جداول: {", ".join(restored_tables)}', 'success')
-        if skipped_tables:
-            flash(f'جداول رد شده: {", ".join(skipped_tables)}', 'warning')
-        if error_tables:
-            flash(f'خطا در جداول: {", ".join(error_tables)}', 'danger')
-
-        return redirect(url_for('admin_import_export'))
+        path = save_job_file(backup_file, 'restore')
+        should_clear_tables = request.form.get('clear_tables') == 'on'
+        job_id = enqueue_job(db.session, 'restore',
+                             {'path': path, 'clear_tables': should_clear_tables},
+                             created_by=current_user.id)
+        flash('فایل پشتیبان دریافت شد و بازیابی در پس‌زمینه انجام می‌شود.',
+              'info')
+        return redirect(url_for('admin_job_detail', job_id=job_id))
 
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error in restore_database: {str(e)}")
-        flash(f"خطا در بازیابی دیتابیس: {str(e)}", 'danger')
+        flash(f"خطا در ثبت بازیابی دیتابیس: {str(e)}", 'danger')
         return redirect(url_for('admin_import_export'))
 
 
+@app.route('/admin/restore/report/<path:filename>')
+@login_required
+def download_restore_report(filename):
+    """Download the rejected-rows report of a restore"""
+    if not current_user.is_admin:
+        flash('دسترسی غیرمجاز.', 'danger')
+        return redirect(url_for('index'))
+
+    return send_from_directory(os.path.abspath(RESTORE_REPORT_DIR),
+                               secure_filename(filename),
+                               as_attachment=True)
+
+
 @app.route('/admin/database/export/<table_name>', methods=['POST'])
 @login_required
 def export_table_csv(table_name):
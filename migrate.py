@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+اجرای مهاجرت‌های نسخه‌دار ساختار دیتابیس (migrations/versions)
+پیش از شروع وب و ربات پس از هر به‌روزرسانی کد اجرا شود.
+
+استفاده:
+    python migrate.py                  # اعمال همه نسخه‌های معوق
+    python migrate.py upgrade 0003     # اعمال تا نسخه 0003
+    python migrate.py status           # نمایش نسخه‌های اعمال شده و معوق
+"""
+
+import os
+import sys
+import argparse
+
+# اضافه کردن مسیر فعلی به path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from logging_config import get_logger
+from utils.schema_migrations import MigrationError, migration_status, upgrade
+from utils.db_engine import direct_engine
+
+logger = get_logger('app')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Versioned database schema migrations')
+    parser.add_argument('command', nargs='?', choices=('upgrade', 'status'), default='upgrade')
+    parser.add_argument('target', nargs='?', help='آخرین نسخه‌ای که باید اعمال شود')
+    args = parser.parse_args()
+
+    from app import app, ensure_admin_user
+    from extensions import db
+
+    with app.app_context():
+        # advisory lock و CREATE INDEX CONCURRENTLY پشت PgBouncer به اتصال مستقیم نیاز دارند
+        engine = direct_engine(db.engine)
+        if args.command == 'status':
+            for item in migration_status(engine):
+                applied = item['applied_at'].strftime('%Y-%m-%d %H:%M') if item['applied_at'] else 'pending'
+                print(f"{item['revision']}  {applied:16}  {item['description']}")
+            return
+        try:
+            applied = upgrade(engine, target=args.target)
+        except MigrationError as e:
+            logger.error(str(e))
+            sys.exit(1)
+        ensure_admin_user()
+    logger.info(f"Migrations applied: {', '.join(applied) or 'none (up to date)'}")
+
+
+if __name__ == '__main__':
+    main()
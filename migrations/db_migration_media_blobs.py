@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+مهاجرت مخزن رسانه آدرس‌دهی شده با محتوا
+این اسکریپت رسانه‌های موجود را به مخزن منتقل می‌کند (جدول media_blobs و ستون blob_id
+را مهاجرت‌های نسخه‌دار با `python migrate.py` می‌سازند). فایل‌های قبلی با hardlink (یا کپی)
+به مخزن اضافه می‌شوند و سر جای خود باقی می‌مانند تا پاکسازی رسانه‌های یتیم آن‌ها را جمع کند.
+"""
+
+import os
+import sys
+import shutil
+import logging
+from sqlalchemy import text
+from app import app, db
+from models import MediaBlob
+from utils.media_store import MEDIA_TABLES, blob_path, hash_file
+
+# تنظیم لاگر
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _link_or_copy(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+def backfill_table(table):
+    """انتقال رسانه‌های یک جدول به مخزن"""
+    rows = db.session.execute(text(f"""
+        SELECT id, file_id, file_type, local_path FROM {table}
+        WHERE blob_id IS NULL AND local_path IS NOT NULL
+    """)).fetchall()
+    linked, missing = 0, 0
+    for media_id, file_id, file_type, local_path in rows:
+        if not os.path.isfile(local_path):
+            missing += 1
+            continue
+        sha256 = hash_file(local_path)
+        blob = db.session.query(MediaBlob).filter_by(sha256=sha256).first()
+        if blob is None:
+            blob = MediaBlob(sha256=sha256,
+                             path=blob_path(sha256, os.path.splitext(local_path)[1]),
+                             size=os.path.getsize(local_path),
+                             file_type=file_type)
+            db.session.add(blob)
+            db.session.flush()
+        if not os.path.exists(blob.path):
+            _link_or_copy(local_path, blob.path)
+
+        # file_id تلگرام حفظ می‌شود؛ مسیرهای محلی به مسیر blob تغییر می‌کنند
+        is_local = not file_id or '/' in file_id or file_id.startswith('educational_content_image_')
+        new_file_id = blob.path.replace('static/', '', 1) if is_local else file_id
+        if not is_local and not blob.telegram_file_id:
+            blob.telegram_file_id = file_id
+        db.session.execute(text(f"""
+            UPDATE {table} SET blob_id = :blob_id, local_path = :path, file_id = :file_id
+            WHERE id = :id
+        """), {'id': media_id, 'blob_id': blob.id, 'path': blob.path, 'file_id': new_file_id})
+        linked += 1
+    db.session.commit()
+    logger.info(f"{table}: {linked} رسانه به مخزن منتقل شد، {missing} فایل یافت نشد.")
+
+def migrate_media_blobs():
+    """انتقال رسانه‌های موجود به مخزن"""
+    try:
+        with app.app_context():
+            for table in MEDIA_TABLES:
+                backfill_table(table)
+            return True
+    except Exception as e:
+        logger.error(f"خطا در مهاجرت مخزن رسانه: {e}")
+        db.session.rollback()
+        return False
+
+if __name__ == "__main__":
+    if migrate_media_blobs():
+        logger.info("مهاجرت با موفقیت انجام شد.")
+        sys.exit(0)
+    else:
+        logger.error("مهاجرت با خطا مواجه شد.")
+        sys.exit(1)
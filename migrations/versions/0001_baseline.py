@@ -0,0 +1,213 @@
+"""
+نسخه پایه ساختار دیتابیس
+جدول‌هایی که وجود ندارند ساخته می‌شوند و ستون‌هایی که اسکریپت‌های مهاجرت قدیمی
+(migrations/db_migration_*.py و add_local_path_column.py) اضافه می‌کردند، اگر در جدول‌های
+موجود نباشند افزوده می‌شوند؛ روی دیتابیس تازه و دیتابیس قدیمی هر دو قابل اجراست.
+
+ساختار در همین فایل ثابت شده و به models.py وابسته نیست تا تغییر بعدی مدل‌ها اثر این نسخه
+را عوض نکند. ایندکس‌ها در 0003 و پارتیشن‌بندی inquiries در 0009 ساخته می‌شوند؛ جدول
+inquiries اینجا به شکل قدیمی (کلید اصلی id) ساخته می‌شود تا دیتابیس تازه و قدیمی از یک
+مسیر به ساختار نهایی برسند.
+"""
+
+from sqlalchemy import (MetaData, Table, Column, Integer, BigInteger, String, Text, Boolean, Date,
+                        DateTime, ForeignKey, CheckConstraint)
+from utils.schema_migrations import add_missing_columns
+
+revision = '0001'
+description = 'Baseline schema: create missing tables and columns'
+
+metadata = MetaData()
+
+Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(64), unique=True, nullable=False),
+    Column('email', String(120)),
+    Column('password_hash', String(256)),
+    Column('is_admin', Boolean),
+    Column('telegram_id', BigInteger, unique=True),
+    Column('telegram_username', String(64)),
+    Column('first_name', String(64)),
+    Column('last_name', String(64)),
+    Column('phone', String(15)),
+    Column('language_code', String(10)),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+)
+
+for _name in ('product_categories', 'service_categories', 'educational_categories'):
+    Table(
+        _name, metadata,
+        Column('id', Integer, primary_key=True),
+        Column('name', String(255), nullable=False),
+        Column('parent_id', Integer, ForeignKey(f'{_name}.id')),
+    )
+
+Table(
+    'products', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', Text, nullable=False),
+    Column('description', Text),
+    Column('price', Integer),
+    Column('category_id', Integer, ForeignKey('product_categories.id')),
+    Column('brand', Text),
+    Column('model', String(64)),
+    Column('in_stock', Boolean),
+    Column('tags', Text),
+    Column('featured', Boolean),
+    Column('model_number', Text),
+    Column('manufacturer', Text),
+    Column('provider', String(255)),
+    Column('service_code', String(255)),
+    Column('duration', String(255)),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+)
+
+Table(
+    'services', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', Text, nullable=False),
+    Column('description', Text),
+    Column('price', Integer),
+    Column('category_id', Integer, ForeignKey('service_categories.id')),
+    Column('featured', Boolean),
+    Column('available', Boolean),
+    Column('tags', Text),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+)
+
+Table(
+    'educational_content', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('title', String(128), nullable=False),
+    Column('content', Text, nullable=False),
+    Column('category_id', Integer, ForeignKey('educational_categories.id')),
+    Column('tags', String(128)),
+    Column('featured', Boolean),
+    Column('created_at', DateTime),
+)
+
+Table(
+    'media_blobs', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('sha256', String(64), unique=True, nullable=False),
+    Column('path', String(255), nullable=False),
+    Column('size', BigInteger, nullable=False),
+    Column('file_type', String(10)),
+    Column('telegram_file_id', String(255)),
+    Column('created_at', DateTime),
+)
+
+for _name, _parent, _column, _file_type in (('product_media', 'products', 'product_id', String(255)),
+                                            ('service_media', 'services', 'service_id', String(255)),
+                                            ('educational_content_media', 'educational_content',
+                                             'content_id', Text)):
+    Table(
+        _name, metadata,
+        Column('id', Integer, primary_key=True),
+        Column(_column, Integer, ForeignKey(f'{_parent}.id', ondelete='CASCADE'),
+               nullable=_name != 'educational_content_media'),
+        Column('blob_id', Integer, ForeignKey('media_blobs.id', ondelete='SET NULL')),
+        Column('file_id', _file_type, nullable=False),
+        Column('file_type', String(10)),
+        Column('local_path', _file_type),
+        Column('variants', Text),
+        Column('width', Integer),
+        Column('height', Integer),
+        Column('created_at', DateTime),
+    )
+
+Table(
+    'inquiries', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', BigInteger, nullable=False),
+    Column('product_id', Integer, ForeignKey('products.id')),
+    Column('service_id', Integer, ForeignKey('services.id')),
+    Column('name', String(100), nullable=False),
+    Column('phone', String(20), nullable=False),
+    Column('description', Text),
+    Column('status', String(20), nullable=False),
+    Column('date', DateTime, nullable=False),
+    # در 0002 مقداردهی و NOT NULL می‌شود
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    CheckConstraint('(product_id IS NOT NULL AND service_id IS NULL) OR '
+                    '(product_id IS NULL AND service_id IS NOT NULL) OR '
+                    '(product_id IS NULL AND service_id IS NULL)',
+                    name='product_or_service_check'),
+)
+
+Table(
+    'static_content', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('content_type', String(20), nullable=False, unique=True),
+    Column('content', Text, nullable=False),
+    Column('updated_at', DateTime),
+)
+
+Table(
+    'media_storage_usage', metadata,
+    Column('entity_type', String(20), primary_key=True),
+    Column('entity_id', Integer, primary_key=True),
+    Column('files', Integer, nullable=False),
+    Column('bytes', BigInteger, nullable=False),
+    Column('missing', Integer, nullable=False),
+    Column('updated_at', DateTime),
+)
+
+Table(
+    'jobs', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('kind', String(50), nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('params', Text),
+    Column('result', Text),
+    Column('error', Text),
+    Column('progress', Integer, nullable=False),
+    Column('progress_message', String(255)),
+    Column('cancel_requested', Boolean, nullable=False),
+    Column('created_by', Integer),
+    Column('worker', String(100)),
+    Column('created_at', DateTime),
+    Column('started_at', DateTime),
+    Column('finished_at', DateTime),
+    Column('heartbeat_at', DateTime),
+)
+
+Table(
+    'inquiry_daily_stats', metadata,
+    Column('day', Date, primary_key=True),
+    Column('item_type', String(10), primary_key=True),
+    Column('item_id', Integer, primary_key=True),
+    Column('status', String(20), primary_key=True),
+    Column('category_id', Integer),
+    Column('inquiries', Integer, nullable=False),
+    Column('customers', Integer, nullable=False),
+)
+
+Table(
+    'inquiry_customer_stats', metadata,
+    Column('phone', String(20), primary_key=True),
+    Column('name', String(100)),
+    Column('inquiries', Integer, nullable=False),
+    Column('completed', Integer, nullable=False),
+    Column('first_at', DateTime),
+    Column('last_at', DateTime),
+)
+
+Table(
+    'analytics_refresh', metadata,
+    Column('name', String(50), primary_key=True),
+    Column('watermark', DateTime),
+    Column('refreshed_at', DateTime),
+    Column('days', Integer, nullable=False),
+    Column('phones', Integer, nullable=False),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    add_missing_columns(conn, metadata)
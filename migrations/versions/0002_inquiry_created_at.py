@@ -0,0 +1,16 @@
+"""
+مقداردهی created_at استعلام‌های قدیمی و NOT NULL کردن آن
+صفحه‌بندی keyset صندوق استعلام‌ها و پارتیشن‌بندی به created_at غیرتهی نیاز دارند.
+"""
+
+from sqlalchemy import text
+
+revision = '0002'
+description = 'Backfill inquiries.created_at and make it NOT NULL'
+
+
+def upgrade(conn):
+    conn.execute(text(
+        "UPDATE inquiries SET created_at = coalesce(date, CURRENT_TIMESTAMP) WHERE created_at IS NULL"))
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("ALTER TABLE inquiries ALTER COLUMN created_at SET NOT NULL"))
@@ -0,0 +1,43 @@
+"""
+ساخت ایندکس‌های جدول‌های پایه بدون قفل کردن جدول‌ها
+شامل ایندکس‌های مسیرهای پرتکرار: products.category_id، services.category_id،
+educational_content.category_id، شناسه والد جدول‌های رسانه، parent_id جدول‌های دسته‌بندی
+و ایندکس‌های inquiries (status, created_at) و (user_id, created_at).
+فهرست در همین فایل ثابت است و ایندکس‌هایی که بعداً به مدل‌ها اضافه می‌شوند نسخه خودشان را دارند.
+"""
+
+from utils.schema_migrations import create_index_concurrently
+
+revision = '0003'
+description = 'Create model indexes concurrently (hot-path foreign keys and inquiries)'
+transactional = False
+
+# (نام، جدول، ستون‌ها، یکتا)
+INDEXES = [
+    ('ix_educational_categories_parent_id', 'educational_categories', 'parent_id', False),
+    ('ix_inquiry_customer_stats_inquiries', 'inquiry_customer_stats', 'inquiries', False),
+    ('ix_jobs_status_created_at', 'jobs', 'status, created_at', False),
+    ('ix_product_categories_parent_id', 'product_categories', 'parent_id', False),
+    ('ix_service_categories_parent_id', 'service_categories', 'parent_id', False),
+    ('ix_educational_content_category_id', 'educational_content', 'category_id', False),
+    ('ix_products_category_id', 'products', 'category_id', False),
+    ('ix_services_category_id', 'services', 'category_id', False),
+    ('ix_educational_content_media_blob_id', 'educational_content_media', 'blob_id', False),
+    ('ix_educational_content_media_content_id', 'educational_content_media', 'content_id', False),
+    ('ix_inquiries_created_at_id', 'inquiries', 'created_at, id', False),
+    ('ix_inquiries_phone', 'inquiries', 'phone', False),
+    ('ix_inquiries_product_created_at', 'inquiries', 'product_id, created_at', False),
+    ('ix_inquiries_service_created_at', 'inquiries', 'service_id, created_at', False),
+    ('ix_inquiries_status_created_at_id', 'inquiries', 'status, created_at, id', False),
+    ('ix_inquiries_updated_at', 'inquiries', 'updated_at', False),
+    ('ix_inquiries_user_id_created_at', 'inquiries', 'user_id, created_at', False),
+    ('ix_product_media_blob_id', 'product_media', 'blob_id', False),
+    ('ix_product_media_product_id', 'product_media', 'product_id', False),
+    ('ix_service_media_blob_id', 'service_media', 'blob_id', False),
+    ('ix_service_media_service_id', 'service_media', 'service_id', False),
+]
+
+
+def upgrade(conn):
+    for name, table, columns, unique in INDEXES:
+        create_index_concurrently(conn, name, table, columns, unique=unique)
@@ -0,0 +1,14 @@
+"""
+کلیدهای ورود CSV (بدون تغییر ساختار)
+این نسخه در ابتدا ایندکس‌های یکتای نام محصول، خدمت، محتوای آموزشی و دسته‌ها را برای
+upsert با ON CONFLICT می‌ساخت که نام تکراری در پنل را ممنوع می‌کرد و روی دیتابیس دارای
+تکراری متوقف می‌شد. ورود CSV اکنون ردیف‌ها را با id یا جست‌وجوی کلید طبیعی پیدا می‌کند؛
+این نسخه برای حفظ ترتیب شماره‌ها خالی مانده و ایندکس‌های ساخته شده قبلی در 0008 حذف می‌شوند.
+"""
+
+revision = '0004'
+description = 'CSV import keys (superseded, no schema change)'
+
+
+def upgrade(conn):
+    pass
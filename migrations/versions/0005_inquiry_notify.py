@@ -0,0 +1,13 @@
+"""
+تریگر NOTIFY تغییرات استعلام‌ها برای نمایش زنده در پنل مدیریت
+"""
+
+from utils.inquiry_feed import install_notify_trigger
+
+revision = '0005'
+description = 'Inquiry change notification trigger'
+
+
+def upgrade(conn):
+    if conn.dialect.name == 'postgresql':
+        install_notify_trigger(conn)
@@ -0,0 +1,28 @@
+"""
+جدول تاریخچه کوئری‌های کنسول SQL پنل مدیریت
+"""
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, Boolean, DateTime, Index
+
+revision = '0006'
+description = 'SQL console query history'
+
+metadata = MetaData()
+
+sql_query_history = Table(
+    'sql_query_history', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer),
+    Column('sql', Text, nullable=False),
+    Column('mode', String(20), nullable=False),
+    Column('duration_ms', Integer),
+    Column('rows', Integer),
+    Column('truncated', Boolean, nullable=False),
+    Column('error', Text),
+    Column('created_at', DateTime),
+    Index('ix_sql_query_history_user_id_id', 'user_id', 'id'),
+)
+
+
+def upgrade(conn):
+    sql_query_history.create(conn, checkfirst=True)
@@ -0,0 +1,23 @@
+"""
+جدول outbox تغییرهای کاتالوگ برای باطل کردن کش ربات
+"""
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, DateTime, Index
+
+revision = '0007'
+description = 'Catalog change outbox'
+
+metadata = MetaData()
+
+catalog_changes = Table(
+    'catalog_changes', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('table_name', String(50), nullable=False),
+    Column('ids', Text, nullable=False),
+    Column('created_at', DateTime, nullable=False),
+    Index('ix_catalog_changes_created_at', 'created_at'),
+)
+
+
+def upgrade(conn):
+    catalog_changes.create(conn, checkfirst=True)
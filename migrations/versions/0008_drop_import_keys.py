@@ -0,0 +1,28 @@
+"""
+حذف ایندکس‌های یکتای کلید طبیعی ورود CSV که نسخه اولیه 0004 ساخته بود
+نام‌ها در پنل مدیریت تکراری‌پذیرند و ورود CSV به این ایندکس‌ها نیازی ندارد.
+"""
+
+from sqlalchemy import text
+from utils.schema_migrations import index_state
+
+revision = '0008'
+description = 'Drop unique natural-key indexes of CSV import'
+transactional = False
+
+IMPORT_KEY_INDEXES = [
+    'uq_products_name',
+    'uq_services_name',
+    'uq_educational_content_title',
+    'uq_inquiries_user_phone_date',
+    'uq_product_categories_name_parent',
+    'uq_service_categories_name_parent',
+    'uq_educational_categories_name_parent',
+]
+
+
+def upgrade(conn):
+    concurrently = 'CONCURRENTLY ' if conn.dialect.name == 'postgresql' else ''
+    for index_name in IMPORT_KEY_INDEXES:
+        if index_state(conn, index_name) is not None:
+            conn.execute(text(f"DROP INDEX {concurrently}IF EXISTS {index_name}"))
@@ -0,0 +1,163 @@
+"""
+تبدیل آنلاین جدول inquiries به جدول پارتیشن‌بندی ماهانه روی created_at
+۱. جدول سایه inquiries_partitioned با پارتیشن‌های ماهانه، پارتیشن پیش‌فرض و ایندکس‌ها ساخته می‌شود.
+۲. تریگری تغییرات جدول اصلی را هم‌زمان در جدول سایه تکرار می‌کند.
+۳. ردیف‌های موجود دسته به دسته کپی می‌شوند (FOR SHARE تا نسخه آخر هر ردیف کپی شود).
+۴. در یک تراکنش کوتاه با قفل جدول، تعداد ردیف‌ها مقایسه و نام جدول‌ها، ایندکس‌ها و
+   مالکیت sequence جابه‌جا می‌شود.
+جدول قدیمی با نام inquiries_unpartitioned برای بازگشت نگه داشته می‌شود و پس از
+اطمینان می‌توان آن را حذف کرد. اجرای ناتمام قبلی (جدول سایه باقی مانده) از ابتدا تکرار
+می‌شود و جدولی که از قبل پارتیشن‌بندی شده دست نمی‌خورد. فقط روی PostgreSQL اجرا می‌شود.
+"""
+
+import os
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from logging_config import get_logger
+from utils.inquiry_partitions import is_partitioned, ensure_partitions, month_start
+from utils.inquiry_feed import install_notify_trigger
+
+logger = get_logger('app')
+
+revision = '0009'
+description = 'Convert inquiries to a monthly partitioned table'
+transactional = False
+
+SHADOW = 'inquiries_partitioned'
+OLD = 'inquiries_unpartitioned'
+SWAP_ATTEMPTS = 5
+# تعداد شناسه در هر دسته کپی
+BATCH_SIZE = int(os.environ.get('INQUIRY_PARTITION_BATCH', 5000))
+
+# ایندکس‌های inquiries (همان‌هایی که 0003 ساخته است)
+INDEXES = [
+    ('ix_inquiries_created_at_id', 'created_at, id'),
+    ('ix_inquiries_phone', 'phone'),
+    ('ix_inquiries_product_created_at', 'product_id, created_at'),
+    ('ix_inquiries_service_created_at', 'service_id, created_at'),
+    ('ix_inquiries_status_created_at_id', 'status, created_at, id'),
+    ('ix_inquiries_updated_at', 'updated_at'),
+    ('ix_inquiries_user_id_created_at', 'user_id, created_at'),
+]
+
+MIRROR_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION inquiries_mirror() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM {SHADOW} WHERE id = OLD.id AND created_at = OLD.created_at;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {SHADOW} SELECT (NEW).* ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def create_shadow(conn):
+    """ساخت جدول سایه پارتیشن‌بندی شده با قیدها، پارتیشن‌ها و ایندکس‌ها"""
+    conn.execute(text(f"""
+        CREATE TABLE {SHADOW} (LIKE inquiries INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (created_at)
+    """))
+    conn.execute(text(f"ALTER TABLE {SHADOW} ALTER COLUMN created_at SET NOT NULL"))
+    conn.execute(text(f"ALTER TABLE {SHADOW} ADD CONSTRAINT {SHADOW}_pkey PRIMARY KEY (id, created_at)"))
+    conn.execute(text(f"ALTER TABLE {SHADOW} ADD FOREIGN KEY (product_id) REFERENCES products (id)"))
+    conn.execute(text(f"ALTER TABLE {SHADOW} ADD FOREIGN KEY (service_id) REFERENCES services (id)"))
+    conn.execute(text(f"CREATE TABLE inquiries_default PARTITION OF {SHADOW} DEFAULT"))
+
+    first = conn.execute(text("SELECT min(created_at) FROM inquiries")).scalar()
+    created = ensure_partitions(conn, first_month=month_start(first) if first else None,
+                                parent=SHADOW)
+    logger.info(f"{len(created)} monthly inquiry partitions created")
+
+    # جدول سایه هنوز خالی است، پس ساخت ایندکس‌ها سریع است
+    for name, columns in INDEXES:
+        conn.execute(text(f"CREATE INDEX {name}_new ON {SHADOW} ({columns})"))
+
+
+def copy_rows(engine, batch_size: int):
+    """کپی دسته‌ای ردیف‌های موجود به جدول سایه"""
+    with engine.connect() as conn:
+        max_id = conn.execute(text("SELECT coalesce(max(id), 0) FROM inquiries")).scalar()
+    last_id, copied = 0, 0
+    while last_id < max_id:
+        with engine.begin() as conn:
+            copied += conn.execute(text(f"""
+                INSERT INTO {SHADOW}
+                SELECT * FROM (
+                    SELECT * FROM inquiries WHERE id > :low AND id <= :high FOR SHARE
+                ) AS batch
+                ON CONFLICT DO NOTHING
+            """), {'low': last_id, 'high': last_id + batch_size}).rowcount
+        last_id += batch_size
+        logger.info(f"Copied inquiries up to id {min(last_id, max_id)} of {max_id} ({copied} rows)")
+
+
+def swap_tables(engine):
+    """جابه‌جایی جدول‌ها در یک تراکنش کوتاه؛ در صورت عدم تطابق تعداد، هیچ تغییری اعمال نمی‌شود"""
+    with engine.begin() as conn:
+        conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        conn.execute(text("LOCK TABLE inquiries IN ACCESS EXCLUSIVE MODE"))
+        source = conn.execute(text("SELECT count(*) FROM inquiries")).scalar()
+        target = conn.execute(text(f"SELECT count(*) FROM {SHADOW}")).scalar()
+        if source != target:
+            raise RuntimeError(f"Row count mismatch: inquiries={source}, {SHADOW}={target}")
+
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence('inquiries', 'id')")).scalar()
+        notify = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'inquiries_notify')")).scalar()
+        if notify:
+            conn.execute(text("DROP TRIGGER inquiries_notify ON inquiries"))
+        conn.execute(text("DROP TRIGGER inquiries_mirror ON inquiries"))
+        conn.execute(text("DROP FUNCTION inquiries_mirror()"))
+        conn.execute(text(f"ALTER TABLE inquiries RENAME TO {OLD}"))
+        conn.execute(text(f"ALTER INDEX IF EXISTS inquiries_pkey RENAME TO {OLD}_pkey"))
+        for name, _ in INDEXES:
+            conn.execute(text(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_old"))
+            conn.execute(text(f"ALTER INDEX {name}_new RENAME TO {name}"))
+        conn.execute(text(f"ALTER TABLE {SHADOW} RENAME TO inquiries"))
+        conn.execute(text(f"ALTER INDEX {SHADOW}_pkey RENAME TO inquiries_pkey"))
+        if sequence:
+            # شناسه‌ها از همان sequence ادامه پیدا کنند و حذف جدول قدیمی آن را حذف نکند
+            conn.execute(text(f"ALTER TABLE inquiries ALTER COLUMN id SET DEFAULT nextval('{sequence}')"))
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY inquiries.id"))
+        if notify:
+            # اعلان‌های پنل مدیریت روی جدول جدید ادامه پیدا کنند
+            install_notify_trigger(conn)
+    logger.info(f"Swapped inquiries for the partitioned table ({source} rows)")
+
+
+def upgrade(conn):
+    if conn.dialect.name != 'postgresql' or is_partitioned(conn):
+        return
+    engine = conn.engine
+    if conn.execute(text("SELECT to_regclass(:name)"), {'name': SHADOW}).scalar():
+        logger.info("Dropping the shadow table of an interrupted partitioning run")
+        with engine.begin() as tx:
+            tx.execute(text("DROP TRIGGER IF EXISTS inquiries_mirror ON inquiries"))
+            tx.execute(text(f"DROP TABLE {SHADOW} CASCADE"))
+
+    with engine.begin() as tx:
+        create_shadow(tx)
+        tx.execute(text(MIRROR_FUNCTION))
+        tx.execute(text("""
+            CREATE TRIGGER inquiries_mirror AFTER INSERT OR UPDATE OR DELETE ON inquiries
+            FOR EACH ROW EXECUTE FUNCTION inquiries_mirror()
+        """))
+
+    copy_rows(engine, BATCH_SIZE)
+
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        try:
+            swap_tables(engine)
+            break
+        except OperationalError as e:
+            if attempt == SWAP_ATTEMPTS:
+                raise
+            logger.warning(f"Could not lock inquiries ({e.orig}); retrying")
+            time.sleep(attempt)
+
+    logger.info(f"Old table kept as {OLD}; drop it once the partitioned table is verified")
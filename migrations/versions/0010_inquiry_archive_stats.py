@@ -0,0 +1,36 @@
+"""
+جمع‌بندی استعلام‌های بایگانی شده
+archive_closed_inquiries پیش از حذف هر دسته، تعداد روزانه و خلاصه شماره‌های آن را در این
+جدول‌ها جمع می‌زند تا تازه‌سازی گزارش‌ها تاریخچه بایگانی شده را از دست ندهد.
+"""
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, Date, DateTime
+
+revision = '0010'
+description = 'Rollups of archived inquiries for analytics'
+
+metadata = MetaData()
+
+Table(
+    'inquiry_archived_daily_stats', metadata,
+    Column('day', Date, primary_key=True),
+    Column('item_type', String(10), primary_key=True),
+    Column('item_id', Integer, primary_key=True),
+    Column('status', String(20), primary_key=True),
+    Column('inquiries', Integer, nullable=False),
+    Column('customers', Integer, nullable=False),
+)
+
+Table(
+    'inquiry_archived_customer_stats', metadata,
+    Column('phone', String(20), primary_key=True),
+    Column('name', String(100)),
+    Column('inquiries', Integer, nullable=False),
+    Column('completed', Integer, nullable=False),
+    Column('first_at', DateTime),
+    Column('last_at', DateTime),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, BigInteger, CheckConstraint
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Text, BigInteger, CheckConstraint, Index, Identity, DDL, event
 from sqlalchemy.orm import relationship, DeclarativeBase
 from datetime import datetime
 from flask_login import UserMixin
@@ -38,7 +38,7 @@ class ProductCategory(Base):
     __tablename__ = 'product_categories'
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
-    parent_id = Column(Integer, ForeignKey('product_categories.id'), nullable=True)
+    parent_id = Column(Integer, ForeignKey('product_categories.id'), nullable=True, index=True)
     parent = relationship('ProductCategory', remote_side=[id], backref='children')
 
     def __repr__(self):
@@ -48,7 +48,7 @@ class ServiceCategory(Base):
     __tablename__ = 'service_categories'
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
-    parent_id = Column(Integer, ForeignKey('service_categories.id'), nullable=True)
+    parent_id = Column(Integer, ForeignKey('service_categories.id'), nullable=True, index=True)
     parent = relationship('ServiceCategory', remote_side=[id], backref='children')
 
     def __repr__(self):
@@ -58,7 +58,7 @@ class EducationalCategory(Base):
     __tablename__ = 'educational_categories'
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
-    parent_id = Column(Integer, ForeignKey('educational_categories.id'), nullable=True)
+    parent_id = Column(Integer, ForeignKey('educational_categories.id'), nullable=True, index=True)
     parent = relationship('EducationalCategory', remote_side=[id], backref='children')
 
     def __repr__(self):
@@ -71,7 +71,7 @@ class Product(Base):
     name = Column(Text, nullable=False)
     description = Column(Text)
     price = Column(Integer, default=0)
-    category_id = Column(Integer, ForeignKey('product_categories.id'))
+    category_id = Column(Integer, ForeignKey('product_categories.id'), index=True)
     category = relationship('ProductCategory', backref='products')
     brand = Column(Text, nullable=True)
     model = Column(String(64), nullable=True)
@@ -97,7 +97,7 @@ class Service(Base):
     name = Column(Text, nullable=False)
     description = Column(Text)
     price = Column(Integer, default=0)
-    category_id = Column(Integer, ForeignKey('service_categories.id'))
+    category_id = Column(Integer, ForeignKey('service_categories.id'), index=True)
     category = relationship('ServiceCategory', backref='services')
     featured = Column(Boolean, default=False)
     available = Column(Boolean, default=True)
@@ -109,14 +109,47 @@ class Service(Base):
     def __repr__(self):
         return f'<Service {self.name}>'
 
+class MediaBlob(Base):
+    """فایل رسانه یکتا در مخزن آدرس‌دهی شده با SHA-256"""
+    __tablename__ = 'media_blobs'
+
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), unique=True, nullable=False)
+    path = Column(String(255), nullable=False)
+    size = Column(BigInteger, nullable=False, default=0)
+    file_type = Column(String(10), default='photo')
+    telegram_file_id = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MediaBlob {self.id} {self.sha256[:12]}>'
+
+class MediaStorageUsage(Base):
+    """فضای دیسک رسانه‌های هر محصول/خدمت/محتوا (توسط کار پاکسازی رسانه‌ها به‌روز می‌شود)"""
+    __tablename__ = 'media_storage_usage'
+
+    entity_type = Column(String(20), primary_key=True)  # product, service, educational
+    entity_id = Column(Integer, primary_key=True)
+    files = Column(Integer, nullable=False, default=0)
+    bytes = Column(BigInteger, nullable=False, default=0)
+    missing = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MediaStorageUsage {self.entity_type} {self.entity_id}: {self.bytes}>'
+
 class ProductMedia(Base):
     __tablename__ = 'product_media'
 
     id = Column(Integer, primary_key=True)
-    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'))
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'), index=True)
+    blob_id = Column(Integer, ForeignKey('media_blobs.id', ondelete='SET NULL'), nullable=True, index=True)
     file_id = Column(String(255), nullable=False)
     file_type = Column(String(10), default='photo')
     local_path = Column(String(255), nullable=True)
+    variants = Column(Text, nullable=True)  # JSON: نام نسخه (thumb، webp، ...) -> مسیر
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -126,10 +159,14 @@ class ServiceMedia(Base):
     __tablename__ = 'service_media'
 
     id = Column(Integer, primary_key=True)
-    service_id = Column(Integer, ForeignKey('services.id', ondelete='CASCADE'))
+    service_id = Column(Integer, ForeignKey('services.id', ondelete='CASCADE'), index=True)
+    blob_id = Column(Integer, ForeignKey('media_blobs.id', ondelete='SET NULL'), nullable=True, index=True)
     file_id = Column(String(255), nullable=False)
     file_type = Column(String(10), default='photo')
     local_path = Column(String(255), nullable=True)
+    variants = Column(Text, nullable=True)  # JSON: نام نسخه (thumb، webp، ...) -> مسیر
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -138,7 +175,8 @@ class ServiceMedia(Base):
 class Inquiry(Base):
     __tablename__ = 'inquiries'
 
-    id = Column(Integer, primary_key=True)
+    # کلید جدول (id, created_at) است چون جدول روی created_at پارتیشن‌بندی ماهانه می‌شود
+    id = Column(Integer, Identity(), primary_key=True)
     user_id = Column(BigInteger, nullable=False)
     product_id = Column(Integer, ForeignKey('products.id'), nullable=True)
     service_id = Column(Integer, ForeignKey('services.id'), nullable=True)
@@ -147,7 +185,7 @@ class Inquiry(Base):
     description = Column(Text, nullable=True)
     status = Column(String(20), nullable=False, default='new')
     date = Column(DateTime, nullable=False, default=datetime.utcnow)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     product = relationship('Product', foreign_keys=[product_id], backref='inquiries')
     service = relationship('Service', foreign_keys=[service_id], backref='inquiries')
@@ -157,7 +195,20 @@ class Inquiry(Base):
                         '(product_id IS NULL AND service_id IS NOT NULL) OR '
                         '(product_id IS NULL AND service_id IS NULL)',
                         name='product_or_service_check'),
+        # صندوق استعلام‌های پنل: صفحه‌بندی keyset و فیلترها (utils/inquiry_inbox.py)
+        Index('ix_inquiries_created_at_id', 'created_at', 'id'),
+        Index('ix_inquiries_status_created_at_id', 'status', 'created_at', 'id'),
+        Index('ix_inquiries_product_created_at', 'product_id', 'created_at'),
+        Index('ix_inquiries_service_created_at', 'service_id', 'created_at'),
+        # تازه‌سازی افزایشی گزارش‌ها (utils/inquiry_analytics.py)
+        Index('ix_inquiries_updated_at', 'updated_at'),
+        Index('ix_inquiries_phone', 'phone'),
+        # استعلام‌های اخیر هر کاربر در ربات
+        Index('ix_inquiries_user_id_created_at', 'user_id', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
+    # ORM استعلام را فقط با id می‌شناسد (Inquiry.query.get(id))
+    __mapper_args__ = {'primary_key': [id]}
 
     def __repr__(self):
         if self.product_id:
@@ -190,12 +241,19 @@ class Inquiry(Base):
         else:
             return 'نامشخص'
 
+
+# پارتیشن پیش‌فرض برای دیتابیس‌هایی که با create_all ساخته می‌شوند؛ پارتیشن‌های ماهانه
+# را نگهداری دوره‌ای (utils/inquiry_partitions.py) می‌سازد
+event.listen(Inquiry.__table__, 'after_create', DDL(
+    "CREATE TABLE IF NOT EXISTS inquiries_default PARTITION OF inquiries DEFAULT"
+).execute_if(dialect='postgresql'))
+
 class EducationalContent(Base):
     __tablename__ = 'educational_content'
     id = Column(Integer, primary_key=True)
     title = Column(String(128), nullable=False)
     content = Column(Text, nullable=False)
-    category_id = Column(Integer, ForeignKey('educational_categories.id'), nullable=True)
+    category_id = Column(Integer, ForeignKey('educational_categories.id'), nullable=True, index=True)
     tags = Column(String(128), nullable=True)
     featured = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -206,10 +264,14 @@ class EducationalContentMedia(Base):
     __tablename__ = 'educational_content_media'
 
     id = Column(Integer, primary_key=True)
-    content_id = Column(Integer, ForeignKey('educational_content.id', ondelete='CASCADE'), nullable=False)
+    content_id = Column(Integer, ForeignKey('educational_content.id', ondelete='CASCADE'), nullable=False, index=True)
+    blob_id = Column(Integer, ForeignKey('media_blobs.id', ondelete='SET NULL'), nullable=True, index=True)
     file_id = Column(Text, nullable=False)
     file_type = Column(String(10), default='photo')
     local_path = Column(Text, nullable=True)
+    variants = Column(Text, nullable=True)  # JSON: نام نسخه (thumb، webp، ...) -> مسیر
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -224,4 +286,146 @@ class StaticContent(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
-        return f'<StaticContent {self.content_type}>'
\ No newline at end of file
+        return f'<StaticContent {self.content_type}>'
+
+class InquiryDailyStat(Base):
+    """تعداد روزانه استعلام‌ها به تفکیک محصول/خدمت و وضعیت (جمع‌بندی utils/inquiry_analytics.py)"""
+    __tablename__ = 'inquiry_daily_stats'
+
+    day = Column(Date, primary_key=True)
+    item_type = Column(String(10), primary_key=True)  # product, service, general
+    item_id = Column(Integer, primary_key=True)  # برای general صفر است
+    status = Column(String(20), primary_key=True)
+    category_id = Column(Integer, nullable=True)
+    inquiries = Column(Integer, nullable=False, default=0)
+    customers = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<InquiryDailyStat {self.day} {self.item_type}:{self.item_id} {self.status}={self.inquiries}>'
+
+class InquiryCustomerStat(Base):
+    """خلاصه استعلام‌های هر شماره تماس برای گزارش مشتریان تکراری"""
+    __tablename__ = 'inquiry_customer_stats'
+
+    phone = Column(String(20), primary_key=True)
+    name = Column(String(100), nullable=True)
+    inquiries = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    first_at = Column(DateTime, nullable=True)
+    last_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_inquiry_customer_stats_inquiries', 'inquiries'),
+    )
+
+    def __repr__(self):
+        return f'<InquiryCustomerStat {self.phone}: {self.inquiries}>'
+
+class InquiryArchivedDailyStat(Base):
+    """تعداد روزانه استعلام‌های بایگانی شده؛ تازه‌سازی گزارش آن را به ردیف‌های موجود اضافه می‌کند"""
+    __tablename__ = 'inquiry_archived_daily_stats'
+
+    day = Column(Date, primary_key=True)
+    item_type = Column(String(10), primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    status = Column(String(20), primary_key=True)
+    inquiries = Column(Integer, nullable=False, default=0)
+    customers = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<InquiryArchivedDailyStat {self.day} {self.item_type}:{self.item_id} {self.status}={self.inquiries}>'
+
+class InquiryArchivedCustomerStat(Base):
+    """خلاصه استعلام‌های بایگانی شده هر شماره تماس"""
+    __tablename__ = 'inquiry_archived_customer_stats'
+
+    phone = Column(String(20), primary_key=True)
+    name = Column(String(100), nullable=True)
+    inquiries = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    first_at = Column(DateTime, nullable=True)
+    last_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<InquiryArchivedCustomerStat {self.phone}: {self.inquiries}>'
+
+class AnalyticsRefresh(Base):
+    """وضعیت آخرین تازه‌سازی هر جمع‌بندی گزارش"""
+    __tablename__ = 'analytics_refresh'
+
+    name = Column(String(50), primary_key=True)
+    watermark = Column(DateTime, nullable=True)
+    refreshed_at = Column(DateTime, nullable=True)
+    days = Column(Integer, nullable=False, default=0)
+    phones = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<AnalyticsRefresh {self.name} {self.watermark}>'
+
+class Job(Base):
+    """کار پس‌زمینه پنل مدیریت (ورود داده، بازیابی، پشتیبان‌گیری و ...)"""
+    __tablename__ = 'jobs'
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default='queued')
+    params = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    progress = Column(Integer, nullable=False, default=0)
+    progress_message = Column(String(255), nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    created_by = Column(Integer, nullable=True)
+    worker = Column(String(100), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_jobs_status_created_at', 'status', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed', 'cancelled')
+
+class CatalogChange(Base):
+    """صندوق خروجی (outbox) تغییرهای کاتالوگ برای باطل کردن کش پردازه‌های دیگر"""
+    __tablename__ = 'catalog_changes'
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(50), nullable=False)
+    ids = Column(Text, nullable=False, default='[]')  # JSON؛ فهرست خالی یعنی کل جدول
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_catalog_changes_created_at', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<CatalogChange {self.id} {self.table_name}>'
+
+class SqlQueryHistory(Base):
+    """تاریخچه کوئری‌های کنسول SQL پنل مدیریت"""
+    __tablename__ = 'sql_query_history'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=True)
+    sql = Column(Text, nullable=False)
+    mode = Column(String(20), nullable=False, default='run')
+    duration_ms = Column(Integer, nullable=True)
+    rows = Column(Integer, nullable=True)
+    truncated = Column(Boolean, nullable=False, default=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_sql_query_history_user_id_id', 'user_id', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<SqlQueryHistory {self.id} {self.mode}>'
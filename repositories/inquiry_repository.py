@@ -3,6 +3,7 @@ from sqlalchemy.orm import scoped_session
 from models import Inquiry
 from logging_config import get_logger
 from datetime import datetime
+from utils.inquiry_partitions import INQUIRY_HOT_DAYS, hot_cutoff
 
 logger = get_logger('app')
 
@@ -19,7 +20,8 @@ class InquiryRepository:
         """
         self.session = session
 
-    def create_inquiry(self, user_id: int, name: str, phone: str, description: str, product_id: int = None, service_id: int = None) -> bool:
+    def create_inquiry(self, user_id: int, name: str, phone: str, description: str, product_id: int = None, service_id: int = None,
+                       created_at: datetime = None) -> bool:
         """
         ایجاد درخواست جدید.
         
@@ -30,6 +32,7 @@ class InquiryRepository:
             description: توضیحات درخواست
             product_id: شناسه محصول (اختیاری)
             service_id: شناسه سرویس (اختیاری)
+            created_at: زمان ثبت (برای درخواست‌های صف شده هنگام قطع دیتابیس؛ پیش‌فرض اکنون)
         
         خروجی:
             True اگه موفق باشه، False در غیر این صورت
@@ -46,7 +49,8 @@ class InquiryRepository:
                 product_id=product_id,
                 service_id=service_id,
                 status='new',
-                date=datetime.utcnow()
+                date=created_at or datetime.utcnow(),
+                created_at=created_at or datetime.utcnow()
             )
             self.session.add(inquiry)
             self.session.commit()
@@ -59,13 +63,16 @@ class InquiryRepository:
         finally:
             self.session.close()
 
-    def get_inquiries(self, user_id: int = None, status: str = None) -> List[Dict]:
+    def get_inquiries(self, user_id: int = None, status: str = None,
+                      days: Optional[int] = INQUIRY_HOT_DAYS) -> List[Dict]:
         """
-        گرفتن درخواست‌ها با فیلتر اختیاری.
+        گرفتن درخواست‌ها با فیلتر اختیاری، جدیدترین اول.
         
         آرگومان‌ها:
             user_id: شناسه تلگرام کاربر (اختیاری)
             status: وضعیت درخواست (اختیاری)
+            days: فقط درخواست‌های این چند روز اخیر (فقط پارتیشن‌های داغ خوانده می‌شوند)؛
+                None برای کل تاریخچه
         
         خروجی:
             لیست دیکشنری‌های درخواست‌ها
@@ -76,7 +83,9 @@ class InquiryRepository:
                 query = query.filter_by(user_id=user_id)
             if status:
                 query = query.filter_by(status=status)
-            inquiries = query.all()
+            if days is not None:
+                query = query.filter(Inquiry.created_at >= hot_cutoff(days))
+            inquiries = query.order_by(Inquiry.created_at.desc(), Inquiry.id.desc()).all()
             return [
                 {
                     'id': inquiry.id,
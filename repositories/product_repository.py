@@ -2,6 +2,7 @@ from typing import Dict, List, Optional
 from sqlalchemy.orm import scoped_session
 from models import Product, ProductMedia, ProductCategory
 from logging_config import get_logger
+from utils.media_store import share_telegram_file_id
 
 logger = get_logger('app')
 
@@ -9,14 +10,16 @@ class ProductRepository:
     """
     مدیریت عملیات دیتابیس برای محصولات، رسانه‌ها، و دسته‌بندی‌های محصول.
     """
-    def __init__(self, session: scoped_session):
+    def __init__(self, session: scoped_session, read_session: Optional[scoped_session] = None):
         """
         مقداردهی اولیه با session دیتابیس.
 
         آرگومان‌ها:
             session: نمونه scoped_session برای تعامل با دیتابیس
+            read_session: session خواندن‌های کاتالوگ (replica در صورت تنظیم)؛ پیش‌فرض همان session
         """
         self.session = session
+        self.read_session = read_session or session
 
     def get_product(self, product_id: int) -> Optional[Dict]:
         """
@@ -29,7 +32,7 @@ class ProductRepository:
             دیکشنری اطلاعات محصول یا None اگه پیدا نشه
         """
         try:
-            product = self.session.query(Product).filter_by(id=product_id).first()
+            product = self.read_session.query(Product).filter_by(id=product_id).first()
             if product:
                 return {
                     'id': product.id,
@@ -56,7 +59,7 @@ class ProductRepository:
             logger.error(f"خطا در گرفتن محصول {product_id}: {str(e)}")
             return None
         finally:
-            self.session.close()
+            self.read_session.close()
 
     def get_product_media(self, product_id: int) -> List[Dict]:
         """
@@ -69,7 +72,7 @@ class ProductRepository:
             لیست دیکشنری‌های رسانه‌ها
         """
         try:
-            media_list = self.session.query(ProductMedia).filter_by(product_id=product_id).all()
+            media_list = self.read_session.query(ProductMedia).filter_by(product_id=product_id).all()
             return [
                 {
                     'id': media.id,
@@ -85,7 +88,7 @@ class ProductRepository:
             logger.error(f"خطا در گرفتن رسانه‌های محصول {product_id}: {str(e)}")
             return []
         finally:
-            self.session.close()
+            self.read_session.close()
 
     def update_product_media_file_id(self, media_id: int, new_file_id: str) -> bool:
         """
@@ -107,8 +110,10 @@ class ProductRepository:
                 logger.warning(f"رسانه با id {media_id} پیدا نشد")
                 return False
             media.file_id = new_file_id
+            shared = share_telegram_file_id(self.session, media.blob_id, new_file_id)
             self.session.commit()
-            logger.debug(f"file_id رسانه {media_id} به {new_file_id} به‌روزرسانی شد")
+            logger.debug(f"file_id رسانه {media_id} به {new_file_id} به‌روزرسانی شد"
+                         f" ({shared} رسانه دیگر با همان فایل)")
             return True
         except Exception as e:
             self.session.rollback()
@@ -128,7 +133,7 @@ class ProductRepository:
             دیکشنری اطلاعات دسته‌بندی یا None اگه پیدا نشه
         """
         try:
-            category = self.session.query(ProductCategory).filter_by(id=category_id).first()
+            category = self.read_session.query(ProductCategory).filter_by(id=category_id).first()
             if category:
                 return {
                     'id': category.id,
@@ -141,7 +146,7 @@ class ProductRepository:
             logger.error(f"خطا در گرفتن دسته‌بندی محصول {category_id}: {str(e)}")
             return None
         finally:
-            self.session.close()
+            self.read_session.close()
 
     def get_all_product_categories(self) -> List[Dict]:
         """
@@ -151,7 +156,7 @@ class ProductRepository:
             لیست دیکشنری‌های دسته‌بندی‌ها
         """
         try:
-            categories = self.session.query(ProductCategory).all()
+            categories = self.read_session.query(ProductCategory).all()
             return [
                 {
                     'id': category.id,
@@ -164,7 +169,7 @@ class ProductRepository:
             logger.error(f"خطا در گرفتن همه دسته‌بندی‌های محصول: {str(e)}")
             return []
         finally:
-            self.session.close()
+            self.read_session.close()
 
     def get_product_categories(self, parent_id: Optional[int] = None) -> List[Dict]:
         """
@@ -176,7 +181,7 @@ class ProductRepository:
         خروجی:
             لیست دیکشنری‌های دسته‌بندی‌ها با اطلاعات اضافی
         """
-        session = self.session()
+        session = self.read_session()
         try:
             query = session.query(ProductCategory)
             if parent_id is None:
@@ -207,7 +212,7 @@ class ProductRepository:
         """Get all products in a category"""
        
         try:
-            products = self.session.query(Product).filter_by(category_id=category_id).order_by(Product.name).all()
+            products = self.read_session.query(Product).filter_by(category_id=category_id).order_by(Product.name).all()
             return [{
                 'id': p.id,
                 'name': p.name,
@@ -219,4 +224,4 @@ class ProductRepository:
             logger.error(f"Error getting products: {str(e)}")
             return []
         finally:
-            self.session.close()
\ No newline at end of file
+            self.read_session.close()
\ No newline at end of file
@@ -2,6 +2,7 @@ from typing import Dict, List, Optional
 from sqlalchemy.orm import scoped_session
 from models import Service, ServiceMedia, ServiceCategory
 from logging_config import get_logger
+from utils.media_store import share_telegram_file_id
 
 logger = get_logger('app')
 
@@ -9,14 +10,16 @@ class ServiceRepository:
     """
     مدیریت عملیات دیتابیس برای سرویس‌ها، رسانه‌ها، و دسته‌بندی‌های سرویس.
     """
-    def __init__(self, session: scoped_session):
+    def __init__(self, session: scoped_session, read_session: Optional[scoped_session] = None):
         """
         مقداردهی اولیه با session دیتابیس.
         
         آرگومان‌ها:
             session: نمونه scoped_session برای تعامل با دیتابیس
+            read_session: session خواندن‌های کاتالوگ (replica در صورت تنظیم)؛ پیش‌فرض همان session
         """
         self.session = session
+        self.read_session = read_session or session
 
     def get_service(self, service_id: int) -> Optional[Dict]:
         """
@@ -29,7 +32,7 @@ class ServiceRepository:
             دیکشنری اطلاعات سرویس یا None اگه پیدا نشه
         """
         try:
-            service = self.session.query(Service).filter_by(id=service_id).first()
+            service = self.read_session.query(Service).filter_by(id=service_id).first()
             if service:
                 return {
                     'id': service.id,
@@ -49,7 +52,7 @@ class ServiceRepository:
             logger.error(f"خطا در گرفتن سرویس {service_id}: {str(e)}")
             return None
         finally:
-            self.session.close()
+            self.read_session.close()
 
     def get_service_media(self, service_id: int) -> List[Dict]:
         """
@@ -62,7 +65,7 @@ class ServiceRepository:
             لیست دیکشنری‌های رسانه‌ها
         """
         try:
-            media_list = self.session.query(ServiceMedia).filter_by(service_id=service_id).all()
+            media_list = self.read_session.query(ServiceMedia).filter_by(service_id=service_id).all()
             return [
                 {
                     'id': media.id,
@@ -78,7 +81,7 @@ class ServiceRepository:
             logger.error(f"خطا در گرفتن رسانه‌های سرویس {service_id}: {str(e)}")
             return []
         finally:
-            self.session.close()
+            self.read_session.close()
 
     def update_service_media_file_id(self, media_id: int, new_file_id: str) -> bool:
         """
@@ -100,8 +103,10 @@ class ServiceRepository:
                 logger.warning(f"رسانه با id {media_id} پیدا نشد")
                 return False
             media.file_id = new_file_id
+            shared = share_telegram_file_id(self.session, media.blob_id, new_file_id)
             self.session.commit()
-            logger.debug(f"file_id رسانه {media_id} به {new_file_id} به‌روزرسانی شد")
+            logger.debug(f"file_id رسانه {media_id} به {new_file_id} به‌روزرسانی شد"
+                         f" ({shared} رسانه دیگر با همان فایل)")
             return True
         except Exception as e:
             self.session.rollback()
@@ -121,7 +126,7 @@ class ServiceRepository:
             دیکشنری اطلاعات دسته‌بندی یا None اگه پیدا نشه
         """
         try:
-            category = self.session.query(ServiceCategory).filter_by(id=category_id).first()
+            category = self.read_session.query(ServiceCategory).filter_by(id=category_id).first()
             if category:
                 return {
                     'id': category.id,
@@ -134,7 +139,7 @@ class ServiceRepository:
             logger.error(f"خطا در گرفتن دسته‌بندی سرویس {category_id}: {str(e)}")
             return None
         finally:
-            self.session.close()
+            self.read_session.close()
 
     def get_all_service_categories(self) -> List[Dict]:
         """
@@ -144,7 +149,7 @@ class ServiceRepository:
             لیست دیکشنری‌های دسته‌بندی‌ها
         """
         try:
-            categories = self.session.query(ServiceCategory).all()
+            categories = self.read_session.query(ServiceCategory).all()
             return [
                 {
                     'id': category.id,
@@ -157,4 +162,4 @@ class ServiceRepository:
             logger.error(f"خطا در گرفتن همه دسته‌بندی‌های سرویس: {str(e)}")
             return []
         finally:
-            self.session.close()
\ No newline at end of file
+            self.read_session.close()
\ No newline at end of file
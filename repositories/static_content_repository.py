@@ -9,14 +9,16 @@ class StaticContentRepository:
     """
     مدیریت عملیات دیتابیس برای محتوای ثابت.
     """
-    def __init__(self, session: scoped_session):
+    def __init__(self, session: scoped_session, read_session: Optional[scoped_session] = None):
         """
         مقداردهی اولیه با session دیتابیس.
         
         آرگومان‌ها:
             session: نمونه scoped_session برای تعامل با دیتابیس
+            read_session: session خواندن‌های کاتالوگ (replica در صورت تنظیم)؛ پیش‌فرض همان session
         """
         self.session = session
+        self.read_session = read_session or session
 
     def get_static_content(self, content_type: str) -> Optional[Dict]:
         """
@@ -29,7 +31,7 @@ class StaticContentRepository:
             دیکشنری محتوای ثابت یا None اگه پیدا نشه
         """
         try:
-            content = self.session.query(StaticContent).filter_by(content_type=content_type).first()
+            content = self.read_session.query(StaticContent).filter_by(content_type=content_type).first()
             if content:
                 return {
                     'id': content.id,
@@ -43,4 +45,4 @@ class StaticContentRepository:
             logger.error(f"خطا در گرفتن محتوای ثابت {content_type}: {str(e)}")
             return None
         finally:
-            self.session.close()
\ No newline at end of file
+            self.read_session.close()
\ No newline at end of file
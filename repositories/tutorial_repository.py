@@ -2,6 +2,7 @@ from typing import Dict, List, Optional
 from sqlalchemy.orm import scoped_session
 from models import EducationalContent, EducationalContentMedia, EducationalCategory
 from logging_config import get_logger
+from utils.media_store import share_telegram_file_id
 
 logger = get_logger('app')
 
@@ -9,14 +10,16 @@ class TutorialRepository:
     """
     مدیریت عملیات دیتابیس برای محتوای آموزشی، رسانه‌ها، و دسته‌بندی‌های آموزشی.
     """
-    def __init__(self, session: scoped_session):
+    def __init__(self, session: scoped_session, read_session: Optional[scoped_session] = None):
         """
         مقداردهی اولیه با session دیتابیس.
         
         آرگومان‌ها:
             session: نمونه scoped_session برای تعامل با دیتابیس
+            read_session: session خواندن‌های کاتالوگ (replica در صورت تنظیم)؛ پیش‌فرض همان session
         """
         self.session = session
+        self.read_session = read_session or session
 
     def get_educational_content(self, content_id: int) -> Optional[Dict]:
         """
@@ -29,7 +32,7 @@ class TutorialRepository:
             دیکشنری اطلاعات محتوا یا None اگه پیدا نشه
         """
         try:
-            content = self.session.query(EducationalContent).filter_by(id=content_id).first()
+            content = self.read_session.query(EducationalContent).filter_by(id=content_id).first()
             if content:
                 return {
                     'id': content.id,
@@ -46,7 +49,7 @@ class TutorialRepository:
             logger.error(f"خطا در گرفتن محتوای آموزشی {content_id}: {str(e)}")
             return None
         finally:
-            self.session.close()
+            self.read_session.close()
 
     def get_educational_content_media(self, content_id: int) -> List[Dict]:
         """
@@ -59,7 +62,7 @@ class TutorialRepository:
             لیست دیکشنری‌های رسانه‌ها
         """
         try:
-            media_list = self.session.query(EducationalContentMedia).filter_by(content_id=content_id).all()
+            media_list = self.read_session.query(EducationalContentMedia).filter_by(content_id=content_id).all()
             return [
                 {
                     'id': media.id,
@@ -75,7 +78,7 @@ class TutorialRepository:
             logger.error(f"خطا در گرفتن رسانه‌های محتوای آموزشی {content_id}: {str(e)}")
             return []
         finally:
-            self.session.close()
+            self.read_session.close()
 
     def update_educational_content_media_file_id(self, media_id: int, new_file_id: str) -> bool:
         """
@@ -97,8 +100,10 @@ class TutorialRepository:
                 logger.warning(f"رسانه با id {media_id} پیدا نشد")
                 return False
             media.file_id = new_file_id
+            shared = share_telegram_file_id(self.session, media.blob_id, new_file_id)
             self.session.commit()
-            logger.debug(f"file_id رسانه {media_id} به {new_file_id} به‌روزرسانی شد")
+            logger.debug(f"file_id رسانه {media_id} به {new_file_id} به‌روزرسانی شد"
+                         f" ({shared} رسانه دیگر با همان فایل)")
             return True
         except Exception as e:
             self.session.rollback()
@@ -118,7 +123,7 @@ class TutorialRepository:
             دیکشنری اطلاعات دسته‌بندی یا None اگه پیدا نشه
         """
         try:
-            category = self.session.query(EducationalCategory).filter_by(id=category_id).first()
+            category = self.read_session.query(EducationalCategory).filter_by(id=category_id).first()
             if category:
                 return {
                     'id': category.id,
@@ -131,7 +136,7 @@ class TutorialRepository:
             logger.error(f"خطا در گرفتن دسته‌بندی آموزشی {category_id}: {str(e)}")
             return None
         finally:
-            self.session.close()
+            self.read_session.close()
 
     def get_all_educational_categories(self) -> List[Dict]:
         """
@@ -141,7 +146,7 @@ class TutorialRepository:
             لیست دیکشنری‌های دسته‌بندی‌ها
         """
         try:
-            categories = self.session.query(EducationalCategory).all()
+            categories = self.read_session.query(EducationalCategory).all()
             return [
                 {
                     'id': category.id,
@@ -154,4 +159,4 @@ class TutorialRepository:
             logger.error(f"خطا در گرفتن همه دسته‌بندی‌های آموزشی: {str(e)}")
             return []
         finally:
-            self.session.close()
\ No newline at end of file
+            self.read_session.close()
\ No newline at end of file
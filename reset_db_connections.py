@@ -4,9 +4,14 @@
 """
 
 import os
-import psycopg2
+import sys
 import logging
 from dotenv import load_dotenv
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.db_engine import create_db_engine, direct_engine
 
 # Load environment variables
 load_dotenv()
@@ -18,36 +23,23 @@ logger = logging.getLogger(__name__)
 
 def reset_database_connections():
     """قطع کردن تمام اتصالات فعال به پایگاه داده"""
-    conn = None
-    cursor = None
     try:
-        # Connect to the database
-        database_url = os.environ.get("DATABASE_URL")
-        conn = psycopg2.connect(database_url)
-        conn.autocommit = True
-        cursor = conn.cursor()
-        
-        # Get database name from connection string
-        db_name = database_url.split('/')[-1].split('?')[0]
-        
-        # Terminate all connections to the database except our own
-        cursor.execute("""
-            SELECT pg_terminate_backend(pid)
-            FROM pg_stat_activity
-            WHERE pid <> pg_backend_pid()
-            AND datname = %s
-        """, (db_name,))
-        
-        logger.info("All connections to the database have been terminated")
-        
+        # پشت PgBouncer از اتصال مستقیم استفاده می‌شود تا اتصال‌های سرور دیده شوند
+        engine = direct_engine(create_db_engine(role='script'))
+        with engine.begin() as conn:
+            # Terminate all connections to the database except our own
+            terminated = conn.execute(text("""
+                SELECT count(pg_terminate_backend(pid))
+                FROM pg_stat_activity
+                WHERE pid <> pg_backend_pid()
+                AND datname = current_database()
+            """)).scalar()
+
+        logger.info(f"{terminated} connections to the database have been terminated")
+
     except Exception as e:
         logger.error(f"Error resetting database connections: {e}")
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 if __name__ == "__main__":
-    reset_database_connections()
\ No newline at end of file
+    reset_database_connections()
@@ -650,7 +650,8 @@ def initialize_secure_database():
         with app.app_context():
             # ایجاد جداول
             print("📊 ایجاد جداول پایگاه داده...")
-            db.create_all()
+            from utils.schema_migrations import upgrade
+            upgrade(db.engine)
             print("✅ جداول پایگاه داده ایجاد شدند")
             
             # بررسی و ایجاد کاربر ادمین
@@ -3,8 +3,10 @@
 """
 
 import os
+import shutil
 import logging
 from typing import Tuple, List, Dict, Optional
+from PIL import Image, ImageOps
 from werkzeug.utils import secure_filename
 from flask import current_app, send_from_directory
 
@@ -15,6 +17,22 @@ VIDEO = ('mp4', 'mov', 'avi', 'webm')
 # Allowed media types
 ALLOWED_MEDIA_TYPES = ['photo', 'video']
 
+# Telegram photo limits: width + height <= 10000, ratio <= 20, size <= 10MB.
+# Telegram re-encodes photos to at most 2560px on the long side, so larger
+# originals only waste disk and upload time.
+TELEGRAM_PHOTO_MAX_SIDE = 2560
+TELEGRAM_PHOTO_MAX_SUM = 10000
+TELEGRAM_PHOTO_MAX_RATIO = 20
+TELEGRAM_PHOTO_MAX_BYTES = 10 * 1024 * 1024
+
+# Fixed-size variants generated for every processed photo
+THUMBNAIL_SIZES = {
+    'thumb': (320, 320),
+    'card': (640, 480),
+}
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -122,6 +140,114 @@ def handle_media_upload(file, directory: str, file_type: str = 'photo',
         logger.error(f"Error in file upload: {e}")
         return False, None
 
+def _variant_path(path: str, suffix: str, extension: str) -> str:
+    base, _ext = os.path.splitext(path)
+    return f"{base}{suffix}.{extension}"
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """Convert palette/alpha images to RGB on a white background for JPEG output"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def _webp_ready(image: Image.Image) -> Image.Image:
+    """WebP only accepts RGB/RGBA"""
+    if image.mode in ('RGB', 'RGBA'):
+        return image
+    if image.mode in ('LA', 'P', 'PA'):
+        return image.convert('RGBA')
+    return image.convert('RGB')
+
+
+def fit_telegram_limits(size: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    Compute the largest size within Telegram's photo limits
+
+    Args:
+        size: (width, height) of the original image
+
+    Returns:
+        (width, height) that keeps the aspect ratio
+    """
+    width, height = size
+    scale = min(1.0,
+                TELEGRAM_PHOTO_MAX_SIDE / max(width, height),
+                TELEGRAM_PHOTO_MAX_SUM / (width + height))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def process_image(path: str, dest: Optional[str] = None) -> Dict:
+    """
+    Normalize an uploaded photo and generate its variants
+
+    The EXIF orientation is applied to the pixels and all EXIF data is
+    dropped, the image is downscaled to Telegram's photo limits, and a
+    fixed-size JPEG thumbnail plus WebP copies are written next to it.
+
+    Args:
+        path: Path of the uploaded photo
+        dest: Where to write the normalized photo (defaults to overwriting path).
+            Content-addressed files are never rewritten, so the blob store
+            passes a new path here.
+
+    Returns:
+        Dict with width, height and a 'variants' map of variant name -> path
+
+    Raises:
+        ValueError: If the aspect ratio cannot be sent as a Telegram photo
+    """
+    with Image.open(path) as original:
+        animated = getattr(original, 'is_animated', False)
+        image_format = original.format
+        image = ImageOps.exif_transpose(original)
+        if image is original:
+            image = original.copy()
+
+    width, height = image.size
+    if max(width, height) / min(width, height) > TELEGRAM_PHOTO_MAX_RATIO:
+        raise ValueError(f"Aspect ratio of {path} exceeds Telegram's photo limit")
+
+    dest = dest or path
+    variants = {}
+    if not animated:
+        target = fit_telegram_limits(image.size)
+        if target != image.size:
+            image = image.resize(target, Image.LANCZOS)
+        # Re-save without the exif argument so no metadata is carried over
+        if image_format in ('JPEG', 'MPO'):
+            _flatten(image).save(dest, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+            if os.path.getsize(dest) > TELEGRAM_PHOTO_MAX_BYTES:
+                _flatten(image).save(dest, 'JPEG', quality=70, optimize=True, progressive=True)
+        else:
+            image.save(dest, image_format, optimize=True)
+
+        webp_path = _variant_path(path, '', 'webp')
+        if webp_path != path:
+            _webp_ready(image).save(webp_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+            variants['webp'] = webp_path
+    elif dest != path:
+        shutil.copyfile(path, dest)
+
+    for name, size in THUMBNAIL_SIZES.items():
+        thumbnail = ImageOps.fit(image, size, Image.LANCZOS)
+        thumbnail_path = _variant_path(path, f'_{name}', 'jpg')
+        _flatten(thumbnail).save(thumbnail_path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+        variants[name] = thumbnail_path
+        webp_thumbnail_path = _variant_path(path, f'_{name}', 'webp')
+        _webp_ready(thumbnail).save(webp_thumbnail_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+        variants[f'{name}_webp'] = webp_thumbnail_path
+
+    logger.info(f"Processed image {path}: {image.size[0]}x{image.size[1]}, {len(variants)} variants")
+    return {'width': image.size[0], 'height': image.size[1], 'variants': variants}
+
+
 def allowed_media_type(file, file_type: str) -> bool:
     """
     Check if file is allowed for the given media type
@@ -133,11 +259,26 @@ def allowed_media_type(file, file_type: str) -> bool:
     Returns:
         True if file is allowed, False otherwise
     """
-    if not file or not file.filename or '.' not in file.filename:
+    if not file or not file.filename:
         return False
-    
-    extension = file.filename.rsplit('.', 1)[1].lower()
-    
+    return allowed_media_filename(file.filename, file_type)
+
+def allowed_media_filename(filename: str, file_type: str) -> bool:
+    """
+    Check if a filename has an allowed extension for the given media type
+
+    Args:
+        filename: Original file name
+        file_type: Type of media (photo/video)
+
+    Returns:
+        True if the extension is allowed, False otherwise
+    """
+    if not filename or '.' not in filename:
+        return False
+
+    extension = filename.rsplit('.', 1)[1].lower()
+
     if file_type == 'photo':
         return extension in ['jpg', 'jpeg', 'png', 'gif']
     elif file_type == 'video':
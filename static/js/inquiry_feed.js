@@ -0,0 +1,61 @@
+/*
+ * دریافت زنده تغییرات استعلام‌ها از /admin/inquiries/stream (Server-Sent Events)
+ * EventSource پس از قطع اتصال خودکار دوباره وصل می‌شود و با Last-Event-ID
+ * رویدادهای از دست رفته را می‌گیرد.
+ */
+(function (window) {
+    'use strict';
+
+    const STATUS_LABELS = {
+        new: 'جدید',
+        pending: 'در انتظار بررسی',
+        in_progress: 'در حال بررسی',
+        completed: 'تکمیل شده',
+        rejected: 'رد شده',
+        cancelled: 'لغو شده'
+    };
+
+    function connect(url, onChange) {
+        if (!window.EventSource) {
+            return null;
+        }
+        const source = new EventSource(url);
+        source.addEventListener('inquiry', function (event) {
+            let change;
+            try {
+                change = JSON.parse(event.data);
+            } catch (e) {
+                return;
+            }
+            onChange(change);
+        });
+        return source;
+    }
+
+    // تغییر شمارنده‌ها بر اساس نوع رویداد: {وضعیت: +1/-1}
+    function countDelta(change) {
+        const delta = {};
+        const add = function (status, value) {
+            if (status) {
+                delta[status] = (delta[status] || 0) + value;
+            }
+        };
+        if (change.op === 'insert') {
+            add('all', 1);
+            add(change.status, 1);
+        } else if (change.op === 'delete') {
+            add('all', -1);
+            add(change.status, -1);
+        } else if (change.op === 'update' && change.old_status !== change.status) {
+            add(change.old_status, -1);
+            add(change.status, 1);
+        }
+        return delta;
+    }
+
+    window.InquiryFeed = {
+        connect: connect,
+        countDelta: countDelta,
+        statusLabels: STATUS_LABELS
+    };
+})(window);
@@ -0,0 +1,137 @@
+/*
+ * آپلود تکه‌تکه و قابل ادامه رسانه‌ها از طریق /admin/uploads
+ * شناسه هر آپلود در localStorage نگه داشته می‌شود تا پس از قطع اتصال یا
+ * بارگذاری مجدد صفحه، ارسال از آخرین offset ذخیره شده ادامه یابد.
+ */
+(function (window) {
+    'use strict';
+
+    const MAX_RETRIES = 8;
+
+    function storageKey(entity, entityId, file) {
+        return ['rfbot-upload', entity, entityId, file.name, file.size, file.lastModified].join(':');
+    }
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    async function request(method, url, options) {
+        const response = await fetch(url, Object.assign({method: method, credentials: 'same-origin'}, options));
+        let body = {};
+        try {
+            body = await response.json();
+        } catch (e) {
+            body = {};
+        }
+        return {status: response.status, body: body};
+    }
+
+    async function startOrResume(entity, entityId, fileType, file) {
+        const key = storageKey(entity, entityId, file);
+        const saved = window.localStorage.getItem(key);
+        if (saved) {
+            const status = await request('GET', '/admin/uploads/' + saved);
+            if (status.status === 200) {
+                return {id: saved, offset: status.body.offset, chunkSize: status.body.chunk_size, key: key};
+            }
+            window.localStorage.removeItem(key);
+        }
+        const created = await request('POST', '/admin/uploads', {
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                entity: entity,
+                entity_id: entityId,
+                file_type: fileType,
+                filename: file.name,
+                size: file.size
+            })
+        });
+        if (created.status !== 201) {
+            throw new Error(created.body.error || 'شروع آپلود ناموفق بود');
+        }
+        window.localStorage.setItem(key, created.body.upload_id);
+        return {id: created.body.upload_id, offset: 0, chunkSize: created.body.chunk_size, key: key};
+    }
+
+    /**
+     * آپلود یک فایل به صورت تکه‌تکه
+     * onProgress(sentBytes, totalBytes) پس از هر تکه فراخوانی می‌شود.
+     */
+    async function uploadFile(entity, entityId, fileType, file, onProgress) {
+        const upload = await startOrResume(entity, entityId, fileType, file);
+        const chunkSize = upload.chunkSize || 8 * 1024 * 1024;
+        let offset = upload.offset;
+        let retries = 0;
+
+        while (offset < file.size) {
+            const chunk = file.slice(offset, Math.min(offset + chunkSize, file.size));
+            let result;
+            try {
+                result = await request('PATCH', '/admin/uploads/' + upload.id, {
+                    headers: {
+                        'Content-Type': 'application/offset+octet-stream',
+                        'Upload-Offset': String(offset)
+                    },
+                    body: chunk
+                });
+            } catch (networkError) {
+                result = {status: 0, body: {}};
+            }
+
+            if (result.status === 200) {
+                offset = result.body.offset;
+                retries = 0;
+                if (onProgress) {
+                    onProgress(offset, file.size);
+                }
+                if (result.body.complete) {
+                    window.localStorage.removeItem(upload.key);
+                    return result.body;
+                }
+                continue;
+            }
+            if (result.status === 409 && typeof result.body.offset === 'number') {
+                // سرور بخشی از تکه قبلی را دریافت کرده است؛ از offset سرور ادامه می‌دهیم
+                offset = result.body.offset;
+                continue;
+            }
+            if ((result.status === 0 || result.status === 423 || result.status >= 500) && retries < MAX_RETRIES) {
+                retries += 1;
+                await sleep(Math.min(1000 * Math.pow(2, retries), 30000));
+                const status = await request('GET', '/admin/uploads/' + upload.id).catch(() => null);
+                if (status && status.status === 200) {
+                    offset = status.body.offset;
+                }
+                continue;
+            }
+            if (result.status === 404) {
+                window.localStorage.removeItem(upload.key);
+            }
+            throw new Error(result.body.error || 'آپلود فایل ناموفق بود');
+        }
+        window.localStorage.removeItem(upload.key);
+        return {complete: true};
+    }
+
+    /**
+     * آپلود چند فایل پشت سر هم با نمایش پیشرفت کلی
+     */
+    async function uploadFiles(entity, entityId, fileType, files, onProgress) {
+        const total = Array.from(files).reduce((sum, file) => sum + file.size, 0);
+        let done = 0;
+        const results = [];
+        for (const file of files) {
+            const result = await uploadFile(entity, entityId, fileType, file, function (sent) {
+                if (onProgress) {
+                    onProgress(done + sent, total, file.name);
+                }
+            });
+            done += file.size;
+            results.push(result);
+        }
+        return results;
+    }
+
+    window.ResumableUpload = {uploadFile: uploadFile, uploadFiles: uploadFiles};
+})(window);
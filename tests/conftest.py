@@ -10,12 +10,56 @@ from PIL import Image
 import io
 import shutil
 from werkzeug.datastructures import FileStorage
+from sqlalchemy import create_engine, text
 
 # اضافه کردن مسیر پروژه به سیستم
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# ماژول bot (از مسیر handlers) بدون توکن با exit خارج می‌شود و جمع‌آوری تست‌ها را متوقف می‌کند
+os.environ.setdefault('BOT_TOKEN', '123456:test-token')
 
 # ایمپورت کلاس Database
-from database import Database
+from models import Base
+from extensions import Database
+
+
+def _sqlite_file(path, statements):
+    """ساخت جدول‌های مدل‌ها در یک فایل SQLite و اجرای دستورهای داده اولیه"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def make_database(tmp_path, monkeypatch):
+    """
+    سازنده Database روی فایل SQLite در پوشه موقت تست
+
+    make_database(*statements, path='bot.db', replica=None, replica_path='replica.db', **options):
+    دستورها پس از ساخت جدول‌ها اجرا می‌شوند، replica فهرست دستورهای فایل جدای replica است و
+    options به Database.initialize داده می‌شود. engine ها پس از تست بسته می‌شوند.
+    """
+    monkeypatch.chdir(tmp_path)
+    databases = []
+
+    def make(*statements, path='bot.db', replica=None, replica_path='replica.db', **options):
+        url = _sqlite_file(str(tmp_path / path), statements)
+        if replica is not None:
+            options['replica_url'] = _sqlite_file(str(tmp_path / replica_path), replica)
+        database = Database()
+        database.initialize(url, **options)
+        databases.append(database)
+        return database
+    yield make
+    for database in databases:
+        database.engine.dispose()
+        if database.replica_engine is not None:
+            database.replica_engine.dispose()
 
 # ایجاد مسیر آپلود موقت برای تست
 @pytest.fixture
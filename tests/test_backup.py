@@ -0,0 +1,242 @@
+"""
+تست‌های موتور پشتیبان‌گیری جریانی
+"""
+
+import os
+import io
+import sys
+import json
+import zipfile
+import pytest
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import backup_utils
+from utils.backup_utils import (_ZipStream, _write_entry, _HashingWriter, build_manifest,
+                                collect_media_references, dump_table, iter_backup_zip,
+                                BACKUP_TABLES, MANIFEST_VERSION)
+
+
+class _RecordingConnection:
+    """اتصال خام ساختگی که فراخوانی‌های psycopg2 را ثبت می‌کند"""
+
+    def __init__(self):
+        self.calls = []
+
+    def cursor(self):
+        return self
+
+    def rollback(self):
+        self.calls.append('rollback')
+
+    def set_session(self, **kwargs):
+        self.calls.append(('set_session', kwargs))
+
+    def execute(self, sql, params=None):
+        self.calls.append(sql)
+
+    def copy_expert(self, sql, writer):
+        writer.write(b'id\n1\n')
+        self.rowcount = 1
+
+    def close(self):
+        self.calls.append('close')
+
+
+class TestBackupArchive:
+    """تست‌های ساخت آرشیو و manifest"""
+
+    def test_zip_stream_produces_valid_archive(self, tmp_path):
+        """تست اینکه خروجی تکه‌تکه یک فایل ZIP معتبر است"""
+        source = tmp_path / 'products.csv'
+        source.write_bytes(b'id,name\n' + b''.join(f'{i},item {i}\n'.encode() for i in range(5000)))
+
+        stream = _ZipStream()
+        chunks = []
+        with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zf:
+            chunks.extend(_write_entry(zf, stream, str(source), 'products.csv'))
+        chunks.append(stream.drain())
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        assert archive.read('products.csv') == source.read_bytes()
+
+    def test_stream_failure_is_not_a_valid_archive(self, tmp_path, monkeypatch):
+        """تست اینکه خطای میانه پشتیبان جریانی به سرور می‌رسد و فایل ناقص ZIP معتبر نیست"""
+        source = tmp_path / 'users.csv'
+        source.write_bytes(b'id\n' + os.urandom(200000))
+
+        def dump_tables(engine, spool_dir, workers):
+            target = os.path.join(spool_dir, 'users.csv')
+            with open(source, 'rb') as src, open(target, 'wb') as dest:
+                dest.write(src.read())
+            yield 'users', {'file': 'users.csv'}
+            raise RuntimeError('connection lost')
+        monkeypatch.setattr(backup_utils, 'dump_tables', dump_tables)
+
+        chunks = []
+        with pytest.raises(RuntimeError):
+            for chunk in iter_backup_zip(None):
+                chunks.append(chunk)
+        assert chunks
+        with pytest.raises(zipfile.BadZipFile):
+            zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+
+    def test_dump_table_sets_read_only_session(self, tmp_path):
+        """تست تنظیم حالت تراکنش با set_session به جای BEGIN دستی و برگرداندن آن"""
+        conn = _RecordingConnection()
+        engine = type('Engine', (), {'raw_connection': lambda self: conn})()
+        entry = dump_table(engine, 'users', str(tmp_path / 'users.csv'), snapshot_id='00000003-1')
+
+        assert entry['rows'] == 1
+        assert not [call for call in conn.calls if isinstance(call, str) and 'BEGIN' in call]
+        sessions = [call for call in conn.calls if isinstance(call, tuple)]
+        assert sessions == [('set_session', {'isolation_level': 'REPEATABLE READ', 'readonly': True}),
+                            ('set_session', {'isolation_level': 'DEFAULT', 'readonly': 'DEFAULT'})]
+        assert conn.calls.index(sessions[0]) < conn.calls.index('SET TRANSACTION SNAPSHOT %s')
+        assert conn.calls[-1] == 'close'
+
+    def test_hashing_writer(self):
+        """تست محاسبه checksum و حجم هنگام نوشتن"""
+        buffer = io.BytesIO()
+        writer = _HashingWriter(buffer)
+        writer.write(b'id,name\n')
+        writer.write('1,تست\n')
+        assert writer.size == len(buffer.getvalue())
+        assert len(writer.hexdigest()) == 64
+
+    def test_manifest_orders_tables_and_lists_media(self, tmp_path):
+        """تست ترتیب جداول و ثبت رسانه‌ها به صورت ارجاع"""
+        media_dir = tmp_path / 'uploads' / 'products' / '1'
+        media_dir.mkdir(parents=True)
+        (media_dir / 'main.jpg').write_bytes(b'x' * 10)
+
+        tables = {
+            'products': {'file': 'products.csv', 'rows': 2, 'bytes': 20, 'sha256': 'a'},
+            'users': {'file': 'users.csv', 'rows': 1, 'bytes': 10, 'sha256': 'b'},
+        }
+        manifest = build_manifest(tables, include_media=True, media_root=str(tmp_path / 'uploads'))
+
+        assert manifest['version'] == MANIFEST_VERSION
+        assert list(manifest['tables']) == [t for t in BACKUP_TABLES if t in tables]
+        assert manifest['media']['files'][0]['path'] == 'products/1/main.jpg'
+        assert manifest['media']['total_bytes'] == 10
+        json.dumps(manifest)
+
+    def test_media_references_missing_root(self, tmp_path):
+        """تست پوشه رسانه ناموجود"""
+        assert collect_media_references(str(tmp_path / 'missing')) == []
+
+
+class TestRestoreChecksums:
+    """تست‌های بررسی manifest هنگام بازیابی"""
+
+    def _make_backup(self, tmp_path, content, checksum):
+        from utils.backup_utils import MANIFEST_NAME
+        path = tmp_path / 'backup.zip'
+        manifest = {'version': MANIFEST_VERSION,
+                    'tables': {'users': {'file': 'users.csv', 'rows': 1, 'sha256': checksum}}}
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('users.csv', content)
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest))
+        return path
+
+    def test_valid_checksum(self, tmp_path):
+        """تست پذیرش پشتیبان سالم"""
+        import hashlib
+        from utils.restore_utils import verify_checksums
+        content = b'id,username\n1,admin\n'
+        path = self._make_backup(tmp_path, content, hashlib.sha256(content).hexdigest())
+        with zipfile.ZipFile(path) as zf:
+            assert verify_checksums(zf)['tables']['users']['rows'] == 1
+
+    def test_corrupted_backup_is_rejected(self, tmp_path):
+        """تست رد پشتیبان با checksum نامعتبر"""
+        from utils.restore_utils import verify_checksums, RestoreError
+        path = self._make_backup(tmp_path, b'id,username\n1,admin\n', '0' * 64)
+        with zipfile.ZipFile(path) as zf:
+            with pytest.raises(RestoreError):
+                verify_checksums(zf)
+
+
+class _RestoreConnection:
+    """اتصال خام ساختگی بازیابی؛ شمارش‌ها همه یک و دستورهای تغییر بدون اثر (rowcount صفر)"""
+
+    def __init__(self, fail_commit=False):
+        self.fail_commit = fail_commit
+        self.calls = []
+        self.rowcount = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.calls.append(sql)
+
+    def fetchone(self):
+        return (1,)
+
+    def fetchall(self):
+        return []
+
+    def copy_expert(self, sql, fh):
+        if 'TO STDOUT' in sql:
+            fh.write(b'table_name,reason,row_data\n')
+
+    def commit(self):
+        if self.fail_commit:
+            raise RuntimeError('could not serialize access')
+        self.calls.append('commit')
+
+    def rollback(self):
+        self.calls.append('rollback')
+
+    def close(self):
+        pass
+
+
+class _RestoreEngine:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def raw_connection(self):
+        return self.conn
+
+
+class TestRestore:
+    """تست‌های خالی کردن جداول و گزارش rejectهای بازیابی"""
+
+    def _make_backup(self, tmp_path, *tables):
+        path = tmp_path / 'backup.zip'
+        with zipfile.ZipFile(path, 'w') as zf:
+            for table in tables:
+                zf.writestr(f'{table}.csv', 'id,name\n1,item\n')
+        return str(path)
+
+    def test_clear_refuses_outside_dependents(self, tmp_path):
+        """تست رد خالی کردن دسته‌ها وقتی محصولات ارجاع‌دهنده در پشتیبان نیستند"""
+        from utils.restore_utils import restore_from_zip, RestoreError
+        path = self._make_backup(tmp_path, 'product_categories')
+        conn = _RestoreConnection()
+        with pytest.raises(RestoreError, match='products -> product_categories'):
+            restore_from_zip(_RestoreEngine(conn), path, clear_tables=True, report_dir=str(tmp_path))
+        assert conn.calls == []
+
+        # بدون خالی کردن یا همراه با جدول وابسته مجاز است
+        restore_from_zip(_RestoreEngine(conn), path, report_dir=str(tmp_path / 'a'))
+        path = self._make_backup(tmp_path, 'product_categories', 'products', 'product_media', 'inquiries')
+        restore_from_zip(_RestoreEngine(_RestoreConnection()), path, clear_tables=True,
+                         report_dir=str(tmp_path / 'b'))
+
+    def test_reject_report_is_published_after_commit(self, tmp_path):
+        """تست اینکه گزارش reject فقط برای بازیابی commit شده باقی می‌ماند"""
+        from utils.restore_utils import restore_from_zip
+        path = self._make_backup(tmp_path, 'users')
+        with pytest.raises(RuntimeError):
+            restore_from_zip(_RestoreEngine(_RestoreConnection(fail_commit=True)), path,
+                             report_dir=str(tmp_path / 'failed'))
+        assert os.listdir(tmp_path / 'failed') == []
+
+        result = restore_from_zip(_RestoreEngine(_RestoreConnection()), path, report_dir=str(tmp_path / 'ok'))
+        assert os.listdir(tmp_path / 'ok') == [os.path.basename(result['report_path'])]
+        assert result['report_path'].endswith('.csv')
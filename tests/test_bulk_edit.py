@@ -0,0 +1,75 @@
+"""
+تست‌های ویرایش گروهی محصولات و خدمات
+"""
+
+import os
+import sys
+import pytest
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.bulk_edit import build_bulk_update, parse_ids, BulkEditError
+from utils.catalog_changes import CHANGE_LISTENERS, catalog_changed, on_catalog_change
+
+
+class TestBulkEdit:
+    """تست‌های ساخت دستور UPDATE گروهی"""
+
+    def test_every_action_is_one_update_by_ids(self):
+        """تست اینکه همه عملیات یک UPDATE با id = ANY و updated_at هستند"""
+        cases = [
+            ('set_category', {'category_id': '3'}),
+            ('adjust_price', {'percent': '10'}),
+            ('set_flag', {'flag': 'in_stock', 'value': 'false'}),
+            ('add_tag', {'tag': 'حراج'}),
+            ('remove_tag', {'tag': 'حراج'}),
+        ]
+        for action, params in cases:
+            sql, _binds = build_bulk_update('products', action, params)
+            assert sql.startswith('UPDATE products SET ')
+            assert 'updated_at = ' in sql
+            assert sql.endswith('WHERE id = ANY(:ids)')
+
+    def test_price_factor_and_bounds(self):
+        """تست ضریب قیمت و رد درصد خارج از محدوده"""
+        _sql, binds = build_bulk_update('services', 'adjust_price', {'percent': '-25'})
+        assert binds['factor'] == 0.75
+        with pytest.raises(BulkEditError):
+            build_bulk_update('services', 'adjust_price', {'percent': '-150'})
+
+    def test_flags_are_per_table(self):
+        """تست پرچم‌های مجاز هر جدول و حالت معکوس"""
+        sql, binds = build_bulk_update('services', 'set_flag', {'flag': 'available', 'value': 'toggle'})
+        assert 'available = NOT coalesce(available, false)' in sql and not binds
+        with pytest.raises(BulkEditError):
+            build_bulk_update('services', 'set_flag', {'flag': 'in_stock', 'value': 'true'})
+
+    def test_invalid_input(self):
+        """تست رد برچسب کاما دار، عملیات ناشناخته و شناسه نامعتبر"""
+        with pytest.raises(BulkEditError):
+            build_bulk_update('products', 'add_tag', {'tag': 'a,b'})
+        with pytest.raises(BulkEditError):
+            build_bulk_update('products', 'drop_table', {})
+        with pytest.raises(BulkEditError):
+            parse_ids(['1', 'x'])
+        assert parse_ids(['3', '1', '3']) == [1, 3]
+
+    def test_catalog_changed_notifies_listeners_once(self):
+        """تست اعلام تغییر به همه دریافت‌کننده‌ها حتی با خطای یکی از آن‌ها"""
+        calls = []
+
+        def failing(table, ids):
+            raise RuntimeError('boom')
+
+        def recording(table, ids):
+            calls.append((table, ids))
+
+        on_catalog_change(failing)
+        on_catalog_change(recording)
+        try:
+            catalog_changed('products', [2, 1, 2])
+        finally:
+            CHANGE_LISTENERS.remove(failing)
+            CHANGE_LISTENERS.remove(recording)
+        assert calls == [('products', [1, 2])]
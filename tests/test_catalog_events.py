@@ -0,0 +1,127 @@
+"""
+تست‌های outbox تغییرهای کاتالوگ و باطل شدن کش ربات
+"""
+
+import os
+import sys
+import json
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import Base, Product, ProductCategory
+from extensions import Database
+from utils.catalog_changes import CHANGE_LISTENERS, on_catalog_change
+from utils.catalog_events import CatalogSubscriber, install_session_hooks, publish, uninstall_session_hooks
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO products (id, name) VALUES (1, 'router'), (2, 'switch')"))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def Session(engine):
+    """session factory با شنونده‌های outbox که پس از تست برداشته می‌شوند"""
+    factory = sessionmaker(bind=engine)
+    install_session_hooks(factory)
+    install_session_hooks(factory)
+    yield factory
+    uninstall_session_hooks(factory)
+
+
+@pytest.fixture
+def received():
+    changes = []
+
+    def recording(table, ids):
+        changes.append((table, ids))
+
+    on_catalog_change(recording)
+    yield changes
+    CHANGE_LISTENERS.remove(recording)
+
+
+def _outbox(engine):
+    with engine.connect() as conn:
+        return [(row.table_name, json.loads(row.ids))
+                for row in conn.execute(text("SELECT table_name, ids FROM catalog_changes ORDER BY id"))]
+
+
+class TestCatalogEvents:
+    """تست‌های ثبت تغییرها و دریافت آن‌ها در پردازه دیگر"""
+
+    def test_orm_changes_are_recorded_after_commit(self, engine, Session, received):
+        """تست ثبت تغییر ORM در outbox و اعلام محلی فقط پس از commit، فقط برای session های برنامه"""
+        session = Session()
+        session.get(Product, 1).name = 'edited'
+        session.add(ProductCategory(id=5, name='cables'))
+        session.flush()
+        assert received == []
+        session.commit()
+        assert sorted(received) == [('product_categories', [5]), ('products', [1])]
+        assert sorted(_outbox(engine)) == sorted(received)
+
+        session.get(Product, 2).name = 'discarded'
+        session.flush()
+        session.rollback()
+        session.close()
+        assert len(received) == 2 and len(_outbox(engine)) == 2
+
+        # session های دیگر پردازه (اسکریپت‌ها، تست‌ها) outbox را لمس نمی‌کنند
+        other = sessionmaker(bind=engine)()
+        other.get(Product, 2).name = 'script'
+        other.commit()
+        other.close()
+        assert len(received) == 2 and len(_outbox(engine)) == 2
+
+        uninstall_session_hooks(Session)
+        session = Session()
+        session.get(Product, 1).name = 'unhooked'
+        session.commit()
+        session.close()
+        assert len(_outbox(engine)) == 2
+
+    def test_subscriber_dispatches_each_change_once(self, engine):
+        """تست خواندن تغییرهای جدید outbox به ترتیب و بدون تکرار"""
+        changes = []
+        subscriber = CatalogSubscriber(engine, dispatch=lambda table, ids: changes.append((table, ids)))
+        with engine.begin() as conn:
+            publish(conn, 'products', [9])
+        assert subscriber.catch_up() == 0  # فقط نقطه شروع ثبت می‌شود
+
+        with engine.begin() as conn:
+            publish(conn, 'products', [2, 1, 2])
+            publish(conn, 'static_content')
+        assert subscriber.catch_up() == 2
+        assert subscriber.catch_up() == 0
+        assert changes == [('products', [1, 2]), ('static_content', [])]
+
+    def test_bot_cache_evicts_changed_entries(self, engine, tmp_path, monkeypatch):
+        """تست باطل شدن فقط محصول تغییر کرده در کش ربات پس از نوشتن پنل"""
+        monkeypatch.chdir(tmp_path)
+        database = Database()
+        database.initialize(engine=engine, degraded=False, cache_backend='memory')
+        subscriber = CatalogSubscriber(engine)
+        subscriber.catch_up()
+        assert database.get_product(1)['name'] == 'router'
+        assert database.get_product(2)['name'] == 'switch'
+
+        # نوشتن پنل: در پردازه دیگر و بدون اعلام محلی
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE products SET name = 'edited' WHERE id IN (1, 2)"))
+            publish(conn, 'products', [1])
+        assert database.get_product(1)['name'] == 'router'
+
+        assert subscriber.catch_up() == 1
+        assert database.get_product(1)['name'] == 'edited'
+        assert database.get_product(2)['name'] == 'switch'
+        uninstall_session_hooks(database.Session)
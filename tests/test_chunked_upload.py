@@ -0,0 +1,93 @@
+"""
+تست‌های آپلود تکه‌تکه و قابل ادامه
+"""
+
+import io
+import os
+import sys
+import time
+import pytest
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.chunked_upload import (create_upload, get_upload, write_chunk, finish_upload,
+                                  remove_stale_uploads, UploadNotFound, UploadOffsetMismatch,
+                                  UploadTooLarge)
+
+
+class _DroppedStream(io.BytesIO):
+    """stream درخواستی که پیش از رسیدن همه بایت‌ها قطع می‌شود"""
+
+    def __init__(self, data, cut):
+        super().__init__(data[:cut])
+
+
+class TestChunkedUpload:
+    """تست‌های ذخیره تکه‌ها روی دیسک و ادامه آپلود"""
+
+    def test_chunks_are_assembled_in_order(self, tmp_path):
+        """تست ارسال دو تکه و انتقال فایل کامل به پوشه مقصد"""
+        root = str(tmp_path / 'tmp')
+        data = os.urandom(300 * 1024)
+        upload = create_upload('demo video.mp4', len(data), {'entity': 'product'}, root=root)
+
+        first = write_chunk(upload['upload_id'], 0, io.BytesIO(data[:100000]), 100000, root=root)
+        assert first['offset'] == 100000
+        rest = data[100000:]
+        last = write_chunk(upload['upload_id'], 100000, io.BytesIO(rest), len(rest), root=root)
+        assert last['offset'] == len(data)
+
+        path = finish_upload(upload['upload_id'], str(tmp_path / 'products' / '5'), root=root)
+        assert os.path.basename(path) == 'demo_video.mp4'
+        with open(path, 'rb') as fh:
+            assert fh.read() == data
+        with pytest.raises(UploadNotFound):
+            get_upload(upload['upload_id'], root=root)
+
+    def test_resume_after_dropped_connection(self, tmp_path):
+        """تست حفظ بایت‌های دریافت شده و رد offset قدیمی"""
+        root = str(tmp_path)
+        data = b'0123456789' * 1000
+        upload = create_upload('clip.mp4', len(data), {}, root=root)
+
+        partial = write_chunk(upload['upload_id'], 0, _DroppedStream(data, 4321), len(data), root=root)
+        assert partial['offset'] == 4321
+
+        with pytest.raises(UploadOffsetMismatch) as error:
+            write_chunk(upload['upload_id'], 0, io.BytesIO(data), len(data), root=root)
+        assert error.value.offset == 4321
+
+        rest = data[4321:]
+        done = write_chunk(upload['upload_id'], 4321, io.BytesIO(rest), len(rest), root=root)
+        assert done['offset'] == len(data)
+
+    def test_size_limits(self, tmp_path):
+        """تست رد آپلود بزرگ‌تر از حد و تکه بیش از اندازه اعلام شده"""
+        with pytest.raises(UploadTooLarge):
+            create_upload('big.mp4', 11, {}, root=str(tmp_path), max_size=10)
+        upload = create_upload('small.mp4', 4, {}, root=str(tmp_path))
+        with pytest.raises(UploadTooLarge):
+            write_chunk(upload['upload_id'], 0, io.BytesIO(b'12345'), 5, root=str(tmp_path))
+
+    def test_invalid_id_and_stale_cleanup(self, tmp_path):
+        """تست رد شناسه نامعتبر و حذف آپلودهای رها شده"""
+        with pytest.raises(UploadNotFound):
+            get_upload('../../etc/passwd', root=str(tmp_path))
+
+        upload = create_upload('old.mp4', 10, {}, root=str(tmp_path))
+        stale = time.time() - 3600
+        for suffix in ('.json', '.part'):
+            os.utime(tmp_path / (upload['upload_id'] + suffix), (stale, stale))
+        create_upload('new.mp4', 10, {}, root=str(tmp_path))
+
+        assert remove_stale_uploads(str(tmp_path), max_age=60) == 1
+        assert len(os.listdir(tmp_path)) == 2
+
+        # انتقالی که پس از تغییر نام به .assembling قطع شده
+        crashed = create_upload('crashed.mp4', 10, {}, root=str(tmp_path))['upload_id']
+        os.rename(tmp_path / (crashed + '.part'), tmp_path / (crashed + '.part.assembling'))
+        for suffix in ('.json', '.part.assembling'):
+            os.utime(tmp_path / (crashed + suffix), (stale, stale))
+        assert remove_stale_uploads(str(tmp_path), max_age=60) == 1
+        assert not [name for name in os.listdir(tmp_path) if name.startswith(crashed)]
@@ -0,0 +1,80 @@
+"""
+تست‌های ساخت engine مشترک و آمار pool اتصال‌ها
+"""
+
+import os
+import sys
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.db_engine import (MeteredQueuePool, create_db_engine, direct_engine, engine_options,
+                             pool_snapshots)
+from utils.query_stats import QueryStats, merge_snapshots
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """engine با pool یک اتصالی روی SQLite"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}", role='test',
+                              poolclass=MeteredQueuePool, pool_size=1, max_overflow=0,
+                              pool_timeout=0.05)
+    yield engine
+    engine.dispose()
+
+
+def _pool(role):
+    return next(item for item in pool_snapshots() if item['role'] == role)
+
+
+class TestDbEngine:
+    """تست‌های تنظیمات pool، PgBouncer و شمارنده‌های checkout"""
+
+    def test_engine_options(self):
+        """تست تنظیمات pool برای پستگرس و حالت PgBouncer"""
+        options = engine_options('postgresql://user@localhost/db', role='bot', pgbouncer=False)
+        assert options['poolclass'] is MeteredQueuePool
+        assert options['pool_pre_ping'] is True
+        assert options['pool_recycle'] > 0
+        assert options['connect_args']['application_name'] == 'rfcbot-bot'
+        assert options['connect_args']['keepalives'] == 1
+        assert 'pool_reset_on_return' not in options
+
+        bouncer = engine_options('postgresql://user@localhost/db', pgbouncer=True)
+        assert bouncer['pool_reset_on_return'] == 'rollback'
+        assert 'options' not in bouncer['connect_args']
+        assert engine_options('sqlite://') == {'pool_pre_ping': True}
+
+    def test_checkout_wait_and_timeout_metrics(self, engine):
+        """تست شمارش checkout ها، timeout هنگام پر بودن pool و نمایش در آمار پردازه"""
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert _pool('test')['checked_out'] == 1
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        pool = _pool('test')
+        assert pool['checkouts'] == 2
+        assert pool['timeouts'] == 1
+        assert pool['checked_out'] == 0
+        assert pool['max_wait_ms'] >= 0
+
+        # شمارنده‌ها پس از dispose (ساخت دوباره pool) حفظ می‌شوند
+        engine.dispose()
+        assert _pool('test')['checkouts'] == 2
+
+        stats = QueryStats(directory='unused')
+        snapshot = stats.snapshot()
+        merged = merge_snapshots([snapshot])
+        item = next(item for item in merged['pools'] if item['role'] == 'test')
+        assert item['process'] == snapshot['process']
+        assert item['avg_wait_ms'] == pytest.approx(pool['wait_ms'] / 2)
+
+    def test_direct_engine_without_pgbouncer(self, engine):
+        """تست استفاده از همان engine وقتی PgBouncer فعال نیست"""
+        assert direct_engine(engine) is engine
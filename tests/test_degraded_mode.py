@@ -0,0 +1,141 @@
+"""
+تست‌های circuit breaker دیتابیس، خواندن کاتالوگ از نسخه ذخیره شده و صف استعلام‌ها
+"""
+
+import os
+import sys
+import time
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, text
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.degraded_mode import CircuitBreaker, DegradedMode, load_states, CLOSED, OPEN, HALF_OPEN
+
+
+@pytest.fixture
+def database(make_database):
+    """Database روی یک فایل SQLite که با تغییر نام پوشه آن «قطع» می‌شود"""
+    database = make_database(
+        "INSERT INTO products (id, name) VALUES (1, 'router')",
+        # کلید (id, created_at) در SQLite شناسه خودکار نمی‌سازد
+        "DROP TABLE inquiries",
+        "CREATE TABLE inquiries (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id BIGINT, "
+        "product_id INTEGER, service_id INTEGER, name TEXT, phone TEXT, description TEXT, "
+        "status TEXT, date DATETIME, created_at DATETIME, updated_at DATETIME)",
+        path='db/bot.db', cache_backend='off')
+    database.degraded.breaker.reset_timeout = 0.05
+    return database
+
+
+def _outage(database, down: bool):
+    os.rename(*(('db', 'db_down') if down else ('db_down', 'db')))
+    database.engine.dispose()
+
+
+class TestDegradedMode:
+    """تست‌های حالت کاهش‌یافته ربات"""
+
+    def test_breaker_transitions(self):
+        """تست باز شدن پس از خطاها، یک درخواست آزمایشی در half_open و بسته شدن"""
+        changes = []
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05,
+                                 on_change=lambda old, new: changes.append(new))
+        breaker.record_failure(Exception('refused'))
+        assert breaker.state == CLOSED and breaker.allow_request()
+        breaker.record_failure(Exception('refused'))
+        assert breaker.state == OPEN and not breaker.allow_request()
+
+        time.sleep(0.06)
+        assert breaker.allow_request() and breaker.state == HALF_OPEN
+        assert not breaker.allow_request()
+        breaker.record_failure(Exception('still down'))
+        assert breaker.state == OPEN
+
+        time.sleep(0.06)
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CLOSED and breaker.failures == 0
+        assert changes == [OPEN, HALF_OPEN, OPEN, HALF_OPEN, CLOSED]
+
+    def test_serves_stale_catalog(self, database):
+        """تست برگرداندن آخرین پاسخ سالم وقتی دیتابیس در دسترس نیست"""
+        assert database.get_product(1)['name'] == 'router'
+        _outage(database, True)
+
+        for _ in range(3):
+            assert database.get_product(1)['name'] == 'router'
+        assert database.get_product(2) is None
+        assert database.get_products(1) == []
+
+        health = database.health()
+        assert health['state'] == OPEN
+        assert health['stale_served'] == 3 and health['stale_missing'] == 2
+        assert 'unable to open database file' in health['last_error']
+        assert [item['state'] for item in load_states()] == [OPEN]
+
+    def test_failed_reads_keep_last_snapshot(self, tmp_path):
+        """تست اینکه پاسخ خالی مخزنی که خطای دیتابیس را بلعیده نسخه سالم را بازنویسی نمی‌کند"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'bot.db'}")
+        mode = DegradedMode(str(tmp_path / 'degraded'))
+        mode.attach(engine)
+
+        def swallowing_loader():
+            try:
+                with engine.connect() as conn:
+                    # تعداد پارامتر نادرست؛ خطای غیر اتصالی
+                    return conn.exec_driver_sql("SELECT ?", (1, 2)).fetchall()
+            except Exception:
+                return []
+        assert mode.read('get_products:[1]', lambda: ['router']) == ['router']
+        assert mode.read('get_products:[1]', swallowing_loader) == []
+        assert mode.breaker.state == CLOSED
+        assert mode.store.get('get_products:[1]') == ['router']
+        engine.dispose()
+
+    def test_replica_outage_opens_breaker(self, make_database, tmp_path):
+        """تست شمرده شدن قطع replica در breaker و پاسخ از نسخه ذخیره شده"""
+        database = make_database("INSERT INTO products (id, name) VALUES (1, 'primary')",
+                                 replica=["INSERT INTO products (id, name) VALUES (1, 'replica')"],
+                                 replica_path='replica/bot.db', cache_backend='off')
+        database.router.marker = str(tmp_path / 'marker')
+        database.router.checked_at = time.monotonic()
+        assert database.get_product(1)['name'] == 'replica'
+
+        os.rename('replica', 'replica_down')
+        database.replica_engine.dispose()
+        for _ in range(3):
+            assert database.get_product(1)['name'] == 'replica'
+        assert database.health()['state'] == OPEN
+
+    def test_queues_and_replays_inquiries(self, database):
+        """تست صف پایدار استعلام‌ها هنگام قطع و ثبت آن‌ها پس از وصل شدن"""
+        database.get_product(1)
+        _outage(database, True)
+        for _ in range(3):
+            database.get_product(1)
+        assert database.create_inquiry(7, 'Ali', '0912', 'price?', product_id=1)
+        assert database.degraded.store.pending_count() == 1
+        # صف روی دیسک است و پس از راه‌اندازی دوباره پردازه باقی می‌ماند
+        queued = DegradedMode().store.pending()[0]['payload']
+        assert queued['name'] == 'Ali'
+
+        _outage(database, False)
+        time.sleep(0.06)
+        assert database.get_product(1)['name'] == 'router'
+        assert database.degraded.breaker.state == CLOSED
+        deadline = time.monotonic() + 5
+        while database.degraded.store.pending_count() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        with database.degraded.replay_lock:
+            pass
+
+        assert database.degraded.counts['replayed'] == 1
+        with database.engine.connect() as conn:
+            row = conn.execute(text("SELECT name, created_at FROM inquiries WHERE user_id = 7")).one()
+        assert row.name == 'Ali'
+        # زمان ثبت همان زمان صف شدن است، نه زمان ثبت دوباره
+        assert row.created_at == str(datetime.utcfromtimestamp(queued['queued_at']))
+
@@ -0,0 +1,74 @@
+"""
+تست‌های پردازش تصاویر آپلود شده (جهت EXIF، ابعاد تلگرام و نسخه‌ها)
+"""
+
+import os
+import sys
+import pytest
+from PIL import Image
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'utils')))
+
+from utils_upload import (process_image, fit_telegram_limits, THUMBNAIL_SIZES,
+                          TELEGRAM_PHOTO_MAX_SIDE)
+
+
+class TestImagePipeline:
+    """تست‌های process_image"""
+
+    def test_fit_telegram_limits(self):
+        """تست کوچک‌سازی با حفظ نسبت ابعاد"""
+        assert fit_telegram_limits((800, 600)) == (800, 600)
+        width, height = fit_telegram_limits((5120, 2560))
+        assert width == TELEGRAM_PHOTO_MAX_SIDE and height == 1280
+
+    def test_exif_orientation_is_applied_and_stripped(self, tmp_path):
+        """تست اعمال چرخش EXIF و حذف متادیتا"""
+        path = tmp_path / 'photo.jpg'
+        exif = Image.Exif()
+        exif[0x0112] = 6  # چرخش ۹۰ درجه
+        Image.new('RGB', (400, 200), (200, 10, 10)).save(path, 'JPEG', exif=exif.tobytes())
+
+        info = process_image(str(path))
+
+        assert (info['width'], info['height']) == (200, 400)
+        with Image.open(path) as result:
+            assert result.size == (200, 400)
+            assert 0x0112 not in result.getexif()
+
+    def test_variants_are_written(self, tmp_path):
+        """تست ساخت تصاویر بندانگشتی با اندازه ثابت و نسخه WebP"""
+        path = tmp_path / 'large.png'
+        Image.new('RGBA', (3000, 1000), (0, 0, 255, 128)).save(path, 'PNG')
+
+        info = process_image(str(path))
+
+        assert max(info['width'], info['height']) == TELEGRAM_PHOTO_MAX_SIDE
+        for name, size in THUMBNAIL_SIZES.items():
+            with Image.open(info['variants'][name]) as thumbnail:
+                assert thumbnail.size == size
+            assert os.path.exists(info['variants'][f'{name}_webp'])
+        with Image.open(info['variants']['webp']) as webp:
+            assert webp.format == 'WEBP'
+
+    def test_extreme_aspect_ratio_is_rejected(self, tmp_path):
+        """تست رد تصویر با نسبت ابعاد غیرمجاز تلگرام"""
+        path = tmp_path / 'banner.png'
+        Image.new('RGB', (2100, 100)).save(path, 'PNG')
+        with pytest.raises(ValueError):
+            process_image(str(path))
+
+    def test_destination_leaves_source_untouched(self, tmp_path):
+        """تست نوشتن نسخه پردازش شده در مسیر جدید بدون تغییر فایل اصلی"""
+        path = tmp_path / 'blob.jpg'
+        Image.new('RGB', (300, 200), (10, 200, 10)).save(path, 'JPEG')
+        original = path.read_bytes()
+        dest = tmp_path / 'blob_n.jpg'
+
+        process_image(str(path), str(dest))
+
+        assert path.read_bytes() == original
+        with Image.open(dest) as result:
+            assert result.size == (300, 200)
@@ -0,0 +1,170 @@
+"""
+تست‌های موتور ورود داده از CSV
+"""
+
+import io
+import os
+import csv
+import sys
+import datetime
+import pytest
+from sqlalchemy import Column, Integer, Boolean, DateTime, String, Text
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import Base, Inquiry
+from utils.import_utils import coerce_value, _ErrorReport, _TablePlan, IMPORT_SPECS, CsvImportError
+
+
+class TestCoerceValue:
+    """تست‌های تبدیل نوع مقادیر CSV"""
+
+    def test_integer_with_separators_and_persian_digits(self):
+        """تست قیمت با جداکننده هزارگان و ارقام فارسی"""
+        assert coerce_value(Column(Integer), '۱,۲۰۰,۰۰۰') == 1200000
+        assert coerce_value(Column(Integer), ' 42 ') == 42
+
+    def test_invalid_integer(self):
+        """تست عدد نامعتبر"""
+        with pytest.raises(ValueError):
+            coerce_value(Column(Integer), 'abc')
+
+    def test_boolean(self):
+        """تست مقادیر بولی"""
+        assert coerce_value(Column(Boolean), 'True') is True
+        assert coerce_value(Column(Boolean), 'f') is False
+        with pytest.raises(ValueError):
+            coerce_value(Column(Boolean), 'maybe')
+
+    def test_datetime_formats(self):
+        """تست تاریخ با و بدون میکروثانیه"""
+        assert coerce_value(Column(DateTime), '2025-05-16 01:04:41') == datetime.datetime(2025, 5, 16, 1, 4, 41)
+        assert coerce_value(Column(DateTime), '2025-05-16 01:04:41.5').microsecond == 500000
+
+    def test_empty_and_length(self):
+        """تست مقدار خالی و طول بیش از حد"""
+        assert coerce_value(Column(Text), '  ') is None
+        with pytest.raises(ValueError):
+            coerce_value(Column(String(5)), 'too long value')
+
+
+class TestTablePlan:
+    """تست‌های برنامه upsert هر جدول"""
+
+    def test_price_list_updates_only_given_columns(self):
+        """تست اینکه لیست قیمت فقط قیمت را به‌روزرسانی می‌کند"""
+        plan = _TablePlan(IMPORT_SPECS['products'], ['name', 'price'])
+        assert plan.upsert_columns[0] == 'id'
+        assert 'ON CONFLICT (id) DO UPDATE SET price = EXCLUDED.price' in plan.sql
+        assert 'ON CONFLICT' not in plan.insert_sql
+        assert 'in_stock' in plan.insert_columns
+        assert 'in_stock = EXCLUDED' not in plan.sql
+
+    def test_id_column_switches_conflict_target(self):
+        """تست upsert بر اساس id وقتی ستون id موجود است"""
+        plan = _TablePlan(IMPORT_SPECS['products'], ['id', 'name', 'price'])
+        assert 'ON CONFLICT (id)' in plan.sql
+        assert 'name = EXCLUDED.name' in plan.sql
+
+    def test_natural_key_matches_existing_rows(self, tmp_path):
+        """تست نگاشت نام به id ردیف موجود، درج نام جدید و خطای نام مبهم"""
+        class Cursor:
+            def execute(self, sql, params):
+                self.sql, self.params = sql, params
+
+            def fetchall(self):
+                return [(1, 'Antenna'), (2, 'Cable'), (3, 'Cable')]
+
+        plan = _TablePlan(IMPORT_SPECS['products'], ['name', 'price'])
+        rows = {}
+        for line, name in enumerate(['Antenna', 'Cable', 'Router'], start=2):
+            raw = {'name': name, 'price': '100'}
+            row, _errors = plan.build_row(raw)
+            rows[plan.key_of(row)] = (line, row, raw)
+        report = _ErrorReport(str(tmp_path), 'products', ['name', 'price'])
+        cursor = Cursor()
+        upserts, inserts = plan.split(cursor, rows, report)
+        report.close()
+
+        assert 'WHERE name = ANY(%s)' in cursor.sql
+        assert [(row['id'], row['name']) for row in upserts] == [(1, 'Antenna')]
+        assert [row['name'] for row in inserts] == ['Router']
+        assert report.count == 1 and 'matches 2 existing rows' in report.samples[0]['error']
+
+    def test_parents_checked_against_batch(self, tmp_path):
+        """تست anti-join کلید خارجی، پذیرش والد همین دسته و حذف زنجیره فرزندان والد ناموجود"""
+        class Cursor:
+            def execute(self, sql, params):
+                self.sql, self.params = sql, params
+
+            def fetchall(self):
+                # هیچ‌کدام از والدها هنوز در دیتابیس نیستند
+                return [(value,) for value in self.params[0]]
+
+        header = ['id', 'name', 'parent_id']
+        plan = _TablePlan(IMPORT_SPECS['product_categories'], header)
+        rows = {}
+        for line, values in enumerate([('1', 'root', ''), ('2', 'child', '1'), ('3', 'orphan', '99'),
+                                       ('4', 'grandchild', '3')], start=2):
+            raw = dict(zip(header, values))
+            row, _errors = plan.build_row(raw)
+            rows[plan.key_of(row)] = (line, row, raw)
+        report = _ErrorReport(str(tmp_path), 'categories', header)
+        cursor = Cursor()
+        plan.check_parents(cursor, rows, report)
+        report.close()
+
+        assert 'unnest(%s)' in cursor.sql and 'NOT EXISTS (SELECT 1 FROM product_categories p' in cursor.sql
+        assert cursor.params == ([1, 3, 99],)
+        assert sorted(row['id'] for _line, row, _raw in rows.values()) == [1, 2]
+        assert [(item['line'], item['error']) for item in report.samples] == [
+            (4, 'product_categories 99 does not exist'), (5, 'product_categories 3 does not exist')]
+
+    def test_conflict_target_is_the_primary_key(self):
+        """تست اینکه upsert با id روی کلید اصلی هر جدول (برای inquiries همراه created_at) است"""
+        for spec in IMPORT_SPECS.values():
+            plan = _TablePlan(spec, [c.name for c in Base.metadata.tables[spec['table']].columns])
+            primary_key = tuple(c.name for c in plan.model_table.primary_key.columns)
+            assert sorted(plan.row_key) == sorted(primary_key)
+            assert f"ON CONFLICT ({', '.join(plan.row_key)})" in plan.sql
+
+    def test_exported_inquiries_import_back(self):
+        """تست ورود دوباره فایل خروجی استعلام‌ها با همان قالب خروجی پنل"""
+        inquiry = Inquiry(id=7, user_id=123456789, name='علی', phone='09120000000', description='',
+                          status='new', date=datetime.datetime(2025, 5, 1, 10, 30, 15, 250000),
+                          created_at=datetime.datetime(2025, 5, 1, 10, 30, 15, 250000))
+        columns = [c.name for c in Inquiry.__table__.columns]
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(columns)
+        writer.writerow([str(getattr(inquiry, c)) if getattr(inquiry, c) is not None else '' for c in columns])
+        output.seek(0)
+        reader = csv.DictReader(output)
+
+        plan = _TablePlan(IMPORT_SPECS['inquiries'], reader.fieldnames)
+        row, errors = plan.build_row(next(reader))
+        assert errors == []
+        assert plan.key_of(row) == (7, inquiry.created_at)
+        assert 'ON CONFLICT (id, created_at) DO UPDATE' in plan.sql
+        assert 'created_at = EXCLUDED' not in plan.sql
+
+        # بدون created_at ردیف با id قابل تطبیق نیست
+        with pytest.raises(CsvImportError):
+            _TablePlan(IMPORT_SPECS['inquiries'], [c for c in columns if c != 'created_at'])
+
+    def test_missing_required_column(self):
+        """تست نبود ستون الزامی"""
+        with pytest.raises(CsvImportError):
+            _TablePlan(IMPORT_SPECS['products'], ['price'])
+
+    def test_invalid_row_reports_errors(self):
+        """تست ثبت خطای ردیف بدون توقف"""
+        plan = _TablePlan(IMPORT_SPECS['products'], ['name', 'price', 'in_stock'])
+        row, errors = plan.build_row({'name': 'Antenna', 'price': 'x', 'in_stock': ''})
+        assert row is None
+        assert errors[0][0] == 'price'
+
+        row, errors = plan.build_row({'name': 'Antenna', 'price': '100', 'in_stock': ''})
+        assert errors == []
+        assert row['in_stock'] is True
@@ -0,0 +1,132 @@
+"""
+تست‌های گزارش‌های از پیش محاسبه شده استعلام‌ها
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import (InquiryDailyStat, InquiryCustomerStat, Product, Service,
+                    ProductCategory, ServiceCategory)
+from utils.inquiry_analytics import (daily_volume, weekly_volume, item_volume, category_volume,
+                                     status_conversion, repeat_customers, report_rows, week_start,
+                                     refresh_inquiry_analytics)
+
+
+class _RefreshEngine:
+    """engine بدون دیتابیس برای تازه‌سازی؛ watermark و روزها/شماره‌های تغییر کرده ثابت‌اند"""
+
+    def __init__(self, watermark=None):
+        self.watermark = watermark
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, params=None):
+        sql = ' '.join(str(statement).split())
+        self.statements.append(sql)
+        if sql.startswith('SELECT watermark'):
+            value = self.watermark
+        elif sql.startswith("SELECT timezone('utc', now())"):
+            value = datetime(2024, 1, 7)
+        elif sql.startswith('SELECT DISTINCT created_at::date'):
+            return iter([(date(2024, 1, 6),)])
+        elif sql.startswith('SELECT DISTINCT phone'):
+            return iter([('0912',)])
+        else:
+            value = 0
+        return type('Result', (), {'scalar': lambda self: value})()
+
+    def inserts(self, table):
+        return [sql for sql in self.statements if sql.startswith(f'INSERT INTO {table} ')]
+
+
+@pytest.fixture
+def session():
+    """دیتابیس SQLite در حافظه با چند ردیف جمع‌بندی"""
+    engine = create_engine('sqlite://')
+    for model in (ProductCategory, ServiceCategory, Product, Service,
+                  InquiryDailyStat, InquiryCustomerStat):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        ProductCategory(id=1, name='رادیو'),
+        Product(id=1, name='بی‌سیم', category_id=1),
+        Service(id=1, name='نصب'),
+        # شنبه ۶ ژانویه ۲۰۲۴ و جمعه پیش از آن
+        InquiryDailyStat(day=date(2024, 1, 5), item_type='product', item_id=1, status='new',
+                         category_id=1, inquiries=3, customers=2),
+        InquiryDailyStat(day=date(2024, 1, 6), item_type='product', item_id=1, status='completed',
+                         category_id=1, inquiries=1, customers=1),
+        InquiryDailyStat(day=date(2024, 1, 6), item_type='service', item_id=1, status='new',
+                         category_id=None, inquiries=2, customers=2),
+        InquiryDailyStat(day=date(2024, 1, 6), item_type='general', item_id=0, status='new',
+                         category_id=None, inquiries=4, customers=4),
+        InquiryCustomerStat(phone='0912', name='علی', inquiries=3, completed=1,
+                            first_at=datetime(2024, 1, 5), last_at=datetime(2024, 1, 6)),
+        InquiryCustomerStat(phone='0935', name='رضا', inquiries=1, completed=0),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+class TestInquiryAnalytics:
+    """تست‌های خواندن گزارش‌ها از جدول‌های جمع‌بندی"""
+
+    def test_daily_and_weekly_volume(self, session):
+        """تست جمع روزانه به تفکیک نوع و شروع هفته از شنبه"""
+        daily = daily_volume(session, date(2024, 1, 1), date(2024, 1, 31))
+        assert daily == [
+            {'day': date(2024, 1, 5), 'total': 3, 'product': 3, 'service': 0, 'general': 0},
+            {'day': date(2024, 1, 6), 'total': 7, 'product': 1, 'service': 2, 'general': 4},
+        ]
+        assert week_start(date(2024, 1, 6)) == date(2024, 1, 6)
+        assert [(w['week'], w['total']) for w in weekly_volume(daily)] == [
+            (date(2023, 12, 30), 3), (date(2024, 1, 6), 7)]
+
+    def test_items_categories_and_status(self, session):
+        """تست نرخ تبدیل محصولات، نام دسته‌ها و سهم وضعیت‌ها"""
+        start, end = date(2024, 1, 1), date(2024, 1, 31)
+        items = item_volume(session, start, end)
+        assert [(i['name'], i['inquiries'], i['conversion']) for i in items] == [
+            ('بی‌سیم', 4, 25.0), ('نصب', 2, 0)]
+        assert [(c['name'], c['inquiries']) for c in category_volume(session, start, end)] == [
+            ('رادیو', 4), ('بدون دسته', 2)]
+        assert status_conversion(session, start, end) == [
+            {'status': 'new', 'inquiries': 9, 'share': 90.0},
+            {'status': 'completed', 'inquiries': 1, 'share': 10.0}]
+
+    def test_repeat_customers_and_csv_rows(self, session):
+        """تست خلاصه مشتریان تکراری و ردیف‌های CSV"""
+        summary, top = repeat_customers(session)
+        assert summary == {'customers': 2, 'repeat': 1, 'repeat_share': 50.0}
+        assert [c.phone for c in top] == ['0912']
+        headers, rows = report_rows(session, 'status', date(2024, 1, 6), date(2024, 1, 6))
+        assert headers[0] == 'status' and rows[0] == ['new', 6, 85.7]
+        with pytest.raises(ValueError):
+            report_rows(session, 'bogus', date(2024, 1, 1), date(2024, 1, 2))
+
+    @pytest.mark.parametrize('watermark', [None, datetime(2024, 1, 6)])
+    def test_refresh_adds_archived_rollups(self, watermark):
+        """تست اضافه شدن جمع‌بندی استعلام‌های بایگانی شده در بازسازی کامل و افزایشی"""
+        engine = _RefreshEngine(watermark)
+        result = refresh_inquiry_analytics(engine)
+        assert result['full'] is (watermark is None)
+
+        daily, = engine.inserts('inquiry_daily_stats')
+        customers, = engine.inserts('inquiry_customer_stats')
+        assert 'FROM inquiry_archived_daily_stats' in daily
+        assert 'FROM inquiry_archived_customer_stats' in customers
+        if watermark:
+            assert 'FROM inquiry_archived_daily_stats WHERE day = ANY(:days)' in daily
+            assert 'FROM inquiry_archived_customer_stats WHERE phone = ANY(:phones)' in customers
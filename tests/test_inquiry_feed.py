@@ -0,0 +1,65 @@
+"""
+تست‌های پخش زنده تغییرات استعلام‌ها
+"""
+
+import os
+import sys
+import json
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.inquiry_feed import InquiryFeed, SUBSCRIBER_QUEUE_SIZE, format_sse
+
+
+class _RunningThread:
+    """جایگزین رشته شنونده تا آزمون به دیتابیس وصل نشود"""
+
+    def is_alive(self):
+        return True
+
+
+def _feed():
+    feed = InquiryFeed(engine=None)
+    feed.thread = _RunningThread()
+    return feed
+
+
+def _notify(feed, inquiry_id, op='insert', status='new'):
+    feed.dispatch(json.dumps({'op': op, 'id': inquiry_id, 'status': status}))
+
+
+class TestInquiryFeed:
+    """تست‌های قالب SSE، پخش به مشترکان و ادامه پس از اتصال دوباره"""
+
+    def test_format_sse(self):
+        """تست قالب رویداد با شناسه و متن فارسی"""
+        assert format_sse({'name': 'علی'}, event_id=3) == \
+            'id: 3\nevent: inquiry\ndata: {"name": "علی"}\n\n'
+
+    def test_dispatch_and_replay(self):
+        """تست پخش به همه مشترکان و بازپخش رویدادهای بعد از Last-Event-ID"""
+        feed = _feed()
+        first, second = feed.subscribe(), feed.subscribe()
+        for inquiry_id in (10, 11, 12):
+            _notify(feed, inquiry_id)
+        feed.dispatch('not json')
+
+        assert [first.get_nowait()[1]['id'] for _ in range(3)] == [10, 11, 12]
+        assert second.qsize() == 3
+
+        feed.unsubscribe(first)
+        resumed = feed.subscribe(last_event_id=1)
+        assert [resumed.get_nowait() for _ in range(2)] == [
+            (2, {'op': 'insert', 'id': 11, 'status': 'new'}),
+            (3, {'op': 'insert', 'id': 12, 'status': 'new'})]
+        assert first not in feed.subscribers
+
+    def test_full_queue_gets_resync(self):
+        """تست جایگزینی رویدادها با resync برای مشترک عقب مانده"""
+        feed = _feed()
+        slow = feed.subscribe()
+        for inquiry_id in range(SUBSCRIBER_QUEUE_SIZE + 1):
+            _notify(feed, inquiry_id)
+        assert slow.qsize() == 1
+        assert slow.get_nowait() == (SUBSCRIBER_QUEUE_SIZE + 1, {'op': 'resync'})
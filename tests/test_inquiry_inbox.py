@@ -0,0 +1,76 @@
+"""
+تست‌های صندوق استعلام‌های پنل مدیریت
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import Inquiry, Product, Service
+from utils.inquiry_inbox import (decode_cursor, encode_cursor, inquiry_page, parse_filters,
+                                 status_counts)
+
+
+@pytest.fixture
+def session():
+    """دیتابیس SQLite در حافظه با جداول استعلام، محصول و خدمت"""
+    engine = create_engine('sqlite://')
+    for model in (Product, Service, Inquiry):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Product(id=1, name='رادیو'), Service(id=1, name='نصب')])
+    start = datetime(2024, 1, 1)
+    for i in range(7):
+        # دو استعلام با created_at یکسان برای آزمون شکستن تساوی با id
+        created_at = start + timedelta(days=min(i, 5))
+        session.add(Inquiry(id=i + 1, user_id=1, name=f'n{i}', phone='0912',
+                            status='new' if i % 2 else 'completed',
+                            product_id=1 if i < 4 else None,
+                            service_id=1 if i >= 4 else None,
+                            created_at=created_at, date=created_at))
+    session.commit()
+    yield session
+    session.close()
+
+
+class TestInquiryInbox:
+    """تست‌های صفحه‌بندی keyset و شمارش وضعیت‌ها"""
+
+    def test_cursor_round_trip(self):
+        """تست رمزگذاری و خواندن نشانگر صفحه"""
+        created_at = datetime(2024, 5, 1, 12, 30, 15, 123)
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+        assert decode_cursor('not a cursor') is None
+
+    def test_pages_cover_all_rows_once(self, session):
+        """تست پیمایش صفحه‌ها به جلو و عقب بدون تکرار یا جا افتادن"""
+        query = session.query(Inquiry)
+        filters = parse_filters({})
+        seen, after, pages = [], None, []
+        while True:
+            page = inquiry_page(query, filters, after=after, per_page=3)
+            pages.append(page)
+            seen.extend(item.id for item in page['items'])
+            after = page['next_cursor']
+            if not after:
+                break
+        assert seen == [7, 6, 5, 4, 3, 2, 1]
+        assert pages[0]['prev_cursor'] is None
+
+        back = inquiry_page(query, filters, before=pages[1]['prev_cursor'], per_page=3)
+        assert [item.id for item in back['items']] == [7, 6, 5]
+
+    def test_filters_and_status_counts(self, session):
+        """تست فیلتر خدمت و تاریخ و شمارش وضعیت‌ها بدون فیلتر وضعیت"""
+        filters = parse_filters({'service_id': '1', 'status': 'new', 'end_date': '2024-01-06'})
+        page = inquiry_page(session.query(Inquiry), filters, per_page=10)
+        assert [item.id for item in page['items']] == [6]
+        assert page['items'][0].service.name == 'نصب'
+        assert status_counts(session, filters) == {'new': 1, 'completed': 2, 'all': 3}
+        assert parse_filters({'status': 'bogus', 'product_id': 'x'})['status'] is None
@@ -0,0 +1,94 @@
+"""
+تست‌های پارتیشن‌بندی ماهانه استعلام‌ها
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import Inquiry, Product, Service
+from repositories.inquiry_repository import InquiryRepository
+from utils.inquiry_partitions import add_months, archive_closed_inquiries, month_start, partition_name
+
+
+class _ArchiveEngine:
+    """engine بدون دیتابیس که یک دسته استعلام بسته شده برمی‌گرداند و دستورها را با شماره تراکنش نگه می‌دارد"""
+
+    def __init__(self, rows):
+        self.batches = [rows, []]
+        self.statements = []
+        self.transactions = 0
+
+    @contextmanager
+    def begin(self):
+        self.transactions += 1
+        yield self
+
+    def execute(self, statement, params=None):
+        sql = ' '.join(str(statement).split())
+        self.statements.append((self.transactions, sql, params))
+        rows = self.batches.pop(0) if sql.startswith('SELECT') else []
+        return type('Result', (), {'fetchall': lambda self: rows,
+                                   'keys': lambda self: ['id', 'phone', 'created_at']})()
+
+
+class TestInquiryPartitions:
+    """تست‌های نام و بازه پارتیشن‌ها و پرس‌وجوی استعلام‌های اخیر"""
+
+    def test_month_helpers(self):
+        """تست محاسبه ماه‌ها و نام پارتیشن"""
+        assert month_start(datetime(2024, 3, 31, 23, 59)) == date(2024, 3, 1)
+        assert add_months(date(2024, 11, 1), 2) == date(2025, 1, 1)
+        assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+        assert partition_name(date(2024, 1, 1)) == 'inquiries_y2024m01'
+
+    def test_table_is_range_partitioned_on_created_at(self):
+        """تست DDL جدول: کلید شامل created_at و ORM با id"""
+        ddl = str(CreateTable(Inquiry.__table__).compile(dialect=postgresql.dialect()))
+        assert 'PRIMARY KEY (id, created_at)' in ddl
+        assert ddl.rstrip().endswith('PARTITION BY RANGE (created_at)')
+        assert [column.name for column in Inquiry.__mapper__.primary_key] == ['id']
+
+    def test_user_inquiries_default_to_hot_window(self):
+        """تست محدود شدن استعلام‌های کاربر به روزهای اخیر"""
+        engine = create_engine('sqlite://')
+        for model in (Product, Service, Inquiry):
+            model.__table__.create(engine)
+        Session = sessionmaker(bind=engine)
+        session = Session()
+        now = datetime.utcnow()
+        for inquiry_id, age in ((1, 400), (2, 10), (3, 1)):
+            created_at = now - timedelta(days=age)
+            session.add(Inquiry(id=inquiry_id, user_id=7, name='n', phone='0912',
+                                created_at=created_at, date=created_at))
+        session.commit()
+
+        recent = InquiryRepository(Session()).get_inquiries(user_id=7)
+        everything = InquiryRepository(Session()).get_inquiries(user_id=7, days=None)
+
+        assert [item['id'] for item in recent] == [3, 2]
+        assert [item['id'] for item in everything] == [3, 2, 1]
+
+    def test_archive_folds_batch_before_delete(self, tmp_path):
+        """تست جمع زدن دسته بایگانی در جمع‌بندی گزارش‌ها پیش از حذف و در همان تراکنش"""
+        row = type('Row', (tuple,), {'id': property(lambda self: self[0])})
+        engine = _ArchiveEngine([row((1, '0912', datetime(2023, 1, 5))),
+                                 row((2, '0935', datetime(2023, 1, 6)))])
+        result = archive_closed_inquiries(engine, retention_days=365, archive_dir=str(tmp_path))
+        assert result['archived'] == 2
+
+        writes = [(tx, sql.split(' (')[0], params) for tx, sql, params in engine.statements
+                  if not sql.startswith('SELECT')]
+        assert [sql for _, sql, _ in writes] == ['INSERT INTO inquiry_archived_daily_stats AS a',
+                                                 'INSERT INTO inquiry_archived_customer_stats AS a',
+                                                 'DELETE FROM inquiries WHERE id = ANY(:ids) AND created_at < :cutoff']
+        assert {tx for tx, _, _ in writes} == {1}
+        assert all(params['ids'] == [1, 2] for _, _, params in writes)
@@ -0,0 +1,92 @@
+"""
+تست‌های بررسی و اصلاح یکپارچگی ارجاعات دیتابیس
+"""
+
+import os
+import sys
+import pytest
+from sqlalchemy import create_engine, text
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import Base
+from utils.integrity import foreign_key_checks, scan_integrity, fix_integrity
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """دیتابیس SQLite با ارجاعات یتیم و یک حلقه در درخت دسته‌بندی محصولات"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'integrity.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO product_categories (id, name, parent_id) VALUES
+                (1, 'root', NULL), (2, 'a', 3), (3, 'b', 2), (4, 'tail', 2), (5, 'lost', 99)
+        """))
+        conn.execute(text("INSERT INTO products (id, name, category_id) VALUES (1, 'ok', 1), (2, 'orphan', 42)"))
+        conn.execute(text("INSERT INTO services (id, name) VALUES (1, 'ok')"))
+        conn.execute(text("""
+            INSERT INTO product_media (id, product_id, file_id) VALUES (1, 1, 'f1'), (2, 77, 'f2'), (3, 78, 'f3')
+        """))
+        conn.execute(text("""
+            INSERT INTO inquiries (id, user_id, product_id, service_id, name, phone, status, date, created_at)
+            VALUES (1, 10, 55, NULL, 'n', '0912', 'new', '2024-01-01', '2024-01-01'),
+                   (2, 10, NULL, 66, 'n', '0912', 'new', '2024-01-01', '2024-01-01'),
+                   (3, 10, 1, NULL, 'n', '0912', 'new', '2024-01-01', '2024-01-01')
+        """))
+    return engine
+
+
+def _counts(report):
+    return {check['name']: check['count'] for check in report['checks']}
+
+
+class TestIntegrity:
+    """تست‌های anti-join، تشخیص حلقه و اصلاح مجموعه‌ای"""
+
+    def test_checks_cover_every_foreign_key(self):
+        """تست ساخت بررسی برای همه کلیدهای خارجی و نوع اصلاح هر کدام"""
+        checks = {check['name']: check for check in foreign_key_checks(Base.metadata)}
+        assert checks['inquiries.product_id']['fix'] == 'set_null'
+        assert checks['inquiries.service_id']['fix'] == 'set_null'
+        assert checks['product_media.product_id']['fix'] == 'delete'
+        assert checks['educational_content_media.content_id']['fix'] == 'delete'
+        assert checks['product_categories.parent_id']['fix'] == 'set_null'
+        assert checks['inquiries.product_id']['key'] == 'id'
+
+    def test_scan_reports_counts_and_samples(self, engine):
+        """تست شمارش ردیف‌های یتیم و اعضای حلقه به همراه نمونه‌ها"""
+        report = scan_integrity(engine, Base.metadata)
+        counts = _counts(report)
+        assert counts['inquiries.product_id'] == 1
+        assert counts['inquiries.service_id'] == 1
+        assert counts['products.category_id'] == 1
+        assert counts['product_media.product_id'] == 2
+        assert counts['product_categories.parent_id'] == 1
+        # دسته 4 به حلقه می‌رسد اما عضو آن نیست
+        assert counts['product_categories.parent_id (cycle)'] == 2
+        assert counts['service_categories.parent_id (cycle)'] == 0
+        samples = {check['name']: check['samples'] for check in report['checks']}
+        assert samples['product_media.product_id'] == [{'id': 2, 'value': 77}, {'id': 3, 'value': 78}]
+        assert report['issues'] == 8
+
+    def test_fix_is_set_based_and_complete(self, engine):
+        """تست اصلاح همه مشکلات، باز شدن حلقه در کوچک‌ترین عضو و حفظ داده‌های سالم"""
+        result = fix_integrity(engine, Base.metadata)
+        assert result['remaining'] == 0
+        assert result['fixed']['product_media.product_id'] == 2
+        assert result['fixed']['product_categories.parent_id (cycle)'] == 1
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT id FROM product_media")).scalars().all() == [1]
+            parents = dict(conn.execute(text("SELECT id, parent_id FROM product_categories")).fetchall())
+            assert parents == {1: None, 2: None, 3: 2, 4: 2, 5: None}
+            inquiries = conn.execute(text(
+                "SELECT id, product_id, service_id FROM inquiries ORDER BY id")).fetchall()
+            assert [tuple(row) for row in inquiries] == [(1, None, None), (2, None, None), (3, 1, None)]
+
+    def test_fix_limited_to_table(self, engine):
+        """تست اصلاح فقط ارجاعات جدول انتخاب شده"""
+        result = fix_integrity(engine, Base.metadata, tables=['inquiries'])
+        assert result['total'] == 2
+        assert _counts(scan_integrity(engine, Base.metadata))['product_media.product_id'] == 2
@@ -0,0 +1,113 @@
+"""
+تست‌های اجراکننده کارهای پس‌زمینه
+"""
+
+import os
+import sys
+import time
+import pytest
+from contextlib import contextmanager
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src', 'utils')))
+
+from utils import job_runner
+from utils.job_runner import JOB_HANDLERS, JobContext, job_handler, run_job
+
+
+class _RecordingEngine:
+    """engine بدون دیتابیس که دستورها را نگه می‌دارد؛ rowcount پاسخ UPDATE پایان کار قابل تنظیم است"""
+
+    def __init__(self, finish_rowcount=1):
+        self.statements = []
+        self.finish_rowcount = finish_rowcount
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, params=None):
+        sql = ' '.join(str(statement).split())
+        self.statements.append((sql, params))
+        return type('Result', (), {'rowcount': self.finish_rowcount if 'finished_at' in sql else 1})()
+
+
+class _RecordingContext(JobContext):
+    """JobContext بدون دیتابیس که گزارش‌های پیشرفت را نگه می‌دارد"""
+
+    def __init__(self):
+        super().__init__(engine=None, job_id=0)
+        self.calls = []
+
+    def progress(self, done=None, total=None, message=None, force=False):
+        self.calls.append((done, total, message))
+
+
+class TestJobRegistry:
+    """تست‌های ثبت اجراکننده‌ها"""
+
+    def test_job_handler_registers_kind(self):
+        """تست ثبت تابع با دکوراتور"""
+        @job_handler('test_kind')
+        def handler(engine, params, ctx):
+            return {'value': params['value']}
+
+        try:
+            assert JOB_HANDLERS['test_kind'] is handler
+            assert handler(None, {'value': 3}, None) == {'value': 3}
+        finally:
+            JOB_HANDLERS.pop('test_kind', None)
+
+
+class TestDeleteFilesJob:
+    """تست کار حذف فایل‌های رسانه"""
+
+    def test_delete_files_reports_missing(self, tmp_path):
+        """تست حذف فایل و پوشه و شمارش فایل‌های ناموجود"""
+        admin_jobs = pytest.importorskip('utils.admin_jobs')
+        media = tmp_path / 'a.jpg'
+        media.write_bytes(b'x')
+        folder = tmp_path / 'folder'
+        folder.mkdir()
+        (folder / 'b.jpg').write_bytes(b'y')
+
+        ctx = _RecordingContext()
+        result = admin_jobs.run_delete_files(
+            None, {'paths': [str(media), str(folder), str(tmp_path / 'missing.jpg')]}, ctx)
+
+        assert result == {'deleted': 2, 'missing': 1, 'failed': []}
+        assert not media.exists() and not folder.exists()
+        assert len(ctx.calls) == 3
+
+
+class TestRunJob:
+    """تست heartbeat و ثبت وضعیت پایانی کار"""
+
+    def test_heartbeat_runs_without_progress(self, monkeypatch):
+        """تست به‌روز شدن heartbeat در یک مرحله طولانی بدون گزارش پیشرفت"""
+        monkeypatch.setattr(job_runner, 'HEARTBEAT_INTERVAL', 0.01)
+        engine = _RecordingEngine()
+
+        @job_handler('test_long_step')
+        def handler(engine, params, ctx):
+            time.sleep(0.1)
+            return {'done': True}
+
+        try:
+            run_job(engine, 7, 'test_long_step', None)
+        finally:
+            JOB_HANDLERS.pop('test_long_step', None)
+        heartbeats = [sql for sql, params in engine.statements if 'SET heartbeat_at' in sql]
+        assert len(heartbeats) >= 3
+        assert all("status = 'running'" in sql for sql in heartbeats)
+        # پس از پایان کار heartbeat دیگری نوشته نمی‌شود
+        assert 'finished_at' in engine.statements[-1][0]
+
+    def test_finish_keeps_status_of_reclaimed_job(self):
+        """تست بازنویسی نشدن وضعیت کاری که در این فاصله ناموفق علامت خورده"""
+        engine = _RecordingEngine(finish_rowcount=0)
+        assert not job_runner._finish(engine, 7, 'succeeded', result={})
+        sql, params = engine.statements[-1]
+        assert "WHERE id = :id AND status = 'running'" in sql and params['status'] == 'succeeded'
+        assert job_runner._finish(_RecordingEngine(), 7, 'failed', error='boom')
@@ -0,0 +1,52 @@
+"""
+تست‌های پاکسازی رسانه‌های یتیم
+"""
+
+import os
+import sys
+import json
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.media_gc import row_paths, scan_files, remove_empty_dirs
+
+
+class TestMediaGc:
+    """تست‌های توابع بدون دیتابیس پاکسازی رسانه‌ها"""
+
+    def test_row_paths_include_variants_and_legacy_file_id(self):
+        """تست مسیر فایل اصلی، نسخه‌ها و file_id قدیمی"""
+        variants = json.dumps({'thumb': 'static/uploads/blobs/ab/x_thumb.jpg'})
+        assert row_paths('./static/uploads/blobs/ab/x.jpg', 'tg-file-id', variants) == [
+            os.path.join('static', 'uploads', 'blobs', 'ab', 'x.jpg'),
+            os.path.join('static', 'uploads', 'blobs', 'ab', 'x_thumb.jpg'),
+        ]
+        assert row_paths(None, 'uploads/products/1/a.jpg', None) == [
+            os.path.join('static', 'uploads', 'products', '1', 'a.jpg')]
+        assert row_paths(None, 'AgACAgQAAxkBAAI', 'not json') == []
+
+    def test_scan_skips_protected_dirs(self, tmp_path):
+        """تست اسکن بازگشتی بدون پوشه تصاویر پیش‌فرض"""
+        (tmp_path / 'products' / '1').mkdir(parents=True)
+        (tmp_path / 'products' / '1' / 'a.jpg').write_bytes(b'abc')
+        (tmp_path / 'default').mkdir()
+        (tmp_path / 'default' / 'default.jpg').write_bytes(b'keep')
+
+        files = scan_files(str(tmp_path))
+
+        assert list(files) == [os.path.relpath(str(tmp_path / 'products' / '1' / 'a.jpg'))]
+        assert next(iter(files.values())).st_size == 3
+
+    def test_remove_empty_dirs_keeps_root(self, tmp_path):
+        """تست حذف پوشه‌های خالی پس از پاکسازی"""
+        (tmp_path / 'services' / '7').mkdir(parents=True)
+        (tmp_path / 'products' / '2').mkdir(parents=True)
+        (tmp_path / 'products' / '2' / 'b.jpg').write_bytes(b'b')
+        (tmp_path / 'default').mkdir()
+
+        remove_empty_dirs(str(tmp_path))
+
+        assert not (tmp_path / 'services').exists()
+        assert (tmp_path / 'products' / '2' / 'b.jpg').exists()
+        assert (tmp_path / 'default').exists() and tmp_path.exists()
@@ -0,0 +1,77 @@
+"""
+تست‌های ارائه فایل‌های رسانه‌ای (ETag، کش immutable، Range و X-Accel-Redirect)
+"""
+
+import os
+import sys
+import hashlib
+import pytest
+from flask import Flask
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.media_serving import media_response, content_hashed_name
+
+SHA = 'ab' + '1' * 62
+
+
+@pytest.fixture
+def media_app(tmp_path):
+    """اپ Flask ساده با مسیر /media روی یک پوشه موقت"""
+    app = Flask(__name__)
+    app.config['ACCEL'] = None
+
+    @app.route('/media/<path:filename>')
+    def media(filename):
+        return media_response(filename, root=str(tmp_path), accel_prefix=app.config['ACCEL'])
+
+    (tmp_path / 'blobs' / 'ab').mkdir(parents=True)
+    (tmp_path / 'blobs' / 'ab' / f'{SHA}.mp4').write_bytes(bytes(range(256)) * 4)
+    (tmp_path / 'legacy.jpg').write_bytes(b'legacy image')
+    return app
+
+
+class TestMediaServing:
+    """تست‌های media_response"""
+
+    def test_content_hashed_name(self):
+        """تست تشخیص مسیرهای مخزن و نسخه‌های مشتق"""
+        assert content_hashed_name(f'blobs/ab/{SHA}.jpg') == SHA
+        assert content_hashed_name(f'blobs/ab/{SHA}_thumb.webp') == f'{SHA}_thumb'
+        assert content_hashed_name('products/1/photo.jpg') is None
+
+    def test_blob_is_immutable_with_strong_etag(self, media_app):
+        """تست کش یک‌ساله immutable و پاسخ 304 برای ETag یکسان"""
+        client = media_app.test_client()
+        response = client.get(f'/media/blobs/ab/{SHA}.mp4')
+        assert response.status_code == 200
+        assert response.headers['ETag'] == f'"{SHA}"'
+        assert 'immutable' in response.headers['Cache-Control']
+
+        cached = client.get(f'/media/blobs/ab/{SHA}.mp4', headers={'If-None-Match': f'"{SHA}"'})
+        assert cached.status_code == 304
+
+    def test_legacy_file_etag_is_content_hash(self, media_app):
+        """تست ETag قوی بر اساس محتوا برای فایل‌های خارج از مخزن"""
+        response = media_app.test_client().get('/media/legacy.jpg')
+        assert response.headers['ETag'] == '"%s"' % hashlib.sha256(b'legacy image').hexdigest()
+        assert 'immutable' not in response.headers['Cache-Control']
+
+    def test_range_request_for_video(self, media_app):
+        """تست پاسخ 206 برای بخشی از ویدیو"""
+        response = media_app.test_client().get(f'/media/blobs/ab/{SHA}.mp4',
+                                               headers={'Range': 'bytes=10-19'})
+        assert response.status_code == 206
+        assert response.headers['Content-Range'] == 'bytes 10-19/1024'
+        assert response.data == bytes(range(10, 20))
+        assert response.mimetype == 'video/mp4'
+
+    def test_accel_redirect_and_traversal(self, media_app):
+        """تست واگذاری به nginx و جلوگیری از خروج از پوشه رسانه"""
+        media_app.config['ACCEL'] = '/protected-media'
+        client = media_app.test_client()
+        response = client.get(f'/media/blobs/ab/{SHA}.mp4')
+        assert response.headers['X-Accel-Redirect'] == f'/protected-media/blobs/ab/{SHA}.mp4'
+        assert response.data == b''
+        assert client.get('/media/../secret.txt').status_code == 404
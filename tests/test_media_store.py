@@ -0,0 +1,42 @@
+"""
+تست‌های مخزن رسانه آدرس‌دهی شده با محتوا
+"""
+
+import os
+import sys
+import hashlib
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.media_store import blob_path, hash_file, MEDIA_TABLES
+
+
+class TestMediaStore:
+    """تست‌های مسیر و hash فایل‌های مخزن"""
+
+    def test_hash_file_matches_sha256(self, tmp_path):
+        """تست hash تکه‌تکه فایل بزرگ‌تر از یک تکه"""
+        content = os.urandom(200 * 1024)
+        path = tmp_path / 'video.mp4'
+        path.write_bytes(content)
+        assert hash_file(str(path)) == hashlib.sha256(content).hexdigest()
+
+    def test_blob_path_is_content_addressed(self):
+        """تست مسیر blob بر اساس hash با پسوند کوچک"""
+        sha = 'ab' + '0' * 62
+        path = blob_path(sha, '.JPG', root='blobs')
+        assert path == os.path.join('blobs', 'ab', sha + '.jpg')
+        assert blob_path(sha, '', root='blobs').endswith(sha)
+
+    def test_identical_files_share_blob_path(self, tmp_path):
+        """تست اینکه دو فایل یکسان با نام متفاوت به یک blob می‌رسند"""
+        first = tmp_path / 'a.png'
+        second = tmp_path / 'copy of a.png'
+        first.write_bytes(b'same bytes')
+        second.write_bytes(b'same bytes')
+        assert blob_path(hash_file(str(first)), 'png') == blob_path(hash_file(str(second)), 'png')
+
+    def test_all_media_tables_are_covered(self):
+        """تست پوشش هر سه جدول رسانه"""
+        assert set(MEDIA_TABLES) == {'product_media', 'service_media', 'educational_content_media'}
@@ -0,0 +1,65 @@
+"""
+تست‌های اندازه‌گیری کوئری‌ها و ثبت کوئری‌های کند
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, text
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.query_stats import (QueryStats, instrument_engine, load_snapshots, merge_snapshots,
+                               normalize_sql, query_stats, query_unit)
+
+
+class TestQueryStats:
+    """تست‌های نرمال‌سازی، شمارش هر درخواست و ادغام آمار پردازه‌ها"""
+
+    def test_normalize_sql(self):
+        """تست یکسان شدن کوئری‌های هم‌شکل با مقادیر متفاوت"""
+        first = normalize_sql("SELECT * FROM products\n WHERE id IN (1, 2, 3) AND name = 'a''b' -- x")
+        second = normalize_sql("SELECT * FROM products WHERE id IN (%(id_1)s) AND name = %(name)s")
+        assert first == second == 'SELECT * FROM products WHERE id IN (...) AND name = ?'
+        assert normalize_sql("SELECT created_at::date FROM inquiries_y2024m01 LIMIT :limit") == \
+            'SELECT created_at::date FROM inquiries_y2024m01 LIMIT ?'
+        assert normalize_sql("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == 'INSERT INTO t (a, b) VALUES (...)'
+
+    def test_engine_events_count_queries_per_unit(self):
+        """تست ثبت زمان، ردیف و مبدأ هر دستور و شمارش کوئری‌های یک درخواست"""
+        engine = create_engine('sqlite://')
+        instrument_engine(engine)
+        instrument_engine(engine)
+        query_stats.reset()
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE items (id INTEGER)"))
+            with query_unit('web:test_route') as unit:
+                for value in (1, 2):
+                    conn.execute(text("INSERT INTO items (id) VALUES (:id)"), {'id': value})
+                conn.execute(text("SELECT * FROM items WHERE id = 5"))
+        assert unit['queries'] == 3
+
+        statements = {item['sql']: item for item in query_stats.snapshot()['statements']}
+        insert = statements['INSERT INTO items (id) VALUES (...)']
+        assert insert['count'] == 2 and insert['rows'] == 2
+        assert insert['origins'] == {'web:test_route': 2}
+        assert statements['CREATE TABLE items (id INTEGER)']['origins'] == {'-': 1}
+        origin = query_stats.snapshot()['origins'][0]
+        assert (origin['origin'], origin['units'], origin['queries']) == ('web:test_route', 1, 3)
+
+    def test_merge_process_snapshots(self, tmp_path):
+        """تست ادغام آمار ذخیره شده دو پردازه"""
+        web, bot = QueryStats(str(tmp_path)), QueryStats(str(tmp_path))
+        web.record('SELECT ?', 10, 1, 'web:index')
+        web.record_unit('web:index', 4, 10)
+        bot.record('SELECT ?', 30, 2, 'bot:show_products')
+        snapshots = [web.snapshot(), dict(bot.snapshot(), process='bot-1')]
+        merged = merge_snapshots(snapshots)
+        statement = merged['statements'][0]
+        assert (statement['count'], statement['total_ms'], statement['max_ms'], statement['avg_ms']) == \
+            (2, 40, 30, 20)
+        assert statement['origins'] == {'web:index': 1, 'bot:show_products': 1}
+        assert merged['origins'][0]['avg_queries'] == 4
+
+        web.flush()
+        assert [snapshot['statements'][0]['sql'] for snapshot in load_snapshots(str(tmp_path))] == ['SELECT ?']
@@ -0,0 +1,117 @@
+"""
+تست‌های کش خواندن کاتالوگ (TTL، LRU، کش منفی و باطل کردن با برچسب)
+"""
+
+import os
+import sys
+import time
+import pytest
+from sqlalchemy import text
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.catalog_changes import catalog_changed
+from utils.read_cache import MemoryBackend, SharedBackend, ReadCache, tag_matches, change_tags
+
+
+@pytest.fixture
+def database(make_database):
+    """Database روی SQLite با کش حافظه"""
+    return make_database("INSERT INTO products (id, name) VALUES (1, 'router'), (2, 'switch')",
+                         degraded=False, cache_backend='memory')
+
+
+def _rename(database, product_id, name):
+    with database.engine.begin() as conn:
+        conn.execute(text("UPDATE products SET name = :name WHERE id = :id"), {'name': name, 'id': product_id})
+
+
+@pytest.mark.parametrize('backend', ['memory', 'shared'])
+def test_backend_ttl_lru_and_tags(tmp_path, backend):
+    """تست انقضا، حذف LRU و باطل کردن برچسب‌ها در هر دو backend"""
+    store = MemoryBackend(max_entries=2) if backend == 'memory' else \
+        SharedBackend(str(tmp_path / 'cache.db'), max_entries=2)
+    cache = ReadCache(store)
+    cache.get_or_load('m', 'a', lambda: 'A', ttl=60, tags=['product:1'])
+    cache.get_or_load('m', 'b', lambda: 'B', ttl=60, tags=['service:1'])
+    time.sleep(0.01)
+    cache.get_or_load('m', 'missing', lambda: None, ttl=60, negative_ttl=0.01)
+    # کم‌استفاده‌ترین ورودی (a) حذف می‌شود
+    assert len(store) == 2 and store.evictions == 1
+    time.sleep(0.02)
+    assert cache.get_or_load('m', 'missing', lambda: 'loaded', ttl=60) == 'loaded'
+
+    cache.get_or_load('m', 'list', lambda: ['A'], ttl=60, tags=['product:*'])
+    assert cache.invalidate('service:2') == 0
+    assert cache.invalidate('product:2') == 1
+    assert cache.get_or_load('m', 'list', lambda: ['A2'], ttl=60, tags=['product:*']) == ['A2']
+    assert cache.invalidate('product:*') == 1
+    assert len(store) == 1
+
+class TestReadCache:
+    """تست‌های کش متدهای Database"""
+
+    def test_tag_rules(self):
+        """تست تطبیق برچسب‌ها و تبدیل تغییر جدول به برچسب"""
+        assert tag_matches('product:1', 'product:1')
+        assert tag_matches('product:*', 'product:1')
+        assert tag_matches('product:7', 'product:*')
+        assert not tag_matches('product:2', 'product:1')
+        assert not tag_matches('product_category:1', 'product:*')
+        assert change_tags('products', [3, 4]) == ['product:3', 'product:4']
+        assert change_tags('static_content', []) == ['static_content:*']
+        assert change_tags('inquiries', [1]) == []
+
+    def test_hits_and_negative_cache(self, database):
+        """تست برخورد، کش منفی و آمار هر متد"""
+        assert database.get_product(1)['name'] == 'router'
+        _rename(database, 1, 'edited')
+        assert database.get_product(product_id=1)['name'] == 'router'
+        assert database.get_product(99) is None
+        assert database.get_product(99) is None
+
+        methods = {item['method']: item for item in database.cache.stats()['methods']}
+        assert methods['get_product']['hits'] == 1
+        assert methods['get_product']['negative_hits'] == 1
+        assert methods['get_product']['misses'] == 2
+
+    def test_results_are_copies(self, database):
+        """تست اینکه تغییر نتیجه در فراخواننده مقدار کش شده را تغییر نمی‌دهد"""
+        product = database.get_product(1)
+        product['name'] = 'mutated'
+        products = database.get_products(None)
+        products.clear()
+        assert database.get_product(1)['name'] == 'router'
+        assert len(database.get_products(None)) == 2
+
+    def test_invalidation_during_load_is_not_lost(self):
+        """تست کش نشدن نتیجه‌ای که هنگام بارگذاری آن برچسبش باطل شد"""
+        cache = ReadCache(MemoryBackend())
+        loads = []
+
+        def loader():
+            loads.append(1)
+            if len(loads) == 1:
+                # تغییر کاتالوگ پس از خواندن و پیش از نوشتن در کش
+                cache.on_catalog_change('products', [1])
+            return {'name': f'router-{len(loads)}'}
+        assert cache.get_or_load('get_product', 'p1', loader, ttl=60, tags=['product:1']) == {'name': 'router-1'}
+        assert len(cache.backend) == 0
+        assert cache.get_or_load('get_product', 'p1', loader, ttl=60, tags=['product:1']) == {'name': 'router-2'}
+        assert cache.get_or_load('get_product', 'p1', loader, ttl=60, tags=['product:1']) == {'name': 'router-2'}
+        assert len(loads) == 2
+
+    def test_catalog_change_invalidates_tags(self, database):
+        """تست باطل شدن فقط ورودی‌های وابسته پس از catalog_changed"""
+        database.get_product(1)
+        database.get_product(2)
+        database.get_products(None)
+        _rename(database, 1, 'edited')
+        _rename(database, 2, 'edited')
+
+        catalog_changed('products', [1])
+        assert database.get_product(1)['name'] == 'edited'
+        assert database.get_product(2)['name'] == 'switch'
+        # فهرست‌ها به همه محصولات وابسته‌اند
+        assert database.cache.stats()['invalidated'] == 2
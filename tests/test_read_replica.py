@@ -0,0 +1,98 @@
+"""
+تست‌های هدایت خواندن‌های کاتالوگ به replica و read-your-writes
+"""
+
+import os
+import sys
+import time
+import pytest
+from sqlalchemy import text
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import read_replica
+from utils.read_replica import catalog_table
+
+
+def _seed(name):
+    return (f"INSERT INTO products (id, name) VALUES (1, '{name}')",
+            f"INSERT INTO static_content (content_type, content) VALUES ('about', '{name}')")
+
+
+@pytest.fixture
+def database(make_database, tmp_path, monkeypatch):
+    """Database با دو فایل SQLite جدا به جای primary و replica"""
+    # تغییر زمان فایل مشترک در تست‌ها بی‌درنگ دیده شود
+    monkeypatch.setattr(read_replica, 'MARKER_RESOLUTION', 0)
+    database = make_database(*_seed('primary'), replica=_seed('replica'), cache_backend='off')
+    database.router.marker = str(tmp_path / 'replica' / 'last_catalog_write')
+    # SQLite تابع‌های تأخیر replica را ندارد؛ بررسی سلامت برای این تست رد می‌شود
+    database.router.checked_at = time.monotonic()
+    return database
+
+
+class TestReadReplica:
+    """تست‌های مسیر خواندن، پنجره پس از نوشتن و بازگشت به primary"""
+
+    def test_catalog_table(self):
+        """تست تشخیص دستورهای نوشتن روی جدول‌های کاتالوگ"""
+        assert catalog_table('UPDATE products SET name=%(name)s WHERE products.id = %(id)s') == 'products'
+        assert catalog_table('INSERT INTO product_media (product_id) VALUES (?)') == 'product_media'
+        assert catalog_table('DELETE FROM "static_content" WHERE id = 1') == 'static_content'
+        assert catalog_table('INSERT INTO inquiries (name) VALUES (?)') is None
+        assert catalog_table('SELECT * FROM products') is None
+
+    def test_reads_follow_writes(self, database):
+        """تست خواندن از replica، خواندن از primary پس از نوشتن و نوشتن پردازه‌های دیگر"""
+        router = database.router
+        assert database.get_product(1)['name'] == 'replica'
+        assert database.get_static_content('about')['content'] == 'replica'
+
+        with database.engine.begin() as conn:
+            conn.execute(text("UPDATE products SET name = 'edited' WHERE id = 1"))
+        assert database.get_product(1)['name'] == 'edited'
+        assert router.counts['primary_window'] == 1
+
+        # پس از پایان پنجره دوباره replica
+        router.last_write = 0
+        os.utime(router.marker, (time.time() - 60, time.time() - 60))
+        assert database.get_product(1)['name'] == 'replica'
+
+        # نوشتن در پردازه دیگر (پنل وب) فقط فایل مشترک را به‌روز می‌کند
+        os.utime(router.marker, None)
+        assert database.get_product(1)['name'] == 'edited'
+
+        # نوشتن‌های غیرکاتالوگ پنجره را باز نمی‌کنند
+        router.last_write = 0
+        os.utime(router.marker, (time.time() - 60, time.time() - 60))
+        database.create_inquiry(5, 'n', '0912', '', product_id=1)
+        assert database.get_product(1)['name'] == 'replica'
+
+    def test_engine_is_pinned_per_transaction(self, database, monkeypatch):
+        """تست ثابت ماندن engine تا پایان تراکنش و خواندن محدود فایل مشترک"""
+        router, session = database.router, database.ReadSession()
+        query = text("SELECT name FROM products WHERE id = 1")
+        assert session.execute(query).scalar() == 'replica'
+        # پنجره پس از نوشتن وسط تراکنش باز می‌شود
+        router.mark_write()
+        assert session.execute(query).scalar() == 'replica'
+        session.commit()
+        assert session.execute(query).scalar() == 'primary'
+        database.ReadSession.remove()
+
+        monkeypatch.setattr(read_replica, 'MARKER_RESOLUTION', 60)
+        router.last_write, router.marker_read_at = 0, float('-inf')
+        calls = []
+        getmtime = os.path.getmtime
+        monkeypatch.setattr(read_replica.os.path, 'getmtime', lambda path: calls.append(path) or getmtime(path))
+        for _ in range(3):
+            router.last_catalog_write()
+        assert len(calls) == 1
+
+    def test_unhealthy_replica_falls_back(self, database):
+        """تست بازگشت به primary وقتی بررسی replica ناموفق است"""
+        database.router.checked_at = 0
+        assert database.get_product(1)['name'] == 'primary'
+        assert database.router.stats()['primary_down'] == 1
+        assert database.router.replica_down
@@ -0,0 +1,96 @@
+"""
+تست‌های اجرای نسخه‌دار مهاجرت‌های دیتابیس
+"""
+
+import os
+import sys
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import Base
+from utils.schema_migrations import MigrationError, load_revisions, migration_status, upgrade
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """دیتابیس SQLite خالی در فایل"""
+    return create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+
+
+def _write_revision(directory, filename, body):
+    (directory / filename).write_text(body, encoding='utf-8')
+
+
+class TestSchemaMigrations:
+    """تست‌های اعمال، ثبت و تکرارپذیری مهاجرت‌ها"""
+
+    def test_upgrade_fresh_database(self, engine):
+        """تست ساخت کامل ساختار، ثبت نسخه‌ها و ایندکس‌های مسیرهای پرتکرار"""
+        revisions = [module.revision for module in load_revisions()]
+        assert upgrade(engine) == revisions
+        assert upgrade(engine) == []
+        assert all(item['applied_at'] for item in migration_status(engine))
+
+        inspector = inspect(engine)
+        indexed = {(table, tuple(index['column_names']))
+                   for table in inspector.get_table_names() for index in inspector.get_indexes(table)}
+        for expected in [('products', ('category_id',)), ('services', ('category_id',)),
+                         ('product_media', ('product_id',)), ('service_media', ('service_id',)),
+                         ('educational_content_media', ('content_id',)),
+                         ('product_categories', ('parent_id',)), ('service_categories', ('parent_id',)),
+                         ('educational_categories', ('parent_id',)),
+                         ('inquiries', ('status', 'created_at', 'id')),
+                         ('inquiries', ('user_id', 'created_at'))]:
+            assert expected in indexed
+
+    def test_upgrade_matches_models(self, engine):
+        """تست اینکه ساختار ثابت شده نسخه‌ها همه جدول‌ها، ستون‌ها و ایندکس‌های مدل‌ها را دارد"""
+        upgrade(engine)
+        inspector = inspect(engine)
+        for table in Base.metadata.sorted_tables:
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            assert {column.name for column in table.columns} <= columns, table.name
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            assert {index.name for index in table.indexes} <= indexes, table.name
+
+    def test_baseline_reconciles_legacy_tables(self, engine):
+        """تست افزودن ستون‌ها و ایندکس‌های جا افتاده به جدول‌های قدیمی"""
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE service_media (id INTEGER PRIMARY KEY, "
+                              "service_id INTEGER, file_id VARCHAR(255), file_type VARCHAR(50))"))
+            conn.execute(text("INSERT INTO service_media (service_id, file_id, file_type) "
+                              "VALUES (1, 'abc', 'photo')"))
+        upgrade(engine)
+
+        inspector = inspect(engine)
+        columns = {column['name'] for column in inspector.get_columns('service_media')}
+        assert {'local_path', 'blob_id', 'variants'} <= columns
+        assert 'ix_service_media_service_id' in {index['name']
+                                                 for index in inspector.get_indexes('service_media')}
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT file_id FROM service_media")).scalar() == 'abc'
+
+    def test_failed_revision_is_not_recorded(self, engine, tmp_path):
+        """تست توقف روی نسخه خطادار، برگشت تراکنش و اجرای تا نسخه مشخص"""
+        versions = tmp_path / 'versions'
+        versions.mkdir()
+        _write_revision(versions, '0001_first.py',
+                        "from sqlalchemy import text\nrevision = '0001'\ndescription = 'first'\n"
+                        "def upgrade(conn):\n    conn.execute(text('CREATE TABLE first (id INTEGER)'))\n")
+        _write_revision(versions, '0002_broken.py',
+                        "from sqlalchemy import text\nrevision = '0002'\ndescription = 'broken'\n"
+                        "def upgrade(conn):\n    conn.execute(text('INSERT INTO first (id) VALUES (1)'))\n"
+                        "    conn.execute(text('SELECT * FROM missing'))\n")
+
+        assert upgrade(engine, target='0001', directory=str(versions)) == ['0001']
+        with pytest.raises(MigrationError):
+            upgrade(engine, directory=str(versions))
+        assert [item['applied_at'] is not None
+                for item in migration_status(engine, str(versions))] == [True, False]
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM first")).scalar() == 0
+        with pytest.raises(MigrationError):
+            upgrade(engine, target='0009', directory=str(versions))
@@ -0,0 +1,118 @@
+"""
+تست‌های ادغام خواندن‌های هم‌زمان یکسان (single-flight)
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+from sqlalchemy import event
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.single_flight import SingleFlight
+
+
+def _wait_for_waiters(flight, count, timeout=5):
+    """انتظار تا همه رشته‌ها به فراخوانی در جریان بپیوندند"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with flight.lock:
+            if sum(call.waiters for call in flight.calls.values()) >= count:
+                return
+        time.sleep(0.001)
+    raise AssertionError('waiters did not join the in-flight call')
+
+
+def _run_threads(count, target):
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+@pytest.fixture
+def database(make_database):
+    """Database روی SQLite بدون کش تا همه خواندن‌ها به دیتابیس برسند"""
+    return make_database("INSERT INTO product_categories (id, name) VALUES (1, 'network'), (2, 'storage')",
+                         "INSERT INTO products (id, name, category_id) VALUES (1, 'router', 1), (2, 'nas', 2)",
+                         degraded=False, cache_backend='off')
+
+
+def test_concurrent_calls_share_one_result():
+    """تست اجرای یک بار تابع برای فراخوانی‌های هم‌زمان یکسان، نسخه جدای هر منتظر و آمار ادغام"""
+    flight, release, runs = SingleFlight(), threading.Event(), []
+
+    def load():
+        runs.append(1)
+        release.wait(5)
+        return ['router']
+    threads, results = _run_threads(5, lambda: flight.do('get_products:[1]', load, method='get_products'))
+    _wait_for_waiters(flight, 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(runs) == 1
+    assert results == [['router']] * 5
+    # هر فراخوانی نسخه جدای خود را می‌گیرد
+    results[0].append('media')
+    assert results[1:] == [['router']] * 4 and len({id(result) for result in results}) == 5
+    assert flight.stats() == [{'method': 'get_products', 'queries': 1, 'shared': 4, 'max_waiters': 4,
+                               'calls': 5, 'ratio': 0.8}]
+    # پس از پایان، فراخوانی بعدی دوباره اجرا می‌شود
+    assert flight.do('get_products:[1]', load, method='get_products') == ['router'] and len(runs) == 2
+    assert not flight.calls
+
+
+def test_error_reaches_every_waiter():
+    """تست رسیدن خطای فراخوانی اول به همه منتظرها"""
+    flight, release = SingleFlight(), threading.Event()
+
+    def load():
+        release.wait(5)
+        raise RuntimeError('connection lost')
+    threads, results = _run_threads(3, lambda: flight.do('key', load))
+    _wait_for_waiters(flight, 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not flight.calls
+    assert flight.do('key', lambda: 'ok') == 'ok'
+
+
+def test_database_coalesces_catalog_reads(database):
+    """تست یک کوئری برای ضربه‌های هم‌زمان روی یک دسته و کوئری جدا برای دسته دیگر"""
+    statements, release = [], threading.Event()
+    event.listen(database.engine, 'after_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    repo_get_products = database.product_repo.get_products
+
+    def slow_get_products(category_id):
+        release.wait(5)
+        return repo_get_products(category_id)
+    database.product_repo.get_products = slow_get_products
+
+    threads, results = _run_threads(4, lambda: database.get_products(category_id=1))
+    _wait_for_waiters(database.flight, 3)
+    other, other_results = _run_threads(1, lambda: database.get_products(2))
+    release.set()
+    for thread in threads + other:
+        thread.join()
+
+    assert [[item['name'] for item in result] for result in results] == [['router']] * 4
+    assert [item['name'] for item in other_results[0]] == ['nas']
+    assert len([sql for sql in statements if 'FROM products' in sql]) == 2
+    stats = {item['method']: item for item in database.flight.stats()}
+    assert stats['get_products']['queries'] == 2 and stats['get_products']['shared'] == 3
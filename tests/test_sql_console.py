@@ -0,0 +1,84 @@
+"""
+تست‌های کنسول SQL پنل مدیریت
+"""
+
+import os
+import sys
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import SqlQueryHistory
+from utils.sql_console import (MAX_TIMEOUT_MS, SqlConsoleError, check_query, clamp_timeout,
+                               plan_tree, record_history)
+
+PLAN = {
+    'Plan': {
+        'Node Type': 'Hash Join', 'Join Type': 'Inner', 'Hash Cond': '(p.category_id = c.id)',
+        'Total Cost': 120.0, 'Plan Rows': 10, 'Actual Rows': 900, 'Actual Loops': 1,
+        'Actual Total Time': 50.0,
+        'Plans': [
+            {'Node Type': 'Seq Scan', 'Relation Name': 'products', 'Alias': 'p', 'Total Cost': 100.0,
+             'Plan Rows': 1000, 'Actual Rows': 1000, 'Actual Loops': 1, 'Actual Total Time': 40.0,
+             'Filter': '(price > 0)', 'Rows Removed by Filter': 5, 'Shared Hit Blocks': 3,
+             'Shared Read Blocks': 7},
+            {'Node Type': 'Hash', 'Total Cost': 10.0, 'Plan Rows': 5, 'Actual Rows': 5,
+             'Actual Loops': 1, 'Actual Total Time': 1.0,
+             'Plans': [{'Node Type': 'Index Scan', 'Relation Name': 'product_categories',
+                        'Alias': 'c', 'Index Name': 'ix_product_categories_parent_id',
+                        'Total Cost': 9.0, 'Plan Rows': 5, 'Actual Rows': 5, 'Actual Loops': 1,
+                        'Actual Total Time': 0.9}]},
+        ],
+    },
+    'Planning Time': 0.2,
+    'Execution Time': 50.5,
+}
+
+
+class TestSqlConsole:
+    """تست‌های بررسی کوئری، درخت طرح اجرا و تاریخچه"""
+
+    def test_check_query_keeps_text_and_rejects_writes(self):
+        """تست حفظ حروف و رشته‌ها و رد دستورهای چندگانه یا تغییر داده"""
+        sql = "SELECT name FROM products WHERE name = 'Radio; DROP' -- x;\n;"
+        assert check_query(sql) == "SELECT name FROM products WHERE name = 'Radio; DROP' -- x;"
+        assert check_query('  Explain select 1 ') == 'Explain select 1'
+        for bad in ('', 'SELECT 1; DELETE FROM users', 'update users set is_admin = true',
+                    '/* hi */ DROP TABLE users', 'commit'):
+            with pytest.raises(SqlConsoleError):
+                check_query(bad)
+        assert clamp_timeout('x') == 10000
+        assert clamp_timeout(10 ** 9) == MAX_TIMEOUT_MS
+
+    def test_plan_tree_marks_costly_nodes(self):
+        """تست عمق گره‌ها، زمان اختصاصی و علامت‌گذاری گره پرهزینه و تخمین اشتباه"""
+        tree = plan_tree(PLAN)
+        nodes = tree['nodes']
+        assert [(node['node_type'], node['depth']) for node in nodes] == [
+            ('Hash Join', 0), ('Seq Scan', 1), ('Hash', 1), ('Index Scan', 2)]
+        join, scan, hash_node, index = nodes
+        assert join['exclusive'] == pytest.approx(9.0)
+        assert scan['heat'] == 'hot' and join['heat'] == 'warm' and index['heat'] is None
+        assert join['misestimate'] == 90 and scan['misestimate'] is None
+        assert (scan['rows_removed'], scan['shared_read']) == (5, 7)
+        assert tree['execution_ms'] == 50.5
+
+        costs = plan_tree(PLAN, analyze=False)['nodes']
+        assert costs[0]['exclusive'] == pytest.approx(10.0) and 'actual_rows' not in costs[0]
+
+    def test_history_keeps_latest_per_user(self, monkeypatch):
+        """تست ثبت تاریخچه و حذف موارد قدیمی‌تر از سقف"""
+        monkeypatch.setattr('utils.sql_console.HISTORY_SIZE', 3)
+        engine = create_engine('sqlite://')
+        SqlQueryHistory.__table__.create(engine)
+        session = sessionmaker(bind=engine)()
+        for number in range(5):
+            record_history(session, SqlQueryHistory, 1, f'SELECT {number}', 'run',
+                           duration_ms=1.6, rows=1)
+        record_history(session, SqlQueryHistory, 2, 'SELECT x', 'explain', error='boom')
+        assert [item.sql for item in session.query(SqlQueryHistory).filter_by(user_id=1)
+                .order_by(SqlQueryHistory.id)] == ['SELECT 2', 'SELECT 3', 'SELECT 4']
+        assert session.query(SqlQueryHistory).filter_by(user_id=2).one().error == 'boom'
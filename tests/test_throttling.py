@@ -0,0 +1,108 @@
+"""
+تست‌های محدودیت نرخ کاربران ربات (سطل توکن، ضربه تکراری و middleware)
+"""
+
+import os
+import sys
+import pytest
+from aiogram.types import CallbackQuery, User
+
+# اضافه کردن مسیر پروژه به سیستم
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# بارگذاری پکیج handlers ماژول bot را وارد می‌کند که بدون توکن خارج می‌شود
+os.environ.setdefault('BOT_TOKEN', '123456:test-token')
+
+from utils import throttling
+from utils.throttling import ALLOWED, DUPLICATE, THROTTLED, Throttle
+from handlers.middlewares import THROTTLED_TEXT, ThrottlingMiddleware
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """ساعت قابل جلو بردن به جای time.monotonic"""
+    now = [1000.0]
+    monkeypatch.setattr(throttling.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def _callback(user_id, data, message_id=None):
+    return CallbackQuery(id=f'{user_id}-{data}', from_user=User(id=user_id, is_bot=False, first_name='u'),
+                         chat_instance='chat', data=data, inline_message_id=message_id)
+
+
+def test_token_bucket_burst_and_refill(clock):
+    """تست مصرف burst، رد شدن پس از آن و پر شدن دوباره با نرخ"""
+    throttle = Throttle('message', rate=2, burst=3)
+    assert [throttle.check(1) for _ in range(4)] == [ALLOWED, ALLOWED, ALLOWED, THROTTLED]
+    # کاربر دیگر سطل جدا دارد
+    assert throttle.check(2) == ALLOWED
+    clock[0] += 0.5
+    assert [throttle.check(1) for _ in range(2)] == [ALLOWED, THROTTLED]
+    clock[0] += 60
+    assert [throttle.check(1) for _ in range(4)] == [ALLOWED, ALLOWED, ALLOWED, THROTTLED]
+
+    stats = throttle.stats()
+    assert (stats['allowed'], stats['throttled'], stats['duplicate']) == (8, 3, 0)
+    assert stats['top_users'] == [{'user_id': 1, 'rejected': 3}]
+    throttle.reset_stats()
+    assert throttle.stats()['total'] == 0
+
+
+def test_duplicate_taps_are_dropped(clock):
+    """تست کنار گذاشتن ضربه تکراری در پنجره بدون مصرف توکن"""
+    throttle = Throttle('callback', rate=1, burst=2, duplicate_window=1.5)
+    assert throttle.check(1, (10, 'product_item:1')) == ALLOWED
+    assert throttle.check(1, (10, 'product_item:1')) == DUPLICATE
+    assert throttle.check(1, (10, 'product_item:2')) == ALLOWED
+    # دکمه دیگری روی پیام دیگر تکراری نیست ولی سطل خالی است
+    assert throttle.check(1, (11, 'product_item:1')) == THROTTLED
+    clock[0] += 2
+    assert throttle.check(1, (10, 'product_item:1')) == ALLOWED
+    assert throttle.stats()['duplicate'] == 1
+
+
+def test_idle_users_are_swept(clock):
+    """تست حذف ضربه‌های بیرون از پنجره و سطل‌های دوباره پر شده"""
+    throttle = Throttle('callback', rate=2, burst=4, duplicate_window=1.5)
+    for user_id in range(50):
+        assert throttle.check(user_id, (user_id, 'product_item:1')) == ALLOWED
+    assert len(throttle.recent) == 50 and len(throttle.buckets) == 50
+
+    # یک کاربر هنوز فعال است؛ بقیه پس از بازه پاک‌سازی حذف می‌شوند
+    clock[0] += throttling.SWEEP_INTERVAL - 1
+    throttle.check(7, (7, 'product_item:2'))
+    clock[0] += 1.2
+    throttle.check(7, (7, 'product_item:3'))
+    assert set(throttle.buckets) == {7}
+    assert set(throttle.recent) == {(7, (7, 'product_item:2')), (7, (7, 'product_item:3'))}
+
+    clock[0] += throttling.SWEEP_INTERVAL
+    throttle.check(8)
+    assert set(throttle.buckets) == {8} and throttle.recent == {}
+
+
+@pytest.mark.asyncio
+async def test_middleware_answers_rejected_callbacks(clock, monkeypatch):
+    """تست نرسیدن callback رد شده به handler و پاسخ answer به آن"""
+    answers, handled = [], []
+
+    async def answer(self, text=None, **kwargs):
+        answers.append(text)
+    monkeypatch.setattr(CallbackQuery, 'answer', answer)
+
+    async def handler(event, data):
+        handled.append(event.data)
+        return 'handled'
+
+    middleware = ThrottlingMiddleware('callback')
+    middleware.throttle.burst = 2
+    middleware.throttle.buckets.clear()
+    assert await middleware(handler, _callback(1, 'product_item:1', 'm1'), {}) == 'handled'
+    assert await middleware(handler, _callback(1, 'product_item:1', 'm1'), {}) is None
+    assert await middleware(handler, _callback(1, 'product_item:2', 'm1'), {}) == 'handled'
+    assert await middleware(handler, _callback(1, 'product_item:3', 'm1'), {}) is None
+
+    assert handled == ['product_item:1', 'product_item:2']
+    # ضربه تکراری بی‌صدا، بیش از حد مجاز با پیام کوتاه
+    assert answers == [None, THROTTLED_TEXT]
+    assert {item['kind'] for item in throttling.throttle_snapshots()} >= {'callback'}
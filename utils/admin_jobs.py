@@ -0,0 +1,201 @@
+"""
+اجراکننده‌های کارهای سنگین پنل مدیریت
+هر تابع با @job_handler ثبت می‌شود و در پردازه job_worker.py اجرا می‌شود.
+"""
+
+import os
+import json
+import shutil
+from typing import Dict
+from sqlalchemy import text
+from logging_config import get_logger
+from models import Base
+from utils.job_runner import job_handler, JobContext
+from utils.db_engine import direct_engine
+from utils.backup_utils import write_backup_file
+from utils.import_utils import import_csv
+from utils.restore_utils import restore_from_zip
+from utils.media_store import MEDIA_TABLES, relocate_blob
+from utils.media_gc import collect_garbage, DEFAULT_GRACE_SECONDS
+from utils.inquiry_analytics import refresh_inquiry_analytics
+from utils.inquiry_partitions import maintain_inquiries, INQUIRY_RETENTION_DAYS
+from utils.integrity import scan_integrity, fix_integrity
+from utils_upload import process_image
+
+logger = get_logger('app')
+
+
+def _remove_input(path: str):
+    """حذف فایل ورودی کار پس از پردازش"""
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        logger.warning(f"Could not remove job input {path}: {e}")
+
+
+@job_handler('import_csv')
+def run_import(engine, params: Dict, ctx: JobContext) -> Dict:
+    """ورود فایل CSV ذخیره شده در data/job_files"""
+    path = params['path']
+    try:
+        with open(path, 'rb') as fh:
+            result = import_csv(engine, params['entity_type'], fh, progress=ctx.progress)
+    finally:
+        _remove_input(path)
+    result['entity_type'] = params['entity_type']
+    result['report_file'] = os.path.basename(result['report_path']) if result['report_path'] else None
+    return result
+
+
+@job_handler('restore')
+def run_restore(engine, params: Dict, ctx: JobContext) -> Dict:
+    """بازیابی پشتیبان ZIP ذخیره شده در data/job_files"""
+    path = params['path']
+    try:
+        result = restore_from_zip(engine, path, clear_tables=params.get('clear_tables', False),
+                                  progress=ctx.progress)
+    finally:
+        _remove_input(path)
+    result['report_file'] = os.path.basename(result['report_path']) if result['report_path'] else None
+    return result
+
+
+@job_handler('backup')
+def run_backup(engine, params: Dict, ctx: JobContext) -> Dict:
+    """ساخت فایل پشتیبان در data/backups"""
+    path, manifest = write_backup_file(engine, include_media=params.get('include_media', False),
+                                       progress=ctx.progress)
+    return {
+        'file': os.path.basename(path),
+        'rows': sum(t['rows'] for t in manifest['tables'].values()),
+        'tables': {t: info['rows'] for t, info in manifest['tables'].items()},
+    }
+
+
+@job_handler('delete_files')
+def run_delete_files(engine, params: Dict, ctx: JobContext) -> Dict:
+    """حذف فایل‌های رسانه‌ای که ردیف‌هایشان قبلاً از دیتابیس حذف شده‌اند"""
+    paths = params.get('paths', [])
+    deleted, missing, failed = 0, 0, []
+    for position, path in enumerate(paths):
+        ctx.progress(position, len(paths), path)
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+                deleted += 1
+            elif os.path.exists(path):
+                os.remove(path)
+                deleted += 1
+            else:
+                missing += 1
+        except OSError as e:
+            failed.append({'path': path, 'error': str(e)})
+    logger.info(f"Media cleanup: deleted={deleted}, missing={missing}, failed={len(failed)}")
+    return {'deleted': deleted, 'missing': missing, 'failed': failed}
+
+
+def _processed_sibling(conn, blob_id):
+    """نسخه‌های پردازش شده رسانه دیگری که به همان blob اشاره می‌کند"""
+    union = ' UNION ALL '.join(
+        f'SELECT variants, width, height FROM {table} WHERE blob_id = :blob_id AND variants IS NOT NULL'
+        for table in MEDIA_TABLES)
+    return conn.execute(text(f"{union} LIMIT 1"), {'blob_id': blob_id}).fetchone()
+
+
+def _save_processed(conn, table, media_id, variants, width, height):
+    conn.execute(text(f"""
+        UPDATE {table} SET variants = :variants, width = :width, height = :height
+        WHERE id = :id
+    """), {'id': media_id, 'variants': variants, 'width': width, 'height': height})
+
+
+@job_handler('process_media')
+def run_process_media(engine, params: Dict, ctx: JobContext) -> Dict:
+    """اصلاح جهت، حذف EXIF، کوچک‌سازی و ساخت نسخه‌های تصاویر آپلود شده"""
+    table = params['table']
+    if table not in MEDIA_TABLES:
+        raise ValueError(f"Unknown media table {table}")
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"""
+            SELECT id, local_path, blob_id FROM {table}
+            WHERE id = ANY(:ids) AND file_type = 'photo' AND local_path IS NOT NULL
+        """), {'ids': list(params.get('ids', []))}).fetchall()
+
+    processed, reused, failed = 0, 0, []
+    for position, (media_id, path, blob_id) in enumerate(rows):
+        ctx.progress(position, len(rows), path)
+        with direct_engine(engine).connect() as lock_conn:
+            # قفل روی blob تا دو کار همزمان یک فایل مشترک را دوباره پردازش نکنند
+            if blob_id:
+                lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {'key': blob_id})
+            try:
+                with engine.begin() as conn:
+                    sibling = _processed_sibling(conn, blob_id) if blob_id else None
+                    if sibling is not None:
+                        _save_processed(conn, table, media_id, sibling.variants,
+                                        sibling.width, sibling.height)
+                        current = conn.execute(text("SELECT path FROM media_blobs WHERE id = :id"),
+                                               {'id': blob_id}).scalar()
+                        if current and current != path:
+                            relocate_blob(conn, blob_id, path, current)
+                        reused += 1
+                        continue
+                # فایل‌های مخزن immutable هستند؛ نسخه پردازش شده در مسیر جدید نوشته می‌شود
+                dest = None
+                if blob_id:
+                    base, extension = os.path.splitext(path)
+                    dest = f'{base}_n{extension}'
+                try:
+                    info = process_image(path, dest)
+                except Exception as e:
+                    logger.error(f"Image processing failed for {table} {media_id}: {e}")
+                    failed.append({'id': media_id, 'error': str(e)})
+                    continue
+                with engine.begin() as conn:
+                    _save_processed(conn, table, media_id, json.dumps(info['variants']),
+                                    info['width'], info['height'])
+                    if blob_id:
+                        relocate_blob(conn, blob_id, path, dest)
+                if dest:
+                    # فایل اصلی با EXIF دیگر ارجاعی ندارد
+                    _remove_input(path)
+                processed += 1
+            finally:
+                if blob_id:
+                    lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': blob_id})
+    return {'table': table, 'processed': processed, 'reused': reused, 'failed': failed}
+
+
+@job_handler('media_gc')
+def run_media_gc(engine, params: Dict, ctx: JobContext) -> Dict:
+    """پاکسازی فایل‌های رسانه بدون ارجاع و به‌روزرسانی فضای مصرفی هر موجودیت"""
+    return collect_garbage(engine, mode=params.get('mode', 'report'),
+                           grace_seconds=int(params.get('grace_seconds', DEFAULT_GRACE_SECONDS)),
+                           progress=ctx.progress)
+
+
+@job_handler('inquiry_analytics')
+def run_inquiry_analytics(engine, params: Dict, ctx: JobContext) -> Dict:
+    """تازه‌سازی جدول‌های جمع‌بندی گزارش استعلام‌ها"""
+    return refresh_inquiry_analytics(engine, full=bool(params.get('full')), progress=ctx.progress)
+
+
+@job_handler('inquiry_maintenance')
+def run_inquiry_maintenance(engine, params: Dict, ctx: JobContext) -> Dict:
+    """ساخت پارتیشن‌های ماه‌های آینده و بایگانی استعلام‌های بسته شده قدیمی"""
+    return maintain_inquiries(engine,
+                              retention_days=int(params.get('retention_days', INQUIRY_RETENTION_DAYS)),
+                              progress=ctx.progress)
+
+
+@job_handler('integrity_check')
+def run_integrity_check(engine, params: Dict, ctx: JobContext) -> Dict:
+    """بررسی ارجاعات یتیم و حلقه‌های دسته‌بندی"""
+    return scan_integrity(engine, Base.metadata, tables=params.get('tables'), progress=ctx.progress)
+
+
+@job_handler('integrity_fix')
+def run_integrity_fix(engine, params: Dict, ctx: JobContext) -> Dict:
+    """اصلاح مجموعه‌ای ارجاعات یتیم و حلقه‌های دسته‌بندی"""
+    return fix_integrity(engine, Base.metadata, tables=params.get('tables'), progress=ctx.progress)
@@ -0,0 +1,357 @@
+"""
+موتور پشتیبان‌گیری جریانی از دیتابیس
+هر جدول با COPY TO STDOUT روی اتصال‌های موازی (با یک snapshot مشترک) در فایل موقت
+روی دیسک ریخته می‌شود و سپس فایل ZIP به صورت تکه‌تکه به پاسخ یا به فایلی در data/ نوشته می‌شود.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import zipfile
+import tempfile
+import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from logging_config import get_logger
+
+logger = get_logger('webpanel')
+
+# جداول به ترتیب وابستگی (والدها قبل از فرزندها)
+BACKUP_TABLES = [
+    'users',
+    'product_categories',
+    'service_categories',
+    'educational_categories',
+    'static_content',
+    'products',
+    'services',
+    'educational_content',
+    'inquiries',
+    'media_blobs',
+    'product_media',
+    'service_media',
+    'educational_content_media',
+]
+
+BACKUP_DIR = os.path.join('data', 'backups')
+MEDIA_ROOT = os.path.join('static', 'uploads')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 2
+DEFAULT_WORKERS = 4
+CHUNK_SIZE = 64 * 1024
+
+
+class _HashingWriter:
+    """فایل مقصد COPY که هم‌زمان با نوشتن، SHA-256 و حجم را محاسبه می‌کند."""
+
+    def __init__(self, fh):
+        self._fh = fh
+        self._sha = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._sha.update(data)
+        self.size += len(data)
+        return self._fh.write(data)
+
+    def hexdigest(self) -> str:
+        return self._sha.hexdigest()
+
+
+class _ZipStream:
+    """بافر فقط-نوشتنی (بدون seek) که خروجی zipfile را برای ارسال تکه‌تکه نگه می‌دارد."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _snapshot_connection(engine):
+    """
+    اتصال خام با تراکنش‌های REPEATABLE READ فقط‌خواندنی
+
+    psycopg2 خودش تراکنش را باز می‌کند و BEGIN دستی در تراکنش باز شده نادیده گرفته می‌شود؛
+    حالت تراکنش با set_session روی اتصال بیکار تنظیم و در _release_connection برگردانده می‌شود.
+    """
+    conn = engine.raw_connection()
+    try:
+        conn.rollback()
+        conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+        return conn
+    except Exception:
+        conn.close()
+        raise
+
+
+def _release_connection(conn):
+    """پایان تراکنش و برگرداندن حالت پیش‌فرض اتصال پیش از بازگشت به pool"""
+    try:
+        conn.rollback()
+        conn.set_session(isolation_level='DEFAULT', readonly='DEFAULT')
+    finally:
+        conn.close()
+
+
+def _export_snapshot(engine):
+    """
+    باز کردن تراکنش هماهنگ‌کننده و صدور snapshot برای استفاده اتصال‌های موازی
+
+    Returns:
+        (connection, snapshot_id)؛ اتصال باید تا پایان dump همه جداول باز بماند
+    """
+    conn = _snapshot_connection(engine)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_export_snapshot()")
+        snapshot_id = cursor.fetchone()[0]
+        cursor.close()
+        return conn, snapshot_id
+    except Exception:
+        _release_connection(conn)
+        raise
+
+
+def dump_table(engine, table: str, dest_path: str, snapshot_id: Optional[str] = None) -> Dict:
+    """
+    خروجی گرفتن از یک جدول با COPY TO STDOUT مستقیم روی دیسک
+
+    Args:
+        engine: موتور SQLAlchemy
+        table: نام جدول
+        dest_path: مسیر فایل CSV مقصد
+        snapshot_id: شناسه snapshot صادرشده برای خروجی سازگار بین جداول (اختیاری)
+
+    Returns:
+        دیکشنری شامل تعداد ردیف، حجم و checksum فایل
+    """
+    conn = _snapshot_connection(engine)
+    try:
+        cursor = conn.cursor()
+        if snapshot_id:
+            cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot_id,))
+        with open(dest_path, 'wb') as fh:
+            writer = _HashingWriter(fh)
+            cursor.copy_expert(
+                f"COPY {_quote_ident(table)} TO STDOUT WITH (FORMAT csv, HEADER true)",
+                writer)
+        rows = cursor.rowcount
+        cursor.close()
+        return {
+            'file': f'{table}.csv',
+            'rows': rows,
+            'bytes': writer.size,
+            'sha256': writer.hexdigest(),
+        }
+    finally:
+        _release_connection(conn)
+
+
+def dump_tables(engine, spool_dir: str, tables: List[str] = None,
+                workers: int = DEFAULT_WORKERS) -> Iterator[Tuple[str, Dict]]:
+    """
+    خروجی موازی از جداول در پوشه موقت
+
+    Args:
+        engine: موتور SQLAlchemy
+        spool_dir: پوشه موقت برای فایل‌های CSV
+        tables: لیست جداول (پیش‌فرض: BACKUP_TABLES)
+        workers: تعداد اتصال‌های موازی
+
+    Yields:
+        (نام جدول، اطلاعات manifest) به ترتیب اتمام
+    """
+    tables = tables or BACKUP_TABLES
+    coordinator, snapshot_id = _export_snapshot(engine)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(dump_table, engine, table,
+                                os.path.join(spool_dir, f'{table}.csv'),
+                                snapshot_id): table
+                for table in tables
+            }
+            for future in as_completed(futures):
+                table = futures[future]
+                entry = future.result()
+                logger.info(f"Backup dumped table {table}: {entry['rows']} rows, {entry['bytes']} bytes")
+                yield table, entry
+    finally:
+        _release_connection(coordinator)
+
+
+def collect_media_references(media_root: str = MEDIA_ROOT) -> List[Dict]:
+    """
+    فهرست فایل‌های رسانه‌ای به صورت ارجاع (بدون کپی محتوا)
+
+    Args:
+        media_root: ریشه پوشه آپلودها
+
+    Returns:
+        لیست دیکشنری‌های path/size/mtime
+    """
+    references = []
+    if not os.path.isdir(media_root):
+        return references
+    for root, _dirs, files in os.walk(media_root):
+        for name in sorted(files):
+            full_path = os.path.join(root, name)
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            references.append({
+                'path': os.path.relpath(full_path, media_root).replace(os.sep, '/'),
+                'size': stat.st_size,
+                'mtime': int(stat.st_mtime),
+            })
+    return references
+
+
+def build_manifest(tables: Dict[str, Dict], include_media: bool = False,
+                   media_root: str = MEDIA_ROOT) -> Dict:
+    """ساخت manifest پشتیبان با تعداد ردیف‌ها و checksum هر جدول"""
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'created_at': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'format': 'csv',
+        'tables': {table: tables[table] for table in BACKUP_TABLES if table in tables},
+    }
+    if include_media:
+        media = collect_media_references(media_root)
+        manifest['media'] = {
+            'root': media_root.replace(os.sep, '/'),
+            'files': media,
+            'total_bytes': sum(item['size'] for item in media),
+        }
+    return manifest
+
+
+def _readme(manifest: Dict) -> bytes:
+    files = ', '.join(entry['file'] for entry in manifest['tables'].values())
+    return f"""این پشتیبان در تاریخ {manifest['created_at']} ایجاد شده است.
+هر فایل CSV شامل داده‌های یک جدول است و با COPY از PostgreSQL گرفته شده است.
+ستون اول در هر فایل CSV نام ستون‌ها را نشان می‌دهد.
+تعداد ردیف‌ها و checksum هر فایل در {MANIFEST_NAME} ثبت شده است.
+
+فایل‌های پشتیبان شامل:
+{files}
+""".encode('utf-8')
+
+
+def _write_entry(zf: zipfile.ZipFile, stream: Optional[_ZipStream], path: str,
+                 arcname: str) -> Iterator[bytes]:
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    with open(path, 'rb') as src, zf.open(zinfo, 'w') as dest:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            dest.write(chunk)
+            if stream is not None:
+                data = stream.drain()
+                if data:
+                    yield data
+
+
+def _generate_archive(engine, fileobj, stream: Optional[_ZipStream], include_media: bool,
+                      workers: int, result: Dict,
+                      progress: Optional[Callable] = None) -> Iterator[bytes]:
+    spool_dir = tempfile.mkdtemp(prefix='rfcbot_backup_')
+    try:
+        with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as zf:
+            tables = {}
+            for table, entry in dump_tables(engine, spool_dir, workers=workers):
+                tables[table] = entry
+                yield from _write_entry(zf, stream, os.path.join(spool_dir, entry['file']), entry['file'])
+                os.unlink(os.path.join(spool_dir, entry['file']))
+                if progress is not None:
+                    progress(len(tables), len(BACKUP_TABLES), f'{table} archived')
+
+            manifest = build_manifest(tables, include_media=include_media)
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+            zf.writestr('README.txt', _readme(manifest))
+            result['manifest'] = manifest
+        if stream is not None:
+            data = stream.drain()
+            if data:
+                yield data
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+def iter_backup_zip(engine, include_media: bool = False,
+                    workers: int = DEFAULT_WORKERS) -> Iterator[bytes]:
+    """
+    تولید تکه‌تکه فایل ZIP پشتیبان برای ارسال مستقیم در پاسخ HTTP
+
+    Args:
+        engine: موتور SQLAlchemy
+        include_media: افزودن فهرست فایل‌های static/uploads به manifest
+        workers: تعداد اتصال‌های موازی برای COPY
+
+    Yields:
+        بایت‌های فایل ZIP
+
+    خطای میانه کار پس از شروع پاسخ به route نمی‌رسد؛ همین‌جا ثبت و دوباره raise می‌شود تا
+    سرور اتصال را بدون تکه پایانی ببندد. فهرست مرکزی ZIP فرستاده نمی‌شود، پس فایل ناقص
+    در کلاینت دانلود ناتمام و آرشیو نامعتبر است و با پشتیبان سالم اشتباه نمی‌شود.
+    """
+    stream = _ZipStream()
+    try:
+        yield from _generate_archive(engine, stream, stream, include_media, workers, {})
+    except Exception as e:
+        logger.error(f"Streaming backup failed: {e}", exc_info=True)
+        raise
+
+
+def write_backup_file(engine, dest_dir: str = BACKUP_DIR, include_media: bool = False,
+                      workers: int = DEFAULT_WORKERS,
+                      progress: Optional[Callable] = None) -> Tuple[str, Dict]:
+    """
+    ذخیره فایل پشتیبان روی دیسک (پیش‌فرض: data/backups)
+    progress در صورت وجود پس از هر جدول با (done, total, message) فراخوانی می‌شود.
+
+    Returns:
+        (مسیر فایل، manifest)
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = os.path.join(dest_dir, f'database_backup_{timestamp}.zip')
+    partial_path = path + '.part'
+    result = {}
+    try:
+        with open(partial_path, 'wb') as fh:
+            for _ in _generate_archive(engine, fh, None, include_media, workers, result,
+                                       progress):
+                pass
+        os.replace(partial_path, path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+        raise
+    logger.info(f"Backup written to {path}")
+    return path, result['manifest']
@@ -0,0 +1,144 @@
+"""
+ویرایش گروهی محصولات و خدمات
+هر عملیات یک دستور UPDATE ... WHERE id = ANY(:ids) است که updated_at را هم
+به‌روز می‌کند؛ تغییر در همان تراکنش در outbox کاتالوگ ثبت و پس از commit یک بار به
+catalog_changed اعلام می‌شود (utils/catalog_events.py).
+"""
+
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from logging_config import get_logger
+from utils.catalog_events import publish
+
+logger = get_logger('app')
+
+# جدول -> جدول دسته‌بندی و پرچم‌های قابل تغییر
+BULK_TABLES = {
+    'products': {'category_table': 'product_categories', 'flags': ('in_stock', 'featured')},
+    'services': {'category_table': 'service_categories', 'flags': ('featured', 'available')},
+}
+
+BULK_ACTIONS = ('set_category', 'adjust_price', 'set_flag', 'add_tag', 'remove_tag')
+MAX_PRICE_PERCENT = 1000
+
+# برچسب‌ها رشته‌ای جدا شده با کاما هستند؛ برچسب‌های موجود پس از trim مقایسه می‌شوند
+_TAG_LIST = "ARRAY(SELECT trim(t) FROM unnest(string_to_array(coalesce(tags, ''), ',')) AS t WHERE trim(t) <> '')"
+
+
+class BulkEditError(ValueError):
+    """پارامتر نامعتبر برای ویرایش گروهی"""
+
+
+def parse_ids(values: List[str]) -> List[int]:
+    """تبدیل شناسه‌های فرم به لیست اعداد یکتا"""
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            raise BulkEditError(f"Invalid id {value!r}")
+    return sorted(ids)
+
+
+def build_bulk_update(table: str, action: str, params: Dict) -> Tuple[str, Dict]:
+    """
+    ساخت دستور UPDATE یک عملیات گروهی
+
+    Args:
+        table: products یا services
+        action: یکی از BULK_ACTIONS
+        params: پارامترهای فرم (category_id، percent، flag، value، tag)
+
+    Returns:
+        (sql, bind_params) بدون پارامتر ids
+
+    Raises:
+        BulkEditError: اگر عملیات یا پارامترها نامعتبر باشند
+    """
+    if table not in BULK_TABLES:
+        raise BulkEditError(f"Bulk edit is not supported for {table}")
+    spec = BULK_TABLES[table]
+    binds = {}
+
+    if action == 'set_category':
+        category_id = params.get('category_id')
+        if category_id in (None, ''):
+            assignment = 'category_id = NULL'
+        else:
+            try:
+                binds['category_id'] = int(category_id)
+            except (TypeError, ValueError):
+                raise BulkEditError("Invalid category id")
+            assignment = 'category_id = :category_id'
+    elif action == 'adjust_price':
+        try:
+            percent = float(params.get('percent'))
+        except (TypeError, ValueError):
+            raise BulkEditError("Price percentage must be a number")
+        if not -100 <= percent <= MAX_PRICE_PERCENT:
+            raise BulkEditError(f"Price percentage must be between -100 and {MAX_PRICE_PERCENT}")
+        binds['factor'] = (100 + percent) / 100
+        assignment = 'price = GREATEST(0, ROUND(coalesce(price, 0) * :factor))::integer'
+    elif action == 'set_flag':
+        flag = params.get('flag')
+        if flag not in spec['flags']:
+            raise BulkEditError(f"Unknown flag {flag!r}")
+        value = params.get('value')
+        if value == 'toggle':
+            assignment = f'{flag} = NOT coalesce({flag}, false)'
+        elif value in ('true', 'false'):
+            binds['flag_value'] = value == 'true'
+            assignment = f'{flag} = :flag_value'
+        else:
+            raise BulkEditError("Flag value must be true, false or toggle")
+    elif action in ('add_tag', 'remove_tag'):
+        tag = (params.get('tag') or '').strip()
+        if not tag or ',' in tag:
+            raise BulkEditError("Tag must be a non-empty value without commas")
+        binds['tag'] = tag
+        if action == 'add_tag':
+            assignment = (f"tags = CASE WHEN :tag = ANY({_TAG_LIST}) THEN tags "
+                          f"ELSE array_to_string(array_append({_TAG_LIST}, CAST(:tag AS text)), ', ') END")
+        else:
+            assignment = f"tags = NULLIF(array_to_string(array_remove({_TAG_LIST}, CAST(:tag AS text)), ', '), '')"
+    else:
+        raise BulkEditError(f"Unknown bulk action {action!r}")
+
+    sql = (f"UPDATE {table} SET {assignment}, updated_at = timezone('utc', now()) "
+           f"WHERE id = ANY(:ids)")
+    return sql, binds
+
+
+def bulk_update(session, table: str, ids: List[int], action: str, params: Dict) -> int:
+    """
+    اجرای یک عملیات گروهی در یک دستور و یک تراکنش
+
+    Args:
+        session: session دیتابیس
+        table: products یا services
+        ids: شناسه ردیف‌های انتخاب شده
+        action: یکی از BULK_ACTIONS
+        params: پارامترهای عملیات
+
+    Returns:
+        تعداد ردیف‌های به‌روز شده
+    """
+    if not ids:
+        raise BulkEditError("No rows selected")
+    sql, binds = build_bulk_update(table, action, params)
+    if 'category_id' in binds:
+        category_table = BULK_TABLES[table]['category_table']
+        exists = session.execute(text(f"SELECT 1 FROM {category_table} WHERE id = :id"),
+                                 {'id': binds['category_id']}).first()
+        if not exists:
+            raise BulkEditError("Category not found")
+
+    try:
+        updated = session.execute(text(sql), dict(binds, ids=list(ids))).rowcount
+        publish(session, table, ids)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    logger.info(f"Bulk {action} on {table}: {updated} rows")
+    return updated
@@ -0,0 +1,43 @@
+"""
+اعلام تغییرات کاتالوگ (محصولات، خدمات، دسته‌ها و ...) به لایه‌های پایین‌دستی
+عملیات نوشتن پس از commit تابع catalog_changed را یک بار فراخوانی می‌کنند و
+هر کش یا مصرف‌کننده‌ای که با on_catalog_change ثبت شده، مطلع می‌شود.
+"""
+
+from typing import Callable, Iterable, List
+from logging_config import get_logger
+
+logger = get_logger('app')
+
+CHANGE_LISTENERS: List[Callable] = []
+
+
+def on_catalog_change(func: Callable) -> Callable:
+    """
+    ثبت تابعی که پس از هر تغییر کاتالوگ با (table, ids) فراخوانی می‌شود
+
+    Args:
+        func: تابع دریافت‌کننده
+
+    Returns:
+        همان تابع (قابل استفاده به عنوان دکوراتور)
+    """
+    if func not in CHANGE_LISTENERS:
+        CHANGE_LISTENERS.append(func)
+    return func
+
+
+def catalog_changed(table: str, ids: Iterable[int]):
+    """
+    اعلام تغییر ردیف‌های یک جدول؛ خطای یک دریافت‌کننده مانع بقیه نمی‌شود
+
+    Args:
+        table: نام جدول تغییر کرده
+        ids: شناسه ردیف‌های تغییر کرده
+    """
+    ids = sorted(set(ids))
+    for listener in list(CHANGE_LISTENERS):
+        try:
+            listener(table, ids)
+        except Exception as e:
+            logger.error(f"Catalog change listener {listener.__name__} failed for {table}: {e}")
@@ -0,0 +1,250 @@
+"""
+انتقال تغییرهای کاتالوگ بین پردازه‌ها (پنل وب، job_worker و ربات)
+هر تراکنشی که ردیف جدول‌های کاتالوگ را تغییر دهد، در همان تراکنش یک ردیف در جدول
+catalog_changes (outbox) می‌نویسد و NOTIFY روی کانال rfcbot_catalog می‌فرستد؛ Postgres اعلان
+را فقط پس از commit تحویل می‌دهد و rollback هر دو را از بین می‌برد. تغییرهای ORM با after_flush
+خودکار ثبت می‌شوند و دستورهای مستقیم (ویرایش گروهی، ورود CSV، بازیابی) publish را صدا می‌زنند.
+پس از commit همان پردازه هم با catalog_changed مطلع می‌شود. شنونده‌ها فقط روی session های
+برنامه (Database.Session و db.session فلسک) ثبت می‌شوند، نه روی کلاس Session کل پردازه.
+
+در ربات CatalogSubscriber با یک اتصال LISTEN بیدار می‌شود و ردیف‌های جدید outbox را می‌خواند و
+برای هر کدام catalog_changed را فراخوانی می‌کند تا کش خواندن دقیقاً ورودی‌های وابسته را حذف کند.
+چون هر بار از outbox خوانده می‌شود، اعلان‌های از دست رفته (قطع اتصال LISTEN یا راه‌اندازی
+دوباره) در بیدار شدن بعدی یا بررسی دوره‌ای جبران می‌شوند.
+"""
+
+import json
+import time
+import select
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from logging_config import get_logger
+from models import CatalogChange
+from utils.catalog_changes import catalog_changed
+from utils.db_engine import direct_engine
+from utils.read_cache import TABLE_TAGS
+
+logger = get_logger('app')
+
+CATALOG_CHANNEL = 'rfcbot_catalog'
+# بررسی outbox بدون اعلان (اتصال LISTEN قطع شده یا دیتابیس غیر Postgres)
+POLL_INTERVAL = 30
+# شناسه‌ها به ترتیب درج گرفته می‌شوند ولی تراکنش‌ها به ترتیب دیگری commit می‌شوند؛
+# این تعداد ردیف پیش از آخرین شناسه دیده شده دوباره خوانده می‌شود
+OUTBOX_OVERLAP = 100
+OUTBOX_BATCH = 1000
+OUTBOX_RETENTION_DAYS = 7
+PRUNE_INTERVAL = 3600
+RECONNECT_DELAY = 5
+
+_PENDING = 'catalog_changes_pending'
+# session factory هایی که شنونده‌ها روی آن‌ها ثبت شده‌اند
+_hooked: List[sessionmaker] = []
+
+
+def _connection(executor):
+    """اتصال تراکنش جاری یک Session یا Connection"""
+    return executor.connection() if isinstance(executor, Session) else executor
+
+
+def publish(executor, table: str, ids: Iterable = ()):
+    """
+    ثبت تغییر در outbox و NOTIFY در تراکنش جاری
+
+    Args:
+        executor: Session (یا scoped_session) یا Connection که تغییر در تراکنش آن انجام شده
+        table: نام جدول کاتالوگ
+        ids: شناسه ردیف‌های تغییر کرده (خالی یعنی کل جدول)
+    """
+    if isinstance(executor, scoped_session):
+        executor = executor()
+    ids = sorted({item for item in ids if item is not None})
+    conn = _connection(executor)
+    conn.execute(CatalogChange.__table__.insert().values(
+        table_name=table, ids=json.dumps(ids), created_at=datetime.utcnow()))
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("SELECT pg_notify(:channel, :table)"), {'channel': CATALOG_CHANNEL, 'table': table})
+    if isinstance(executor, Session):
+        executor.info.setdefault(_PENDING, []).append((table, ids))
+
+
+def publish_raw(cursor, table: str, ids: Iterable = ()):
+    """publish برای اتصال خام psycopg2 (ورود CSV و بازیابی)"""
+    ids = sorted({item for item in ids if item is not None})
+    cursor.execute("INSERT INTO catalog_changes (table_name, ids, created_at) VALUES (%s, %s, %s)",
+                   (table, json.dumps(ids), datetime.utcnow()))
+    cursor.execute("SELECT pg_notify(%s, %s)", (CATALOG_CHANNEL, table))
+
+
+def _after_flush(session, flush_context):
+    changed: Dict[str, set] = {}
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(instance, '__tablename__', None)
+        if table not in TABLE_TAGS:
+            continue
+        if instance in session.dirty and not session.is_modified(instance, include_collections=False):
+            continue
+        key = inspect(instance).mapper.primary_key_from_instance(instance)
+        changed.setdefault(table, set()).add(key[0])
+    for table, ids in changed.items():
+        publish(session, table, ids)
+
+
+def _after_commit(session):
+    for table, ids in session.info.pop(_PENDING, []):
+        catalog_changed(table, ids)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING, None)
+
+
+_HOOKS = (('after_flush', _after_flush), ('after_commit', _after_commit), ('after_rollback', _after_rollback))
+
+
+def _factory(target) -> sessionmaker:
+    return target.session_factory if isinstance(target, scoped_session) else target
+
+
+def install_session_hooks(*targets):
+    """
+    ثبت خودکار تغییرهای ORM روی جدول‌های کاتالوگ برای session های ساخته شده با factory ها
+
+    Args:
+        targets: sessionmaker یا scoped_session (فراخوانی دوباره برای همان factory اثری ندارد)
+    """
+    for target in targets:
+        factory = _factory(target)
+        if event.contains(factory, 'after_flush', _after_flush):
+            continue
+        for name, handler in _HOOKS:
+            event.listen(factory, name, handler)
+        _hooked.append(factory)
+
+
+def uninstall_session_hooks(*targets):
+    """حذف شنونده‌ها از factory ها (بدون آرگومان: از همه factory های ثبت شده)"""
+    factories = [_factory(target) for target in targets] or list(_hooked)
+    for factory in factories:
+        if not event.contains(factory, 'after_flush', _after_flush):
+            continue
+        for name, handler in _HOOKS:
+            event.remove(factory, name, handler)
+        _hooked.remove(factory)
+
+
+class CatalogSubscriber:
+    """دریافت تغییرهای کاتالوگ پردازه‌های دیگر از outbox و اعلام آن‌ها در این پردازه"""
+
+    def __init__(self, engine, dispatch: Callable = catalog_changed, poll_interval: float = POLL_INTERVAL):
+        """
+        Args:
+            engine: engine دیتابیس (LISTEN از direct_engine آن)
+            dispatch: تابعی که با (table, ids) برای هر تغییر فراخوانی می‌شود
+            poll_interval: حداکثر فاصله بررسی outbox بدون اعلان (ثانیه)
+        """
+        self.engine = engine
+        self.dispatch = dispatch
+        self.poll_interval = poll_interval
+        self.last_id: Optional[int] = None
+        # تغییرهای پیش از شروع (کش هنوز خالی است) دوباره خوانده نمی‌شوند
+        self.start_id = 0
+        self.seen = deque(maxlen=OUTBOX_OVERLAP * 10)
+        self.seen_ids = set()
+        self.pruned_at = 0.0
+        self.counts = {'notifications': 0, 'changes': 0}
+        self.thread = None
+
+    def catch_up(self) -> int:
+        """
+        اعلام ردیف‌های جدید outbox؛ در اولین فراخوانی فقط آخرین شناسه ثبت می‌شود
+
+        Returns:
+            تعداد تغییرهای اعلام شده
+        """
+        dispatched = 0
+        with self.engine.connect() as conn:
+            if self.last_id is None:
+                self.last_id = conn.execute(text("SELECT coalesce(max(id), 0) FROM catalog_changes")).scalar()
+                self.start_id = self.last_id
+                return 0
+            while True:
+                rows = conn.execute(text(
+                    "SELECT id, table_name, ids FROM catalog_changes WHERE id > :low ORDER BY id LIMIT :limit"),
+                    {'low': max(self.start_id, self.last_id - OUTBOX_OVERLAP), 'limit': OUTBOX_BATCH}).fetchall()
+                for row in rows:
+                    self.last_id = max(self.last_id, row.id)
+                    if row.id in self.seen_ids:
+                        continue
+                    if len(self.seen) == self.seen.maxlen:
+                        self.seen_ids.discard(self.seen[0])
+                    self.seen.append(row.id)
+                    self.seen_ids.add(row.id)
+                    self.dispatch(row.table_name, json.loads(row.ids))
+                    dispatched += 1
+                if len(rows) < OUTBOX_BATCH:
+                    break
+        self.counts['changes'] += dispatched
+        return dispatched
+
+    def prune(self, retention_days: int = OUTBOX_RETENTION_DAYS) -> int:
+        """حذف ردیف‌های قدیمی outbox"""
+        with self.engine.begin() as conn:
+            return conn.execute(text("DELETE FROM catalog_changes WHERE created_at < :cutoff"),
+                                {'cutoff': datetime.utcnow() - timedelta(days=retention_days)}).rowcount
+
+    def _tick(self):
+        self.catch_up()
+        if time.monotonic() - self.pruned_at >= PRUNE_INTERVAL:
+            self.pruned_at = time.monotonic()
+            removed = self.prune()
+            if removed:
+                logger.info(f"Pruned {removed} catalog change events")
+
+    def start(self):
+        """شروع رشته شنونده"""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='catalog-events', daemon=True)
+            self.thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                if self.engine.dialect.name == 'postgresql':
+                    self._listen()
+                else:
+                    self._tick()
+                    time.sleep(self.poll_interval)
+            except Exception as e:
+                logger.error(f"Catalog change subscriber failed: {e}")
+                time.sleep(RECONNECT_DELAY)
+
+    def _listen(self):
+        # LISTEN وضعیت سطح session است و پشت PgBouncer اتصال مستقیم می‌خواهد
+        raw = direct_engine(self.engine).raw_connection()
+        try:
+            connection = raw.dbapi_connection
+            connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute(f"LISTEN {CATALOG_CHANNEL}")
+            cursor.close()
+            logger.info("Listening for catalog changes")
+            # تغییرهای زمان قطع اتصال
+            self._tick()
+            while True:
+                if select.select([connection], [], [], self.poll_interval) != ([], [], []):
+                    connection.poll()
+                    self.counts['notifications'] += len(connection.notifies)
+                    connection.notifies.clear()
+                self._tick()
+        finally:
+            # اتصال LISTEN به pool برنمی‌گردد
+            raw.invalidate()
+
+    def stats(self) -> Dict:
+        return dict(self.counts, last_id=self.last_id)
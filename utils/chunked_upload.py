@@ -0,0 +1,254 @@
+"""
+آپلود تکه‌تکه و قابل ادامه فایل‌های رسانه‌ای بزرگ (مبتنی بر offset، مشابه tus)
+هر آپلود یک فایل .part و یک فایل .json با مشخصات در data/uploads_tmp دارد.
+اندازه فایل .part همان offset فعلی است؛ پس از قطع اتصال، کلاینت offset را
+می‌پرسد و از همان نقطه ادامه می‌دهد. هیچ تکه‌ای کامل در حافظه نگه داشته نمی‌شود.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import datetime
+from typing import Dict, Optional
+from werkzeug.utils import secure_filename
+from logging_config import get_logger
+
+logger = get_logger('app')
+
+UPLOAD_TMP_DIR = os.path.join('data', 'uploads_tmp')
+# اندازه تکه پیشنهادی به کلاینت؛ باید از MAX_CONTENT_LENGTH کمتر باشد
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_UPLOAD_SIZE = 512 * 1024 * 1024
+UPLOAD_EXPIRY = 24 * 3600
+COPY_BUFFER = 64 * 1024
+
+_UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+# پسوند فایل .part در حال انتقال به پوشه مقصد
+ASSEMBLING_SUFFIX = '.assembling'
+
+
+class UploadError(Exception):
+    """خطای آپلود تکه‌تکه همراه با کد وضعیت HTTP"""
+    status_code = 400
+
+
+class UploadNotFound(UploadError):
+    status_code = 404
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+
+class UploadLocked(UploadError):
+    """تکه دیگری از همین آپلود در حال نوشته شدن است"""
+    status_code = 423
+
+
+class UploadOffsetMismatch(UploadError):
+    """offset درخواست با اندازه فعلی فایل برابر نیست"""
+    status_code = 409
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+
+def _paths(upload_id: str, root: str):
+    if not upload_id or not _UPLOAD_ID_RE.match(upload_id):
+        raise UploadNotFound(f"Invalid upload id {upload_id!r}")
+    base = os.path.join(root, upload_id)
+    return base + '.json', base + '.part'
+
+
+def create_upload(filename: str, size: int, meta: Dict, root: str = UPLOAD_TMP_DIR,
+                  max_size: int = MAX_UPLOAD_SIZE) -> Dict:
+    """
+    شروع یک آپلود جدید
+
+    Args:
+        filename: نام فایل اصلی
+        size: اندازه کامل فایل به بایت
+        meta: مشخصات مقصد (نوع موجودیت، شناسه، نوع رسانه، کاربر)
+        root: پوشه فایل‌های موقت
+        max_size: حداکثر اندازه مجاز
+
+    Returns:
+        dict مشخصات آپلود شامل upload_id و offset
+    """
+    if size <= 0:
+        raise UploadError("Upload size must be positive")
+    if size > max_size:
+        raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+
+    os.makedirs(root, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _paths(upload_id, root)
+    upload = dict(meta, upload_id=upload_id, filename=filename, size=size,
+                  created_at=datetime.datetime.now().isoformat())
+    open(part_path, 'wb').close()
+    with open(meta_path, 'w', encoding='utf-8') as fh:
+        json.dump(upload, fh, ensure_ascii=False)
+    logger.info(f"Started resumable upload {upload_id}: {filename} ({size} bytes)")
+    return dict(upload, offset=0)
+
+
+def get_upload(upload_id: str, root: str = UPLOAD_TMP_DIR) -> Dict:
+    """
+    مشخصات آپلود به همراه offset فعلی (اندازه فایل .part)
+
+    Raises:
+        UploadNotFound: اگر آپلود وجود نداشته باشد یا تکمیل شده باشد
+    """
+    meta_path, part_path = _paths(upload_id, root)
+    try:
+        with open(meta_path, encoding='utf-8') as fh:
+            upload = json.load(fh)
+        upload['offset'] = os.path.getsize(part_path)
+    except (OSError, ValueError):
+        raise UploadNotFound(f"Upload {upload_id} not found")
+    return upload
+
+
+def write_chunk(upload_id: str, offset: int, stream, length: Optional[int],
+                root: str = UPLOAD_TMP_DIR) -> Dict:
+    """
+    نوشتن مستقیم یک تکه از stream درخواست روی دیسک
+
+    بایت‌هایی که پیش از قطع اتصال رسیده‌اند حفظ می‌شوند و offset بعدی را تعیین می‌کنند.
+
+    Args:
+        upload_id: شناسه آپلود
+        offset: offset اعلام شده توسط کلاینت
+        stream: stream بدنه درخواست
+        length: طول بدنه (Content-Length)
+        root: پوشه فایل‌های موقت
+
+    Returns:
+        مشخصات آپلود با offset جدید
+
+    Raises:
+        UploadOffsetMismatch: اگر offset با اندازه فعلی فایل برابر نباشد
+        UploadLocked: اگر درخواست دیگری همزمان روی این آپلود بنویسد
+    """
+    upload = get_upload(upload_id, root)
+    _meta_path, part_path = _paths(upload_id, root)
+    if length is None:
+        raise UploadError("Content-Length is required")
+
+    with open(part_path, 'ab') as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadLocked(f"Upload {upload_id} is being written by another request")
+        try:
+            current = os.fstat(fh.fileno()).st_size
+            if offset != current:
+                raise UploadOffsetMismatch(
+                    f"Offset {offset} does not match upload offset {current}", current)
+            if current + length > upload['size']:
+                raise UploadTooLarge("Chunk exceeds the declared upload size")
+
+            remaining = length
+            try:
+                while remaining > 0:
+                    data = stream.read(min(COPY_BUFFER, remaining))
+                    if not data:
+                        break
+                    fh.write(data)
+                    remaining -= len(data)
+            finally:
+                fh.flush()
+                os.fsync(fh.fileno())
+            upload['offset'] = os.fstat(fh.fileno()).st_size
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+    return upload
+
+
+def finish_upload(upload_id: str, directory: str, root: str = UPLOAD_TMP_DIR) -> str:
+    """
+    انتقال فایل کامل شده به پوشه آپلود (بدون خواندن آن در حافظه)
+
+    Args:
+        upload_id: شناسه آپلود
+        directory: پوشه مقصد (مانند static/uploads/products/5)
+        root: پوشه فایل‌های موقت
+
+    Returns:
+        مسیر فایل نهایی
+
+    Raises:
+        UploadError: اگر همه بایت‌ها دریافت نشده باشند
+    """
+    upload = get_upload(upload_id, root)
+    if upload['offset'] != upload['size']:
+        raise UploadError(f"Upload {upload_id} is incomplete "
+                          f"({upload['offset']}/{upload['size']} bytes)")
+    meta_path, part_path = _paths(upload_id, root)
+
+    # تغییر نام اتمی تا درخواست تکراری همزمان همین فایل را دوباره منتقل نکند
+    assembling_path = part_path + ASSEMBLING_SUFFIX
+    try:
+        os.rename(part_path, assembling_path)
+    except FileNotFoundError:
+        raise UploadNotFound(f"Upload {upload_id} was already completed")
+
+    os.makedirs(directory, exist_ok=True)
+    name, extension = os.path.splitext(secure_filename(upload['filename']) or 'upload')
+    target = os.path.join(directory, f"{name}{extension}")
+    if os.path.exists(target):
+        target = os.path.join(directory, f"{name}_{int(time.time())}_{upload_id[:8]}{extension}")
+    shutil.move(assembling_path, target)
+    os.remove(meta_path)
+    logger.info(f"Completed resumable upload {upload_id}: {target}")
+    return target
+
+
+def discard_upload(upload_id: str, root: str = UPLOAD_TMP_DIR) -> bool:
+    """حذف فایل‌های یک آپلود لغو شده (شامل .assembling انتقالی که نیمه‌کاره مانده)"""
+    meta_path, part_path = _paths(upload_id, root)
+    removed = False
+    for path in (meta_path, part_path, part_path + ASSEMBLING_SUFFIX):
+        try:
+            os.remove(path)
+            removed = True
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def remove_stale_uploads(root: str = UPLOAD_TMP_DIR, max_age: int = UPLOAD_EXPIRY) -> int:
+    """
+    حذف آپلودهای نیمه‌کاره‌ای که مدت max_age ثانیه تکه جدیدی دریافت نکرده‌اند
+
+    فایل .assembling انتقالی که پیش از جابه‌جایی قطع شده (و .json یا .part بی‌همراه) هم
+    پس از همین مدت حذف می‌شود.
+
+    Returns:
+        تعداد آپلودهای حذف شده
+    """
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age
+    last_writes: Dict[str, float] = {}
+    for entry in os.scandir(root):
+        upload_id = entry.name.split('.', 1)[0]
+        if not _UPLOAD_ID_RE.match(upload_id):
+            continue
+        try:
+            mtime = entry.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        last_writes[upload_id] = max(last_writes.get(upload_id, mtime), mtime)
+    removed = 0
+    for upload_id, last_write in last_writes.items():
+        if last_write < cutoff and discard_upload(upload_id, root):
+            removed += 1
+    if removed:
+        logger.info(f"Removed {removed} stale resumable uploads")
+    return removed
@@ -0,0 +1,260 @@
+"""
+ساخت engine دیتابیس با تنظیمات مشترک برای همه پردازه‌ها
+ربات، پنل وب (Flask-SQLAlchemy)، job_worker و اسکریپت‌ها engine خود را فقط از این ماژول
+می‌سازند تا اندازه pool، recycle، pre-ping و keepalive همه یکسان باشد؛ pre-ping اتصال‌های
+بسته شده سمت سرور (SSL connection has been closed unexpectedly) را پیش از استفاده کنار
+می‌گذارد و به جای خطا در وسط درخواست، اتصال تازه می‌سازد.
+
+با DB_PGBOUNCER=1 برنامه پشت PgBouncer در حالت transaction کار می‌کند: هیچ وضعیتی در
+سطح session سرور (LISTEN، advisory lock سطح session، SET بدون LOCAL) روی اتصال‌های pool
+نگه داشته نمی‌شود و این کارها از direct_engine (آدرس DATABASE_DIRECT_URL) استفاده می‌کنند.
+psycopg2 از prepared statement سمت سرور استفاده نمی‌کند.
+
+زمان انتظار برای گرفتن اتصال از pool برای هر engine اندازه‌گیری و در آمار کوئری‌ها
+(/admin/database/queries) نمایش داده می‌شود.
+"""
+
+import os
+import time
+import threading
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+from logging_config import get_logger
+from utils.query_stats import instrument_engine
+
+logger = get_logger('app')
+
+# تنظیمات pool پیش از import ماژول‌های دیگر هم از .env خوانده شوند
+load_dotenv()
+
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+# کمتر از idle timeout فایروال/PgBouncer تا اتصال کهنه به کار نرود
+POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+PGBOUNCER = os.environ.get('DB_PGBOUNCER', '').lower() in ('1', 'true', 'yes')
+DIRECT_DATABASE_URL = os.environ.get('DATABASE_DIRECT_URL')
+# انتظارهای طولانی‌تر از این برای گرفتن اتصال در لاگ ثبت می‌شوند
+SLOW_CHECKOUT_MS = float(os.environ.get('DB_SLOW_CHECKOUT_MS', 100))
+
+CONNECT_ARGS = {
+    'connect_timeout': 10,
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 5,
+}
+
+# engine های ساخته شده در این پردازه: نقش -> engine
+_engines: Dict[str, object] = {}
+_direct_engine = None
+_lock = threading.Lock()
+
+
+def database_url() -> Optional[str]:
+    """آدرس دیتابیس از متغیرهای محیطی"""
+    return os.environ.get('DATABASE_URL') or os.environ.get('SQLALCHEMY_DATABASE_URI')
+
+
+class PoolMetrics:
+    """شمارنده‌های گرفتن اتصال از pool یک engine"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.checkouts = 0
+            self.wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.slow = 0
+            self.timeouts = 0
+            self.invalidated = 0
+
+    def record_checkout(self, wait_ms: float):
+        with self.lock:
+            self.checkouts += 1
+            self.wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.slow += wait_ms >= SLOW_CHECKOUT_MS
+
+    def record_timeout(self):
+        with self.lock:
+            self.timeouts += 1
+
+    def record_invalidated(self):
+        with self.lock:
+            self.invalidated += 1
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {'checkouts': self.checkouts, 'wait_ms': self.wait_ms,
+                    'max_wait_ms': self.max_wait_ms, 'slow': self.slow,
+                    'timeouts': self.timeouts, 'invalidated': self.invalidated}
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool که زمان انتظار هر checkout و timeout ها را ثبت می‌کند"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            logger.error(f"Database pool exhausted: {self.status()}")
+            raise
+        wait_ms = (time.perf_counter() - started) * 1000
+        self.metrics.record_checkout(wait_ms)
+        if wait_ms >= SLOW_CHECKOUT_MS:
+            logger.warning(f"Waited {wait_ms:.0f}ms for a database connection: {self.status()}")
+        return connection
+
+    def recreate(self):
+        # engine.dispose() pool را دوباره می‌سازد؛ شمارنده‌ها حفظ شوند
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def engine_options(url: str, role: str = 'app', pgbouncer: bool = PGBOUNCER) -> Dict:
+    """
+    آرگومان‌های create_engine (یا SQLALCHEMY_ENGINE_OPTIONS در Flask-SQLAlchemy)
+
+    Args:
+        url: آدرس دیتابیس
+        role: نام engine در application_name و آمار pool
+        pgbouncer: اتصال از طریق PgBouncer در حالت transaction
+
+    Returns:
+        دیکشنری تنظیمات engine
+    """
+    if not url or not url.startswith('postgres'):
+        return {'pool_pre_ping': True}
+    connect_args = dict(CONNECT_ARGS, application_name=f'rfcbot-{role}')
+    options = {
+        'poolclass': MeteredQueuePool,
+        'pool_size': POOL_SIZE,
+        'max_overflow': MAX_OVERFLOW,
+        'pool_timeout': POOL_TIMEOUT,
+        'pool_recycle': POOL_RECYCLE,
+        'pool_pre_ping': True,
+        # آخرین اتصال برگشتی دوباره استفاده شود تا اتصال‌های اضافه بیکار بمانند و recycle شوند
+        'pool_use_lifo': True,
+        'connect_args': connect_args,
+    }
+    if pgbouncer:
+        # PgBouncer پارامتر startup دیگری جز application_name را نمی‌پذیرد و اتصال سرور پس از
+        # هر تراکنش به کلاینت دیگری می‌رسد؛ rollback در بازگشت به pool تراکنش را می‌بندد
+        options['pool_reset_on_return'] = 'rollback'
+    return options
+
+
+def configure_engine(engine, role: str = 'app'):
+    """
+    افزودن اندازه‌گیری کوئری‌ها و ثبت engine برای آمار pool (تکرار آن بی‌اثر است)
+
+    برای engine ساخته شده توسط Flask-SQLAlchemy از روی engine_options هم فراخوانی می‌شود.
+    """
+    instrument_engine(engine)
+    with _lock:
+        if _engines.get(role) is engine:
+            return engine
+        _engines[role] = engine
+
+    @event.listens_for(engine, 'invalidate')
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        # pool پس از dispose عوض می‌شود؛ شمارنده از pool فعلی engine خوانده شود
+        metrics = getattr(engine.pool, 'metrics', None)
+        if metrics is not None:
+            metrics.record_invalidated()
+        if exception is not None:
+            logger.warning(f"Database connection ({role}) invalidated: {exception}")
+
+    return engine
+
+
+def create_db_engine(url: Optional[str] = None, role: str = 'app', **overrides):
+    """
+    ساخت engine با تنظیمات مشترک pool
+
+    Args:
+        url: آدرس دیتابیس (پیش‌فرض از DATABASE_URL)
+        role: نام engine (app، bot، script و ...)
+        overrides: جایگزینی تنظیمات engine_options
+
+    Returns:
+        engine آماده استفاده
+    """
+    url = url or database_url()
+    if not url:
+        raise ValueError("Database URL not provided")
+    options = dict(engine_options(url, role), **overrides)
+    engine = create_engine(url, **options)
+    return configure_engine(engine, role)
+
+
+def direct_engine(engine):
+    """
+    engine مناسب وضعیت سطح session (LISTEN، pg_advisory_lock، مهاجرت‌ها)
+
+    پشت PgBouncer در حالت transaction اتصال مستقیم DATABASE_DIRECT_URL (بدون pool) برگردانده
+    می‌شود؛ در غیر این صورت همان engine.
+    """
+    global _direct_engine
+    if not PGBOUNCER:
+        return engine
+    if not DIRECT_DATABASE_URL:
+        logger.warning("DB_PGBOUNCER is set without DATABASE_DIRECT_URL; "
+                       "session-level features use the pooled engine")
+        return engine
+    with _lock:
+        if _direct_engine is None:
+            _direct_engine = create_engine(DIRECT_DATABASE_URL, poolclass=NullPool,
+                                           connect_args=dict(CONNECT_ARGS, application_name='rfcbot-direct'))
+            instrument_engine(_direct_engine)
+        return _direct_engine
+
+
+def pool_snapshots() -> List[Dict]:
+    """وضعیت و شمارنده‌های pool همه engine های این پردازه"""
+    with _lock:
+        engines = list(_engines.items())
+    snapshots = []
+    for role, engine in engines:
+        pool = engine.pool
+        metrics = getattr(pool, 'metrics', None)
+        if metrics is None:
+            continue
+        snapshots.append(dict(metrics.snapshot(), role=role, size=pool.size(),
+                              checked_out=pool.checkedout(), overflow=max(pool.overflow(), 0)))
+    return snapshots
+
+
+def reset_pool_metrics():
+    """صفر کردن شمارنده‌های pool این پردازه"""
+    with _lock:
+        engines = list(_engines.values())
+    for engine in engines:
+        metrics = getattr(engine.pool, 'metrics', None)
+        if metrics is not None:
+            metrics.reset()
+
+
+def _after_fork():
+    # اتصال‌های باز پردازه پدر (gunicorn با preload_app) در فرزند استفاده نشوند
+    for engine in list(_engines.values()) + [_direct_engine]:
+        if engine is not None:
+            engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,399 @@
+"""
+حالت کاهش‌یافته ربات هنگام قطع دیتابیس
+یک circuit breaker روی engine اصلی (و replica در صورت وجود) خطاهای اتصال (قطع SSL، رد اتصال، خاموشی سرور) را
+می‌شمارد و پس از FAILURE_THRESHOLD خطای پشت سر هم باز می‌شود. در حالت باز هیچ درخواستی
+به دیتابیس نمی‌رسد: پاسخ‌های کاتالوگ از آخرین نسخه سالم ذخیره شده روی دیسک
+(data/degraded/stale.db) برگردانده می‌شوند و استعلام‌ها در همان فایل صف می‌شوند. پس از
+RESET_TIMEOUT ثانیه یک درخواست آزمایشی عبور می‌کند؛ اگر موفق شد breaker بسته می‌شود و
+استعلام‌های صف شده در پس‌زمینه در دیتابیس ثبت می‌شوند.
+
+وضعیت breaker هر پردازه در data/degraded/<process>-<pid>.json نوشته می‌شود تا پنل
+مدیریت آن را نمایش دهد.
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.exc import InterfaceError, OperationalError
+from logging_config import get_logger
+
+logger = get_logger('app')
+
+FAILURE_THRESHOLD = int(os.environ.get('DB_BREAKER_FAILURES', 3))
+RESET_TIMEOUT = float(os.environ.get('DB_BREAKER_RESET', 15))
+DEGRADED_DIR = os.path.join('data', 'degraded')
+# وضعیت پردازه‌هایی که این مدت به‌روز نشده‌اند در پنل نمایش داده نمی‌شود
+STATE_MAX_AGE = 3600
+REPLAY_BATCH = 50
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+# کدهای SQLSTATE که به معنی در دسترس نبودن سرور هستند (نه خطای خود کوئری)
+_OUTAGE_CODES = ('08', '57P01', '57P02', '57P03')
+
+# خطاهای دیتابیس فراخوانی جاری (مخزن‌ها خطا را می‌بلعند و None یا [] برمی‌گردانند):
+# error خطای اتصال و db_error هر خطای دیگر
+_call_failed: ContextVar[Optional[Dict]] = ContextVar('db_call_failed', default=None)
+# آیا آخرین خواندن این context از نسخه ذخیره شده پاسخ داده شد (نباید در کش‌های دیگر بماند)
+_served_stale: ContextVar[bool] = ContextVar('db_served_stale', default=False)
+
+
+def served_stale() -> bool:
+    """آیا آخرین خواندن کاتالوگ در این رشته/task از نسخه ذخیره شده پاسخ داده شد"""
+    return _served_stale.get()
+
+
+def set_served_stale(value: bool):
+    """ثبت نتیجه خواندنی که در رشته دیگری انجام شد (ادغام خواندن‌های هم‌زمان)"""
+    _served_stale.set(value)
+
+
+def is_outage(exception_context) -> bool:
+    """آیا خطای SQLAlchemy نشانه قطع دیتابیس است"""
+    if exception_context.is_disconnect:
+        return True
+    error = exception_context.sqlalchemy_exception
+    if not isinstance(error, (OperationalError, InterfaceError)):
+        return False
+    code = getattr(exception_context.original_exception, 'pgcode', None)
+    return code is None or code.startswith(_OUTAGE_CODES)
+
+
+class CircuitBreaker:
+    """breaker سه‌حالته (closed، open، half_open) برای یک engine"""
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT,
+                 on_change: Optional[Callable] = None):
+        """
+        Args:
+            failure_threshold: تعداد خطای پشت سر هم برای باز شدن
+            reset_timeout: مدت باز ماندن پیش از درخواست آزمایشی (ثانیه)
+            on_change: تابعی که با (old_state, new_state) پس از هر تغییر حالت فراخوانی می‌شود
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.last_error = None
+        self.changed_at = time.time()
+
+    def _set_state(self, state: str):
+        old, self.state = self.state, state
+        self.changed_at = time.time()
+        if old != state and self.on_change is not None:
+            self.on_change(old, state)
+
+    def allow_request(self) -> bool:
+        """آیا این فراخوانی اجازه رفتن به دیتابیس را دارد (در half_open فقط یک درخواست)"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        """ثبت اجرای موفق یک دستور"""
+        if self.state == CLOSED and not self.failures:
+            return
+        with self.lock:
+            self.failures = 0
+            self.probing = False
+            if self.state != CLOSED:
+                logger.info("Database is reachable again; circuit closed")
+                self._set_state(CLOSED)
+
+    def record_failure(self, error: Exception):
+        """ثبت یک خطای اتصال"""
+        with self.lock:
+            self.failures += 1
+            self.last_error = str(error).strip()[:500]
+            self.probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.error(f"Database unavailable after {self.failures} failures; "
+                                 f"circuit open, serving cached catalog: {self.last_error}")
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def release_probe(self):
+        """آزاد کردن درخواست آزمایشی که به دیتابیس نرسید (مثلاً خطای غیر اتصال)"""
+        with self.lock:
+            self.probing = False
+
+
+class StaleStore:
+    """ذخیره محلی آخرین پاسخ‌های سالم کاتالوگ و صف پایدار استعلام‌ها (SQLite)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.digests: Dict[str, str] = {}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS catalog (key TEXT PRIMARY KEY, value BLOB, stored_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS pending_writes (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                         "kind TEXT, payload TEXT, queued_at REAL, attempts INTEGER DEFAULT 0)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def put(self, key: str, value):
+        """ذخیره پاسخ؛ فقط اگر با نسخه قبلی فرق داشته باشد روی دیسک نوشته می‌شود"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha1(blob).hexdigest()
+        if self.digests.get(key) == digest:
+            return
+        with self.lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO catalog (key, value, stored_at) VALUES (?, ?, ?)",
+                         (key, blob, time.time()))
+        self.digests[key] = digest
+
+    def get(self, key: str, default=None):
+        """آخرین پاسخ سالم یا default"""
+        with self.lock, self._connect() as conn:
+            row = conn.execute("SELECT value FROM catalog WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row else default
+
+    def count(self) -> int:
+        with self.lock, self._connect() as conn:
+            return conn.execute("SELECT count(*) FROM catalog").fetchone()[0]
+
+    def enqueue(self, kind: str, payload: Dict) -> int:
+        """افزودن نوشتن به صف (پیش از برگشت، روی دیسک commit می‌شود)"""
+        with self.lock, self._connect() as conn:
+            cursor = conn.execute("INSERT INTO pending_writes (kind, payload, queued_at) VALUES (?, ?, ?)",
+                                  (kind, json.dumps(payload, ensure_ascii=False), time.time()))
+            return cursor.lastrowid
+
+    def pending(self, limit: int = REPLAY_BATCH) -> List[Dict]:
+        with self.lock, self._connect() as conn:
+            rows = conn.execute("SELECT id, kind, payload, queued_at, attempts FROM pending_writes "
+                                "ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [{'id': row[0], 'kind': row[1], 'payload': json.loads(row[2]),
+                 'queued_at': row[3], 'attempts': row[4]} for row in rows]
+
+    def pending_count(self) -> int:
+        with self.lock, self._connect() as conn:
+            return conn.execute("SELECT count(*) FROM pending_writes").fetchone()[0]
+
+    def remove(self, item_id: int):
+        with self.lock, self._connect() as conn:
+            conn.execute("DELETE FROM pending_writes WHERE id = ?", (item_id,))
+
+    def retry_later(self, item_id: int):
+        with self.lock, self._connect() as conn:
+            conn.execute("UPDATE pending_writes SET attempts = attempts + 1 WHERE id = ?", (item_id,))
+
+
+class DegradedMode:
+    """breaker و ذخیره محلی یک پردازه که Database دور فراخوانی‌ها می‌پیچد"""
+
+    def __init__(self, directory: str = DEGRADED_DIR, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT):
+        self.directory = directory
+        self.store = StaleStore(os.path.join(directory, 'stale.db'))
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, on_change=self._on_change)
+        self.writers: Dict[str, Callable] = {}
+        self.counts = {'stale_served': 0, 'stale_missing': 0, 'queued': 0, 'replayed': 0, 'dropped': 0}
+        self.replay_lock = threading.Lock()
+        self.process = f'{os.path.basename(sys.argv[0]) or "python"}-{os.getpid()}'
+
+    # ----- اتصال به engine -----
+
+    def attach(self, engine):
+        """شنیدن خطاها و دستورهای موفق یک engine (اصلی و replica)"""
+        if event.contains(engine, 'handle_error', self._handle_error):
+            return
+        event.listen(engine, 'handle_error', self._handle_error)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _handle_error(self, exception_context):
+        failed = _call_failed.get()
+        if failed is not None:
+            failed['db_error'] = True
+        if not is_outage(exception_context):
+            return
+        if failed is not None:
+            failed['error'] = exception_context.original_exception
+        self.breaker.record_failure(exception_context.original_exception)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.breaker.record_success()
+
+    def _guarded(self, func: Callable):
+        """اجرای func و برگرداندن (نتیجه، دیکشنری خطاها با کلیدهای error و db_error)"""
+        failed = {'error': None, 'db_error': False}
+        token = _call_failed.set(failed)
+        try:
+            result = func()
+        finally:
+            _call_failed.reset(token)
+        return result, failed
+
+    # ----- خواندن‌ها -----
+
+    def read(self, key: str, loader: Callable, default=None):
+        """
+        خواندن کاتالوگ با breaker
+
+        Args:
+            key: کلید پاسخ (نام متد و آرگومان‌ها)
+            loader: تابع خواندن از دیتابیس
+            default: مقدار برگشتی وقتی دیتابیس و نسخه ذخیره شده هر دو در دسترس نیستند
+
+        Returns:
+            پاسخ دیتابیس، یا آخرین پاسخ سالم وقتی breaker باز است یا خواندن به خاطر قطع اتصال شکست خورد
+
+        فقط پاسخ فراخوانی بدون خطای دیتابیس ذخیره می‌شود؛ None یا [] مخزنی که خطا را بلعیده
+        نسخه سالم قبلی را بازنویسی نمی‌کند.
+        """
+        _served_stale.set(False)
+        if self.breaker.allow_request():
+            result, failed = self._guarded(loader)
+            if failed['error'] is None:
+                if self.breaker.state == HALF_OPEN:
+                    self.breaker.release_probe()
+                if not failed['db_error']:
+                    self.store.put(key, result)
+                return result
+        return self._stale(key, default)
+
+    def _stale(self, key: str, default):
+        _served_stale.set(True)
+        value = self.store.get(key, self)
+        if value is self:
+            self.counts['stale_missing'] += 1
+            return default
+        self.counts['stale_served'] += 1
+        return value
+
+    # ----- نوشتن‌ها -----
+
+    def register_writer(self, kind: str, writer: Callable):
+        """ثبت تابع نوشتن یک نوع (writer(payload) -> bool)؛ payload صف شده queued_at هم دارد"""
+        self.writers[kind] = writer
+
+    def write(self, kind: str, payload: Dict) -> bool:
+        """
+        نوشتن با breaker؛ اگر دیتابیس در دسترس نیست نوشتن به صف پایدار می‌رود
+
+        Returns:
+            True اگر نوشته یا صف شد، False اگر دیتابیس نوشتن را رد کرد (داده نامعتبر)
+        """
+        if self.breaker.allow_request():
+            result, failed = self._guarded(lambda: self.writers[kind](payload))
+            if failed['error'] is None:
+                if self.breaker.state == HALF_OPEN:
+                    self.breaker.release_probe()
+                if self.store.pending_count():
+                    self.replay_async()
+                return result
+        self.store.enqueue(kind, dict(payload, queued_at=time.time()))
+        self.counts['queued'] += 1
+        logger.warning(f"Database unavailable; queued {kind} for replay")
+        self.write_state()
+        return True
+
+    def replay(self) -> int:
+        """
+        ثبت نوشتن‌های صف شده به ترتیب؛ با اولین خطای اتصال متوقف می‌شود
+
+        Returns:
+            تعداد نوشتن‌های ثبت شده
+        """
+        done = 0
+        with self.replay_lock:
+            while self.breaker.state == CLOSED:
+                items = self.store.pending()
+                if not items:
+                    break
+                for item in items:
+                    writer = self.writers.get(item['kind'])
+                    if writer is None:
+                        logger.error(f"No writer for queued {item['kind']} #{item['id']}; dropped")
+                        self.store.remove(item['id'])
+                        self.counts['dropped'] += 1
+                        continue
+                    result, failed = self._guarded(lambda: writer(item['payload']))
+                    if failed['error'] is not None:
+                        self.store.retry_later(item['id'])
+                        self.write_state()
+                        return done
+                    self.store.remove(item['id'])
+                    if result:
+                        done += 1
+                        self.counts['replayed'] += 1
+                    else:
+                        logger.error(f"Queued {item['kind']} #{item['id']} was rejected: {item['payload']}")
+                        self.counts['dropped'] += 1
+        if done:
+            logger.info(f"Replayed {done} queued writes")
+        self.write_state()
+        return done
+
+    def replay_async(self):
+        """ثبت صف در یک رشته پس‌زمینه (اگر ثبتی در جریان نیست)"""
+        if self.replay_lock.locked():
+            return
+        threading.Thread(target=self.replay, name='degraded-replay', daemon=True).start()
+
+    # ----- وضعیت -----
+
+    def _on_change(self, old: str, new: str):
+        self.write_state()
+        if new == CLOSED:
+            self.replay_async()
+
+    def state(self) -> Dict:
+        """وضعیت breaker، صف و ذخیره محلی"""
+        breaker = self.breaker
+        return dict(self.counts, process=self.process, state=breaker.state, failures=breaker.failures,
+                    last_error=breaker.last_error, changed_at=breaker.changed_at,
+                    pending=self.store.pending_count(), cached=self.store.count(), updated_at=time.time())
+
+    def write_state(self):
+        """نوشتن وضعیت برای پنل مدیریت"""
+        try:
+            data = self.state()
+            path = os.path.join(self.directory, f'{self.process}.json')
+            with open(f'{path}.tmp', 'w', encoding='utf-8') as handle:
+                json.dump(data, handle, ensure_ascii=False)
+            os.replace(f'{path}.tmp', path)
+        except OSError as e:
+            logger.warning(f"Could not write degraded mode state: {e}")
+
+
+def load_states(directory: str = DEGRADED_DIR, max_age: float = STATE_MAX_AGE) -> List[Dict]:
+    """وضعیت breaker پردازه‌هایی که اخیراً گزارش داده‌اند"""
+    states = []
+    if not os.path.isdir(directory):
+        return states
+    now = time.time()
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.json'):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                continue
+            with open(path, encoding='utf-8') as handle:
+                states.append(json.load(handle))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read degraded mode state {path}: {e}")
+    return states
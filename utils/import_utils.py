@@ -0,0 +1,409 @@
+"""
+موتور ورود داده از CSV با upsert دسته‌ای
+فایل به صورت جریانی خوانده می‌شود، ردیف‌ها در دسته‌های ثابت اعتبارسنجی و تبدیل نوع می‌شوند
+و با INSERT چندردیفی نوشته می‌شوند. ردیف‌های دارای id با ON CONFLICT (id) upsert می‌شوند و
+ردیف‌های بدون id با کلید طبیعی (مثلاً نام محصول) به ردیف موجود نگاشت می‌شوند؛ کلید طبیعی
+فقط برای پیدا کردن ردیف است و در دیتابیس یکتا نیست، پس تطبیق با چند ردیف خطای همان ردیف است.
+کلیدهای خارجی هر دسته با anti-join مقادیر همان دسته روی جدول والد بررسی می‌شوند؛ والدی که در
+همین دسته درج می‌شود (درخت دسته‌بندی با id) معتبر است.
+ردیف‌های نامعتبر کل عملیات را متوقف نمی‌کنند و در یک فایل گزارش خطا ثبت می‌شوند.
+"""
+
+import os
+import io
+import csv
+import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Boolean, DateTime, Integer, BigInteger, String
+from psycopg2.extras import execute_values
+from models import Base
+from logging_config import get_logger
+from utils.restore_utils import reset_sequences
+from utils.catalog_events import publish_raw
+from utils.read_cache import TABLE_TAGS
+
+logger = get_logger('webpanel')
+
+REPORT_DIR = os.path.join('data', 'import_reports')
+BATCH_SIZE = 1000
+SAMPLE_LIMIT = 10
+
+# کلید طبیعی هر نوع داده برای پیدا کردن ردیف موجود وقتی فایل ستون id ندارد؛
+# row_key ستون‌های کلید اصلی و هدف ON CONFLICT است (پیش‌فرض id)
+IMPORT_SPECS = {
+    'products': {
+        'table': 'products',
+        'natural_key': ('name',),
+    },
+    'services': {
+        'table': 'services',
+        'natural_key': ('name',),
+    },
+    'educational': {
+        'table': 'educational_content',
+        'natural_key': ('title',),
+    },
+    'inquiries': {
+        'table': 'inquiries',
+        'natural_key': ('user_id', 'phone', 'date'),
+        # کلید اصلی جدول پارتیشن‌بندی شده شامل ستون پارتیشن است
+        'row_key': ('id', 'created_at'),
+    },
+    'product_categories': {
+        'table': 'product_categories',
+        'natural_key': ('name', 'parent_id'),
+    },
+    'service_categories': {
+        'table': 'service_categories',
+        'natural_key': ('name', 'parent_id'),
+    },
+    'educational_categories': {
+        'table': 'educational_categories',
+        'natural_key': ('name', 'parent_id'),
+    },
+}
+
+# فایل دسته‌بندی‌ها بر اساس ستون category_type بین سه جدول تقسیم می‌شود
+CATEGORY_TYPES = {
+    'product': 'product_categories',
+    'service': 'service_categories',
+    'educational': 'educational_categories',
+}
+
+TRUE_VALUES = {'true', '1', 'yes', 't', 'y', 'on', 'بله'}
+FALSE_VALUES = {'false', '0', 'no', 'f', 'n', 'off', 'خیر'}
+_DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+
+
+class CsvImportError(Exception):
+    """خطای کلی فایل ورودی (مثلاً نبود ستون الزامی)"""
+
+
+def _normalize_number(value: str) -> str:
+    return value.translate(_DIGITS).replace(',', '').replace('٬', '').replace(' ', '')
+
+
+def coerce_value(column, value: Optional[str]):
+    """
+    تبدیل مقدار متنی CSV به نوع ستون مدل
+
+    Args:
+        column: ستون SQLAlchemy
+        value: مقدار خام
+
+    Returns:
+        مقدار تبدیل‌شده یا None برای مقدار خالی
+
+    Raises:
+        ValueError: اگر مقدار با نوع ستون سازگار نباشد
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    if value == '':
+        return None
+    column_type = column.type
+    if isinstance(column_type, (Integer, BigInteger)):
+        return int(_normalize_number(value))
+    if isinstance(column_type, Boolean):
+        lowered = value.lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+        raise ValueError(f"invalid boolean: {value}")
+    if isinstance(column_type, DateTime):
+        return datetime.datetime.fromisoformat(value.translate(_DIGITS))
+    if isinstance(column_type, String) and column_type.length and len(value) > column_type.length:
+        raise ValueError(f"longer than {column_type.length} characters")
+    return value
+
+
+def _column_default(column):
+    default = column.default
+    if default is None:
+        return None
+    if default.is_callable:
+        return default.arg(None)
+    return default.arg
+
+
+class _TablePlan:
+    """ستون‌ها، پیش‌فرض‌ها و دستور upsert یک جدول برای هدر مشخص"""
+
+    def __init__(self, spec: Dict, header: List[str]):
+        self.table = spec['table']
+        self.model_table = Base.metadata.tables[self.table]
+        columns = self.model_table.columns
+        self.csv_columns = [c for c in header if c in columns]
+        self.row_key = tuple(spec.get('row_key', ('id',)))
+        self.by_id = 'id' in self.csv_columns
+        self.natural_key = () if self.by_id else tuple(spec['natural_key'])
+        self.key_columns = self.row_key if self.by_id else self.natural_key
+
+        missing = [c.name for c in columns
+                   if not c.nullable and not c.primary_key and c.default is None
+                   and c.name not in self.csv_columns]
+        missing += [k for k in self.key_columns
+                    if k not in self.csv_columns and (self.by_id or columns[k].default is None)]
+        if missing:
+            raise CsvImportError(f"Missing required columns for {self.table}: {', '.join(sorted(set(missing)))}")
+
+        self.default_columns = [c.name for c in columns
+                                if c.name not in self.csv_columns and c.default is not None]
+        self.insert_columns = self.csv_columns + self.default_columns
+        self.foreign_keys = {fk.parent.name: fk.column.table.name
+                             for fk in self.model_table.foreign_keys
+                             if fk.parent.name in self.csv_columns}
+
+        updates = [f'{c} = EXCLUDED.{c}' for c in self.csv_columns
+                   if c not in self.row_key and c not in self.key_columns]
+        if 'updated_at' in columns and 'updated_at' not in self.csv_columns:
+            updates.append('updated_at = EXCLUDED.updated_at')
+        action = f"DO UPDATE SET {', '.join(updates)}" if updates else 'DO NOTHING'
+        # ردیف‌های نگاشت شده با کلید طبیعی کلید اصلی ردیف موجود را می‌گیرند
+        self.upsert_columns = self.insert_columns if self.by_id else \
+            list(self.row_key) + [c for c in self.insert_columns if c not in self.row_key]
+        self.sql = (f"INSERT INTO {self.table} ({', '.join(self.upsert_columns)}) VALUES %s "
+                    f"ON CONFLICT ({', '.join(self.row_key)}) {action} RETURNING id, (xmax = 0)")
+        self.insert_sql = (f"INSERT INTO {self.table} ({', '.join(self.insert_columns)}) VALUES %s "
+                           f"RETURNING id, true")
+
+    def build_row(self, raw: Dict[str, str]) -> Tuple[Optional[Dict], List[Tuple[str, str]]]:
+        """تبدیل ردیف خام؛ برگرداندن (ردیف، لیست خطاها)"""
+        columns = self.model_table.columns
+        row, errors = {}, []
+        for name in self.csv_columns:
+            try:
+                row[name] = coerce_value(columns[name], raw.get(name))
+            except (ValueError, TypeError) as e:
+                errors.append((name, str(e)))
+        for name in self.default_columns:
+            row[name] = _column_default(columns[name])
+        for name in self.csv_columns:
+            if row.get(name) is not None or name not in row:
+                continue
+            column = columns[name]
+            default = _column_default(column)
+            if default is not None:
+                row[name] = default
+            elif not column.nullable and (self.by_id or not column.primary_key):
+                errors.append((name, 'required value is empty'))
+        return (None if errors else row), errors
+
+    def key_of(self, row: Dict) -> tuple:
+        return tuple(0 if row.get(c) is None else row.get(c) for c in self.key_columns)
+
+    def match_existing(self, cursor, rows: List[Dict]) -> Dict[tuple, List[tuple]]:
+        """
+        کلید اصلی ردیف‌های موجود با همان کلید طبیعی
+
+        Returns:
+            نگاشت کلید طبیعی به فهرست مقادیر row_key (بیش از یکی یعنی کلید مبهم است)
+        """
+        first = self.natural_key[0]
+        size = len(self.row_key)
+        cursor.execute(f"SELECT {', '.join(self.row_key + self.natural_key)} FROM {self.table} "
+                       f"WHERE {first} = ANY(%s)", (list({row[first] for row in rows}),))
+        matches = {}
+        for record in cursor.fetchall():
+            key = tuple(0 if value is None else value for value in record[size:])
+            matches.setdefault(key, []).append(tuple(record[:size]))
+        return matches
+
+    def check_parents(self, cursor, rows: Dict[tuple, Tuple[int, Dict, Dict]], report: '_ErrorReport'):
+        """
+        حذف ردیف‌هایی از دسته که والدشان نه در دیتابیس است و نه در همین دسته
+
+        فقط مقادیر کلید خارجی همین دسته با anti-join روی جدول والد بررسی می‌شوند. برای ارجاع
+        به خود، ردیف‌های فرزند ردیف حذف شده هم تا رسیدن به ثبات حذف می‌شوند.
+        """
+        for column, parent in self.foreign_keys.items():
+            values = {row[column] for _line, row, _raw in rows.values() if row.get(column) is not None}
+            if not values:
+                continue
+            cursor.execute(f"SELECT v FROM unnest(%s) AS v "
+                           f"WHERE NOT EXISTS (SELECT 1 FROM {parent} p WHERE p.id = v)", (sorted(values),))
+            missing = {record[0] for record in cursor.fetchall()}
+            while missing:
+                in_batch = {row.get('id') for _line, row, _raw in rows.values()} if parent == self.table else ()
+                invalid = [key for key, (_line, row, _raw) in rows.items()
+                           if row.get(column) in missing and row[column] not in in_batch]
+                if not invalid:
+                    break
+                for key in invalid:
+                    line, row, raw = rows.pop(key)
+                    report.add(line, column, f'{parent} {row[column]} does not exist', raw)
+
+    def split(self, cursor, rows: Dict[tuple, Tuple[int, Dict, Dict]],
+              report: '_ErrorReport') -> Tuple[List[Dict], List[Dict]]:
+        """
+        تقسیم ردیف‌های یک دسته به upsert با id و درج ردیف جدید
+
+        Returns:
+            (ردیف‌های upsert، ردیف‌های درج)
+        """
+        if self.by_id:
+            return [row for _line, row, _raw in rows.values()], []
+        existing = self.match_existing(cursor, [row for _line, row, _raw in rows.values()])
+        upserts, inserts = [], []
+        for key, (line, row, raw) in rows.items():
+            ids = existing.get(key, [])
+            if len(ids) > 1:
+                report.add(line, ','.join(self.key_columns),
+                           f'matches {len(ids)} existing rows; add the id column to choose one', raw)
+            elif ids:
+                upserts.append(dict(row, **dict(zip(self.row_key, ids[0]))))
+            else:
+                inserts.append(row)
+        return upserts, inserts
+
+
+class _ErrorReport:
+    """نوشتن تدریجی ردیف‌های نامعتبر در فایل CSV گزارش"""
+
+    def __init__(self, report_dir: str, entity_type: str, header: List[str]):
+        self.report_dir = report_dir
+        self.entity_type = entity_type
+        self.header = header
+        self.path = None
+        self.count = 0
+        self.samples = []
+        self._fh = None
+        self._writer = None
+
+    def add(self, line: int, field: str, message: str, raw: Dict[str, str]):
+        if self._writer is None:
+            os.makedirs(self.report_dir, exist_ok=True)
+            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.path = os.path.join(self.report_dir, f'import_errors_{self.entity_type}_{timestamp}.csv')
+            self._fh = open(self.path, 'w', encoding='utf-8-sig', newline='')
+            self._writer = csv.writer(self._fh)
+            self._writer.writerow(['line', 'field', 'error'] + self.header)
+        self._writer.writerow([line, field, message] + [raw.get(h, '') for h in self.header])
+        self.count += 1
+        if len(self.samples) < SAMPLE_LIMIT:
+            self.samples.append({'line': line, 'field': field, 'error': message})
+
+    def close(self):
+        if self._fh:
+            self._fh.close()
+
+
+def _batches(reader: Iterable[Dict[str, str]], size: int):
+    batch = []
+    # شماره خط 1 مربوط به هدر است
+    for line, raw in enumerate(reader, start=2):
+        batch.append((line, raw))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_csv(engine, entity_type: str, stream, report_dir: str = REPORT_DIR,
+               batch_size: int = BATCH_SIZE, progress: Optional[Callable] = None) -> Dict:
+    """
+    ورود جریانی فایل CSV با upsert دسته‌ای
+
+    Args:
+        engine: موتور SQLAlchemy
+        entity_type: products / services / categories / inquiries / educational
+        stream: فایل باینری ورودی (مثلاً FileStorage.stream)
+        report_dir: پوشه فایل گزارش خطا
+        batch_size: تعداد ردیف در هر دستور INSERT
+        progress: تابع اختیاری progress(done, total, message) پس از هر دسته
+
+    Returns:
+        دیکشنری شامل تعداد درج، به‌روزرسانی، خطا و مسیر گزارش
+
+    Raises:
+        CsvImportError: برای نوع داده یا هدر نامعتبر
+    """
+    if entity_type != 'categories' and entity_type not in IMPORT_SPECS:
+        raise CsvImportError(f"Unknown entity type: {entity_type}")
+
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text_stream)
+    header = [h.strip() for h in (reader.fieldnames or [])]
+    reader.fieldnames = header
+    if not header:
+        raise CsvImportError("CSV file has no header")
+
+    if entity_type == 'categories':
+        spec_names = list(CATEGORY_TYPES.values())
+    else:
+        spec_names = [entity_type]
+    plans = {name: _TablePlan(IMPORT_SPECS[name], header) for name in spec_names}
+
+    report = _ErrorReport(report_dir, entity_type, header)
+    result = {'inserted': 0, 'updated': 0, 'errors': 0, 'report_path': None, 'samples': []}
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        processed = 0
+        for batch in _batches(reader, batch_size):
+            processed += len(batch)
+            pending = {name: {} for name in plans}
+            for line, raw in batch:
+                if entity_type == 'categories':
+                    name = CATEGORY_TYPES.get((raw.get('category_type') or 'product').strip())
+                    if not name:
+                        report.add(line, 'category_type', 'unknown category type', raw)
+                        continue
+                else:
+                    name = entity_type
+                plan = plans[name]
+                row, errors = plan.build_row(raw)
+                for field, message in errors:
+                    report.add(line, field, message, raw)
+                if errors:
+                    continue
+                key = plan.key_of(row)
+                if key in pending[name]:
+                    previous_line, _previous, previous_raw = pending[name][key]
+                    report.add(previous_line, ','.join(plan.key_columns),
+                               f'duplicate key in file, superseded by line {line}', previous_raw)
+                pending[name][key] = (line, row, raw)
+
+            for name, rows in pending.items():
+                if not rows:
+                    continue
+                plan = plans[name]
+                plan.check_parents(cursor, rows, report)
+                upserts, inserts = plan.split(cursor, rows, report)
+                for sql, columns, batch_rows in ((plan.sql, plan.upsert_columns, upserts),
+                                                 (plan.insert_sql, plan.insert_columns, inserts)):
+                    if not batch_rows:
+                        continue
+                    values = [[row[c] for c in columns] for row in batch_rows]
+                    returned = execute_values(cursor, sql, values, page_size=len(values), fetch=True)
+                    for _row_id, inserted in returned:
+                        result['inserted' if inserted else 'updated'] += 1
+            if progress is not None:
+                progress(processed, None, f'{processed} rows processed')
+
+        if any(plan.by_id for plan in plans.values()):
+            reset_sequences(cursor, [plan.table for plan in plans.values() if plan.by_id])
+        if result['inserted'] or result['updated']:
+            # کش ربات پس از commit کل جدول‌های وارد شده را باطل می‌کند
+            for plan in plans.values():
+                if plan.table in TABLE_TAGS:
+                    publish_raw(cursor, plan.table)
+        cursor.close()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+        report.close()
+        text_stream.detach()
+
+    result['errors'] = report.count
+    result['report_path'] = report.path
+    result['samples'] = report.samples
+    logger.info(f"Imported {entity_type}: inserted={result['inserted']}, "
+                f"updated={result['updated']}, errors={result['errors']}")
+    return result
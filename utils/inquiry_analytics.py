@@ -0,0 +1,329 @@
+"""
+گزارش‌های از پیش محاسبه شده استعلام‌ها
+جدول inquiry_daily_stats تعداد استعلام‌های هر روز را به تفکیک محصول/خدمت، دسته و
+وضعیت نگه می‌دارد و inquiry_customer_stats خلاصه هر شماره تماس را. تازه‌سازی
+افزایشی است: فقط روزها و شماره‌هایی که از آخرین تازه‌سازی استعلام جدید یا تغییر
+کرده دارند (created_at/updated_at) دوباره جمع زده می‌شوند. گزارش‌های پنل فقط این
+جدول‌های کوچک را می‌خوانند. روزها بر اساس UTC هستند، مانند created_at.
+
+استعلام‌های بایگانی شده از inquiries حذف می‌شوند؛ fold_archived_inquiries پیش از حذف، آن‌ها را
+در inquiry_archived_daily_stats و inquiry_archived_customer_stats جمع می‌زند و هر بازمحاسبه
+(کامل یا افزایشی) این جمع‌ها را به ردیف‌های موجود اضافه می‌کند. ستون customers روزهای
+بایگانی شده جمع شماره‌های متمایز هر دسته بایگانی است و در مرز دسته‌ها ممکن است بیشتر شمرده شود.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import case, func, text
+from logging_config import get_logger
+from models import (InquiryDailyStat, InquiryCustomerStat, AnalyticsRefresh, Product,
+                    Service, ProductCategory, ServiceCategory)
+
+logger = get_logger('app')
+
+REFRESH_NAME = 'inquiries'
+# همپوشانی برای استعلام‌هایی که تراکنششان پس از شروع تازه‌سازی قبلی commit شده
+REFRESH_OVERLAP = timedelta(minutes=5)
+# هفته‌ها از شنبه شروع می‌شوند (weekday شنبه = 5)
+WEEK_START = 5
+
+ITEM_TYPE_SQL = ("CASE WHEN i.product_id IS NOT NULL THEN 'product' "
+                 "WHEN i.service_id IS NOT NULL THEN 'service' ELSE 'general' END")
+
+DAILY_SELECT = f"""
+    SELECT i.created_at::date AS day, {ITEM_TYPE_SQL} AS item_type,
+           coalesce(i.product_id, i.service_id, 0) AS item_id, i.status,
+           count(*) AS inquiries, count(DISTINCT i.phone) AS customers
+    FROM inquiries i
+    {{where}}
+    GROUP BY 1, 2, 3, 4
+"""
+
+CUSTOMER_SELECT = """
+    SELECT phone, (array_agg(name ORDER BY created_at DESC))[1] AS name, count(*) AS inquiries,
+           count(*) FILTER (WHERE status = 'completed') AS completed,
+           min(created_at) AS first_at, max(created_at) AS last_at
+    FROM inquiries
+    {where}
+    GROUP BY phone
+"""
+
+# ردیف‌های موجود به اضافه جمع‌بندی استعلام‌های بایگانی شده؛ دسته از محصول/خدمت فعلی خوانده می‌شود
+DAILY_INSERT = f"""
+    INSERT INTO inquiry_daily_stats (day, item_type, item_id, status, category_id, inquiries, customers)
+    SELECT c.day, c.item_type, c.item_id, c.status, coalesce(p.category_id, s.category_id),
+           sum(c.inquiries), sum(c.customers)
+    FROM (
+        {DAILY_SELECT.format(where='{where}')}
+        UNION ALL
+        SELECT day, item_type, item_id, status, inquiries, customers
+        FROM inquiry_archived_daily_stats
+        {{archived_where}}
+    ) AS c
+    LEFT JOIN products p ON c.item_type = 'product' AND p.id = c.item_id
+    LEFT JOIN services s ON c.item_type = 'service' AND s.id = c.item_id
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+CUSTOMER_INSERT = f"""
+    INSERT INTO inquiry_customer_stats (phone, name, inquiries, completed, first_at, last_at)
+    SELECT phone, (array_agg(name ORDER BY last_at DESC NULLS LAST))[1], sum(inquiries),
+           sum(completed), min(first_at), max(last_at)
+    FROM (
+        {CUSTOMER_SELECT.format(where='{where}')}
+        UNION ALL
+        SELECT phone, name, inquiries, completed, first_at, last_at
+        FROM inquiry_archived_customer_stats
+        {{where}}
+    ) AS c
+    GROUP BY phone
+"""
+
+ARCHIVE_DAILY_UPSERT = f"""
+    INSERT INTO inquiry_archived_daily_stats AS a (day, item_type, item_id, status, inquiries, customers)
+    {DAILY_SELECT.format(where="WHERE i.id = ANY(:ids) AND i.created_at < :cutoff")}
+    ON CONFLICT (day, item_type, item_id, status) DO UPDATE
+    SET inquiries = a.inquiries + EXCLUDED.inquiries, customers = a.customers + EXCLUDED.customers
+"""
+
+ARCHIVE_CUSTOMER_UPSERT = f"""
+    INSERT INTO inquiry_archived_customer_stats AS a (phone, name, inquiries, completed, first_at, last_at)
+    {CUSTOMER_SELECT.format(where="WHERE id = ANY(:ids) AND created_at < :cutoff")}
+    ON CONFLICT (phone) DO UPDATE
+    SET name = CASE WHEN EXCLUDED.last_at >= a.last_at THEN EXCLUDED.name ELSE a.name END,
+        inquiries = a.inquiries + EXCLUDED.inquiries, completed = a.completed + EXCLUDED.completed,
+        first_at = least(a.first_at, EXCLUDED.first_at), last_at = greatest(a.last_at, EXCLUDED.last_at)
+"""
+
+TOUCHED = "FROM inquiries WHERE created_at >= :since OR updated_at >= :since"
+
+
+def refresh_inquiry_analytics(engine, full: bool = False, progress: Optional[Callable] = None) -> Dict:
+    """
+    تازه‌سازی جدول‌های جمع‌بندی استعلام‌ها در یک تراکنش
+
+    Args:
+        engine: engine دیتابیس
+        full: بازسازی کامل به جای تازه‌سازی افزایشی
+        progress: تابع گزارش پیشرفت (done, total, message)
+
+    Returns:
+        دیکشنری full، days و phones (تعداد روزها و شماره‌های بازمحاسبه شده)
+    """
+    report = progress or (lambda *args, **kwargs: None)
+    with engine.begin() as conn:
+        # تازه‌سازی‌های هم‌زمان پشت سر هم اجرا می‌شوند
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {'name': REFRESH_NAME})
+        started = conn.execute(text("SELECT timezone('utc', now())")).scalar()
+        watermark = None if full else conn.execute(
+            text("SELECT watermark FROM analytics_refresh WHERE name = :name"),
+            {'name': REFRESH_NAME}).scalar()
+
+        if watermark is None:
+            report(0, 2, 'full rebuild')
+            conn.execute(text("DELETE FROM inquiry_daily_stats"))
+            conn.execute(text("DELETE FROM inquiry_customer_stats"))
+            conn.execute(text(DAILY_INSERT.format(where='', archived_where='')))
+            conn.execute(text(CUSTOMER_INSERT.format(where='')))
+            days = conn.execute(text("SELECT count(DISTINCT day) FROM inquiry_daily_stats")).scalar()
+            phones = conn.execute(text("SELECT count(*) FROM inquiry_customer_stats")).scalar()
+        else:
+            since = {'since': watermark - REFRESH_OVERLAP}
+            touched_days = [row[0] for row in conn.execute(
+                text(f"SELECT DISTINCT created_at::date {TOUCHED}"), since)]
+            touched_phones = [row[0] for row in conn.execute(
+                text(f"SELECT DISTINCT phone {TOUCHED}"), since)]
+            report(0, 2, f'{len(touched_days)} days, {len(touched_phones)} phones')
+            if touched_days:
+                params = {'days': touched_days,
+                          'first_day': datetime.combine(min(touched_days), datetime.min.time())}
+                conn.execute(text("DELETE FROM inquiry_daily_stats WHERE day = ANY(:days)"), params)
+                conn.execute(text(DAILY_INSERT.format(
+                    where="WHERE i.created_at >= :first_day AND i.created_at::date = ANY(:days)",
+                    archived_where="WHERE day = ANY(:days)")), params)
+            report(1, 2, 'customers')
+            if touched_phones:
+                params = {'phones': touched_phones}
+                conn.execute(text("DELETE FROM inquiry_customer_stats WHERE phone = ANY(:phones)"), params)
+                conn.execute(text(CUSTOMER_INSERT.format(where="WHERE phone = ANY(:phones)")), params)
+            days, phones = len(touched_days), len(touched_phones)
+
+        conn.execute(text("""
+            INSERT INTO analytics_refresh (name, watermark, refreshed_at, days, phones)
+            VALUES (:name, :watermark, timezone('utc', now()), :days, :phones)
+            ON CONFLICT (name) DO UPDATE
+            SET watermark = EXCLUDED.watermark, refreshed_at = EXCLUDED.refreshed_at,
+                days = EXCLUDED.days, phones = EXCLUDED.phones
+        """), {'name': REFRESH_NAME, 'watermark': started, 'days': days, 'phones': phones})
+        report(2, 2, 'done')
+
+    logger.info(f"Inquiry analytics refreshed ({'full' if watermark is None else 'incremental'}): "
+                f"{days} days, {phones} phones")
+    return {'full': watermark is None, 'days': days, 'phones': phones}
+
+
+def fold_archived_inquiries(conn, ids: List[int], cutoff: datetime):
+    """
+    جمع زدن استعلام‌هایی که بایگانی و حذف می‌شوند در جمع‌بندی‌های بایگانی
+
+    باید در همان تراکنش حذف و پیش از آن اجرا شود تا هر ردیف دقیقاً یک بار شمرده شود.
+
+    Args:
+        conn: اتصال تراکنش بایگانی
+        ids: شناسه استعلام‌های دسته
+        cutoff: همان مرز created_at که حذف با آن انجام می‌شود
+    """
+    params = {'ids': ids, 'cutoff': cutoff}
+    conn.execute(text(ARCHIVE_DAILY_UPSERT), params)
+    conn.execute(text(ARCHIVE_CUSTOMER_UPSERT), params)
+
+
+def last_refresh(session) -> Optional[AnalyticsRefresh]:
+    """وضعیت آخرین تازه‌سازی یا None"""
+    return session.get(AnalyticsRefresh, REFRESH_NAME)
+
+
+def _in_range(query, start: date, end: date):
+    return query.filter(InquiryDailyStat.day >= start, InquiryDailyStat.day <= end)
+
+
+def week_start(day: date) -> date:
+    """اولین روز (شنبه) هفته‌ای که day در آن است"""
+    return day - timedelta(days=(day.weekday() - WEEK_START) % 7)
+
+
+def daily_volume(session, start: date, end: date) -> List[Dict]:
+    """تعداد استعلام‌های هر روز به تفکیک محصول، خدمت و عمومی"""
+    rows = _in_range(session.query(InquiryDailyStat.day, InquiryDailyStat.item_type,
+                                   func.sum(InquiryDailyStat.inquiries)), start, end).group_by(
+        InquiryDailyStat.day, InquiryDailyStat.item_type).all()
+    volume = {}
+    for day, item_type, count in rows:
+        entry = volume.setdefault(day, {'day': day, 'total': 0, 'product': 0, 'service': 0, 'general': 0})
+        entry[item_type] += int(count)
+        entry['total'] += int(count)
+    return [volume[day] for day in sorted(volume)]
+
+
+def weekly_volume(daily: List[Dict]) -> List[Dict]:
+    """جمع هفتگی خروجی daily_volume"""
+    weeks = {}
+    for entry in daily:
+        key = week_start(entry['day'])
+        week = weeks.setdefault(key, {'week': key, 'total': 0, 'product': 0, 'service': 0, 'general': 0})
+        for field in ('total', 'product', 'service', 'general'):
+            week[field] += entry[field]
+    return [weeks[key] for key in sorted(weeks)]
+
+
+def item_volume(session, start: date, end: date, limit: int = 50) -> List[Dict]:
+    """پراستعلام‌ترین محصولات و خدمات با نرخ تکمیل"""
+    total = func.sum(InquiryDailyStat.inquiries)
+    completed = func.sum(case((InquiryDailyStat.status == 'completed', InquiryDailyStat.inquiries), else_=0))
+    rows = _in_range(session.query(InquiryDailyStat.item_type, InquiryDailyStat.item_id, total, completed),
+                     start, end).filter(InquiryDailyStat.item_type != 'general').group_by(
+        InquiryDailyStat.item_type, InquiryDailyStat.item_id).order_by(total.desc()).limit(limit).all()
+
+    names = {}
+    for item_type, model in (('product', Product), ('service', Service)):
+        ids = [item_id for kind, item_id, _, _ in rows if kind == item_type]
+        if ids:
+            names.update({(item_type, item_id): name for item_id, name in
+                          session.query(model.id, model.name).filter(model.id.in_(ids))})
+    return [{'item_type': item_type, 'item_id': item_id,
+             'name': names.get((item_type, item_id), f'#{item_id}'),
+             'inquiries': int(count), 'completed': int(done),
+             'conversion': round(100 * int(done) / int(count), 1) if count else 0}
+            for item_type, item_id, count, done in rows]
+
+
+def category_volume(session, start: date, end: date) -> List[Dict]:
+    """تعداد استعلام‌های هر دسته محصول و خدمت"""
+    total = func.sum(InquiryDailyStat.inquiries)
+    rows = _in_range(session.query(InquiryDailyStat.item_type, InquiryDailyStat.category_id, total),
+                     start, end).filter(InquiryDailyStat.item_type != 'general').group_by(
+        InquiryDailyStat.item_type, InquiryDailyStat.category_id).order_by(total.desc()).all()
+
+    names = {}
+    for item_type, model in (('product', ProductCategory), ('service', ServiceCategory)):
+        ids = [category_id for kind, category_id, _ in rows if kind == item_type and category_id]
+        if ids:
+            names.update({(item_type, category_id): name for category_id, name in
+                          session.query(model.id, model.name).filter(model.id.in_(ids))})
+    return [{'item_type': item_type, 'category_id': category_id,
+             'name': names.get((item_type, category_id), 'بدون دسته' if not category_id else f'#{category_id}'),
+             'inquiries': int(count)}
+            for item_type, category_id, count in rows]
+
+
+def status_conversion(session, start: date, end: date) -> List[Dict]:
+    """تعداد و سهم هر وضعیت از استعلام‌های بازه"""
+    rows = _in_range(session.query(InquiryDailyStat.status, func.sum(InquiryDailyStat.inquiries)),
+                     start, end).group_by(InquiryDailyStat.status).all()
+    total = sum(int(count) for _, count in rows)
+    return [{'status': status, 'inquiries': int(count),
+             'share': round(100 * int(count) / total, 1) if total else 0}
+            for status, count in sorted(rows, key=lambda row: -int(row[1]))]
+
+
+def repeat_customers(session, limit: int = 50) -> Tuple[Dict, List[InquiryCustomerStat]]:
+    """
+    خلاصه مشتریان تکراری (بیش از یک استعلام با یک شماره)
+
+    Returns:
+        (customers، repeat، repeat_share) و لیست پراستعلام‌ترین شماره‌ها
+    """
+    customers, repeat = session.query(
+        func.count(InquiryCustomerStat.phone),
+        func.sum(case((InquiryCustomerStat.inquiries > 1, 1), else_=0))).one()
+    customers, repeat = int(customers or 0), int(repeat or 0)
+    top = session.query(InquiryCustomerStat).filter(InquiryCustomerStat.inquiries > 1).order_by(
+        InquiryCustomerStat.inquiries.desc(), InquiryCustomerStat.last_at.desc()).limit(limit).all()
+    summary = {'customers': customers, 'repeat': repeat,
+               'repeat_share': round(100 * repeat / customers, 1) if customers else 0}
+    return summary, top
+
+
+# نام گزارش -> عنوان (برای خروجی CSV)
+REPORTS = {
+    'daily': 'حجم روزانه',
+    'weekly': 'حجم هفتگی',
+    'items': 'محصولات و خدمات',
+    'categories': 'دسته‌ها',
+    'status': 'وضعیت‌ها',
+    'customers': 'مشتریان تکراری',
+}
+
+
+def report_rows(session, report: str, start: date, end: date) -> Tuple[List[str], List[List]]:
+    """
+    سرستون‌ها و ردیف‌های یک گزارش برای خروجی CSV
+
+    Raises:
+        ValueError: اگر گزارش ناشناخته باشد
+    """
+    if report == 'daily':
+        return (['day', 'total', 'product', 'service', 'general'],
+                [[e['day'], e['total'], e['product'], e['service'], e['general']]
+                 for e in daily_volume(session, start, end)])
+    if report == 'weekly':
+        return (['week_start', 'total', 'product', 'service', 'general'],
+                [[e['week'], e['total'], e['product'], e['service'], e['general']]
+                 for e in weekly_volume(daily_volume(session, start, end))])
+    if report == 'items':
+        return (['item_type', 'item_id', 'name', 'inquiries', 'completed', 'conversion_percent'],
+                [[e['item_type'], e['item_id'], e['name'], e['inquiries'], e['completed'], e['conversion']]
+                 for e in item_volume(session, start, end, limit=None)])
+    if report == 'categories':
+        return (['item_type', 'category_id', 'name', 'inquiries'],
+                [[e['item_type'], e['category_id'] or '', e['name'], e['inquiries']]
+                 for e in category_volume(session, start, end)])
+    if report == 'status':
+        return (['status', 'inquiries', 'share_percent'],
+                [[e['status'], e['inquiries'], e['share']] for e in status_conversion(session, start, end)])
+    if report == 'customers':
+        _, top = repeat_customers(session, limit=None)
+        return (['phone', 'name', 'inquiries', 'completed', 'first_at', 'last_at'],
+                [[c.phone, c.name or '', c.inquiries, c.completed, c.first_at or '', c.last_at or '']
+                 for c in top])
+    raise ValueError(f"Unknown report {report}")
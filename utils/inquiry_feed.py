@@ -0,0 +1,200 @@
+"""
+پخش زنده تغییرات استعلام‌ها به پنل مدیریت
+تریگر inquiries_notify پس از درج، تغییر یا حذف هر استعلام یک NOTIFY روی کانال
+rfcbot_inquiries می‌فرستد. در هر پردازه وب یک رشته با یک اتصال LISTEN اعلان‌ها را
+می‌گیرد و به صف همه مرورگرهای متصل (Server-Sent Events) پخش می‌کند؛ چند رویداد آخر
+برای ادامه پس از اتصال دوباره (Last-Event-ID) نگه داشته می‌شود.
+"""
+
+import json
+import time
+import queue
+import select
+import threading
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import text
+from logging_config import get_logger
+
+logger = get_logger('app')
+
+INQUIRY_CHANNEL = 'rfcbot_inquiries'
+HEARTBEAT_INTERVAL = 15
+# هر اتصال SSE پس از این مدت بسته می‌شود تا رشته وب آزاد شود؛ EventSource خودکار وصل می‌شود
+STREAM_LIFETIME = 300
+SUBSCRIBER_QUEUE_SIZE = 100
+REPLAY_SIZE = 200
+RECONNECT_DELAY = 5
+
+NOTIFY_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION inquiries_notify() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    item record;
+BEGIN
+    IF TG_OP = 'DELETE' THEN item := OLD; ELSE item := NEW; END IF;
+    PERFORM pg_notify('{INQUIRY_CHANNEL}', json_build_object(
+        'op', lower(TG_OP),
+        'id', item.id,
+        'status', item.status,
+        'old_status', CASE WHEN TG_OP = 'UPDATE' THEN OLD.status END,
+        'name', item.name,
+        'phone', item.phone,
+        'product_id', item.product_id,
+        'service_id', item.service_id,
+        'created_at', item.created_at
+    )::text);
+    RETURN NULL;
+END
+$$
+"""
+
+# ستون‌هایی که تغییرشان در پنل دیده می‌شود
+NOTIFY_TRIGGER = """
+CREATE TRIGGER inquiries_notify
+AFTER INSERT OR DELETE OR UPDATE OF status, name, phone, product_id, service_id ON inquiries
+FOR EACH ROW EXECUTE FUNCTION inquiries_notify()
+"""
+
+
+def install_notify_trigger(conn):
+    """ساخت (یا بازسازی) تابع و تریگر NOTIFY روی جدول inquiries"""
+    conn.execute(text(NOTIFY_FUNCTION))
+    conn.execute(text("DROP TRIGGER IF EXISTS inquiries_notify ON inquiries"))
+    conn.execute(text(NOTIFY_TRIGGER))
+
+
+def format_sse(data: Dict, event: str = 'inquiry', event_id: Optional[int] = None) -> str:
+    """قالب یک رویداد Server-Sent Events"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class InquiryFeed:
+    """
+    یک شنونده LISTEN در هر پردازه که اعلان‌ها را به صف مشترکان پخش می‌کند
+
+    رشته شنونده در اولین subscribe شروع می‌شود (پس از fork شدن worker در gunicorn).
+    """
+
+    def __init__(self, engine):
+        """
+        Args:
+            engine: engine دیتابیس (اتصال LISTEN از pool آن گرفته می‌شود)
+        """
+        self.engine = engine
+        self.subscribers: List[queue.Queue] = []
+        self.recent = deque(maxlen=REPLAY_SIZE)
+        self.last_id = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> queue.Queue:
+        """
+        ثبت یک مشترک جدید
+
+        Args:
+            last_event_id: آخرین رویدادی که مرورگر دریافت کرده؛ رویدادهای بعد از آن دوباره فرستاده می‌شوند
+
+        Returns:
+            صف رویدادهای (id, data) مشترک
+        """
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self.lock:
+            if last_event_id is not None:
+                for item in self.recent:
+                    if item[0] > last_event_id:
+                        subscriber.put_nowait(item)
+            self.subscribers.append(subscriber)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._listen, name='inquiry-feed', daemon=True)
+                self.thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        """حذف مشترک"""
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def dispatch(self, payload: str):
+        """پخش یک اعلان به همه مشترکان؛ مشترک کند که صفش پر است رویداد resync می‌گیرد"""
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Invalid inquiry notification payload: {payload[:200]}")
+            return
+        with self.lock:
+            self.last_id += 1
+            item = (self.last_id, data)
+            self.recent.append(item)
+            for subscriber in self.subscribers:
+                try:
+                    subscriber.put_nowait(item)
+                except queue.Full:
+                    # مرورگر عقب مانده؛ به جای رویدادها صفحه را دوباره بارگذاری کند
+                    with subscriber.mutex:
+                        subscriber.queue.clear()
+                    subscriber.put_nowait((self.last_id, {'op': 'resync'}))
+
+    def _listen(self):
+        """حلقه رشته شنونده با اتصال دوباره پس از خطا"""
+        while True:
+            with self.lock:
+                if not self.subscribers:
+                    self.thread = None
+                    return
+            raw = None
+            try:
+                raw = self.engine.raw_connection()
+                connection = raw.dbapi_connection
+                connection.autocommit = True
+                cursor = connection.cursor()
+                cursor.execute(f"LISTEN {INQUIRY_CHANNEL}")
+                cursor.close()
+                logger.info("Inquiry feed listening")
+                while True:
+                    with self.lock:
+                        if not self.subscribers:
+                            break
+                    if select.select([connection], [], [], HEARTBEAT_INTERVAL) != ([], [], []):
+                        connection.poll()
+                        while connection.notifies:
+                            self.dispatch(connection.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Inquiry feed listener failed: {e}")
+                time.sleep(RECONNECT_DELAY)
+            finally:
+                # اتصال LISTEN به pool برنمی‌گردد
+                if raw is not None:
+                    try:
+                        raw.invalidate()
+                    except Exception:
+                        pass
+
+    def stream(self, last_event_id: Optional[int] = None,
+               lifetime: float = STREAM_LIFETIME) -> Iterator[str]:
+        """
+        تولید متن پاسخ SSE برای یک مرورگر
+
+        Args:
+            last_event_id: مقدار سرآیند Last-Event-ID
+            lifetime: حداکثر مدت باز ماندن اتصال (ثانیه)
+        """
+        subscriber = self.subscribe(last_event_id)
+        deadline = time.monotonic() + lifetime
+        try:
+            yield f'retry: {RECONNECT_DELAY * 1000}\n\n'
+            while time.monotonic() < deadline:
+                try:
+                    event_id, data = subscriber.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    # کامنت SSE برای باز نگه داشتن اتصال از پشت proxy
+                    yield ': ping\n\n'
+                    continue
+                yield format_sse(data, event_id=event_id)
+        finally:
+            self.unsubscribe(subscriber)
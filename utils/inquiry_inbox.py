@@ -0,0 +1,178 @@
+"""
+صندوق استعلام‌های پنل مدیریت
+صفحه‌بندی keyset روی (created_at, id) به ترتیب نزولی، فیلتر وضعیت، بازه تاریخ و
+محصول/خدمت، و شمارش هر وضعیت با یک GROUP BY. ایندکس‌های ترکیبی این کوئری‌ها را
+مهاجرت migrations/versions/0003_model_indexes.py می‌سازد.
+"""
+
+import base64
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import joinedload, load_only
+from models import Inquiry, Product, Service
+
+# وضعیت‌های استعلام (new از ربات، بقیه از پنل مدیریت)
+INQUIRY_STATUSES = ('new', 'pending', 'in_progress', 'completed', 'rejected', 'cancelled')
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime, inquiry_id: int) -> str:
+    """ساخت نشانگر صفحه از کلید آخرین/اولین ردیف"""
+    raw = f"{created_at.isoformat()}|{inquiry_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Optional[Tuple[datetime, int]]:
+    """
+    خواندن نشانگر صفحه
+
+    Returns:
+        (created_at, id) یا None اگر نشانگر نامعتبر باشد
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, inquiry_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(inquiry_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _parse_date(value: Optional[str]):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        return None
+
+
+def _parse_int(value: Optional[str]):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def parse_filters(args) -> Dict:
+    """
+    استخراج فیلترهای معتبر از پارامترهای درخواست
+
+    Args:
+        args: request.args
+
+    Returns:
+        دیکشنری status، start_date، end_date، product_id و service_id؛ مقادیر نامعتبر None می‌شوند
+    """
+    status = args.get('status')
+    return {
+        'status': status if status in INQUIRY_STATUSES else None,
+        'start_date': _parse_date(args.get('start_date')),
+        'end_date': _parse_date(args.get('end_date')),
+        'product_id': _parse_int(args.get('product_id')),
+        'service_id': _parse_int(args.get('service_id')),
+    }
+
+
+def filter_args(filters: Dict) -> Dict:
+    """فیلترهای فعال به شکل پارامترهای URL برای لینک‌های صفحه‌بندی"""
+    args = {}
+    for key, value in filters.items():
+        if value is None:
+            continue
+        args[key] = value.strftime('%Y-%m-%d') if isinstance(value, datetime) else value
+    return args
+
+
+def apply_filters(query, filters: Dict, with_status: bool = True):
+    """
+    اعمال فیلترها روی کوئری Inquiry
+
+    Args:
+        query: کوئری پایه (Inquiry.query یا session.query(Inquiry))
+        filters: خروجی parse_filters
+        with_status: برای شمارش وضعیت‌ها فیلتر وضعیت اعمال نمی‌شود
+
+    Returns:
+        کوئری فیلتر شده
+    """
+    if with_status and filters.get('status'):
+        query = query.filter(Inquiry.status == filters['status'])
+    if filters.get('start_date'):
+        query = query.filter(Inquiry.created_at >= filters['start_date'])
+    if filters.get('end_date'):
+        # تاریخ پایان شامل کل همان روز است
+        query = query.filter(Inquiry.created_at < filters['end_date'] + timedelta(days=1))
+    if filters.get('product_id'):
+        query = query.filter(Inquiry.product_id == filters['product_id'])
+    if filters.get('service_id'):
+        query = query.filter(Inquiry.service_id == filters['service_id'])
+    return query
+
+
+def inquiry_page(query, filters: Dict, after: Optional[str] = None, before: Optional[str] = None,
+                 per_page: int = DEFAULT_PAGE_SIZE) -> Dict:
+    """
+    یک صفحه از استعلام‌ها با صفحه‌بندی keyset
+
+    Args:
+        query: کوئری پایه Inquiry
+        filters: خروجی parse_filters
+        after: نشانگر صفحه بعد (ردیف‌های قدیمی‌تر از آن)
+        before: نشانگر صفحه قبل (ردیف‌های جدیدتر از آن)
+        per_page: تعداد ردیف هر صفحه
+
+    Returns:
+        دیکشنری items، next_cursor و prev_cursor
+    """
+    per_page = max(1, min(per_page, MAX_PAGE_SIZE))
+    query = apply_filters(query, filters).options(
+        joinedload(Inquiry.product).load_only(Product.id, Product.name),
+        joinedload(Inquiry.service).load_only(Service.id, Service.name),
+    )
+    key = tuple_(Inquiry.created_at, Inquiry.id)
+    newest_first = (Inquiry.created_at.desc(), Inquiry.id.desc())
+
+    before_key = decode_cursor(before) if before else None
+    after_key = decode_cursor(after) if after and not before_key else None
+
+    if before_key:
+        rows = (query.filter(key > tuple_(*before_key))
+                .order_by(Inquiry.created_at.asc(), Inquiry.id.asc())
+                .limit(per_page + 1).all())
+        has_newer = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_older = True
+    else:
+        if after_key:
+            query = query.filter(key < tuple_(*after_key))
+        rows = query.order_by(*newest_first).limit(per_page + 1).all()
+        has_older = len(rows) > per_page
+        items = rows[:per_page]
+        has_newer = after_key is not None
+
+    return {
+        'items': items,
+        'next_cursor': encode_cursor(items[-1].created_at, items[-1].id) if items and has_older else None,
+        'prev_cursor': encode_cursor(items[0].created_at, items[0].id) if items and has_newer else None,
+    }
+
+
+def status_counts(session, filters: Dict) -> Dict[str, int]:
+    """
+    تعداد استعلام‌های هر وضعیت با فیلترهای فعلی (بدون فیلتر وضعیت)
+
+    Returns:
+        دیکشنری وضعیت -> تعداد به همراه کلید all
+    """
+    query = apply_filters(session.query(Inquiry.status, func.count(Inquiry.id)), filters, with_status=False)
+    counts = dict(query.group_by(Inquiry.status).all())
+    counts['all'] = sum(counts.values())
+    return counts
+
+
+def related_choices(session) -> Tuple[List, List]:
+    """شناسه و نام محصولات و خدمات برای فیلتر صندوق استعلام‌ها"""
+    products = session.query(Product.id, Product.name).order_by(Product.name).all()
+    services = session.query(Service.id, Service.name).order_by(Service.name).all()
+    return products, services
@@ -0,0 +1,238 @@
+"""
+پارتیشن‌بندی ماهانه و بایگانی جدول inquiries
+جدول inquiries روی created_at به صورت RANGE پارتیشن‌بندی ماهانه می‌شود (inquiries_y2024m01)
+و پارتیشن inquiries_default ردیف‌های خارج از ماه‌های ساخته شده را نگه می‌دارد.
+نگهداری دوره‌ای پارتیشن ماه‌های آینده را از پیش می‌سازد، استعلام‌های بسته شده
+قدیمی‌تر از مدت نگهداری را در فایل CSV فشرده بایگانی و از جدول حذف می‌کند و
+پارتیشن‌های قدیمی خالی شده را برمی‌دارد. تبدیل جدول موجود در مهاجرت
+migrations/versions/0009_inquiry_partitions.py انجام می‌شود.
+"""
+
+import io
+import os
+import csv
+import gzip
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import text
+from logging_config import get_logger
+from utils.inquiry_analytics import fold_archived_inquiries
+
+logger = get_logger('app')
+
+TABLE = 'inquiries'
+DEFAULT_PARTITION = 'inquiries_default'
+# پرس‌وجوهای «استعلام‌های اخیر» فقط این چند روز را می‌خوانند (پارتیشن‌های داغ)
+INQUIRY_HOT_DAYS = int(os.environ.get('INQUIRY_HOT_DAYS', 90))
+# استعلام‌های بسته شده قدیمی‌تر از این مدت بایگانی می‌شوند
+INQUIRY_RETENTION_DAYS = int(os.environ.get('INQUIRY_RETENTION_DAYS', 365))
+MONTHS_AHEAD = 2
+CLOSED_STATUSES = ('completed', 'rejected', 'cancelled')
+ARCHIVE_DIR = os.path.join('data', 'inquiry_archive')
+ARCHIVE_BATCH = 5000
+
+
+def month_start(value) -> date:
+    """اولین روز ماه"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    """اولین روز count ماه بعد (یا قبل)"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """نام پارتیشن ماه"""
+    return f'{TABLE}_y{month.year:04d}m{month.month:02d}'
+
+
+def hot_cutoff(days: int = INQUIRY_HOT_DAYS) -> datetime:
+    """مرز created_at پرس‌وجوهای اخیر (برای حذف پارتیشن‌های سرد توسط planner)"""
+    return datetime.utcnow() - timedelta(days=days)
+
+
+def is_partitioned(conn) -> bool:
+    """آیا جدول inquiries پارتیشن‌بندی شده است"""
+    return conn.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE relname = :table AND relnamespace = 'public'::regnamespace"),
+        {'table': TABLE}).scalar() or False
+
+
+def existing_partitions(conn) -> List[str]:
+    """نام پارتیشن‌های فعلی inquiries"""
+    return [row[0] for row in conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        WHERE parent.relname = :table
+        ORDER BY child.relname
+    """), {'table': TABLE})]
+
+
+def create_partition(conn, month: date, parent: str = TABLE, default: str = DEFAULT_PARTITION) -> bool:
+    """
+    ساخت پارتیشن یک ماه
+
+    اگر پارتیشن پیش‌فرض ردیفی از این ماه داشته باشد، ردیف‌ها ابتدا به جدول جدید
+    منتقل می‌شوند و سپس جدول به عنوان پارتیشن وصل می‌شود.
+
+    Args:
+        conn: اتصال داخل تراکنش
+        month: اولین روز ماه
+        parent: جدول پارتیشن‌بندی شده
+        default: نام پارتیشن پیش‌فرض
+
+    Returns:
+        True اگر پارتیشن ساخته شد، False اگر از قبل وجود داشت
+    """
+    name = partition_name(month)
+    if conn.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar():
+        return False
+    bounds = {'start': datetime.combine(month, datetime.min.time()),
+              'end': datetime.combine(add_months(month, 1), datetime.min.time())}
+    values = f"FOR VALUES FROM ('{bounds['start']:%Y-%m-%d}') TO ('{bounds['end']:%Y-%m-%d}')"
+
+    has_default = conn.execute(text("SELECT to_regclass(:name)"), {'name': default}).scalar()
+    stray = has_default and conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= :start AND created_at < :end)"),
+        bounds).scalar()
+    if stray:
+        conn.execute(text(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        moved = conn.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {default} WHERE created_at >= :start AND created_at < :end RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), bounds).rowcount
+        conn.execute(text(f"ALTER TABLE {parent} ATTACH PARTITION {name} {values}"))
+        logger.info(f"Partition {name} created with {moved} rows moved from {default}")
+    else:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {parent} {values}"))
+        logger.info(f"Partition {name} created")
+    return True
+
+
+def ensure_partitions(conn, first_month: Optional[date] = None, months_ahead: int = MONTHS_AHEAD,
+                      parent: str = TABLE, default: str = DEFAULT_PARTITION) -> List[str]:
+    """
+    ساخت پارتیشن‌های ماهانه از first_month (پیش‌فرض ماه جاری) تا months_ahead ماه بعد
+
+    Returns:
+        نام پارتیشن‌های ساخته شده
+    """
+    current = month_start(datetime.utcnow())
+    month = month_start(first_month) if first_month else current
+    created = []
+    while month <= add_months(current, months_ahead):
+        if create_partition(conn, month, parent=parent, default=default):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def archive_closed_inquiries(engine, retention_days: int = INQUIRY_RETENTION_DAYS,
+                             archive_dir: str = ARCHIVE_DIR,
+                             progress: Optional[Callable] = None) -> Dict:
+    """
+    بایگانی استعلام‌های بسته شده قدیمی در یک فایل CSV فشرده و حذف آن‌ها از جدول
+
+    هر دسته ابتدا در فایل نوشته و fsync می‌شود و سپس در همان تراکنش در جمع‌بندی‌های
+    بایگانی گزارش‌ها جمع زده و حذف می‌شود، پس تازه‌سازی گزارش‌ها تاریخچه را از دست نمی‌دهد.
+
+    Returns:
+        دیکشنری archived، file و cutoff
+    """
+    report = progress or (lambda *args, **kwargs: None)
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    params = {'cutoff': cutoff, 'statuses': list(CLOSED_STATUSES), 'limit': ARCHIVE_BATCH}
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"inquiries_{datetime.utcnow():%Y%m%d_%H%M%S}.csv.gz")
+
+    archived = 0
+    with open(path, 'wb') as handle, gzip.GzipFile(fileobj=handle, mode='wb') as compressed, \
+            io.TextIOWrapper(compressed, encoding='utf-8', newline='') as output:
+        writer = None
+        while True:
+            with engine.begin() as conn:
+                result = conn.execute(text(f"""
+                    SELECT * FROM {TABLE}
+                    WHERE created_at < :cutoff AND status = ANY(:statuses)
+                    ORDER BY created_at, id
+                    LIMIT :limit
+                    FOR UPDATE SKIP LOCKED
+                """), params)
+                rows = result.fetchall()
+                if not rows:
+                    break
+                if writer is None:
+                    writer = csv.writer(output)
+                    writer.writerow(result.keys())
+                writer.writerows(rows)
+                # ردیف‌ها پیش از حذف روی دیسک باشند
+                output.flush()
+                compressed.flush()
+                os.fsync(handle.fileno())
+                ids = [row.id for row in rows]
+                fold_archived_inquiries(conn, ids, cutoff)
+                conn.execute(text(f"DELETE FROM {TABLE} WHERE id = ANY(:ids) AND created_at < :cutoff"),
+                             {'ids': ids, 'cutoff': cutoff})
+            archived += len(rows)
+            report(archived, None, f'{archived} archived')
+
+    if not archived:
+        os.remove(path)
+        path = None
+    logger.info(f"Archived {archived} closed inquiries older than {cutoff:%Y-%m-%d}"
+                + (f" to {path}" if path else ''))
+    return {'archived': archived, 'file': path, 'cutoff': cutoff.isoformat()}
+
+
+def drop_empty_partitions(conn, before: date) -> List[str]:
+    """
+    برداشتن پارتیشن‌های ماهانه خالی که کاملاً پیش از before هستند
+
+    Returns:
+        نام پارتیشن‌های حذف شده
+    """
+    dropped = []
+    limit = partition_name(month_start(before))
+    for name in existing_partitions(conn):
+        if name == DEFAULT_PARTITION or name >= limit:
+            continue
+        if conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+            continue
+        conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+        logger.info(f"Dropped empty partition {name}")
+    return dropped
+
+
+def maintain_inquiries(engine, retention_days: int = INQUIRY_RETENTION_DAYS,
+                       progress: Optional[Callable] = None) -> Dict:
+    """
+    نگهداری دوره‌ای: ساخت پارتیشن‌های آینده، بایگانی و برداشتن پارتیشن‌های خالی
+
+    Returns:
+        دیکشنری partitioned، created، archived، file و dropped
+    """
+    report = progress or (lambda *args, **kwargs: None)
+    with engine.begin() as conn:
+        partitioned = is_partitioned(conn)
+        created = ensure_partitions(conn) if partitioned else []
+    report(1, 3, 'partitions')
+
+    archive = archive_closed_inquiries(engine, retention_days, progress=progress)
+    report(2, 3, 'archive')
+
+    dropped = []
+    if partitioned:
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        with engine.begin() as conn:
+            dropped = drop_empty_partitions(conn, cutoff.date())
+    report(3, 3, 'done')
+    return {'partitioned': partitioned, 'created': created, 'archived': archive['archived'],
+            'file': archive['file'], 'dropped': dropped}
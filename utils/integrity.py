@@ -0,0 +1,189 @@
+"""
+بررسی یکپارچگی ارجاعات دیتابیس
+برای هر کلید خارجی تعریف شده در مدل‌ها یک anti-join (NOT EXISTS) تعداد و نمونه ردیف‌های
+یتیم را پیدا می‌کند؛ جدول‌های قدیمی ممکن است قید FOREIGN KEY واقعی نداشته باشند.
+در سه درخت دسته‌بندی، حلقه‌های parent_id با یک CTE بازگشتی پیدا می‌شوند.
+اصلاح هر مورد یک دستور مجموعه‌ای است: ستون nullable به NULL تغییر می‌کند، ردیف وابسته
+(ON DELETE CASCADE یا ستون اجباری) حذف می‌شود و در هر حلقه، parent_id کوچک‌ترین عضو
+NULL می‌شود تا حلقه باز شود.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional
+from sqlalchemy import inspect, text
+from logging_config import get_logger
+from utils.catalog_events import publish
+from utils.read_cache import TABLE_TAGS
+
+logger = get_logger('app')
+
+SAMPLE_SIZE = 10
+CATEGORY_TABLES = ('product_categories', 'service_categories', 'educational_categories')
+# سقف عمق پیمایش درخت؛ ردیف‌هایی که به حلقه می‌رسند بیش از این پیش نمی‌روند
+MAX_CATEGORY_DEPTH = 64
+
+_CYCLE_MEMBERS = """
+    WITH RECURSIVE walk(start_id, current_id, depth) AS (
+        SELECT id, parent_id, 1 FROM {table} WHERE parent_id IS NOT NULL
+        UNION ALL
+        SELECT walk.start_id, parent.parent_id, walk.depth + 1
+        FROM walk JOIN {table} parent ON parent.id = walk.current_id
+        WHERE walk.current_id <> walk.start_id
+          AND parent.parent_id IS NOT NULL
+          AND walk.depth < {max_depth}
+    )
+    SELECT start_id, min(current_id) AS cycle_root
+    FROM walk
+    WHERE start_id IN (SELECT start_id FROM walk WHERE current_id = start_id)
+    GROUP BY start_id
+"""
+
+
+def foreign_key_checks(metadata, tables: Optional[Iterable[str]] = None) -> List[Dict]:
+    """
+    فهرست بررسی‌های کلید خارجی از روی مدل‌ها
+
+    Args:
+        metadata: metadata مدل‌ها
+        tables: محدود کردن به این جدول‌ها (جدول فرزند)
+
+    Returns:
+        فهرست دیکشنری name، table، column، references، ref_column و fix
+    """
+    checks = []
+    for table in metadata.sorted_tables:
+        if tables is not None and table.name not in tables:
+            continue
+        for column in table.columns:
+            for foreign_key in column.foreign_keys:
+                target = foreign_key.column
+                delete = (foreign_key.ondelete or '').upper() == 'CASCADE' or not column.nullable
+                key = [item.name for item in table.primary_key.columns if item.name != column.name]
+                checks.append({
+                    'name': f'{table.name}.{column.name}',
+                    'kind': 'orphan',
+                    'table': table.name,
+                    'column': column.name,
+                    'key': key[0] if key else column.name,
+                    'references': target.table.name,
+                    'ref_column': target.name,
+                    'fix': 'delete' if delete else 'set_null',
+                })
+    return checks
+
+
+def cycle_checks(tables: Optional[Iterable[str]] = None) -> List[Dict]:
+    """بررسی‌های حلقه درخت‌های دسته‌بندی"""
+    return [{'name': f'{table}.parent_id (cycle)', 'kind': 'cycle', 'table': table,
+             'column': 'parent_id', 'key': 'id', 'references': table, 'ref_column': 'id',
+             'fix': 'break_cycle'}
+            for table in CATEGORY_TABLES if tables is None or table in tables]
+
+
+def _orphan_condition(check: Dict) -> str:
+    return (f"child.{check['column']} IS NOT NULL AND NOT EXISTS ("
+            f"SELECT 1 FROM {check['references']} parent "
+            f"WHERE parent.{check['ref_column']} = child.{check['column']})")
+
+
+def run_check(conn, check: Dict) -> Dict:
+    """
+    اجرای یک بررسی و برگرداندن تعداد و نمونه ردیف‌های مشکل‌دار
+
+    Returns:
+        همان دیکشنری بررسی به همراه count و samples
+    """
+    if check['kind'] == 'cycle':
+        cycle = _CYCLE_MEMBERS.format(table=check['table'], max_depth=MAX_CATEGORY_DEPTH)
+        rows = conn.execute(text(f"""
+            SELECT category.id, category.parent_id, count(*) OVER () AS total
+            FROM {check['table']} category
+            JOIN ({cycle}) members ON members.start_id = category.id
+            ORDER BY category.id
+            LIMIT :limit
+        """), {'limit': SAMPLE_SIZE}).fetchall()
+    else:
+        # count(*) OVER () تعداد کل را پیش از LIMIT در همان anti-join حساب می‌کند
+        rows = conn.execute(text(f"""
+            SELECT child.{check['key']}, child.{check['column']}, count(*) OVER () AS total
+            FROM {check['table']} child
+            WHERE {_orphan_condition(check)}
+            ORDER BY child.{check['key']}
+            LIMIT :limit
+        """), {'limit': SAMPLE_SIZE}).fetchall()
+    return dict(check, count=rows[0].total if rows else 0,
+                samples=[{'id': row[0], 'value': row[1]} for row in rows])
+
+
+def fix_statement(check: Dict) -> str:
+    """دستور اصلاح مجموعه‌ای یک بررسی"""
+    table, column = check['table'], check['column']
+    if check['fix'] == 'break_cycle':
+        cycle = _CYCLE_MEMBERS.format(table=table, max_depth=MAX_CATEGORY_DEPTH)
+        return (f"UPDATE {table} SET parent_id = NULL WHERE id IN ("
+                f"SELECT cycle_root FROM ({cycle}) members)")
+    # نام مستعار child در UPDATE/DELETE با نام جدول جایگزین می‌شود تا در SQLite هم اجرا شود
+    condition = _orphan_condition(check).replace('child.', f'{table}.')
+    if check['fix'] == 'delete':
+        return f"DELETE FROM {table} WHERE {condition}"
+    return f"UPDATE {table} SET {column} = NULL WHERE {condition}"
+
+
+def all_checks(metadata, engine, tables: Optional[Iterable[str]] = None) -> List[Dict]:
+    """بررسی‌های کلید خارجی و حلقه برای جدول‌هایی که در دیتابیس وجود دارند"""
+    existing = set(inspect(engine).get_table_names())
+    checks = foreign_key_checks(metadata, tables) + cycle_checks(tables)
+    return [check for check in checks
+            if check['table'] in existing and check['references'] in existing]
+
+
+def scan_integrity(engine, metadata, tables: Optional[Iterable[str]] = None,
+                   progress: Optional[Callable] = None) -> Dict:
+    """
+    اجرای همه بررسی‌ها
+
+    Args:
+        engine: engine دیتابیس
+        metadata: metadata مدل‌ها
+        tables: محدود کردن به این جدول‌ها
+        progress: تابع گزارش پیشرفت (current, total, message)
+
+    Returns:
+        دیکشنری checks (با count و samples) و issues (مجموع ردیف‌های مشکل‌دار)
+    """
+    report = progress or (lambda *args, **kwargs: None)
+    checks = all_checks(metadata, engine, tables)
+    results = []
+    with engine.connect() as conn:
+        for position, check in enumerate(checks):
+            report(position, len(checks), check['name'])
+            results.append(run_check(conn, check))
+    report(len(checks), len(checks), 'done')
+    return {'checks': results, 'issues': sum(item['count'] for item in results)}
+
+
+def fix_integrity(engine, metadata, tables: Optional[Iterable[str]] = None,
+                  progress: Optional[Callable] = None) -> Dict:
+    """
+    اصلاح همه مشکلات با یک دستور مجموعه‌ای برای هر بررسی (هر کدام در تراکنش خود)
+
+    ردیف‌های یتیم پیش از حلقه‌ها اصلاح می‌شوند و در پایان بررسی دوباره اجرا می‌شود.
+
+    Returns:
+        دیکشنری fixed (تعداد ردیف هر بررسی)، total و remaining (نتیجه بررسی دوباره)
+    """
+    report = progress or (lambda *args, **kwargs: None)
+    checks = all_checks(metadata, engine, tables)
+    fixed = {}
+    for position, check in enumerate(checks):
+        report(position, len(checks) + 1, check['name'])
+        with engine.begin() as conn:
+            count = conn.execute(text(fix_statement(check))).rowcount
+            if count and check['table'] in TABLE_TAGS:
+                publish(conn, check['table'])
+        if count:
+            fixed[check['name']] = count
+            logger.info(f"Integrity fix {check['name']} ({check['fix']}): {count} rows")
+    after = scan_integrity(engine, metadata, tables)
+    report(len(checks) + 1, len(checks) + 1, 'done')
+    return {'fixed': fixed, 'total': sum(fixed.values()), 'remaining': after['issues'],
+            'checks': after['checks']}
@@ -0,0 +1,270 @@
+"""
+اجراکننده کارهای پس‌زمینه پنل مدیریت
+کارها در جدول jobs صف می‌شوند و پردازه‌های job_worker.py آن‌ها را با
+SELECT ... FOR UPDATE SKIP LOCKED برمی‌دارند، پیشرفت را ثبت می‌کنند و درخواست لغو را بررسی می‌کنند.
+heartbeat کار در حال اجرا از یک رشته جدا (مستقل از گزارش پیشرفت) به‌روز می‌شود تا یک مرحله طولانی
+بدون گزارش، کار را از نظر پردازه‌های دیگر از کار افتاده نشان ندهد.
+"""
+
+import os
+import json
+import time
+import select
+import socket
+import datetime
+import threading
+import traceback
+from typing import Callable, Dict, Optional
+from sqlalchemy import text
+from logging_config import get_logger
+from utils.query_stats import query_unit
+from utils.db_engine import direct_engine
+
+logger = get_logger('app')
+
+JOB_CHANNEL = 'rfcbot_jobs'
+JOB_FILES_DIR = os.path.join('data', 'job_files')
+POLL_INTERVAL = 5
+HEARTBEAT_INTERVAL = 10
+STALE_AFTER = 300
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+
+# نوع کار -> تابع اجراکننده با امضای handler(engine, params, ctx) -> dict
+JOB_HANDLERS: Dict[str, Callable] = {}
+
+
+class JobCancelled(Exception):
+    """کار توسط ادمین لغو شده است"""
+
+
+def job_handler(kind: str):
+    """دکوراتور ثبت اجراکننده برای یک نوع کار"""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue_job(session, kind: str, params: Dict = None, created_by: int = None) -> int:
+    """
+    افزودن کار جدید به صف
+
+    Args:
+        session: session دیتابیس (Flask-SQLAlchemy یا scoped_session)
+        kind: نوع کار (کلید JOB_HANDLERS)
+        params: پارامترهای قابل تبدیل به JSON
+        created_by: شناسه کاربر ادمین
+
+    Returns:
+        شناسه کار
+    """
+    from models import Job
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(kind=kind,
+              status='queued',
+              params=json.dumps(params or {}, ensure_ascii=False),
+              created_by=created_by)
+    session.add(job)
+    session.flush()
+    session.execute(text("SELECT pg_notify(:channel, :payload)"),
+                    {'channel': JOB_CHANNEL, 'payload': str(job.id)})
+    session.commit()
+    logger.info(f"Job {job.id} ({kind}) queued")
+    return job.id
+
+
+def request_cancel(session, job_id: int) -> bool:
+    """
+    درخواست لغو کار؛ کار در صف بلافاصله لغو می‌شود و کار در حال اجرا
+    در اولین گزارش پیشرفت متوقف می‌شود.
+    """
+    updated = session.execute(text("""
+        UPDATE jobs
+        SET cancel_requested = true,
+            status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+            finished_at = CASE WHEN status = 'queued' THEN now() ELSE finished_at END
+        WHERE id = :id AND status IN ('queued', 'running')
+    """), {'id': job_id}).rowcount
+    session.commit()
+    return bool(updated)
+
+
+def save_job_file(storage, prefix: str) -> str:
+    """ذخیره فایل آپلودی در پوشه فایل‌های کار به صورت جریانی"""
+    from werkzeug.utils import secure_filename
+    os.makedirs(JOB_FILES_DIR, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    path = os.path.join(JOB_FILES_DIR, f'{prefix}_{timestamp}_{secure_filename(storage.filename)}')
+    storage.save(path)
+    return path
+
+
+class JobContext:
+    """ابزار گزارش پیشرفت و بررسی لغو برای اجراکننده کار"""
+
+    def __init__(self, engine, job_id: int):
+        self.engine = engine
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def progress(self, done: Optional[int] = None, total: Optional[int] = None,
+                 message: Optional[str] = None, force: bool = False):
+        """
+        ثبت پیشرفت (حداکثر هر یک ثانیه) و بررسی درخواست لغو
+
+        Raises:
+            JobCancelled: اگر ادمین کار را لغو کرده باشد
+        """
+        now = time.monotonic()
+        if not force and now - self._last_write < 1.0:
+            return
+        self._last_write = now
+        percent = None
+        if done is not None and total:
+            percent = max(0, min(100, int(done * 100 / total)))
+        with self.engine.begin() as conn:
+            cancelled = conn.execute(text("""
+                UPDATE jobs
+                SET progress = COALESCE(:progress, progress),
+                    progress_message = COALESCE(:message, progress_message),
+                    heartbeat_at = now()
+                WHERE id = :id
+                RETURNING cancel_requested
+            """), {'id': self.job_id, 'progress': percent,
+                   'message': message[:255] if message else None}).scalar()
+        if cancelled:
+            raise JobCancelled()
+
+
+class _Heartbeat(threading.Thread):
+    """به‌روزرسانی heartbeat_at کار در حال اجرا هر HEARTBEAT_INTERVAL ثانیه"""
+
+    def __init__(self, engine, job_id: int):
+        super().__init__(name=f'job-{job_id}-heartbeat', daemon=True)
+        self.engine = engine
+        self.job_id = job_id
+        self.interval = HEARTBEAT_INTERVAL
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(text("""
+                        UPDATE jobs SET heartbeat_at = now()
+                        WHERE id = :id AND status = 'running'
+                    """), {'id': self.job_id})
+            except Exception as e:
+                logger.warning(f"Could not record heartbeat for job {self.job_id}: {e}")
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _claim_next(engine, worker_name: str):
+    with engine.begin() as conn:
+        row = conn.execute(text("""
+            UPDATE jobs SET status = 'running', started_at = now(), heartbeat_at = now(),
+                            worker = :worker
+            WHERE id = (
+                SELECT id FROM jobs
+                WHERE status = 'queued'
+                ORDER BY created_at, id
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING id, kind, params
+        """), {'worker': worker_name}).fetchone()
+    return row
+
+
+def _finish(engine, job_id: int, status: str, result: Dict = None, error: str = None) -> bool:
+    """ثبت وضعیت پایانی؛ اگر کار دیگر running نباشد (مثلاً ناموفق شده با fail_stale_jobs) تغییری نمی‌دهد"""
+    with engine.begin() as conn:
+        updated = conn.execute(text("""
+            UPDATE jobs
+            SET status = :status, result = :result, error = :error, finished_at = now(),
+                progress = CASE WHEN :status = 'succeeded' THEN 100 ELSE progress END
+            WHERE id = :id AND status = 'running'
+        """), {'id': job_id, 'status': status,
+               'result': json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+               'error': error}).rowcount
+    if not updated:
+        logger.warning(f"Job {job_id} was no longer running; {status} result was not recorded")
+    return bool(updated)
+
+
+def fail_stale_jobs(engine, stale_after: int = STALE_AFTER) -> int:
+    """علامت‌گذاری کارهایی که پردازه‌شان از کار افتاده (بدون heartbeat) به عنوان ناموفق"""
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            UPDATE jobs SET status = 'failed', finished_at = now(),
+                            error = 'worker stopped responding'
+            WHERE status = 'running'
+              AND heartbeat_at < now() - make_interval(secs => :stale)
+        """), {'stale': stale_after}).rowcount
+
+
+def run_job(engine, job_id: int, kind: str, params_json: Optional[str]):
+    """اجرای یک کار برداشته‌شده و ثبت نتیجه"""
+    ctx = JobContext(engine, job_id)
+    handler = JOB_HANDLERS.get(kind)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job kind {kind}")
+        params = json.loads(params_json) if params_json else {}
+        heartbeat = _Heartbeat(engine, job_id)
+        heartbeat.start()
+        try:
+            with query_unit(f'job:{kind}'):
+                result = handler(engine, params, ctx)
+        finally:
+            heartbeat.stop()
+        if _finish(engine, job_id, 'succeeded', result=result):
+            logger.info(f"Job {job_id} ({kind}) succeeded")
+    except JobCancelled:
+        if _finish(engine, job_id, 'cancelled', error='cancelled by admin'):
+            logger.info(f"Job {job_id} ({kind}) cancelled")
+    except Exception as e:
+        _finish(engine, job_id, 'failed', error=f"{e}\n{traceback.format_exc()}")
+        logger.error(f"Job {job_id} ({kind}) failed: {str(e)}")
+
+
+def _wait_for_notify(listen_conn, timeout: float):
+    if select.select([listen_conn], [], [], timeout) != ([], [], []):
+        listen_conn.poll()
+        listen_conn.notifies.clear()
+
+
+def run_worker(engine, poll_interval: float = POLL_INTERVAL, once: bool = False):
+    """
+    حلقه اصلی پردازه worker: برداشتن کار، اجرا و انتظار برای NOTIFY یا poll
+
+    Args:
+        engine: موتور SQLAlchemy
+        poll_interval: حداکثر زمان انتظار بین بررسی صف (ثانیه)
+        once: فقط کارهای موجود را اجرا کند و خارج شود
+    """
+    worker_name = f'{socket.gethostname()}:{os.getpid()}'
+    # LISTEN وضعیت سطح session است و پشت PgBouncer اتصال مستقیم می‌خواهد
+    listen_conn = direct_engine(engine).raw_connection()
+    listen_conn.dbapi_connection.autocommit = True
+    cursor = listen_conn.cursor()
+    cursor.execute(f"LISTEN {JOB_CHANNEL}")
+    cursor.close()
+    logger.info(f"Job worker {worker_name} started")
+    try:
+        while True:
+            fail_stale_jobs(engine)
+            row = _claim_next(engine, worker_name)
+            if row is not None:
+                run_job(engine, row.id, row.kind, row.params)
+                continue
+            if once:
+                return
+            _wait_for_notify(listen_conn.dbapi_connection, poll_interval)
+    finally:
+        listen_conn.close()
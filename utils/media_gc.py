@@ -0,0 +1,269 @@
+"""
+پاکسازی رسانه‌های یتیم و محاسبه فضای دیسک رسانه‌ها
+حذف رسانه در پنل فقط ردیف دیتابیس را حذف می‌کند؛ این ماژول static/uploads را با
+سه جدول رسانه و media_blobs به صورت مجموعه‌ای مقایسه می‌کند، فایل‌های بدون ارجاع
+را حذف یا قرنطینه می‌کند و ردیف‌هایی که فایلشان وجود ندارد را گزارش می‌دهد.
+"""
+
+import os
+import json
+import time
+import shutil
+import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import text
+from logging_config import get_logger
+from utils.media_store import MEDIA_TABLES
+
+logger = get_logger('app')
+
+UPLOAD_ROOT = os.path.join('static', 'uploads')
+QUARANTINE_DIR = os.path.join('data', 'media_quarantine')
+# پوشه‌هایی که فایل‌هایشان بدون ردیف رسانه استفاده می‌شوند
+PROTECTED_DIRS = ('default',)
+# فایل‌های تازه ممکن است هنوز ردیف commit شده نداشته باشند
+DEFAULT_GRACE_SECONDS = 3600
+GC_MODES = ('report', 'quarantine', 'delete')
+SAMPLE_SIZE = 50
+BATCH_SIZE = 500
+
+MEDIA_ENTITIES = {
+    'product_media': 'product',
+    'service_media': 'service',
+    'educational_content_media': 'educational',
+}
+
+
+def _norm(path: str) -> str:
+    if os.path.isabs(path):
+        path = os.path.relpath(path)
+    return os.path.normpath(path)
+
+
+def row_paths(local_path: Optional[str], file_id: Optional[str], variants: Optional[str]) -> List[str]:
+    """
+    مسیر فایل‌های یک ردیف رسانه (فایل اصلی و نسخه‌ها)
+
+    برای ردیف‌های قدیمی بدون local_path، file_id محلی (مانند uploads/products/1/a.jpg)
+    نسبت به پوشه static در نظر گرفته می‌شود.
+    """
+    paths = []
+    if local_path:
+        paths.append(_norm(local_path))
+    elif file_id and '/' in file_id and not file_id.startswith('http'):
+        paths.append(_norm(os.path.join('static', file_id)))
+    if variants:
+        try:
+            paths.extend(_norm(path) for path in json.loads(variants).values())
+        except (ValueError, AttributeError):
+            pass
+    return paths
+
+
+def scan_files(root: str = UPLOAD_ROOT, protected: Iterable[str] = PROTECTED_DIRS) -> Dict[str, os.stat_result]:
+    """
+    فهرست همه فایل‌های زیر root به همراه stat آن‌ها
+
+    Returns:
+        dict مسیر نرمال شده -> stat
+    """
+    protected_paths = {_norm(os.path.join(root, name)) for name in protected}
+    files = {}
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            logger.warning(f"Cannot scan {directory}: {e}")
+            continue
+        for entry in entries:
+            path = _norm(entry.path)
+            if entry.is_dir(follow_symlinks=False):
+                if path not in protected_paths:
+                    pending.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                files[path] = entry.stat(follow_symlinks=False)
+    return files
+
+
+def purge_unreferenced_blobs(conn, grace_seconds: int) -> int:
+    """حذف ردیف‌های media_blobs که هیچ رسانه‌ای به آن‌ها اشاره نمی‌کند"""
+    refs = ' AND '.join(f'NOT EXISTS (SELECT 1 FROM {table} m WHERE m.blob_id = b.id)'
+                        for table in MEDIA_TABLES)
+    return conn.execute(text(f"""
+        DELETE FROM media_blobs b
+        WHERE {refs} AND b.created_at < now() - make_interval(secs => :grace)
+    """), {'grace': grace_seconds}).rowcount
+
+
+def load_references(conn):
+    """
+    خواندن مجموعه‌ای همه ارجاعات فایل از جداول رسانه و media_blobs
+
+    Returns:
+        (referenced, rows): مجموعه مسیرهای ارجاع شده و لیست ردیف‌ها
+        به صورت (table, id, parent_id, paths)
+    """
+    referenced: Set[str] = set()
+    rows = []
+    for table, parent_column in MEDIA_TABLES.items():
+        result = conn.execution_options(stream_results=True).execute(text(
+            f"SELECT id, {parent_column}, local_path, file_id, variants FROM {table}"))
+        for media_id, parent_id, local_path, file_id, variants in result:
+            paths = row_paths(local_path, file_id, variants)
+            referenced.update(paths)
+            rows.append((table, media_id, parent_id, paths))
+    for (path,) in conn.execute(text("SELECT path FROM media_blobs")):
+        referenced.add(_norm(path))
+    return referenced, rows
+
+
+def still_referenced(conn, paths: List[str]) -> Set[str]:
+    """بررسی دوباره ارجاع مسیرها درست پیش از حذف (ارجاعات ثبت شده پس از اسکن)"""
+    union = ' UNION '.join(
+        [f'SELECT local_path AS path FROM {table} WHERE local_path = ANY(:paths)' for table in MEDIA_TABLES]
+        + ['SELECT path FROM media_blobs WHERE path = ANY(:paths)'])
+    return {_norm(row[0]) for row in conn.execute(text(union), {'paths': list(paths)})}
+
+
+def _dispose(path: str, mode: str, root: str, quarantine_dir: str):
+    if mode == 'delete':
+        os.remove(path)
+    else:
+        target = os.path.join(quarantine_dir, os.path.relpath(path, root))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(path, target)
+
+
+def remove_empty_dirs(root: str, protected: Iterable[str] = PROTECTED_DIRS) -> int:
+    """حذف پوشه‌های خالی مانده پس از پاکسازی (به جز root و پوشه‌های محافظت شده)"""
+    protected_paths = {_norm(os.path.join(root, name)) for name in protected} | {_norm(root)}
+    removed = 0
+    for directory, _dirs, _files in os.walk(root, topdown=False):
+        if _norm(directory) in protected_paths:
+            continue
+        try:
+            os.rmdir(directory)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def write_usage(conn, usage: Dict) -> int:
+    """جایگزینی کامل جدول media_storage_usage با ارقام جدید"""
+    now = datetime.datetime.utcnow()
+    conn.execute(text("DELETE FROM media_storage_usage"))
+    values = [{'entity_type': entity_type, 'entity_id': entity_id, 'files': item['files'],
+               'bytes': item['bytes'], 'missing': item['missing'], 'updated_at': now}
+              for (entity_type, entity_id), item in usage.items()]
+    if values:
+        conn.execute(text("""
+            INSERT INTO media_storage_usage (entity_type, entity_id, files, bytes, missing, updated_at)
+            VALUES (:entity_type, :entity_id, :files, :bytes, :missing, :updated_at)
+        """), values)
+    return len(values)
+
+
+def collect_garbage(engine, mode: str = 'report', grace_seconds: int = DEFAULT_GRACE_SECONDS,
+                    root: str = UPLOAD_ROOT, quarantine_dir: Optional[str] = None,
+                    progress: Optional[Callable] = None) -> Dict:
+    """
+    مقایسه static/uploads با جداول رسانه، رسیدگی به فایل‌های یتیم و به‌روزرسانی فضای مصرفی
+
+    Args:
+        engine: engine دیتابیس
+        mode: report (فقط گزارش)، quarantine (انتقال به data/media_quarantine) یا delete
+        grace_seconds: فایل‌های جدیدتر از این مدت دست نمی‌خورند
+        root: پوشه آپلودها
+        quarantine_dir: پوشه قرنطینه (پیش‌فرض data/media_quarantine/<تاریخ>)
+        progress: تابع گزارش پیشرفت (done, total, message)
+
+    Returns:
+        dict گزارش شامل تعداد و نمونه فایل‌های یتیم، ردیف‌های بدون فایل و فضای دیسک
+    """
+    if mode not in GC_MODES:
+        raise ValueError(f"Unknown media GC mode {mode}")
+    progress = progress or (lambda *args, **kwargs: None)
+    quarantine_dir = quarantine_dir or os.path.join(
+        QUARANTINE_DIR, datetime.datetime.now().strftime('%Y%m%d_%H%M%S'))
+
+    purged_blobs = 0
+    if mode != 'report':
+        with engine.begin() as conn:
+            purged_blobs = purge_unreferenced_blobs(conn, grace_seconds)
+
+    progress(0, 4, 'خواندن ارجاعات رسانه‌ها')
+    with engine.connect() as conn:
+        referenced, rows = load_references(conn)
+
+    progress(1, 4, 'اسکن فایل‌های آپلود شده')
+    files = scan_files(root)
+    cutoff = time.time() - grace_seconds
+
+    # فضای مصرفی هر موجودیت و ردیف‌هایی که فایل اصلی آن‌ها وجود ندارد
+    usage = {}
+    missing_count, missing_samples = 0, []
+    for table, media_id, parent_id, paths in rows:
+        item = usage.setdefault((MEDIA_ENTITIES[table], parent_id or 0),
+                                {'files': 0, 'bytes': 0, 'missing': 0})
+        present = [path for path in paths if path in files]
+        item['files'] += len(present)
+        item['bytes'] += sum(files[path].st_size for path in present)
+        if paths and paths[0] not in files:
+            item['missing'] += 1
+            missing_count += 1
+            if len(missing_samples) < SAMPLE_SIZE:
+                missing_samples.append({'table': table, 'id': media_id,
+                                        'parent_id': parent_id, 'path': paths[0]})
+
+    orphans = sorted(path for path, stat in files.items()
+                     if path not in referenced and stat.st_mtime < cutoff)
+    orphan_bytes = sum(files[path].st_size for path in orphans)
+
+    progress(2, 4, f'{len(orphans)} فایل یتیم')
+    handled, failed = 0, []
+    if mode != 'report':
+        with engine.connect() as conn:
+            for start in range(0, len(orphans), BATCH_SIZE):
+                batch = orphans[start:start + BATCH_SIZE]
+                in_use = still_referenced(conn, batch)
+                for path in batch:
+                    try:
+                        # ingest_file هنگام استفاده دوباره از blob زمان فایل را به‌روز می‌کند
+                        if path in in_use or os.stat(path).st_mtime >= cutoff:
+                            continue
+                        _dispose(path, mode, root, quarantine_dir)
+                        handled += 1
+                    except FileNotFoundError:
+                        continue
+                    except OSError as e:
+                        failed.append({'path': path, 'error': str(e)})
+                progress(2, 4, f'{handled} از {len(orphans)} فایل یتیم')
+        remove_empty_dirs(root)
+
+    progress(3, 4, 'ذخیره فضای مصرفی')
+    with engine.begin() as conn:
+        entities = write_usage(conn, usage)
+
+    result = {
+        'mode': mode,
+        'total_files': len(files),
+        'total_bytes': sum(stat.st_size for stat in files.values()),
+        'referenced_files': len(referenced),
+        'orphan_files': len(orphans),
+        'orphan_bytes': orphan_bytes,
+        'orphan_samples': orphans[:SAMPLE_SIZE],
+        'orphans_handled': handled,
+        'failed': failed[:SAMPLE_SIZE],
+        'missing_rows': missing_count,
+        'missing_samples': missing_samples,
+        'purged_blobs': purged_blobs,
+        'entities': entities,
+    }
+    if mode == 'quarantine' and handled:
+        result['quarantine_dir'] = quarantine_dir
+    logger.info(f"Media GC ({mode}): {len(orphans)} orphans ({orphan_bytes} bytes), "
+                f"{handled} handled, {missing_count} rows missing files")
+    return result
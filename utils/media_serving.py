@@ -0,0 +1,139 @@
+"""
+ارائه فایل‌های رسانه‌ای با ETag قوی، کش immutable و درخواست‌های Range
+فایل‌های مخزن blobs نامشان از hash محتوا گرفته شده و هرگز بازنویسی نمی‌شوند،
+پس می‌توانند یک سال با immutable کش شوند. ارسال فایل در صورت تنظیم به
+nginx (X-Accel-Redirect) یا سرور دیگر (X-Sendfile) واگذار می‌شود.
+"""
+
+import os
+import re
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import quote
+from flask import Response, abort, request, send_file
+from werkzeug.security import safe_join
+from logging_config import get_logger
+
+logger = get_logger('app')
+
+MEDIA_ROOT = os.path.join('static', 'uploads')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MUTABLE_MAX_AGE = 300
+ETAG_CACHE_SIZE = 2048
+CHUNK_SIZE = 64 * 1024
+
+# blobs/ab/<sha256>.jpg و نسخه‌های مشتق آن مانند blobs/ab/<sha256>_thumb.webp
+CONTENT_HASHED_RE = re.compile(r'^blobs/[0-9a-f]{2}/(?P<name>[0-9a-f]{64}(?:_[a-z0-9]+)?)\.[a-z0-9]+$')
+
+_etag_cache = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+def content_hashed_name(filename: str) -> Optional[str]:
+    """
+    نام hash شده فایل مخزن (بدون پسوند) یا None برای فایل‌های قدیمی خارج از مخزن
+
+    Args:
+        filename: مسیر نسبی فایل زیر static/uploads
+
+    Returns:
+        hash محتوا به همراه پسوند نسخه (مثلاً _thumb) یا None
+    """
+    match = CONTENT_HASHED_RE.match(filename.replace(os.sep, '/'))
+    return match.group('name') if match else None
+
+
+def file_etag(path: str, stat: os.stat_result) -> str:
+    """
+    ETag قوی فایل بر اساس SHA-256 محتوا
+
+    hash هر فایل یک بار محاسبه و تا تغییر اندازه یا زمان ویرایش در حافظه نگه داشته می‌شود.
+
+    Args:
+        path: مسیر فایل
+        stat: نتیجه os.stat فایل
+
+    Returns:
+        مقدار ETag بدون نقل‌قول
+    """
+    key = (path, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    with _etag_lock:
+        if key in _etag_cache:
+            _etag_cache.move_to_end(key)
+            return _etag_cache[key]
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    etag = sha.hexdigest()
+
+    with _etag_lock:
+        _etag_cache[key] = etag
+        while len(_etag_cache) > ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+    return etag
+
+
+def _cache_control(response: Response, immutable: bool):
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        # فایل‌های خارج از مخزن ممکن است جایگزین شوند؛ پس از مدت کوتاه با ETag بررسی می‌شوند
+        response.cache_control.max_age = MUTABLE_MAX_AGE
+        response.cache_control.must_revalidate = True
+
+
+def media_response(filename: str, root: str = MEDIA_ROOT, accel_prefix: Optional[str] = None):
+    """
+    پاسخ HTTP یک فایل رسانه‌ای
+
+    درخواست‌های شرطی (If-None-Match) پاسخ 304 و درخواست‌های Range پاسخ 206 می‌گیرند
+    تا پخش و جابجایی در ویدیوهای mp4 بدون دانلود کامل ممکن باشد. اگر accel_prefix
+    تنظیم شده باشد، فقط سرآیندها ساخته و ارسال بدنه به nginx سپرده می‌شود.
+
+    Args:
+        filename: مسیر نسبی فایل زیر root
+        root: پوشه رسانه‌ها
+        accel_prefix: پیشوند location داخلی nginx برای X-Accel-Redirect
+
+    Returns:
+        پاسخ Flask (در صورت نبود فایل خطای 404)
+    """
+    path = safe_join(root, filename)
+    if path is None:
+        abort(404)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        abort(404)
+    if not os.path.isfile(path):
+        abort(404)
+
+    hashed_name = content_hashed_name(filename)
+    etag = hashed_name or file_etag(path, stat)
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    if accel_prefix:
+        response = Response(mimetype=mimetype)
+        response.set_etag(etag)
+        response.last_modified = stat.st_mtime
+        _cache_control(response, bool(hashed_name))
+        if request.if_none_match.contains(etag):
+            response.status_code = 304
+            return response
+        # nginx خودش Range و ارسال فایل را انجام می‌دهد
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(filename)
+        return response
+
+    # send_file در صورت فعال بودن USE_X_SENDFILE سرآیند X-Sendfile می‌فرستد
+    response = send_file(os.path.abspath(path), mimetype=mimetype, conditional=True,
+                         etag=etag, last_modified=stat.st_mtime)
+    _cache_control(response, bool(hashed_name))
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,188 @@
+"""
+مخزن رسانه با آدرس‌دهی محتوا (SHA-256)
+هر فایل یکتا یک بار در static/uploads/blobs ذخیره می‌شود و ردیف‌های
+ProductMedia، ServiceMedia و EducationalContentMedia با blob_id به آن ارجاع می‌دهند.
+file_id تلگرام روی blob نگه داشته می‌شود تا همه ردیف‌ها از یک آپلود استفاده کنند.
+"""
+
+import os
+import hashlib
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from logging_config import get_logger
+from models import MediaBlob
+
+logger = get_logger('app')
+
+BLOB_ROOT = os.path.join('static', 'uploads', 'blobs')
+CHUNK_SIZE = 64 * 1024
+
+# جدول رسانه -> ستون شناسه والد
+MEDIA_TABLES = {
+    'product_media': 'product_id',
+    'service_media': 'service_id',
+    'educational_content_media': 'content_id',
+}
+
+
+def hash_file(path: str) -> str:
+    """محاسبه SHA-256 فایل به صورت تکه‌تکه"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def blob_path(sha256: str, extension: str, root: str = BLOB_ROOT) -> str:
+    """
+    مسیر blob بر اساس hash (دو حرف اول به عنوان زیرپوشه)
+
+    Args:
+        sha256: hash محتوای فایل
+        extension: پسوند فایل بدون نقطه
+        root: پوشه ریشه مخزن
+
+    Returns:
+        مسیر فایل مانند static/uploads/blobs/ab/ab12....jpg
+    """
+    extension = extension.lower().lstrip('.')
+    filename = f'{sha256}.{extension}' if extension else sha256
+    return os.path.join(root, sha256[:2], filename)
+
+
+def ingest_file(session, path: str, file_type: str, root: str = BLOB_ROOT) -> MediaBlob:
+    """
+    انتقال فایل آپلود شده به مخزن و برگرداندن blob آن
+
+    اگر محتوای یکسانی قبلاً ذخیره شده باشد، فایل جدید حذف و blob موجود برگردانده می‌شود.
+
+    Args:
+        session: session دیتابیس
+        path: مسیر فایل ذخیره شده
+        file_type: نوع رسانه (photo/video)
+        root: پوشه ریشه مخزن
+
+    Returns:
+        ردیف MediaBlob
+    """
+    sha256 = hash_file(path)
+    target = blob_path(sha256, os.path.splitext(path)[1], root)
+    size = os.path.getsize(path)
+
+    blob = None
+    for _attempt in range(2):
+        session.execute(
+            insert(MediaBlob.__table__).values(sha256=sha256, path=target, size=size,
+                                               file_type=file_type)
+            .on_conflict_do_nothing(index_elements=['sha256']))
+        # قفل اشتراکی تا release_blobs همزمان این blob را حذف نکند
+        blob = session.query(MediaBlob).filter_by(sha256=sha256).with_for_update(read=True).first()
+        if blob is not None:
+            break
+    if blob is None:
+        raise RuntimeError(f"Could not store media blob {sha256}")
+
+    if os.path.exists(blob.path):
+        if os.path.abspath(path) != os.path.abspath(blob.path):
+            # به‌روزرسانی زمان فایل تا پاکسازی رسانه‌های یتیم آن را تازه ببیند
+            os.utime(blob.path)
+            os.remove(path)
+        logger.info(f"Reusing media blob {blob.id} ({sha256[:12]}) for {path}")
+    else:
+        os.makedirs(os.path.dirname(blob.path), exist_ok=True)
+        os.replace(path, blob.path)
+        logger.info(f"Stored media blob {blob.id} ({sha256[:12]}) at {blob.path}")
+    return blob
+
+
+def share_telegram_file_id(session, blob_id: Optional[int], file_id: str) -> int:
+    """
+    ثبت file_id تلگرام روی blob و همه ردیف‌های رسانه‌ای که به آن اشاره می‌کنند
+
+    Args:
+        session: session دیتابیس (commit توسط فراخواننده)
+        blob_id: شناسه blob
+        file_id: file_id تلگرام
+
+    Returns:
+        تعداد ردیف‌های رسانه به‌روزرسانی شده
+    """
+    if not blob_id or not file_id:
+        return 0
+    session.execute(text("UPDATE media_blobs SET telegram_file_id = :file_id WHERE id = :id"),
+                    {'id': blob_id, 'file_id': file_id})
+    updated = 0
+    for table in MEDIA_TABLES:
+        updated += session.execute(
+            text(f"UPDATE {table} SET file_id = :file_id WHERE blob_id = :id AND file_id <> :file_id"),
+            {'id': blob_id, 'file_id': file_id}).rowcount
+    return updated
+
+
+def relocate_blob(conn, blob_id: int, old_path: str, new_path: str) -> int:
+    """
+    انتقال blob و ردیف‌های رسانه آن به فایل جدید (مثلاً نسخه پردازش شده تصویر)
+
+    محتوای مسیرهای مخزن هرگز بازنویسی نمی‌شود تا کش immutable مرورگرها معتبر بماند؛
+    به جای آن فایل جدید با نام مشتق از همان hash ساخته و ارجاع‌ها به آن منتقل می‌شوند.
+
+    Args:
+        conn: اتصال یا session دیتابیس (commit توسط فراخواننده)
+        blob_id: شناسه blob
+        old_path: مسیر فعلی فایل blob
+        new_path: مسیر فایل جدید
+
+    Returns:
+        تعداد ردیف‌های رسانه به‌روزرسانی شده
+    """
+    conn.execute(text("UPDATE media_blobs SET path = :path, size = :size WHERE id = :id"),
+                 {'id': blob_id, 'path': new_path, 'size': os.path.getsize(new_path)})
+    params = {'id': blob_id, 'old_path': old_path, 'new_path': new_path,
+              'old_file_id': old_path.replace('static/', '', 1),
+              'new_file_id': new_path.replace('static/', '', 1)}
+    updated = 0
+    for table in MEDIA_TABLES:
+        updated += conn.execute(text(f"""
+            UPDATE {table} SET local_path = :new_path,
+                file_id = CASE WHEN file_id = :old_file_id THEN :new_file_id ELSE file_id END
+            WHERE blob_id = :id AND local_path = :old_path
+        """), params).rowcount
+    return updated
+
+
+def blob_reference_counts(session, blob_ids: List[int]) -> Dict[int, int]:
+    """تعداد ردیف‌های رسانه‌ای که به هر blob اشاره می‌کنند"""
+    if not blob_ids:
+        return {}
+    union = ' UNION ALL '.join(f'SELECT blob_id FROM {table} WHERE blob_id = ANY(:ids)'
+                               for table in MEDIA_TABLES)
+    rows = session.execute(text(f"SELECT blob_id, count(*) FROM ({union}) refs GROUP BY blob_id"),
+                           {'ids': list(blob_ids)}).fetchall()
+    counts = {blob_id: 0 for blob_id in blob_ids}
+    counts.update({blob_id: count for blob_id, count in rows})
+    return counts
+
+
+def release_blobs(session, blob_ids: List[int]) -> List[int]:
+    """
+    حذف blobهایی که دیگر هیچ ردیفی به آن‌ها اشاره نمی‌کند
+
+    باید پس از حذف ردیف‌های رسانه و در همان تراکنش فراخوانی شود.
+
+    Returns:
+        شناسه blobهای حذف شده (فایل‌هایشان را می‌توان از دیسک پاک کرد)
+    """
+    blob_ids = [blob_id for blob_id in blob_ids if blob_id]
+    if not blob_ids:
+        return []
+    session.execute(text("SELECT id FROM media_blobs WHERE id = ANY(:ids) FOR UPDATE"),
+                    {'ids': blob_ids})
+    orphaned = [blob_id for blob_id, count in blob_reference_counts(session, blob_ids).items()
+                if count == 0]
+    if not orphaned:
+        return []
+    rows = session.execute(text("DELETE FROM media_blobs WHERE id = ANY(:ids) RETURNING id"),
+                           {'ids': orphaned}).fetchall()
+    return [row[0] for row in rows]
@@ -0,0 +1,374 @@
+"""
+اندازه‌گیری کوئری‌های SQL و ثبت کوئری‌های کند
+شنونده‌های before/after_cursor_execute روی engine های برنامه (Database و Flask-SQLAlchemy)
+زمان و تعداد ردیف هر دستور را به همراه مبدأ آن (route وب یا handler ربات) جمع می‌کنند.
+دستورها با حذف مقادیر ثابت نرمال می‌شوند تا کوئری‌های هم‌شکل یک ردیف آمار داشته باشند.
+دستورهای کندتر از SLOW_QUERY_MS در لاگ app ثبت می‌شوند و تعداد کوئری هر درخواست وب یا
+به‌روزرسانی تلگرام جداگانه شمرده می‌شود.
+
+هر پردازه آمار خود را در حافظه نگه می‌دارد و هر FLUSH_INTERVAL ثانیه در
+data/query_stats/<process>-<pid>.json می‌نویسد تا صفحه /admin/database/queries آمار
+وب و ربات را با هم نمایش دهد. وضعیت pool اتصال‌های هر پردازه (utils/db_engine.py) و آمار
+کش خواندن کاتالوگ (utils/read_cache.py)، ادغام خواندن‌های هم‌زمان (utils/single_flight.py) و
+به‌روزرسانی‌های رد شده محدودیت نرخ ربات (utils/throttling.py) هم در همین فایل‌ها ذخیره می‌شود.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from logging_config import get_logger
+
+logger = get_logger('app')
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 250))
+STATS_DIR = os.path.join('data', 'query_stats')
+FLUSH_INTERVAL = 30
+# فایل آمار پردازه‌هایی که این مدت به‌روز نشده‌اند نادیده گرفته و سپس حذف می‌شود
+SNAPSHOT_MAX_AGE = 3600
+MAX_STATEMENTS = 500
+MAX_STATEMENT_ORIGINS = 5
+MAX_SQL_LENGTH = 2000
+RESET_MARKER = 'reset'
+
+# مبدأ کوئری‌های جاری (route یا handler) و شمارنده درخواست/به‌روزرسانی جاری
+current_origin: ContextVar[str] = ContextVar('query_origin', default='-')
+_current_unit: ContextVar[Optional[Dict]] = ContextVar('query_unit', default=None)
+
+_NORMALIZE_PATTERNS = [
+    (re.compile(r'--[^\n]*'), ' '),
+    (re.compile(r'/\*.*?\*/', re.S), ' '),
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%\(\w+\)s|%s|(?<![:\w]):\w+'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\s+'), ' '),
+    # IN (?, ?, ...) و VALUES (...), (...) با هر تعداد عضو یک شکل شوند
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+'), '(...)'),
+]
+
+
+def normalize_sql(statement: str) -> str:
+    """حذف مقادیر ثابت، پارامترها و فاصله‌های اضافه از دستور SQL"""
+    for pattern, replacement in _NORMALIZE_PATTERNS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()[:MAX_SQL_LENGTH]
+
+
+class QueryStats:
+    """آمار تجمعی کوئری‌های یک پردازه"""
+
+    def __init__(self, directory: str = STATS_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.statements: Dict[str, Dict] = {}
+        self.origins: Dict[str, Dict] = {}
+        self.started_at = time.time()
+        self.pid = None
+
+    def _ensure_process(self):
+        # پس از fork (gunicorn با preload_app) آمار پدر کنار گذاشته و flusher جدید شروع می‌شود
+        if self.pid == os.getpid():
+            return
+        self.pid = os.getpid()
+        self.statements, self.origins = {}, {}
+        self.started_at = time.time()
+        threading.Thread(target=self._flush_loop, name='query-stats', daemon=True).start()
+
+    def record(self, sql: str, duration_ms: float, rows: int, origin: str):
+        """ثبت یک دستور اجرا شده"""
+        with self.lock:
+            self._ensure_process()
+            item = self.statements.get(sql)
+            if item is None:
+                if len(self.statements) >= MAX_STATEMENTS:
+                    # کم‌هزینه‌ترین دستور جای خود را به دستور جدید می‌دهد
+                    del self.statements[min(self.statements, key=lambda key: self.statements[key]['total_ms'])]
+                item = self.statements[sql] = {'sql': sql, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                               'rows': 0, 'slow': 0, 'origins': {}}
+            item['count'] += 1
+            item['total_ms'] += duration_ms
+            item['max_ms'] = max(item['max_ms'], duration_ms)
+            item['rows'] += rows
+            item['slow'] += duration_ms >= SLOW_QUERY_MS
+            origins = item['origins']
+            if origin in origins or len(origins) < MAX_STATEMENT_ORIGINS:
+                origins[origin] = origins.get(origin, 0) + 1
+
+    def record_unit(self, origin: str, queries: int, duration_ms: float):
+        """ثبت تعداد و زمان کوئری‌های یک درخواست وب یا به‌روزرسانی ربات"""
+        with self.lock:
+            self._ensure_process()
+            item = self.origins.setdefault(origin, {'origin': origin, 'units': 0, 'queries': 0,
+                                                    'max_queries': 0, 'total_ms': 0.0})
+            item['units'] += 1
+            item['queries'] += queries
+            item['max_queries'] = max(item['max_queries'], queries)
+            item['total_ms'] += duration_ms
+
+    def snapshot(self) -> Dict:
+        """کپی آمار فعلی برای ذخیره یا نمایش"""
+        from utils.db_engine import pool_snapshots
+        from utils.read_cache import cache_snapshots
+        from utils.single_flight import flight_snapshots
+        from utils.throttling import throttle_snapshots
+        pools, caches, flights = pool_snapshots(), cache_snapshots(), flight_snapshots()
+        throttling = throttle_snapshots()
+        with self.lock:
+            return {'pools': pools,
+                    'caches': caches,
+                    'flights': flights,
+                    'throttling': throttling,
+                    'process': f'{os.path.basename(sys.argv[0]) or "python"}-{os.getpid()}',
+                    'started_at': self.started_at,
+                    'updated_at': time.time(),
+                    'statements': [dict(item, origins=dict(item['origins']))
+                                   for item in self.statements.values()],
+                    'origins': [dict(item) for item in self.origins.values()]}
+
+    def flush(self):
+        """نوشتن اتمیک آمار پردازه در پوشه آمار"""
+        marker = os.path.join(self.directory, RESET_MARKER)
+        if os.path.exists(marker) and os.path.getmtime(marker) > self.started_at:
+            # آمار از پنل مدیریت پاک شده است
+            self.reset()
+        data = self.snapshot()
+        if not data['statements'] and not data['origins'] and not data['pools'] and not data['caches'] \
+                and not data['flights'] and not data['throttling']:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{data['process']}.json")
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(data, handle, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def reset(self):
+        """پاک کردن آمار پردازه"""
+        from utils.db_engine import reset_pool_metrics
+        from utils.read_cache import reset_cache_stats
+        from utils.single_flight import reset_flight_stats
+        from utils.throttling import reset_throttle_stats
+        reset_pool_metrics()
+        reset_cache_stats()
+        reset_flight_stats()
+        reset_throttle_stats()
+        with self.lock:
+            self.statements, self.origins = {}, {}
+            self.started_at = time.time()
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self.pid == pid:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Could not write query stats: {e}")
+
+
+query_stats = QueryStats()
+
+
+# ----- شنونده‌های SQLAlchemy -----
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if not started:
+        return
+    duration_ms = (time.perf_counter() - started.pop()) * 1000
+    rows = max(cursor.rowcount or 0, 0)
+    origin = current_origin.get()
+    sql = normalize_sql(statement)
+    query_stats.record(sql, duration_ms, rows, origin)
+
+    unit = _current_unit.get()
+    if unit is not None:
+        unit['queries'] += 1
+        unit['ms'] += duration_ms
+    if duration_ms >= SLOW_QUERY_MS:
+        logger.warning(f"Slow query {duration_ms:.0f}ms rows={rows} origin={origin}: {sql}")
+
+
+def _handle_error(exception_context):
+    # زمان شروع دستور ناموفق از پشته برداشته شود
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started'):
+        connection.info['query_started'].pop()
+
+
+def instrument_engine(engine):
+    """افزودن اندازه‌گیری کوئری‌ها به یک engine (تکرار آن بی‌اثر است)"""
+    if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+@contextmanager
+def query_unit(origin: str):
+    """
+    شمارش کوئری‌های یک درخواست یا به‌روزرسانی و ثبت مبدأ آن‌ها
+
+    Yields:
+        دیکشنری queries و ms کوئری‌های اجرا شده تا این لحظه
+    """
+    unit = {'queries': 0, 'ms': 0.0}
+    origin_token = current_origin.set(origin)
+    unit_token = _current_unit.set(unit)
+    try:
+        yield unit
+    finally:
+        _current_unit.reset(unit_token)
+        current_origin.reset(origin_token)
+        query_stats.record_unit(origin, unit['queries'], unit['ms'])
+
+
+def init_flask(app):
+    """شمارش کوئری‌های هر درخواست وب با نام endpoint به عنوان مبدأ"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_query_unit():
+        if request.endpoint == 'static':
+            return
+        g.query_unit = query_unit(f'web:{request.endpoint or request.path}')
+        g.query_counts = g.query_unit.__enter__()
+
+    @app.after_request
+    def _query_count_header(response):
+        counts = g.get('query_counts')
+        if counts is not None:
+            response.headers['X-Query-Count'] = str(counts['queries'])
+        return response
+
+    @app.teardown_request
+    def _end_query_unit(exc):
+        unit = g.pop('query_unit', None)
+        if unit is not None:
+            unit.__exit__(None, None, None)
+
+
+# ----- خواندن آمار همه پردازه‌ها -----
+
+def load_snapshots(directory: str = STATS_DIR, max_age: float = SNAPSHOT_MAX_AGE) -> List[Dict]:
+    """آمار ذخیره شده پردازه‌های فعال؛ فایل‌های خیلی قدیمی حذف می‌شوند"""
+    snapshots = []
+    if not os.path.isdir(directory):
+        return snapshots
+    now = time.time()
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.json'):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+                continue
+            with open(path, encoding='utf-8') as handle:
+                snapshots.append(json.load(handle))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read query stats {path}: {e}")
+    return snapshots
+
+
+def merge_snapshots(snapshots: List[Dict]) -> Dict:
+    """
+    ادغام آمار چند پردازه
+
+    Returns:
+        دیکشنری statements و origins (فهرست‌های ادغام شده)، pools، caches، flights و throttling
+        (هر پردازه جدا) و processes
+    """
+    statements, origins, pools, caches, flights, throttling = {}, {}, [], [], [], []
+    for snapshot in snapshots:
+        for item in snapshot.get('throttling', []):
+            throttling.append(dict(item, process=snapshot.get('process')))
+        for item in snapshot.get('flights', []):
+            flights.append(dict(item, process=snapshot.get('process')))
+        for cache in snapshot.get('caches', []):
+            for item in cache['methods']:
+                caches.append(dict(item, process=snapshot.get('process'), backend=cache['backend'],
+                                   entries=cache['entries'], evictions=cache['evictions'],
+                                   invalidated=cache['invalidated']))
+        for item in snapshot.get('pools', []):
+            pools.append(dict(item, process=snapshot.get('process'),
+                              avg_wait_ms=item['wait_ms'] / item['checkouts'] if item['checkouts'] else 0))
+        for item in snapshot.get('statements', []):
+            merged = statements.get(item['sql'])
+            if merged is None:
+                statements[item['sql']] = dict(item, origins=dict(item['origins']))
+                continue
+            merged['count'] += item['count']
+            merged['total_ms'] += item['total_ms']
+            merged['max_ms'] = max(merged['max_ms'], item['max_ms'])
+            merged['rows'] += item['rows']
+            merged['slow'] += item['slow']
+            for origin, count in item['origins'].items():
+                merged['origins'][origin] = merged['origins'].get(origin, 0) + count
+        for item in snapshot.get('origins', []):
+            merged = origins.get(item['origin'])
+            if merged is None:
+                origins[item['origin']] = dict(item)
+                continue
+            merged['units'] += item['units']
+            merged['queries'] += item['queries']
+            merged['max_queries'] = max(merged['max_queries'], item['max_queries'])
+            merged['total_ms'] += item['total_ms']
+    for item in statements.values():
+        item['avg_ms'] = item['total_ms'] / item['count'] if item['count'] else 0
+    for item in origins.values():
+        item['avg_queries'] = item['queries'] / item['units'] if item['units'] else 0
+    return {'statements': list(statements.values()), 'origins': list(origins.values()), 'pools': pools,
+            'caches': caches, 'flights': flights, 'throttling': throttling, 'processes': [snapshot.get('process') for snapshot in snapshots]}
+
+
+SORT_KEYS = {
+    'total': 'total_ms',
+    'max': 'max_ms',
+    'avg': 'avg_ms',
+    'count': 'count',
+    'slow': 'slow',
+}
+
+
+def top_queries(sort: str = 'total', limit: int = 50, directory: str = STATS_DIR) -> Dict:
+    """
+    پرهزینه‌ترین کوئری‌ها و مبدأهای پرکوئری همه پردازه‌ها
+
+    Args:
+        sort: یکی از کلیدهای SORT_KEYS
+        limit: تعداد ردیف‌ها
+
+    Returns:
+        دیکشنری statements، origins، pools، caches، flights، throttling و processes
+    """
+    # آمار پردازه جاری پیش از خواندن نوشته شود تا تازه باشد
+    query_stats.flush()
+    merged = merge_snapshots(load_snapshots(directory))
+    key = SORT_KEYS.get(sort, 'total_ms')
+    merged['statements'] = sorted(merged['statements'], key=lambda item: item[key], reverse=True)[:limit]
+    merged['origins'] = sorted(merged['origins'], key=lambda item: item['avg_queries'], reverse=True)[:limit]
+    return merged
+
+
+def reset_query_stats(directory: str = STATS_DIR):
+    """پاک کردن آمار همه پردازه‌ها؛ پردازه‌های دیگر با دیدن فایل reset در flush بعدی پاک می‌کنند"""
+    query_stats.reset()
+    os.makedirs(directory, exist_ok=True)
+    for filename in os.listdir(directory):
+        if filename.endswith('.json'):
+            os.remove(os.path.join(directory, filename))
+    with open(os.path.join(directory, RESET_MARKER), 'w') as handle:
+        handle.write(str(time.time()))
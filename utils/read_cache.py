@@ -0,0 +1,371 @@
+"""
+کش خواندن کاتالوگ برای متدهای Database
+متدهای خواندنی با دکوراتور cached مدت اعتبار (TTL) و برچسب‌های خود را اعلام می‌کنند؛ نتیجه
+با کلید «نام متد + آرگومان‌ها» در backend کش نگه داشته می‌شود. نتیجه خالی (None یا [])
+با NEGATIVE_TTL کوتاه‌تر کش می‌شود تا شناسه‌های ناموجود هر بار به دیتابیس نرسند.
+
+برچسب‌ها به شکل «نوع:شناسه» هستند (product:42). برچسب «نوع:*» یعنی وابسته به همه ردیف‌های
+آن نوع (فهرست‌ها و شمارش‌ها). باطل کردن product:42 ورودی‌های product:42 و product:* را حذف
+می‌کند و باطل کردن product:* همه ورودی‌های product را. تغییرهای اعلام شده با catalog_changed
+(utils/catalog_changes.py) خودکار به برچسب تبدیل و باطل می‌شوند.
+
+backend پیش‌فرض در حافظه پردازه است (LRU با سقف READ_CACHE_SIZE) و مانند backend مشترک مقدار را
+سریال‌شده نگه می‌دارد تا هر خواننده نسخه خودش را بگیرد و تغییر نتیجه در یک handler کش را خراب نکند. با READ_CACHE_BACKEND=shared
+کش در data/cache/read_cache.db بین ربات و پنل مشترک است تا تغییرهای پنل در کش ربات هم
+باطل شوند؛ اگر فایل مشترک باز نشود، کش حافظه جای آن را می‌گیرد. READ_CACHE_BACKEND=off کش
+را خاموش می‌کند.
+"""
+
+import os
+import json
+import time
+import pickle
+import sqlite3
+import inspect
+import threading
+import functools
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+from logging_config import get_logger
+
+logger = get_logger('app')
+
+READ_CACHE_BACKEND = os.environ.get('READ_CACHE_BACKEND', 'memory').lower()
+READ_CACHE_SIZE = int(os.environ.get('READ_CACHE_SIZE', 2000))
+CATALOG_TTL = float(os.environ.get('READ_CACHE_TTL', 300))
+STATIC_TTL = 3600
+NEGATIVE_TTL = 30
+SHARED_PATH = os.path.join('data', 'cache', 'read_cache.db')
+# زمان آخرین استفاده در backend مشترک حداکثر یک بار در این مدت نوشته می‌شود
+SHARED_TOUCH_RESOLUTION = 5
+
+# برچسب ردیف‌های تغییر کرده هر جدول کاتالوگ
+TABLE_TAGS = {
+    'products': 'product',
+    'product_categories': 'product_category',
+    'product_media': 'product_media',
+    'services': 'service',
+    'service_categories': 'service_category',
+    'service_media': 'service_media',
+    'educational_content': 'educational_content',
+    'educational_categories': 'educational_category',
+    'educational_content_media': 'educational_content_media',
+    'static_content': 'static_content',
+}
+
+MISSING = object()
+
+# کش‌های ساخته شده در این پردازه برای آمار
+_caches: List['ReadCache'] = []
+
+
+def tag_matches(entry_tag: str, tag: str) -> bool:
+    """آیا باطل کردن tag ورودی دارای برچسب entry_tag را حذف می‌کند"""
+    kind, _, _ = tag.partition(':')
+    if tag.endswith(':*'):
+        return entry_tag.startswith(f'{kind}:')
+    return entry_tag in (tag, f'{kind}:*')
+
+
+def change_tags(table: str, ids: Iterable) -> List[str]:
+    """برچسب‌های باطل شونده برای تغییر ردیف‌های یک جدول (بدون شناسه: کل جدول)"""
+    kind = TABLE_TAGS.get(table)
+    if kind is None:
+        return []
+    ids = list(ids)
+    return [f'{kind}:{item}' for item in ids] if ids else [f'{kind}:*']
+
+
+class MemoryBackend:
+    """کش LRU در حافظه پردازه"""
+
+    def __init__(self, max_entries: int = READ_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: OrderedDict = OrderedDict()  # key -> (expires, pickled value, tags)
+        self.tags: Dict[str, set] = {}
+        self.evictions = 0
+
+    def get(self, key: str):
+        """مقدار معتبر کلید یا MISSING"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                return MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(entry[1])
+
+    def set(self, key: str, value, ttl: float, tags: Iterable[str]):
+        value = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            tags = tuple(tags)
+            self.entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, _, tags = self.entries.pop(key)
+        for tag in tags:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """حذف ورودی‌های برچسب‌ها و برگرداندن تعداد حذف شده"""
+        with self.lock:
+            keys = set()
+            for tag in tags:
+                for entry_tag, entry_keys in self.tags.items():
+                    if tag_matches(entry_tag, tag):
+                        keys |= entry_keys
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tags.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SharedBackend:
+    """کش مشترک بین پردازه‌ها در یک فایل SQLite (LRU تقریبی با زمان آخرین استفاده)"""
+
+    def __init__(self, path: str = SHARED_PATH, max_entries: int = READ_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, "
+                         "expires REAL, used REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS entry_tags (tag TEXT, key TEXT, PRIMARY KEY (tag, key))")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entry_tags_key ON entry_tags (key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_used ON entries (used)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, expires, used FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return MISSING
+            if row[1] < now:
+                self._delete(conn, [key])
+                return MISSING
+            if now - row[2] >= SHARED_TOUCH_RESOLUTION:
+                conn.execute("UPDATE entries SET used = ? WHERE key = ?", (now, key))
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value, ttl: float, tags: Iterable[str]):
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO entries (key, value, expires, used) VALUES (?, ?, ?, ?)",
+                         (key, blob, now + ttl, now))
+            conn.execute("DELETE FROM entry_tags WHERE key = ?", (key,))
+            conn.executemany("INSERT OR IGNORE INTO entry_tags (tag, key) VALUES (?, ?)",
+                             [(tag, key) for tag in tags])
+            excess = conn.execute("SELECT count(*) FROM entries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                keys = [row[0] for row in conn.execute(
+                    "SELECT key FROM entries ORDER BY used LIMIT ?", (excess,))]
+                self._delete(conn, keys)
+                self.evictions += len(keys)
+
+    def _delete(self, conn, keys: List[str]):
+        marks = ', '.join('?' * len(keys))
+        conn.execute(f"DELETE FROM entries WHERE key IN ({marks})", keys)
+        conn.execute(f"DELETE FROM entry_tags WHERE key IN ({marks})", keys)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        exact, prefixes = set(), []
+        for tag in tags:
+            kind = tag.partition(':')[0]
+            if tag.endswith(':*'):
+                prefixes.append(f'{kind}:%')
+            else:
+                exact |= {tag, f'{kind}:*'}
+        conditions = ['tag LIKE ?'] * len(prefixes)
+        if exact:
+            conditions.append(f"tag IN ({', '.join('?' * len(exact))})")
+        if not conditions:
+            return 0
+        with self._connect() as conn:
+            keys = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT key FROM entry_tags WHERE {' OR '.join(conditions)}", prefixes + sorted(exact))]
+            if keys:
+                self._delete(conn, keys)
+        return len(keys)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM entry_tags")
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+
+
+def make_backend(kind: str = READ_CACHE_BACKEND):
+    """
+    ساخت backend کش از روی READ_CACHE_BACKEND
+
+    Returns:
+        MemoryBackend، SharedBackend یا None برای کش خاموش
+    """
+    if kind == 'off':
+        return None
+    if kind == 'shared':
+        try:
+            return SharedBackend()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Shared read cache unavailable, using in-process cache: {e}")
+    return MemoryBackend()
+
+
+class ReadCache:
+    """کش خواندن با آمار برخورد هر متد و باطل کردن با برچسب"""
+
+    def __init__(self, backend, cacheable: Optional[Callable] = None):
+        """
+        Args:
+            backend: MemoryBackend یا SharedBackend (یا هر شیء با get/set/invalidate/clear)
+            cacheable: تابعی که پس از هر بارگذاری تعیین می‌کند نتیجه قابل کش کردن است یا نه
+        """
+        self.backend = backend
+        self.cacheable = cacheable
+        self.lock = threading.Lock()
+        self.counts: Dict[str, Dict] = {}
+        self.invalidated = 0
+        # شمارنده باطل شدن هر نوع برچسب (product، service، ...)
+        self.generations: Dict[str, int] = {}
+        _caches.append(self)
+
+    def _generation(self, tags: tuple) -> tuple:
+        with self.lock:
+            return tuple(self.generations.get(tag.partition(':')[0], 0) for tag in tags)
+
+    def _count(self, method: str, key: str):
+        with self.lock:
+            item = self.counts.setdefault(method, {'hits': 0, 'negative_hits': 0, 'misses': 0})
+            item[key] += 1
+
+    def get_or_load(self, method: str, key: str, loader: Callable, ttl: float,
+                    tags: Iterable[str] = (), negative_ttl: float = NEGATIVE_TTL):
+        """
+        مقدار کش شده یا بارگذاری و کش کردن آن
+
+        Args:
+            method: نام متد برای آمار
+            key: کلید کش
+            loader: تابع خواندن از دیتابیس
+            ttl: مدت اعتبار نتیجه (ثانیه)
+            tags: برچسب‌های باطل کردن
+            negative_ttl: مدت اعتبار نتیجه خالی
+
+        اگر در حین بارگذاری برچسبی از همان نوع باطل شود، نتیجه (که ممکن است پیش از تغییر
+        خوانده شده باشد) کش نمی‌شود تا باطل شدن از دست نرود.
+        """
+        value = self.backend.get(key)
+        if value is not MISSING:
+            self._count(method, 'negative_hits' if value is None or value == [] else 'hits')
+            return value
+        self._count(method, 'misses')
+        tags = tuple(tags)
+        generation = self._generation(tags)
+        value = loader()
+        if (self.cacheable is None or self.cacheable()) and self._generation(tags) == generation:
+            empty = value is None or value == []
+            self.backend.set(key, value, negative_ttl if empty else ttl, tags)
+        return value
+
+    def invalidate(self, *tags: str) -> int:
+        """باطل کردن ورودی‌های برچسب‌ها"""
+        if not tags:
+            return 0
+        with self.lock:
+            for kind in {tag.partition(':')[0] for tag in tags}:
+                self.generations[kind] = self.generations.get(kind, 0) + 1
+        removed = self.backend.invalidate(tags)
+        with self.lock:
+            self.invalidated += removed
+        return removed
+
+    def on_catalog_change(self, table: str, ids: List[int]):
+        """دریافت‌کننده catalog_changed"""
+        self.invalidate(*change_tags(table, ids))
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> Dict:
+        """آمار برخورد هر متد، تعداد ورودی‌ها، حذف‌های LRU و باطل شده‌ها"""
+        with self.lock:
+            methods = []
+            for method, item in sorted(self.counts.items()):
+                calls = item['hits'] + item['negative_hits'] + item['misses']
+                methods.append(dict(item, method=method, calls=calls,
+                                    hit_ratio=(calls - item['misses']) / calls if calls else 0))
+            return {'backend': type(self.backend).__name__, 'entries': len(self.backend),
+                    'evictions': self.backend.evictions, 'invalidated': self.invalidated,
+                    'methods': methods}
+
+    def reset_stats(self):
+        with self.lock:
+            self.counts = {}
+            self.invalidated = 0
+
+
+def cached(ttl: float = CATALOG_TTL, tags: Optional[Callable] = None, negative_ttl: float = NEGATIVE_TTL):
+    """
+    دکوراتور متدهای خواندنی Database؛ کش از self.cache خوانده می‌شود (None یعنی بدون کش)
+
+    Args:
+        ttl: مدت اعتبار نتیجه (ثانیه)
+        tags: تابعی که با آرگومان‌های متد فهرست برچسب‌ها را برمی‌گرداند
+        negative_ttl: مدت اعتبار نتیجه خالی (None یا [])
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, 'cache', None)
+            if cache is None:
+                return func(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            values = tuple(bound.arguments.values())[1:]
+            key = f'{func.__name__}:{json.dumps(values, default=str)}'
+            return cache.get_or_load(func.__name__, key, lambda: func(self, *values),
+                                     ttl, tags(*values) if tags else (), negative_ttl)
+        return wrapper
+    return decorator
+
+
+def cache_snapshots() -> List[Dict]:
+    """آمار کش‌های این پردازه که استفاده شده‌اند"""
+    return [cache.stats() for cache in _caches if cache.counts]
+
+
+def reset_cache_stats():
+    for cache in _caches:
+        cache.reset_stats()
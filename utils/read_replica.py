@@ -0,0 +1,215 @@
+"""
+هدایت خواندن‌های کاتالوگ به replica فقط‌خواندنی
+وقتی DATABASE_REPLICA_URL تنظیم شده باشد، متدهای خواندنی مخزن‌ها (محصولات، خدمات، دسته‌ها،
+محتوای آموزشی و ثابت) با یک session جدا اجرا می‌شوند که engine آن در شروع هر تراکنش انتخاب و
+تا پایان تراکنش ثابت می‌ماند (یک خواندن snapshot های replica و primary را مخلوط نمی‌کند).
+
+برای read-your-writes، هر نوشتن روی جدول‌های کاتالوگ (از پنل، کارهای پس‌زمینه یا خود ربات)
+زمانش را در data/replica/last_catalog_write ثبت می‌کند و تا REPLICA_WRITE_WINDOW ثانیه پس
+از آن همه پردازه‌ها کاتالوگ را از primary می‌خوانند. اگر تأخیر replica از REPLICA_MAX_LAG
+بیشتر شود یا replica در دسترس نباشد، خواندن‌ها تا بررسی بعدی به primary برمی‌گردند.
+"""
+
+import os
+import contextvars
+import re
+import time
+import threading
+from typing import Dict, Optional
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from logging_config import get_logger
+
+logger = get_logger('app')
+
+REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+REPLICA_WRITE_WINDOW = float(os.environ.get('DB_REPLICA_WRITE_WINDOW', 5))
+REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 10))
+# فاصله بررسی تأخیر و سلامت replica (ثانیه)
+REPLICA_CHECK_INTERVAL = 10
+# فایل مشترک حداکثر یک بار در این مدت (ثانیه) به‌روز و خوانده می‌شود
+MARKER_RESOLUTION = 0.5
+WRITE_MARKER = os.path.join('data', 'replica', 'last_catalog_write')
+
+CATALOG_TABLES = frozenset({
+    'products', 'services', 'product_categories', 'service_categories', 'educational_categories',
+    'educational_content', 'product_media', 'service_media', 'educational_content_media',
+    'static_content', 'media_blobs',
+})
+
+_WRITE_STATEMENT = re.compile(r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?)\s+"?(\w+)"?',
+                              re.I)
+
+# تأخیر replica: صفر اگر همه WAL دریافت شده اعمال شده باشد (primary بیکار)
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def catalog_table(statement: str) -> Optional[str]:
+    """نام جدول کاتالوگی که دستور در آن می‌نویسد یا None"""
+    match = _WRITE_STATEMENT.match(statement)
+    if match and match.group(1).lower() in CATALOG_TABLES:
+        return match.group(1).lower()
+    return None
+
+
+class ReplicaRouter:
+    """انتخاب engine خواندن کاتالوگ (replica یا primary)"""
+
+    def __init__(self, primary, replica=None, marker: str = WRITE_MARKER,
+                 write_window: float = REPLICA_WRITE_WINDOW, max_lag: float = REPLICA_MAX_LAG,
+                 check_interval: float = REPLICA_CHECK_INTERVAL):
+        """
+        Args:
+            primary: engine اصلی (نوشتن‌ها)
+            replica: engine replica یا None
+            marker: فایل مشترک زمان آخرین نوشتن کاتالوگ بین پردازه‌ها
+            write_window: مدت خواندن از primary پس از هر نوشتن (ثانیه)
+            max_lag: بیشترین تأخیر قابل قبول replica (ثانیه)
+            check_interval: فاصله بررسی تأخیر replica (ثانیه)
+        """
+        self.primary = primary
+        self.replica = replica
+        self.marker = marker
+        self.write_window = write_window
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.last_write = 0.0
+        self.marked_at = 0.0
+        self.shared_write = 0.0
+        self.marker_read_at = float('-inf')
+        self.replica_ok = True
+        self.replica_down = False
+        self.checked_at = 0.0
+        self.lag = 0.0
+        self.counts = {'replica': 0, 'primary_window': 0, 'primary_lag': 0, 'primary_down': 0}
+
+    # ----- نوشتن‌ها -----
+
+    def mark_write(self):
+        """ثبت نوشتن روی کاتالوگ برای این پردازه و پردازه‌های دیگر"""
+        now = time.time()
+        self.last_write = now
+        if now - self.marked_at < MARKER_RESOLUTION:
+            return
+        self.marked_at = now
+        try:
+            os.makedirs(os.path.dirname(self.marker), exist_ok=True)
+            with open(self.marker, 'a'):
+                pass
+            os.utime(self.marker, (now, now))
+        except OSError as e:
+            logger.warning(f"Could not record catalog write marker: {e}")
+
+    def track_writes(self, engine):
+        """ثبت خودکار نوشتن‌های کاتالوگ روی engine (پس از commit و در حالت autocommit)"""
+        if event.contains(engine, 'after_cursor_execute', self._after_cursor_execute):
+            return
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'commit', self._after_commit)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        table = catalog_table(statement)
+        if table is None:
+            return
+        # پنجره از همین لحظه شروع و پس از commit (تراکنش‌های طولانی) دوباره تمدید می‌شود
+        conn.info['catalog_write'] = table
+        self.mark_write()
+
+    def _after_commit(self, conn):
+        table = conn.info.pop('catalog_write', None)
+        if table is not None:
+            self.mark_write()
+
+    # ----- خواندن‌ها -----
+
+    def last_catalog_write(self) -> float:
+        """زمان آخرین نوشتن کاتالوگ در هر پردازه (فایل مشترک هر MARKER_RESOLUTION ثانیه خوانده می‌شود)"""
+        now = time.monotonic()
+        if now - self.marker_read_at >= MARKER_RESOLUTION:
+            self.marker_read_at = now
+            try:
+                self.shared_write = os.path.getmtime(self.marker)
+            except OSError:
+                self.shared_write = 0.0
+        return max(self.last_write, self.shared_write)
+
+    def _check_replica(self):
+        try:
+            with self.replica.connect() as conn:
+                self.lag = float(conn.execute(text(LAG_QUERY)).scalar() or 0)
+        except Exception as e:
+            if not self.replica_down:
+                logger.error(f"Read replica unavailable, reading from primary: {e}")
+            self.replica_ok, self.replica_down = False, True
+            return
+        healthy = self.lag <= self.max_lag
+        if healthy != self.replica_ok:
+            logger.warning(f"Read replica {'recovered' if healthy else 'lagging'} (lag {self.lag:.1f}s)")
+        self.replica_ok, self.replica_down = healthy, False
+
+    def read_engine(self):
+        """engine خواندن کاتالوگ برای تراکنش جدید"""
+        if self.replica is None:
+            return self.primary
+        if time.time() - self.last_catalog_write() < self.write_window:
+            self._count('primary_window')
+            return self.primary
+        now = time.monotonic()
+        if now - self.checked_at >= self.check_interval:
+            with self.lock:
+                if now - self.checked_at >= self.check_interval:
+                    self.checked_at = now
+                    # خطای بررسی سلامت به خواندن جاری نسبت داده نمی‌شود (حالت کاهش‌یافته)؛
+                    # خواندن به primary می‌رود
+                    contextvars.Context().run(self._check_replica)
+        if not self.replica_ok:
+            self._count('primary_down' if self.replica_down else 'primary_lag')
+            return self.primary
+        self._count('replica')
+        return self.replica
+
+    def _count(self, key: str):
+        with self.lock:
+            self.counts[key] += 1
+
+    def stats(self) -> Dict:
+        """شمارنده‌های مسیر خواندن‌ها و آخرین تأخیر replica"""
+        with self.lock:
+            return dict(self.counts, lag=self.lag, replica_ok=self.replica_ok,
+                        enabled=self.replica is not None)
+
+
+class RoutingSession(Session):
+    """Session خواندن کاتالوگ که engine هر تراکنش را از ReplicaRouter می‌گیرد"""
+
+    def __init__(self, *args, router: ReplicaRouter = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.router = router
+        # engine اتصال تراکنش جاری؛ تا پایان تراکنش همه دستورها روی همان اجرا می‌شوند
+        self.read_bind = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.router is not None:
+            if self.read_bind is not None:
+                return self.read_bind
+            return self.router.read_engine()
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_begin')
+def _pin_read_bind(session, transaction, connection):
+    if session.read_bind is None:
+        session.read_bind = connection.engine
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _unpin_read_bind(session, transaction):
+    if transaction.parent is None:
+        session.read_bind = None
@@ -0,0 +1,326 @@
+"""
+بازیابی مجموعه‌ای (set-based) دیتابیس از فایل پشتیبان
+هر CSV با COPY در یک جدول موقت (staging) بارگذاری می‌شود، ردیف‌های نامعتبر با anti-join
+کنار گذاشته و گزارش می‌شوند و بقیه با INSERT ... SELECT به ترتیب وابستگی در یک تراکنش درج می‌شوند.
+"""
+
+import os
+import io
+import csv
+import json
+import hashlib
+import zipfile
+import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from models import Base
+from logging_config import get_logger
+from utils.backup_utils import BACKUP_TABLES, MANIFEST_NAME
+from utils.catalog_events import publish_raw
+from utils.read_cache import TABLE_TAGS
+
+logger = get_logger('webpanel')
+
+REPORT_DIR = os.path.join('data', 'restore_reports')
+# گزارش rejectها تا commit تراکنش با این پسوند نوشته و سپس به نام نهایی منتقل می‌شود
+PARTIAL_SUFFIX = '.partial'
+REJECTS_TABLE = 'restore_rejects'
+SAMPLE_LIMIT = 5
+
+# بررسی‌های اضافه متناظر با CHECK constraintهای مدل‌ها
+EXTRA_CHECKS = {
+    'inquiries': [
+        ('product_and_service', 's.product_id IS NOT NULL AND s.service_id IS NOT NULL'),
+    ],
+}
+
+
+class RestoreError(Exception):
+    """خطای غیرقابل ادامه در بازیابی (مثلاً checksum نامعتبر)"""
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _stage_name(table: str) -> str:
+    return f'stage_{table}'
+
+
+def _foreign_keys(table: str) -> List[Tuple[str, str, str]]:
+    """لیست (ستون، جدول والد، ستون والد) از روی مدل‌ها"""
+    model_table = Base.metadata.tables.get(table)
+    if model_table is None:
+        return []
+    return sorted((fk.parent.name, fk.column.table.name, fk.column.name)
+                  for fk in model_table.foreign_keys)
+
+
+def _outside_dependents(tables: List[str]) -> List[Tuple[str, str]]:
+    """(جدول وابسته، جدول والد) برای کلیدهای خارجی جدول‌های بیرون از tables به جدول‌های tables"""
+    return sorted({(child.name, fk.column.table.name)
+                   for child in Base.metadata.sorted_tables if child.name not in tables
+                   for fk in child.foreign_keys if fk.column.table.name in tables})
+
+
+def _read_header(zip_ref: zipfile.ZipFile, member: str) -> List[str]:
+    with zip_ref.open(member) as fh:
+        reader = csv.reader(io.TextIOWrapper(fh, encoding='utf-8', newline=''))
+        return next(reader, [])
+
+
+def verify_checksums(zip_ref: zipfile.ZipFile) -> Optional[Dict]:
+    """
+    بررسی checksum فایل‌های CSV بر اساس manifest (در صورت وجود)
+
+    Returns:
+        manifest یا None برای پشتیبان‌های قدیمی بدون manifest
+
+    Raises:
+        RestoreError: اگر checksum یکی از فایل‌ها مطابقت نداشته باشد
+    """
+    if MANIFEST_NAME not in zip_ref.namelist():
+        return None
+    manifest = json.loads(zip_ref.read(MANIFEST_NAME).decode('utf-8'))
+    for table, entry in manifest.get('tables', {}).items():
+        sha = hashlib.sha256()
+        with zip_ref.open(entry['file']) as fh:
+            for chunk in iter(lambda: fh.read(64 * 1024), b''):
+                sha.update(chunk)
+        if sha.hexdigest() != entry.get('sha256'):
+            raise RestoreError(f"Checksum mismatch for {entry['file']}")
+    return manifest
+
+
+def _target_columns(cursor, table: str) -> Dict[str, bool]:
+    """ستون‌های جدول مقصد و nullable بودن آن‌ها"""
+    cursor.execute("""
+        SELECT column_name, is_nullable = 'YES'
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s
+        ORDER BY ordinal_position
+    """, (table,))
+    return dict(cursor.fetchall())
+
+
+def _reject(cursor, table: str, reason: str, condition: str) -> int:
+    """انتقال ردیف‌های staging که شرط را دارند به جدول rejectها"""
+    stage = _quote_ident(_stage_name(table))
+    cursor.execute(f"""
+        WITH rejected AS (
+            DELETE FROM {stage} s WHERE {condition} RETURNING s.*
+        )
+        INSERT INTO {REJECTS_TABLE} (table_name, reason, row_data)
+        SELECT %s, %s, to_jsonb(rejected) FROM rejected
+    """, (table, reason))
+    return cursor.rowcount
+
+
+def _stage_table(cursor, zip_ref: zipfile.ZipFile, table: str, header: List[str],
+                 target_columns: Dict[str, bool]) -> int:
+    """ساخت جدول staging و بارگذاری CSV با COPY"""
+    stage = _quote_ident(_stage_name(table))
+    cursor.execute(f"CREATE TEMP TABLE {stage} (LIKE {_quote_ident(table)} INCLUDING DEFAULTS) ON COMMIT DROP")
+    for column in target_columns:
+        cursor.execute(f"ALTER TABLE {stage} ALTER COLUMN {_quote_ident(column)} DROP NOT NULL")
+    for column in header:
+        if column not in target_columns:
+            # ستون‌های اضافه پشتیبان‌های قدیمی فقط بارگذاری و نادیده گرفته می‌شوند
+            cursor.execute(f"ALTER TABLE {stage} ADD COLUMN {_quote_ident(column)} text")
+    column_list = ', '.join(_quote_ident(c) for c in header)
+    with zip_ref.open(f'{table}.csv') as fh:
+        cursor.copy_expert(f"COPY {stage} ({column_list}) FROM STDIN WITH (FORMAT csv, HEADER true)", fh)
+    return cursor.rowcount
+
+
+def _validate_table(cursor, table: str, target_columns: Dict[str, bool],
+                    check_existing: bool) -> Dict[str, int]:
+    """اعتبارسنجی مجموعه‌ای ردیف‌های staging و حذف ردیف‌های نامعتبر"""
+    target = _quote_ident(table)
+    stage = _quote_ident(_stage_name(table))
+    rejected = {}
+
+    def count(reason, rows):
+        if rows:
+            rejected[reason] = rejected.get(reason, 0) + rows
+
+    required = [c for c, nullable in target_columns.items() if not nullable]
+    if required:
+        condition = ' OR '.join(f's.{_quote_ident(c)} IS NULL' for c in required)
+        count('not_null', _reject(cursor, table, 'not_null', condition))
+
+    count('duplicate_in_backup', _reject(
+        cursor, table, 'duplicate_in_backup',
+        f"EXISTS (SELECT 1 FROM {stage} d WHERE d.id = s.id AND d.ctid < s.ctid)"))
+    if check_existing:
+        count('duplicate_id', _reject(
+            cursor, table, 'duplicate_id',
+            f"EXISTS (SELECT 1 FROM {target} t WHERE t.id = s.id)"))
+
+    for reason, condition in EXTRA_CHECKS.get(table, []):
+        count(reason, _reject(cursor, table, reason, condition))
+
+    for column, parent_table, parent_column in _foreign_keys(table):
+        col = _quote_ident(column)
+        pcol = _quote_ident(parent_column)
+        reason = f'missing_{parent_table}'
+        condition = (f"s.{col} IS NOT NULL AND NOT EXISTS "
+                     f"(SELECT 1 FROM {_quote_ident(parent_table)} p WHERE p.{pcol} = s.{col})")
+        if parent_table == table:
+            # ارجاع به خود (درخت دسته‌بندی): والد ممکن است در همین staging باشد؛
+            # حذف تا زمانی تکرار می‌شود که زنجیره‌های یتیم کاملاً کنار گذاشته شوند
+            condition += f" AND NOT EXISTS (SELECT 1 FROM {stage} q WHERE q.{pcol} = s.{col})"
+            while True:
+                removed = _reject(cursor, table, reason, condition)
+                count(reason, removed)
+                if not removed:
+                    break
+        else:
+            count(reason, _reject(cursor, table, reason, condition))
+    return rejected
+
+
+def _insert_table(cursor, table: str, target_columns: Dict[str, bool],
+                  header: List[str]) -> Tuple[int, int]:
+    """درج ردیف‌های معتبر staging در جدول اصلی؛ برگرداندن (درج‌شده، تداخل)"""
+    target = _quote_ident(table)
+    stage = _quote_ident(_stage_name(table))
+    columns = ', '.join(_quote_ident(c) for c in target_columns if c in header)
+    cursor.execute(f"""
+        WITH inserted AS (
+            INSERT INTO {target} ({columns})
+            SELECT {columns} FROM {stage}
+            ON CONFLICT DO NOTHING
+            RETURNING id
+        ), rejected AS (
+            DELETE FROM {stage} s
+            WHERE NOT EXISTS (SELECT 1 FROM inserted i WHERE i.id = s.id)
+            RETURNING s.*
+        )
+        INSERT INTO {REJECTS_TABLE} (table_name, reason, row_data)
+        SELECT %s, 'unique_conflict', to_jsonb(rejected) FROM rejected
+    """, (table,))
+    conflicts = cursor.rowcount
+    cursor.execute(f"SELECT count(*) FROM {stage}")
+    return cursor.fetchone()[0], conflicts
+
+
+def reset_sequences(cursor, tables: List[str]):
+    """هم‌تراز کردن sequence ستون id با بیشترین مقدار موجود"""
+    for table in tables:
+        cursor.execute(f"""
+            SELECT setval(pg_get_serial_sequence(%s, 'id'),
+                          COALESCE((SELECT MAX(id) FROM {_quote_ident(table)}), 0) + 1, false)
+            WHERE pg_get_serial_sequence(%s, 'id') IS NOT NULL
+        """, (table, table))
+
+
+def _write_reject_report(cursor, report_dir: str) -> Optional[str]:
+    """نوشتن rejectها در فایل موقت (مسیر نهایی + PARTIAL_SUFFIX)؛ برگرداندن مسیر نهایی"""
+    cursor.execute(f"SELECT count(*) FROM {REJECTS_TABLE}")
+    if not cursor.fetchone()[0]:
+        return None
+    os.makedirs(report_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = os.path.join(report_dir, f'restore_rejects_{timestamp}.csv')
+    with open(path + PARTIAL_SUFFIX, 'wb') as fh:
+        cursor.copy_expert(
+            f"COPY (SELECT table_name, reason, row_data FROM {REJECTS_TABLE} ORDER BY id) "
+            f"TO STDOUT WITH (FORMAT csv, HEADER true)", fh)
+    return path
+
+
+def restore_from_zip(engine, zip_path: str, clear_tables: bool = False,
+                     report_dir: str = REPORT_DIR, progress: Optional[Callable] = None) -> Dict:
+    """
+    بازیابی کل پشتیبان در یک تراکنش
+
+    Args:
+        engine: موتور SQLAlchemy
+        zip_path: مسیر فایل ZIP پشتیبان
+        clear_tables: خالی کردن جداول موجود در پشتیبان قبل از بازیابی
+        report_dir: پوشه ذخیره گزارش ردیف‌های رد شده
+        progress: تابع اختیاری progress(done, total, message) پس از هر جدول
+
+    Returns:
+        دیکشنری شامل گزارش هر جدول، مسیر فایل گزارش و نمونه ردیف‌های رد شده
+
+    Raises:
+        RestoreError: برای پشتیبان نامعتبر یا خالی کردن جدولی که جدول بیرون از پشتیبان به آن
+            ارجاع می‌دهد؛ هر خطای دیتابیس باعث rollback کامل می‌شود
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        verify_checksums(zip_ref)
+        members = set(zip_ref.namelist())
+        tables = [t for t in BACKUP_TABLES if f'{t}.csv' in members]
+        if not tables:
+            raise RestoreError("No table files found in backup")
+        if clear_tables:
+            dependents = _outside_dependents(tables)
+            if dependents:
+                raise RestoreError(
+                    "Cannot clear tables referenced by tables missing from the backup: " +
+                    ', '.join(f'{child} -> {parent}' for child, parent in dependents) +
+                    ". Restore a backup that includes them or restore without clearing.")
+
+        report_path = None
+        conn = engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                CREATE TEMP TABLE {REJECTS_TABLE} (
+                    id bigserial PRIMARY KEY,
+                    table_name text NOT NULL,
+                    reason text NOT NULL,
+                    row_data jsonb
+                ) ON COMMIT DROP
+            """)
+            if clear_tables:
+                cursor.execute("TRUNCATE " + ', '.join(_quote_ident(t) for t in tables))
+
+            report = {}
+            for position, table in enumerate(tables):
+                if progress is not None:
+                    progress(position, len(tables), f'restoring {table}')
+                header = _read_header(zip_ref, f'{table}.csv')
+                target_columns = _target_columns(cursor, table)
+                if 'id' not in header:
+                    raise RestoreError(f"{table}.csv has no id column")
+                staged = _stage_table(cursor, zip_ref, table, header, target_columns)
+                rejected = _validate_table(cursor, table, target_columns,
+                                           check_existing=not clear_tables)
+                restored, conflicts = _insert_table(cursor, table, target_columns, header)
+                if conflicts:
+                    rejected['unique_conflict'] = conflicts
+                report[table] = {'staged': staged, 'restored': restored, 'rejected': rejected}
+                logger.info(f"Restore {table}: staged={staged}, restored={restored}, rejected={rejected}")
+
+            reset_sequences(cursor, tables)
+            for table in tables:
+                if table in TABLE_TAGS:
+                    publish_raw(cursor, table)
+
+            cursor.execute(f"""
+                SELECT table_name, reason, row_data::text FROM (
+                    SELECT *, row_number() OVER (PARTITION BY table_name ORDER BY id) AS n
+                    FROM {REJECTS_TABLE}
+                ) r WHERE n <= %s ORDER BY id
+            """, (SAMPLE_LIMIT,))
+            samples = {}
+            for table_name, reason, row_data in cursor.fetchall():
+                samples.setdefault(table_name, []).append({'reason': reason, 'row': row_data})
+
+            report_path = _write_reject_report(cursor, report_dir)
+            cursor.close()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            if report_path is not None:
+                os.remove(report_path + PARTIAL_SUFFIX)
+            raise
+        finally:
+            conn.close()
+
+    if report_path is not None:
+        # گزارش فقط برای بازیابی commit شده منتشر می‌شود
+        os.replace(report_path + PARTIAL_SUFFIX, report_path)
+    return {'tables': report, 'report_path': report_path, 'samples': samples}
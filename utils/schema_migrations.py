@@ -0,0 +1,258 @@
+"""
+اجرای نسخه‌دار مهاجرت‌های ساختار دیتابیس
+هر مهاجرت یک فایل migrations/versions/NNNN_name.py با متغیرهای revision و description،
+پرچم اختیاری transactional (پیش‌فرض True) و تابع upgrade(conn) است. نسخه‌های اعمال شده
+در جدول schema_migrations ثبت می‌شوند و اجرا با یک advisory lock انجام می‌شود تا دو
+پردازه هم‌زمان مهاجرت نکنند. مهاجرت‌های transactional=False با اتصال AUTOCOMMIT اجرا
+می‌شوند تا بتوانند ایندکس‌ها را با CREATE INDEX CONCURRENTLY بدون قفل کردن جدول بسازند.
+
+استفاده:
+    python migrate.py            # اعمال همه نسخه‌های معوق
+    python migrate.py status     # نمایش وضعیت
+"""
+
+import os
+import time
+import importlib.util
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import inspect, text
+from logging_config import get_logger
+
+logger = get_logger('app')
+
+MIGRATIONS_TABLE = 'schema_migrations'
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'migrations', 'versions')
+# کلید advisory lock مهاجرت‌ها (ثابت دلخواه)
+MIGRATION_LOCK_KEY = 72010401
+
+
+class MigrationError(Exception):
+    """خطای اجرای یک نسخه مهاجرت"""
+
+
+def load_revisions(directory: str = VERSIONS_DIR) -> List:
+    """
+    بارگذاری ماژول‌های مهاجرت به ترتیب نام فایل
+
+    Returns:
+        فهرست ماژول‌ها با revision، description، transactional و upgrade
+    """
+    revisions, seen = [], set()
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.py') or not filename[:4].isdigit():
+            continue
+        path = os.path.join(directory, filename)
+        spec = importlib.util.spec_from_file_location(f'schema_migration_{filename[:-3]}', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if module.revision in seen:
+            raise MigrationError(f"Duplicate revision {module.revision} in {filename}")
+        seen.add(module.revision)
+        module.transactional = getattr(module, 'transactional', True)
+        revisions.append(module)
+    return revisions
+
+
+def ensure_migrations_table(conn):
+    """ساخت جدول ثبت نسخه‌ها در صورت نبود"""
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            revision VARCHAR(32) PRIMARY KEY,
+            description VARCHAR(255),
+            applied_at TIMESTAMP NOT NULL,
+            duration_ms INTEGER
+        )
+    """))
+
+
+def applied_revisions(conn) -> Dict[str, datetime]:
+    """نسخه‌های اعمال شده و زمان اعمال آن‌ها"""
+    if not inspect(conn).has_table(MIGRATIONS_TABLE):
+        return {}
+    return {row.revision: row.applied_at for row in conn.execute(
+        text(f"SELECT revision, applied_at FROM {MIGRATIONS_TABLE}"))}
+
+
+def pending_revisions(engine, directory: str = VERSIONS_DIR) -> List:
+    """نسخه‌هایی که هنوز اعمال نشده‌اند"""
+    with engine.connect() as conn:
+        applied = applied_revisions(conn)
+    return [module for module in load_revisions(directory) if module.revision not in applied]
+
+
+def _record(conn, module, duration_ms: int):
+    conn.execute(text(f"""
+        INSERT INTO {MIGRATIONS_TABLE} (revision, description, applied_at, duration_ms)
+        VALUES (:revision, :description, :applied_at, :duration_ms)
+    """), {'revision': module.revision, 'description': getattr(module, 'description', ''),
+           'applied_at': datetime.utcnow(), 'duration_ms': duration_ms})
+
+
+def upgrade(engine, target: Optional[str] = None, directory: str = VERSIONS_DIR,
+            progress: Optional[Callable] = None) -> List[str]:
+    """
+    اعمال نسخه‌های معوق تا target (یا همه)
+
+    نسخه‌های transactional همراه با ثبتشان در یک تراکنش اجرا می‌شوند. نسخه‌های
+    غیرتراکنشی باید خودشان تکرارپذیر باشند (IF NOT EXISTS)، چون اگر وسط کار
+    متوقف شوند دوباره از ابتدا اجرا می‌شوند.
+
+    Args:
+        engine: engine دیتابیس
+        target: آخرین نسخه‌ای که باید اعمال شود
+        directory: پوشه فایل‌های مهاجرت
+        progress: تابع گزارش پیشرفت (current, total, message)
+
+    Returns:
+        نسخه‌های اعمال شده در این اجرا
+    """
+    report = progress or (lambda *args, **kwargs: None)
+    revisions = load_revisions(directory)
+    if target and target not in {module.revision for module in revisions}:
+        raise MigrationError(f"Unknown revision {target}")
+
+    postgres = engine.dialect.name == 'postgresql'
+    # قفل در سطح session روی اتصال جداگانه تا در طول مهاجرت‌های غیرتراکنشی هم بماند
+    lock_conn = engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+    done = []
+    try:
+        if postgres:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+        ensure_migrations_table(lock_conn)
+        applied = applied_revisions(lock_conn)
+        pending = [module for module in revisions if module.revision not in applied]
+        if target:
+            pending = [module for module in pending if module.revision <= target]
+
+        for number, module in enumerate(pending, start=1):
+            logger.info(f"Applying migration {module.revision}: {module.description}")
+            report(number - 1, len(pending), module.revision)
+            started = time.monotonic()
+            try:
+                if module.transactional:
+                    with engine.begin() as conn:
+                        module.upgrade(conn)
+                        _record(conn, module, int((time.monotonic() - started) * 1000))
+                else:
+                    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                        module.upgrade(conn)
+                        _record(conn, module, int((time.monotonic() - started) * 1000))
+            except Exception as e:
+                raise MigrationError(f"Migration {module.revision} failed: {e}") from e
+            done.append(module.revision)
+        report(len(pending), len(pending), 'done')
+    finally:
+        if postgres:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': MIGRATION_LOCK_KEY})
+        lock_conn.close()
+    if done:
+        logger.info(f"Applied migrations: {', '.join(done)}")
+    return done
+
+
+def migration_status(engine, directory: str = VERSIONS_DIR) -> List[Dict]:
+    """وضعیت همه نسخه‌ها برای نمایش (revision، description، applied_at)"""
+    with engine.connect() as conn:
+        applied = applied_revisions(conn)
+    return [{'revision': module.revision, 'description': module.description,
+             'applied_at': applied.get(module.revision)} for module in load_revisions(directory)]
+
+
+def warn_if_pending(engine):
+    """هشدار در لاگ اگر دیتابیس از کد عقب‌تر است (به جای create_all در شروع برنامه)"""
+    try:
+        pending = pending_revisions(engine)
+    except Exception as e:
+        logger.warning(f"Could not check schema migrations: {e}")
+        return
+    if pending:
+        logger.warning(f"Database schema is behind: pending migrations "
+                       f"{', '.join(module.revision for module in pending)}; run `python migrate.py`")
+
+
+# ----- ابزار مهاجرت‌ها -----
+
+def add_missing_columns(conn, metadata) -> List[str]:
+    """
+    افزودن ستون‌های مدل که در جدول‌های موجود نیستند (بدون NOT NULL)
+
+    Returns:
+        فهرست ستون‌های اضافه شده به شکل table.column
+    """
+    inspector = inspect(conn)
+    added = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            for foreign_key in column.foreign_keys:
+                ddl += f" REFERENCES {foreign_key.column.table.name} ({foreign_key.column.name})"
+                if foreign_key.ondelete:
+                    ddl += f" ON DELETE {foreign_key.ondelete}"
+            conn.execute(text(ddl))
+            added.append(f'{table.name}.{column.name}')
+            logger.info(f"Added column {table.name}.{column.name}")
+    return added
+
+
+def index_state(conn, name: str) -> Optional[bool]:
+    """
+    وضعیت یک ایندکس
+
+    Returns:
+        None اگر وجود ندارد، True اگر معتبر است و False اگر ساخت CONCURRENTLY قبلی
+        نیمه‌کاره مانده (INVALID)
+    """
+    if conn.dialect.name == 'sqlite':
+        return conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"),
+                            {'name': name}).scalar() and True
+    return conn.execute(text("""
+        SELECT i.indisvalid FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name AND c.relnamespace = 'public'::regnamespace
+    """), {'name': name}).scalar()
+
+
+def create_index_concurrently(conn, name: str, table: str, columns: str, unique: bool = False) -> bool:
+    """
+    ساخت ایندکس بدون قفل نوشتن روی جدول (اتصال باید AUTOCOMMIT باشد)
+
+    ایندکس INVALID باقی مانده از اجرای ناتمام قبلی ابتدا حذف می‌شود. جدول‌های
+    پارتیشن‌بندی شده CONCURRENTLY را پشتیبانی نمی‌کنند و ایندکسشان معمولی ساخته می‌شود.
+
+    Args:
+        conn: اتصال AUTOCOMMIT
+        name: نام ایندکس
+        table: نام جدول
+        columns: ستون‌ها یا عبارت‌های ایندکس
+        unique: ایندکس یکتا
+
+    Returns:
+        True اگر ایندکس ساخته شد، False اگر از قبل وجود داشت
+    """
+    state = index_state(conn, name)
+    if state:
+        return False
+    postgres = conn.dialect.name == 'postgresql'
+    concurrently = ''
+    if postgres:
+        if state is False:
+            logger.warning(f"Dropping invalid index {name} left by an interrupted build")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        partitioned = conn.execute(text(
+            "SELECT relkind = 'p' FROM pg_class WHERE relname = :table "
+            "AND relnamespace = 'public'::regnamespace"), {'table': table}).scalar()
+        concurrently = '' if partitioned else 'CONCURRENTLY '
+    started = time.monotonic()
+    conn.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX {concurrently}"
+                      f"{name} ON {table} ({columns})"))
+    logger.info(f"Created index {name} on {table} ({columns}) in {time.monotonic() - started:.1f}s")
+    return True
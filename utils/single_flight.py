@@ -0,0 +1,137 @@
+"""
+ادغام خواندن‌های هم‌زمان یکسان (single-flight)
+وقتی چند کاربر هم‌زمان یک دکمه را می‌زنند (مثلاً لینک یک دسته در پست کانال)، اولین فراخوانی
+هر کلید کوئری را اجرا می‌کند و فراخوانی‌های هم‌زمان دیگر با همان کلید منتظر همان نتیجه
+می‌مانند؛ برای هر موج فقط یک کوئری به دیتابیس می‌رسد. خطای فراخوانی اول به همه منتظرها
+برگردانده می‌شود. هر منتظر نسخه جدای نتیجه را می‌گیرد (مثل کش حافظه) تا تغییر آن در یک
+handler به بقیه نرسد. نتیجه پس از پایان نگه داشته نمی‌شود (کار کش خواندن است).
+
+نسبت فراخوانی‌های مشترک به کل برای هر متد در آمار کوئری‌ها نمایش داده می‌شود.
+"""
+
+import json
+import pickle
+import inspect
+import threading
+import functools
+from typing import Callable, Dict, List
+from logging_config import get_logger
+from utils.degraded_mode import served_stale, set_served_stale
+
+logger = get_logger('app')
+
+# گروه‌های ساخته شده در این پردازه برای آمار
+_groups: List['SingleFlight'] = []
+
+
+class _Call:
+    """یک فراخوانی در جریان و منتظرهای آن"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None  # نتیجه pickle شده برای منتظرها
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """گروه فراخوانی‌های در جریان بر اساس کلید"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[str, _Call] = {}
+        self.counts: Dict[str, Dict] = {}
+        _groups.append(self)
+
+    def do(self, key: str, func: Callable, method: str = ''):
+        """
+        اجرای func برای کلید، یا انتظار برای فراخوانی در جریان همان کلید
+
+        Args:
+            key: کلید فراخوانی (نام متد و آرگومان‌ها)
+            func: تابع بدون آرگومان
+            method: نام متد برای آمار
+
+        Returns:
+            نتیجه func (منتظرها هر کدام یک نسخه جدا)
+        """
+        with self.lock:
+            item = self.counts.setdefault(method, {'queries': 0, 'shared': 0, 'max_waiters': 0})
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = _Call()
+                item['queries'] += 1
+                leader = True
+            else:
+                call.waiters += 1
+                item['shared'] += 1
+                item['max_waiters'] = max(item['max_waiters'], call.waiters)
+                leader = False
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return pickle.loads(call.result)
+        try:
+            result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            if call.error is None and call.waiters:
+                try:
+                    call.result = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+                except Exception as e:
+                    call.error = e
+            call.done.set()
+        return result
+
+    def stats(self) -> List[Dict]:
+        """فراخوانی‌های اجرا شده و مشترک هر متد"""
+        with self.lock:
+            return [dict(item, method=method, calls=item['queries'] + item['shared'],
+                         ratio=item['shared'] / (item['queries'] + item['shared']))
+                    for method, item in sorted(self.counts.items()) if item['queries']]
+
+    def reset_stats(self):
+        with self.lock:
+            self.counts = {}
+
+
+def coalesced(func):
+    """
+    دکوراتور متدهای خواندنی Database؛ گروه از self.flight خوانده می‌شود (None یعنی بدون ادغام)
+
+    زیر cached قرار می‌گیرد تا فقط عدم برخوردهای کش ادغام شوند. اگر فراخوانی اول از نسخه ذخیره
+    شده حالت کاهش‌یافته پاسخ گرفته باشد، منتظرها هم همین را می‌بینند تا پاسخ در کش نماند.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        flight = getattr(self, 'flight', None)
+        if flight is None:
+            return func(self, *args, **kwargs)
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        values = tuple(bound.arguments.values())[1:]
+        key = f'{func.__name__}:{json.dumps(values, default=str)}'
+        result, stale = flight.do(key, lambda: (func(self, *values), served_stale()), method=func.__name__)
+        set_served_stale(stale)
+        return result
+    return wrapper
+
+
+def flight_snapshots() -> List[Dict]:
+    """آمار همه گروه‌های این پردازه"""
+    rows = []
+    for group in _groups:
+        rows.extend(group.stats())
+    return rows
+
+
+def reset_flight_stats():
+    for group in _groups:
+        group.reset_stats()
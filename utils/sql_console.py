@@ -0,0 +1,255 @@
+"""
+کنسول SQL پنل مدیریت
+هر کوئری در یک تراکنش فقط‌خواندنی با statement_timeout اجرا می‌شود و پس از آن rollback
+می‌شود. نتیجه با cursor سمت سرور دسته به دسته خوانده و در سقف ردیف بریده می‌شود.
+EXPLAIN (ANALYZE, BUFFERS) به صورت درخت گره‌ها با زمان اختصاصی هر گره برگردانده می‌شود
+تا گره‌های پرهزینه و تخمین‌های اشتباه planner برجسته شوند.
+"""
+
+import re
+import json
+import time
+from typing import Dict, Iterator, List, Optional
+from logging_config import get_logger
+
+logger = get_logger('webpanel')
+
+DEFAULT_TIMEOUT_MS = 10000
+MAX_TIMEOUT_MS = 60000
+DISPLAY_ROW_LIMIT = 500
+EXPORT_ROW_LIMIT = 100000
+FETCH_BATCH = 500
+HISTORY_SIZE = 50
+# سهم زمان اختصاصی گره از کل اجرا برای برجسته شدن
+HOT_NODE_SHARE = 0.2
+WARM_NODE_SHARE = 0.05
+# نسبت ردیف‌های واقعی به تخمینی که اشتباه planner شمرده می‌شود
+MISESTIMATE_FACTOR = 10
+
+FORBIDDEN_PREFIXES = ('drop', 'alter', 'truncate', 'delete', 'insert', 'update', 'create',
+                      'grant', 'revoke', 'vacuum', 'copy', 'call', 'do', 'set', 'reset',
+                      'begin', 'commit', 'rollback', 'lock')
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\$(\w*)\$.*?\$\1\$|--[^\n]*|/\*.*?\*/", re.S)
+
+
+class SqlConsoleError(Exception):
+    """کوئری نامعتبر یا خطای اجرای آن"""
+
+
+def check_query(sql: str) -> str:
+    """
+    بررسی کوئری پیش از اجرا
+
+    متن کوئری تغییر نمی‌کند (حروف و رشته‌ها همان‌طور اجرا می‌شوند)؛ فقط یک دستور مجاز است
+    و دستورهای تغییر داده یا ساختار رد می‌شوند. تراکنش فقط‌خواندنی مانع نهایی است.
+
+    Returns:
+        کوئری بدون فاصله‌ها و ; انتهایی
+    """
+    sql = (sql or '').strip().rstrip(';').strip()
+    if not sql:
+        raise SqlConsoleError('کوئری SQL خالی است.')
+    bare = _LITERALS.sub(' ', sql)
+    if ';' in bare:
+        raise SqlConsoleError('فقط یک دستور در هر اجرا مجاز است.')
+    words = bare.split()
+    if not words or words[0].lower() in FORBIDDEN_PREFIXES:
+        raise SqlConsoleError('کوئری‌های تغییر ساختار یا داده مجاز نیستند.')
+    return sql
+
+
+def clamp_timeout(value, default: int = DEFAULT_TIMEOUT_MS) -> int:
+    """محدود کردن statement_timeout (میلی‌ثانیه) به بازه مجاز"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(value, 100), MAX_TIMEOUT_MS)
+
+
+def _begin_read_only(conn, timeout_ms: int):
+    conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def _execute(conn, sql: str):
+    # no_parameters: متن خام به درایور می‌رسد و % و :name در کوئری تفسیر نمی‌شوند
+    return conn.execution_options(no_parameters=True, stream_results=True,
+                                  max_row_buffer=FETCH_BATCH).exec_driver_sql(sql)
+
+
+def run_query(engine, sql: str, timeout_ms: int = DEFAULT_TIMEOUT_MS,
+              max_rows: int = DISPLAY_ROW_LIMIT) -> Dict:
+    """
+    اجرای کوئری فقط‌خواندنی و خواندن حداکثر max_rows ردیف
+
+    Returns:
+        دیکشنری columns، rows، row_count، truncated و duration_ms
+    """
+    sql = check_query(sql)
+    started = time.monotonic()
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            _begin_read_only(conn, timeout_ms)
+            result = _execute(conn, sql)
+            columns = list(result.keys()) if result.returns_rows else []
+            rows, truncated = [], False
+            if result.returns_rows:
+                while len(rows) <= max_rows:
+                    batch = result.fetchmany(FETCH_BATCH)
+                    if not batch:
+                        break
+                    rows.extend(tuple(row) for row in batch)
+                truncated = len(rows) > max_rows
+                rows = rows[:max_rows]
+            result.close()
+        finally:
+            transaction.rollback()
+    return {'columns': columns, 'rows': rows, 'row_count': len(rows), 'truncated': truncated,
+            'duration_ms': (time.monotonic() - started) * 1000}
+
+
+def stream_query(engine, sql: str, timeout_ms: int = DEFAULT_TIMEOUT_MS,
+                 max_rows: int = EXPORT_ROW_LIMIT) -> Iterator:
+    """
+    تولید ردیف‌های کوئری برای خروجی CSV؛ اولین مقدار نام ستون‌هاست
+
+    اتصال تا پایان پیمایش باز می‌ماند و پس از max_rows ردیف بسته می‌شود.
+    """
+    sql = check_query(sql)
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            _begin_read_only(conn, timeout_ms)
+            result = _execute(conn, sql)
+            if not result.returns_rows:
+                return
+            yield list(result.keys())
+            sent = 0
+            while sent < max_rows:
+                batch = result.fetchmany(min(FETCH_BATCH, max_rows - sent))
+                if not batch:
+                    break
+                for row in batch:
+                    yield tuple(row)
+                sent += len(batch)
+            result.close()
+        finally:
+            transaction.rollback()
+
+
+def explain_query(engine, sql: str, timeout_ms: int = DEFAULT_TIMEOUT_MS, analyze: bool = True) -> Dict:
+    """
+    اجرای EXPLAIN (و در صورت analyze اجرای واقعی با BUFFERS) در تراکنش فقط‌خواندنی
+
+    Returns:
+        خروجی plan_tree به همراه duration_ms و analyze
+    """
+    sql = check_query(sql)
+    options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+    started = time.monotonic()
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            _begin_read_only(conn, timeout_ms)
+            raw = _execute(conn, f"EXPLAIN ({options}) {sql}").scalar()
+        finally:
+            transaction.rollback()
+    document = json.loads(raw) if isinstance(raw, str) else raw
+    result = plan_tree(document[0], analyze=analyze)
+    result['duration_ms'] = (time.monotonic() - started) * 1000
+    return result
+
+
+def _node_time(node: Dict, analyze: bool) -> float:
+    if analyze:
+        return node.get('Actual Total Time', 0) * node.get('Actual Loops', 1)
+    return node.get('Total Cost', 0)
+
+
+def plan_tree(document: Dict, analyze: bool = True) -> Dict:
+    """
+    تبدیل خروجی JSON دستور EXPLAIN به فهرست گره‌ها با عمق برای نمایش درختی
+
+    زمان اختصاصی هر گره (بدون فرزندان) و سهم آن از کل محاسبه و گره‌های پرهزینه
+    (hot/warm) و تخمین‌های اشتباه ردیف علامت‌گذاری می‌شوند. بدون ANALYZE به جای
+    زمان از cost استفاده می‌شود.
+
+    Returns:
+        دیکشنری nodes، planning_ms، execution_ms و analyze
+    """
+    root = document['Plan']
+    total = _node_time(root, analyze) or 1
+    nodes: List[Dict] = []
+
+    def visit(node: Dict, depth: int):
+        children = node.get('Plans', [])
+        inclusive = _node_time(node, analyze)
+        exclusive = max(inclusive - sum(_node_time(child, analyze) for child in children), 0)
+        share = exclusive / total
+        item = {
+            'depth': depth,
+            'node_type': node.get('Node Type'),
+            'relation': node.get('Relation Name'),
+            'alias': node.get('Alias'),
+            'index': node.get('Index Name'),
+            'join_type': node.get('Join Type'),
+            'condition': (node.get('Index Cond') or node.get('Hash Cond') or node.get('Merge Cond')
+                          or node.get('Join Filter')),
+            'filter': node.get('Filter'),
+            'sort_key': ', '.join(node.get('Sort Key', [])) or None,
+            'plan_rows': node.get('Plan Rows'),
+            'total_cost': node.get('Total Cost'),
+            'inclusive': inclusive,
+            'exclusive': exclusive,
+            'share': share,
+            'heat': 'hot' if share >= HOT_NODE_SHARE else 'warm' if share >= WARM_NODE_SHARE else None,
+        }
+        if analyze:
+            loops = node.get('Actual Loops', 1)
+            actual_rows = node.get('Actual Rows', 0) * loops
+            planned = (node.get('Plan Rows') or 0) * loops
+            ratio = max(actual_rows, 1) / max(planned, 1)
+            item.update({
+                'actual_rows': actual_rows,
+                'loops': loops,
+                'rows_removed': node.get('Rows Removed by Filter', 0) * loops,
+                'shared_hit': node.get('Shared Hit Blocks', 0),
+                'shared_read': node.get('Shared Read Blocks', 0),
+                'temp_written': node.get('Temp Written Blocks', 0),
+                'misestimate': ratio if ratio >= MISESTIMATE_FACTOR or ratio <= 1 / MISESTIMATE_FACTOR else None,
+            })
+        nodes.append(item)
+        for child in children:
+            visit(child, depth + 1)
+
+    visit(root, 0)
+    return {'nodes': nodes, 'analyze': analyze,
+            'planning_ms': document.get('Planning Time'),
+            'execution_ms': document.get('Execution Time')}
+
+
+def record_history(session, model, user_id: Optional[int], sql: str, mode: str,
+                   duration_ms: Optional[float] = None, rows: Optional[int] = None,
+                   truncated: bool = False, error: Optional[str] = None):
+    """
+    ثبت کوئری در تاریخچه کنسول و نگه داشتن فقط HISTORY_SIZE مورد آخر هر کاربر
+
+    Args:
+        session: session دیتابیس
+        model: مدل SqlQueryHistory
+        user_id: شناسه مدیر
+        sql: متن کوئری
+        mode: run، explain، analyze یا export
+    """
+    session.add(model(user_id=user_id, sql=sql, mode=mode,
+                      duration_ms=int(duration_ms) if duration_ms is not None else None,
+                      rows=rows, truncated=truncated, error=(error or None) and error[:1000]))
+    session.flush()
+    stale = session.query(model.id).filter(model.user_id == user_id) \
+        .order_by(model.id.desc()).offset(HISTORY_SIZE).subquery()
+    session.query(model).filter(model.id.in_(session.query(stale.c.id))) \
+        .delete(synchronize_session=False)
+    session.commit()
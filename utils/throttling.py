@@ -0,0 +1,126 @@
+"""
+محدودیت نرخ به‌روزرسانی‌های هر کاربر ربات (ضد flood)
+هر کاربر برای پیام‌ها و callback ها دو سطل توکن جدا دارد: هر به‌روزرسانی یک توکن مصرف می‌کند و
+توکن‌ها با نرخ ثابت تا سقف burst پر می‌شوند. ضربه تکراری روی همان دکمه همان پیام در پنجره
+DUPLICATE_WINDOW ثانیه بی‌صدا کنار گذاشته می‌شود و توکنی مصرف نمی‌کند. به‌روزرسانی‌های رد شده
+به handler (و دیتابیس) نمی‌رسند؛ middleware آن‌ها در handlers/middlewares.py است.
+هر SWEEP_INTERVAL ثانیه سطل‌های دوباره پر شده و ضربه‌های بیرون از پنجره حذف می‌شوند تا حافظه
+فقط کاربران فعال اخیر را نگه دارد.
+
+تعداد پذیرفته و رد شده هر نوع در آمار کوئری‌ها نمایش داده می‌شود.
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Hashable, List, Optional
+
+MESSAGE_RATE = float(os.environ.get('THROTTLE_MESSAGE_RATE', 1))
+MESSAGE_BURST = float(os.environ.get('THROTTLE_MESSAGE_BURST', 5))
+CALLBACK_RATE = float(os.environ.get('THROTTLE_CALLBACK_RATE', 2))
+CALLBACK_BURST = float(os.environ.get('THROTTLE_CALLBACK_BURST', 8))
+DUPLICATE_WINDOW = float(os.environ.get('THROTTLE_DUPLICATE_WINDOW', 1.5))
+# سطل‌های پر شده و ضربه‌های بیرون از پنجره تکرار در این فاصله (ثانیه) حذف می‌شوند
+SWEEP_INTERVAL = 10
+# سقف شمارنده کاربران رد شده (پرتکرارترین‌ها در آمار)
+MAX_TRACKED_USERS = 10000
+
+ALLOWED = 'allowed'
+THROTTLED = 'throttled'
+DUPLICATE = 'duplicate'
+
+# محدودکننده‌های ساخته شده در این پردازه برای آمار
+_limiters: List['Throttle'] = []
+
+
+class Throttle:
+    """سطل توکن هر کاربر و تشخیص ضربه‌های تکراری برای یک نوع به‌روزرسانی"""
+
+    def __init__(self, kind: str, rate: float, burst: float, duplicate_window: float = 0):
+        """
+        Args:
+            kind: نوع به‌روزرسانی در آمار (message یا callback)
+            rate: توکن‌های اضافه شده در هر ثانیه
+            burst: ظرفیت سطل (تعداد به‌روزرسانی پشت سر هم مجاز)
+            duplicate_window: پنجره کنار گذاشتن ضربه‌های تکراری (ثانیه، صفر یعنی بدون بررسی)
+        """
+        self.kind = kind
+        self.rate = rate
+        self.burst = burst
+        self.duplicate_window = duplicate_window
+        self.lock = threading.Lock()
+        self.buckets: Dict[int, list] = {}
+        self.recent: Dict[Hashable, float] = {}
+        self.counts = {ALLOWED: 0, THROTTLED: 0, DUPLICATE: 0}
+        self.users: Dict[int, int] = {}
+        self.swept_at = time.monotonic()
+        _limiters.append(self)
+
+    def check(self, user_id: int, fingerprint: Optional[Hashable] = None) -> str:
+        """
+        تصمیم درباره یک به‌روزرسانی کاربر
+
+        Args:
+            user_id: شناسه تلگرام کاربر
+            fingerprint: شناسه ضربه (پیام و داده دکمه) برای تشخیص تکرار
+
+        Returns:
+            ALLOWED، THROTTLED یا DUPLICATE
+        """
+        now = time.monotonic()
+        with self.lock:
+            if now - self.swept_at >= SWEEP_INTERVAL:
+                self._prune(now)
+            if fingerprint is not None and self.duplicate_window:
+                key = (user_id, fingerprint)
+                if now - self.recent.get(key, float('-inf')) < self.duplicate_window:
+                    return self._reject(user_id, DUPLICATE)
+                self.recent[key] = now
+            bucket = self.buckets.setdefault(user_id, [self.burst, now])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                return self._reject(user_id, THROTTLED)
+            bucket[0] -= 1
+            self.counts[ALLOWED] += 1
+            return ALLOWED
+
+    def _reject(self, user_id: int, reason: str) -> str:
+        self.counts[reason] += 1
+        self.users[user_id] = self.users.get(user_id, 0) + 1
+        return reason
+
+    def _prune(self, now: float):
+        self.swept_at = now
+        # سطلی که تا الان پر شده با سطل تازه فرقی ندارد
+        full_after = self.burst / self.rate if self.rate else float('inf')
+        self.buckets = {user_id: bucket for user_id, bucket in self.buckets.items()
+                        if now - bucket[1] < full_after}
+        self.recent = {key: at for key, at in self.recent.items() if now - at < self.duplicate_window}
+        if len(self.users) > MAX_TRACKED_USERS:
+            self.users = {}
+
+    def stats(self) -> Dict:
+        """تعداد پذیرفته و رد شده و پرتکرارترین کاربران رد شده"""
+        with self.lock:
+            rejected = self.counts[THROTTLED] + self.counts[DUPLICATE]
+            total = self.counts[ALLOWED] + rejected
+            top = sorted(self.users.items(), key=lambda item: item[1], reverse=True)[:5]
+            return dict(self.counts, kind=self.kind, rate=self.rate, burst=self.burst, total=total,
+                        rejected_ratio=rejected / total if total else 0, tracked=len(self.buckets),
+                        top_users=[{'user_id': user_id, 'rejected': count} for user_id, count in top])
+
+    def reset_stats(self):
+        with self.lock:
+            self.counts = {ALLOWED: 0, THROTTLED: 0, DUPLICATE: 0}
+            self.users = {}
+
+
+def throttle_snapshots() -> List[Dict]:
+    """آمار همه محدودکننده‌های این پردازه"""
+    return [limiter.stats() for limiter in _limiters]
+
+
+def reset_throttle_stats():
+    for limiter in _limiters:
+        limiter.reset_stats()